@@ -3,6 +3,16 @@ from flask_cors import CORS
 from config import Config
 from models import db
 from routes import register_routes
+from cli import register_commands
+from database import configure_engine
+import query_stats
+import metrics
+import pagination
+import projection
+import services.score_service  # noqa: F401  registers the score summary maintenance hook
+import services.material_service  # noqa: F401  registers the material hierarchy maintenance hook
+import services.notification_service  # noqa: F401  registers the deadline reminder job
+from services import scheduler
 import os
 
 def create_app(config_class=Config):
@@ -21,35 +31,31 @@ def create_app(config_class=Config):
         'https://lls-app-git-main-arunvs830s-projects.vercel.app' # Preview deployments
     ]
     
-    CORS(app, origins=origins, supports_credentials=True)
+    CORS(app, origins=origins, supports_credentials=True, expose_headers=pagination.EXPOSED_HEADERS)
 
     db.init_app(app)
+    with app.app_context():
+        configure_engine(app, db.engine)
     
+    # Per-request query counts, DB time and N+1 detection
+    query_stats.init_app(app)
+
+    # Prometheus latency, size and DB-time metrics served at /metrics
+    metrics.init_app(app)
+
+    # Bad cursors and unknown ?fields= on list endpoints become 400s
+    pagination.init_app(app)
+    projection.init_app(app)
+
+    # Periodic jobs (deadline reminders), started in each worker on its first request
+    scheduler.init_app(app)
+
     # Register API routes
     register_routes(app)
 
-    with app.app_context():
-        db.create_all()
-        
-        # Auto-create admin if not exists (for deployments with no shell access)
-        from models import Admin
-        from werkzeug.security import generate_password_hash
-        
-        try:
-            if not Admin.query.filter_by(username="admin").first():
-                print("👤 Auto-creating default 'admin' user...")
-                admin = Admin(
-                    username="admin",
-                    email="admin@lls.edu",
-                    password_hash=generate_password_hash("admin123"),
-                    full_name="System Administrator",
-                    phone="0000000000"
-                )
-                db.session.add(admin)
-                db.session.commit()
-                print("✅ Default admin created: admin / admin123")
-        except Exception as e:
-            print(f"⚠️ Admin creation skipped: {e}")
+    # Schema changes and the default admin are applied explicitly with
+    # `flask db upgrade` and `flask create-admin`, never at worker boot.
+    register_commands(app)
 
     return app
 
@@ -57,6 +63,12 @@ def create_app(config_class=Config):
 app = create_app()
 
 if __name__ == '__main__':
+    # Local development server: bring the schema up to date before serving
+    import migrations
+    from cli import ensure_default_admin
+    with app.app_context():
+        migrations.upgrade(db.engine)
+        ensure_default_admin()
     port = int(os.environ.get('PORT', 5001))
     debug = os.getenv('FLASK_ENV', 'development') != 'production'
     app.run(debug=debug, port=port)
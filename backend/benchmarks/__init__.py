@@ -0,0 +1,2 @@
+# Benchmark scripts. Run from the backend directory, e.g.:
+#   python -m benchmarks.bench_startup
@@ -0,0 +1,61 @@
+"""
+Admin report benchmark: staff and course reports at institution scale.
+
+Seeds a database with 500 courses (10 programs x 5 semesters x 10 courses)
+and 200 staff, then times /api/admin/staff-report and
+/api/admin/course-report with and without filters. Query counts should not
+depend on the size of the institution.
+
+    python -m benchmarks.bench_admin_reports                  # seed + time
+    python -m benchmarks.bench_admin_reports --no-seed --runs 20
+    python -m benchmarks.bench_admin_reports --compare benchmarks/results/admin-reports-abc1234.json
+"""
+import argparse
+import os
+
+from benchmarks.bench_endpoints import make_app, print_report, time_endpoint
+from benchmarks.common import RESULTS_DIR, load_results, write_results
+from benchmarks.seed_scale import seed
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(RESULTS_DIR, 'admin-scale.db')}"
+
+SCALE = dict(programs=10, semesters=5, courses_per_term=10, staff=200, students=5000,
+             materials_per_course=4, mcqs_per_course=10, assignments_per_course=6, notifications_per_student=0)
+
+REPORTS = {
+    'admin_staff_report': '/api/admin/staff-report',
+    'admin_course_report': '/api/admin/course-report',
+    'admin_course_report_year': '/api/admin/course-report?academic_year_id=1',
+    'admin_course_report_program': '/api/admin/course-report?program_id=3&semester_id=2',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--no-seed', action='store_true', help='Reuse the existing database')
+    parser.add_argument('--students', type=int, default=SCALE['students'])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    args = parser.parse_args()
+
+    if args.database_url.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len('sqlite:///'):])), exist_ok=True)
+    app = make_app(args.database_url)
+    from models import db
+    with app.app_context():
+        if not args.no_seed:
+            seed(db.engine, **dict(SCALE, students=args.students))
+        client = app.test_client()
+        endpoints = {name: time_endpoint(client, path, args.runs) for name, path in REPORTS.items()}
+
+    result = {'endpoints': endpoints, 'parameters': dict(SCALE, students=args.students, runs=args.runs)}
+    baseline = load_results(args.compare) if args.compare else None
+    print_report(result, baseline)
+    path = write_results('admin-reports', result, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == '__main__':
+    main()
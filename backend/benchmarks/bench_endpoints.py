@@ -0,0 +1,136 @@
+"""
+Endpoint benchmark: times the hot read endpoints against a scale database.
+
+Requests go through the Flask test client (no network, no gunicorn), so the
+numbers measure query and serialization cost only. Each endpoint reports
+latency percentiles, SQL statement count and response size.
+
+    python -m benchmarks.seed_scale --students 10000          # once
+    python -m benchmarks.bench_endpoints --runs 20
+    python -m benchmarks.bench_endpoints --compare benchmarks/results/endpoints-abc1234.json
+
+Use --seed-students N to (re)seed the target database before timing.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import load_results, percent_change, write_results
+from benchmarks.seed_scale import DEFAULT_DATABASE_URL, sample_ids, seed
+from query_stats import count_queries
+
+# name -> path template, formatted with the ids from seed_scale.sample_ids()
+ENDPOINTS = {
+    'staff_reports': '/api/reports/staff/{staff_id}',
+    'admin_staff_report': '/api/admin/staff-report',
+    'admin_course_report': '/api/admin/course-report',
+    'student_course_results': '/api/student/{student_id}/course-results',
+    'student_dashboard': '/api/student/{student_id}/dashboard',
+    'student_courses': '/api/student/{student_id}/courses',
+    'course_quiz': '/api/courses/{course_id}/quiz?student_id={student_id}',
+    'material_quiz': '/api/materials/{material_id}/quiz?student_id={student_id}',
+    'students_list': '/api/students',
+    'mcqs_list': '/api/mcqs',
+    'submissions_list': '/api/submissions',
+    'study_materials_list': '/api/study-materials',
+}
+
+
+def make_app(database_url):
+    from app import create_app
+    from config import Config
+    from database import default_profile, engine_options
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        DB_POOL_PROFILE = default_profile(database_url)
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(DB_POOL_PROFILE, database_url)
+        QUERY_STATS_LOG = False
+
+    return create_app(BenchConfig)
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def time_endpoint(client, path, runs, warmup=1):
+    for _ in range(warmup):
+        client.get(path)
+    latencies, queries = [], []
+    status, size = None, 0
+    for _ in range(runs):
+        with count_queries() as stats:
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(stats.count)
+        status, size = response.status_code, len(response.get_data())
+    return {
+        'path': path,
+        'status': status,
+        'runs': runs,
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(_percentile(latencies, 0.5), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'max_ms': round(max(latencies), 2),
+        'queries': max(queries),
+        'response_bytes': size,
+    }
+
+
+def run(app, runs, only=None):
+    from models import db
+    with app.app_context():
+        ids = sample_ids(db.engine)
+        client = app.test_client()
+        results = {}
+        for name, template in ENDPOINTS.items():
+            if only and name not in only:
+                continue
+            results[name] = time_endpoint(client, template.format(**ids), runs)
+    return {'sample_ids': ids, 'endpoints': results}
+
+
+def print_report(result, baseline=None):
+    previous = baseline['endpoints'] if baseline else {}
+    if baseline:
+        print(f"Compared with {baseline['git_revision']} ({baseline['recorded_at']})")
+    print(f"{'endpoint':<24} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'bytes':>10}")
+    for name, r in result['endpoints'].items():
+        line = f"{name:<24} {r['status']:>6} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['queries']:8} {r['response_bytes']:10}"
+        old = previous.get(name)
+        if old:
+            change = percent_change(old['p50_ms'], r['p50_ms'])
+            if change is not None:
+                line += f"  p50 {change:+.1f}%  queries {old['queries']}->{r['queries']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--seed-students', type=int, help='Reseed the database with this many students first')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS), help='Only time these endpoints')
+    parser.add_argument('--output', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    if args.seed_students:
+        from models import db
+        with app.app_context():
+            seed(db.engine, students=args.seed_students)
+
+    result = run(app, args.runs, args.endpoint)
+    result['parameters'] = {'runs': args.runs, 'seed_students': args.seed_students}
+    baseline = load_results(args.compare) if args.compare else None
+    print_report(result, baseline)
+    path = write_results('endpoints', result, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == '__main__':
+    main()
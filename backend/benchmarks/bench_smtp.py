@@ -0,0 +1,116 @@
+"""
+SMTP throughput benchmark: a session per message vs. pooled, pipelined sessions.
+
+Sends the same batch of notification emails to a local SMTP sink
+(benchmarks/smtp_sink.py) that simulates a network round-trip time, first
+the way emails used to be sent (connect, EHLO, login, send, QUIT for every
+message) and then through services.smtp_pool.SMTPPool, and reports messages
+per second and connections opened. TLS is not simulated, so real gains are
+larger: each new session also pays a STARTTLS handshake.
+
+    python -m benchmarks.bench_smtp --messages 200 --latency-ms 20
+    python -m benchmarks.bench_smtp --compare benchmarks/results/smtp-abc1234.json
+"""
+import argparse
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import load_results, percent_change, write_results
+from benchmarks.smtp_sink import SMTPSink
+from services.email_outbox import build_message
+from services.smtp_pool import SMTPPool
+
+SENDER = 'noreply@lls.edu'
+
+
+def _messages(count):
+    return [
+        (f'student{i}@test.com', build_message(
+            SENDER, f'student{i}@test.com', f'New Study Material: Unit {i}',
+            'A new study material has been uploaded.', '<p>A new study material has been uploaded.</p>',
+        ).as_string())
+        for i in range(count)
+    ]
+
+
+def send_per_message(address, messages, concurrency):
+    """The old path: one SMTP session per email."""
+    def send(item):
+        to_email, data = item
+        with smtplib.SMTP(*address) as server:
+            server.login('lls', 'secret')
+            server.sendmail(SENDER, [to_email], data)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, messages))
+
+
+def send_pooled(address, messages, concurrency):
+    pool = SMTPPool(*address, username='lls', password='secret', use_tls=False, max_sessions=concurrency)
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(lambda item: pool.send(SENDER, [item[0]], item[1]), messages))
+    pool.close()
+
+
+# name -> (send function, whether the sink advertises PIPELINING)
+MODES = {
+    'per_message': (send_per_message, True),
+    'pooled': (send_pooled, False),
+    'pooled_pipelined': (send_pooled, True),
+}
+
+
+def run(count, latency_ms, concurrency):
+    messages = _messages(count)
+    results = {}
+    for mode, (send, pipelining) in MODES.items():
+        with SMTPSink(latency=latency_ms / 1000, pipelining=pipelining) as sink:
+            start = time.perf_counter()
+            send(sink.address, messages, concurrency)
+            elapsed = time.perf_counter() - start
+            assert len(sink.messages) == count, f'{mode}: sink received {len(sink.messages)} of {count}'
+            results[mode] = {
+                'seconds': round(elapsed, 3),
+                'messages_per_second': round(count / elapsed, 1),
+                'connections': sink.connections,
+                'commands': len(sink.commands),
+            }
+    return {'modes': results}
+
+
+def print_report(result, baseline=None):
+    previous = baseline['modes'] if baseline else {}
+    if baseline:
+        print(f"Compared with {baseline['git_revision']} ({baseline['recorded_at']})")
+    print(f"{'mode':<22} {'msg/s':>9} {'conns':>6} {'commands':>9}")
+    for mode, r in result['modes'].items():
+        line = f"{mode:<22} {r['messages_per_second']:9.1f} {r['connections']:6} {r['commands']:9}"
+        old = previous.get(mode)
+        if old:
+            change = percent_change(old['messages_per_second'], r['messages_per_second'])
+            if change is not None:
+                line += f"  msg/s {change:+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated network round-trip time')
+    parser.add_argument('--concurrency', type=int, default=2, help='Sender threads and pooled sessions')
+    parser.add_argument('--output', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    args = parser.parse_args()
+
+    result = run(args.messages, args.latency_ms, args.concurrency)
+    result['parameters'] = {'messages': args.messages, 'latency_ms': args.latency_ms,
+                            'concurrency': args.concurrency}
+    baseline = load_results(args.compare) if args.compare else None
+    print_report(result, baseline)
+    path = write_results('smtp', result, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == '__main__':
+    main()
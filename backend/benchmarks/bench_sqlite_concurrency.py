@@ -0,0 +1,135 @@
+"""
+SQLite write-concurrency benchmark: default journal vs. the sqlite-single-node PRAGMAs.
+
+Simulates a class submitting a quiz at once: each writer thread repeatedly
+inserts an MCQAttempt plus a Notification in one transaction (the shape of
+submit_attempt and the notification inserts) while reader threads keep
+loading quiz questions.
+
+    python -m benchmarks.bench_sqlite_concurrency --writers 16 --readers 4 --seconds 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import write_results
+from database import install_sqlite_pragmas, sqlite_pragmas
+from models import db, MCQ, MCQAttempt, Notification
+
+
+def _make_engine(path, tuned):
+    if tuned:
+        engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 5})
+        install_sqlite_pragmas(engine, sqlite_pragmas())
+    else:
+        # What the app used before: rollback journal, pysqlite's default 5 s lock wait
+        engine = create_engine(f'sqlite:///{path}')
+    return engine
+
+
+def _prepare(engine, questions):
+    db.metadata.create_all(engine, tables=[MCQ.__table__, MCQAttempt.__table__, Notification.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(MCQ.__table__), [
+            {'question_text': f'Q{i}', 'option_a': 'a', 'option_b': 'b', 'correct_answer': 'A', 'course_id': 1}
+            for i in range(questions)
+        ])
+
+
+def run_case(tuned, writers, readers, seconds, questions):
+    tmpdir = tempfile.mkdtemp(prefix='lls-sqlite-bench-')
+    path = os.path.join(tmpdir, 'bench.db')
+    engine = _make_engine(path, tuned)
+    _prepare(engine, questions)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {'writes': 0, 'reads': 0, 'locked_errors': 0, 'write_latency': []}
+
+    def writer(student_id):
+        writes, latencies, errors = 0, [], 0
+        mcq_id = 0
+        while not stop.is_set():
+            mcq_id = mcq_id % questions + 1
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(MCQAttempt.__table__).values(
+                        student_id=student_id, mcq_id=mcq_id, selected_answer='A', is_correct=True))
+                    conn.execute(insert(Notification.__table__).values(
+                        user_type='student', user_id=student_id, title='Quiz', message='Answer recorded'))
+                writes += 1
+                latencies.append(time.perf_counter() - start)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                errors += 1
+        with lock:
+            totals['writes'] += writes
+            totals['locked_errors'] += errors
+            totals['write_latency'].extend(latencies)
+
+    def reader():
+        reads = 0
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(MCQ.__table__).where(MCQ.course_id == 1)).all()
+                    conn.execute(select(func.count()).select_from(MCQAttempt.__table__)).scalar()
+                reads += 1
+            except OperationalError:
+                pass
+        with lock:
+            totals['reads'] += reads
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    latencies = sorted(totals['write_latency'])
+    p = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 2) if latencies else None
+    return {
+        'mode': 'wal-pragmas' if tuned else 'default-journal',
+        'writes_per_second': round(totals['writes'] / seconds, 1),
+        'reads_per_second': round(totals['reads'] / seconds, 1),
+        'locked_errors': totals['locked_errors'],
+        'write_p50_ms': p(0.5),
+        'write_p99_ms': p(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    cases = [run_case(tuned, args.writers, args.readers, args.seconds, args.questions) for tuned in (False, True)]
+    for case in cases:
+        print(f"{case['mode']:>16}: {case['writes_per_second']:8.1f} writes/s  {case['reads_per_second']:8.1f} reads/s  "
+              f"p50 {case['write_p50_ms']} ms  p99 {case['write_p99_ms']} ms  locked errors {case['locked_errors']}")
+    if cases[0]['writes_per_second']:
+        print(f"Write throughput: {cases[1]['writes_per_second'] / cases[0]['writes_per_second']:.1f}x")
+
+    path = write_results('sqlite-concurrency', {'parameters': vars(args), 'cases': cases}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Startup-time benchmark: per-module import cost and boot phases.
+
+Each run starts a fresh interpreter, so numbers reflect a cold worker.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --compare benchmarks/results/startup-abc1234.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, load_results, percent_change, write_results
+
+# Executed in a child interpreter: times the import of the app module and the
+# pre-fork preparation separately and reports them on stdout.
+PHASES_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+from boot import prepare_for_fork
+prepare_for_fork(app.app)
+t2 = time.perf_counter()
+print(json.dumps({'import_app_ms': (t1 - t0) * 1000, 'prepare_for_fork_ms': (t2 - t1) * 1000}))
+"""
+
+
+def _child_env():
+    env = dict(os.environ)
+    # Never touch a real database while benchmarking
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    return env
+
+
+def import_profile():
+    """Return {module: (self_us, cumulative_us)} from one `python -X importtime` run."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def boot_phases():
+    proc = subprocess.run(
+        [sys.executable, '-c', PHASES_SCRIPT],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs):
+    samples = [import_profile() for _ in range(runs)]
+    phases = [boot_phases() for _ in range(runs)]
+
+    modules = []
+    for name in samples[0]:
+        self_us = [s[name][0] for s in samples if name in s]
+        cumulative_us = [s[name][1] for s in samples if name in s]
+        modules.append({
+            'module': name,
+            'self_ms': round(statistics.median(self_us) / 1000, 2),
+            'cumulative_ms': round(statistics.median(cumulative_us) / 1000, 2),
+        })
+    modules.sort(key=lambda m: m['cumulative_ms'], reverse=True)
+
+    return {
+        'runs': runs,
+        'phases': {
+            key: round(statistics.median(p[key] for p in phases), 2)
+            for key in phases[0]
+        },
+        'modules': modules,
+    }
+
+
+def print_report(result, top, baseline=None):
+    previous = {}
+    if baseline:
+        previous = {m['module']: m for m in baseline['modules']}
+        print(f"Compared with {baseline['git_revision']} ({baseline['recorded_at']})")
+
+    for phase, value in result['phases'].items():
+        line = f"{phase:>22}: {value:8.1f} ms"
+        if baseline and phase in baseline['phases']:
+            line += f"  ({percent_change(baseline['phases'][phase], value):+.1f}%)"
+        print(line)
+
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for m in result['modules'][:top]:
+        line = f"{m['cumulative_ms']:14.1f} {m['self_ms']:9.1f}  {m['module']}"
+        old = previous.get(m['module'])
+        if old:
+            change = percent_change(old['cumulative_ms'], m['cumulative_ms'])
+            if change is not None:
+                line += f"  ({change:+.1f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=25, help='Modules to print')
+    parser.add_argument('--output', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    baseline = load_results(args.compare) if args.compare else None
+    print_report(result, args.top, baseline)
+    path = write_results('startup', result, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import subprocess
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def write_results(name, payload, output=None):
+    """Store a benchmark run as JSON, tagged with the current commit."""
+    payload = {
+        'benchmark': name,
+        'git_revision': git_revision(),
+        'recorded_at': datetime.utcnow().isoformat(),
+        **payload,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{payload['git_revision']}.json")
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def percent_change(old, new):
+    if not old:
+        return None
+    return round((new - old) / old * 100, 1)
@@ -0,0 +1,374 @@
+"""
+Synthetic data at production scale for benchmarking.
+
+Builds a fresh schema (all migrations) and fills it with programs, courses,
+staff, a study-material tree per course, MCQ banks, assignments, students,
+enrollments, MCQ attempts, submissions with evaluations, and notifications.
+Rows are generated lazily and inserted in executemany batches with explicit
+primary keys, and the secondary indexes are dropped during the load and
+rebuilt afterwards, so 100k students and ~10M attempts load in minutes.
+
+    python -m benchmarks.seed_scale --students 10000
+    python -m benchmarks.seed_scale --students 100000 --database-url postgresql://localhost/lls_bench
+
+THE TARGET DATABASE IS WIPED. The default target is a SQLite file under
+benchmarks/results/.
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, select, text
+from werkzeug.security import generate_password_hash
+
+import cache
+import migrations
+from benchmarks.common import RESULTS_DIR
+from migrations import ops
+from migrations.m0002_secondary_indexes import _indexes as secondary_indexes
+from models import (
+    db, AcademicYear, Assignment, Course, Evaluation, MCQ, MCQAttempt, Notification, Program, Semester,
+    Staff, StaffCourse, Student, StudentCourse, StudyMaterial, Submission,
+)
+from services.material_service import rebuild_hierarchy
+from services.score_service import rebuild_scores
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(RESULTS_DIR, 'scale.db')}"
+
+DEFAULTS = {
+    'students': 10000,
+    'programs': 5,
+    'semesters': 3,
+    'courses_per_term': 4,
+    'staff': 60,
+    'materials_per_course': 8,
+    'children_per_material': 2,
+    'mcqs_per_course': 40,
+    'assignments_per_course': 6,
+    'attempt_rate': 0.6,
+    'submission_rate': 0.7,
+    'evaluation_rate': 0.6,
+    'notifications_per_student': 20,
+    'batch_size': 5000,
+    'seed': 42,
+}
+
+NOTIFICATION_TYPES = ['new_assignment', 'new_material', 'assignment_graded', 'deadline_reminder']
+
+
+class ScaleLayout:
+    """Deterministic id layout, so rows can reference each other without reading ids back."""
+
+    def __init__(self, params):
+        self.p = params
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.courses = []          # (course_id, program_id, semester_id)
+        for program_id in range(1, params['programs'] + 1):
+            for semester_id in range(1, params['semesters'] + 1):
+                for _ in range(params['courses_per_term']):
+                    self.courses.append((len(self.courses) + 1, program_id, semester_id))
+        self.courses_by_term = {}
+        for course_id, program_id, semester_id in self.courses:
+            self.courses_by_term.setdefault((program_id, semester_id), []).append(course_id)
+
+        per_root = 1 + params['children_per_material']
+        self.materials_per_course = params['materials_per_course'] * per_root
+
+    def staff_for(self, course_id):
+        return (course_id - 1) % self.p['staff'] + 1
+
+    def term_for(self, student_id):
+        index = student_id - 1
+        program_id = index % self.p['programs'] + 1
+        semester_id = (index // self.p['programs']) % self.p['semesters'] + 1
+        return program_id, semester_id
+
+    def material_ids(self, course_id):
+        first = (course_id - 1) * self.materials_per_course + 1
+        return range(first, first + self.materials_per_course)
+
+    def mcq_ids(self, course_id):
+        first = (course_id - 1) * self.p['mcqs_per_course'] + 1
+        return range(first, first + self.p['mcqs_per_course'])
+
+    def assignment_ids(self, course_id):
+        first = (course_id - 1) * self.p['assignments_per_course'] + 1
+        return range(first, first + self.p['assignments_per_course'])
+
+    def assignment_max_marks(self, assignment_id):
+        return 10 if assignment_id % 2 else 20
+
+
+# -- row generators --------------------------------------------------------
+
+def _structure_rows(layout, password_hash):
+    p = layout.p
+    yield AcademicYear, [{'id': 1, 'year_name': '2025-2026', 'start_date': date(2025, 9, 1), 'end_date': date(2026, 8, 31)}]
+    yield Semester, [{'id': i, 'semester_name': f'Sem {i}', 'semester_number': i} for i in range(1, p['semesters'] + 1)]
+    yield Program, [
+        {'id': i, 'program_name': f'Program {i}', 'program_code': f'P{i:02d}'} for i in range(1, p['programs'] + 1)
+    ]
+    yield Course, [
+        {'id': cid, 'course_code': f'P{pid:02d}-S{sid}-{cid:04d}', 'course_name': f'German {cid}',
+         'program_id': pid, 'semester_id': sid}
+        for cid, pid, sid in layout.courses
+    ]
+    yield Staff, [
+        {'id': i, 'staff_code': f'STF{i:04d}', 'username': f'staff{i}', 'email': f'staff{i}@bench.lls',
+         'password_hash': password_hash, 'full_name': f'Staff {i}'}
+        for i in range(1, p['staff'] + 1)
+    ]
+    yield StaffCourse, [
+        {'id': cid, 'staff_id': layout.staff_for(cid), 'course_id': cid, 'academic_year_id': 1,
+         'assigned_date': date(2025, 9, 1)}
+        for cid, _, _ in layout.courses
+    ]
+
+
+def _material_rows(layout):
+    per_root = 1 + layout.p['children_per_material']
+    for course_id, _, _ in layout.courses:
+        ids = list(layout.material_ids(course_id))
+        for offset, material_id in enumerate(ids):
+            root = ids[offset - offset % per_root]
+            yield {
+                'id': material_id, 'title': f'Unit {material_id}', 'file_type': 'pdf',
+                'staff_course_id': course_id, 'parent_id': None if material_id == root else root,
+                'upload_date': layout.now - timedelta(days=120 - offset),
+            }
+
+
+def _mcq_rows(layout, rng):
+    for course_id, _, _ in layout.courses:
+        materials = list(layout.material_ids(course_id))
+        for n, mcq_id in enumerate(layout.mcq_ids(course_id)):
+            yield {
+                'id': mcq_id, 'question_text': f'Question {mcq_id}?', 'option_a': 'der', 'option_b': 'die',
+                'option_c': 'das', 'option_d': 'den', 'correct_answer': rng.choice('ABCD'), 'marks': 1,
+                'course_id': course_id, 'staff_id': layout.staff_for(course_id),
+                # Half the bank is attached to materials, the rest is the course-level quiz
+                'study_material_id': materials[n % len(materials)] if n % 2 else None,
+            }
+
+
+def _assignment_rows(layout):
+    for course_id, _, _ in layout.courses:
+        materials = list(layout.material_ids(course_id))
+        for n, assignment_id in enumerate(layout.assignment_ids(course_id)):
+            yield {
+                'id': assignment_id, 'title': f'Assignment {assignment_id}', 'course_id': course_id,
+                'staff_id': layout.staff_for(course_id), 'study_material_id': materials[n % len(materials)],
+                # Spread due dates from a month ago to a month ahead
+                'due_date': layout.now + timedelta(days=-30 + n * 60 // max(1, layout.p['assignments_per_course'])),
+                'max_marks': layout.assignment_max_marks(assignment_id),
+            }
+
+
+def _student_rows(layout, password_hash):
+    for student_id in range(1, layout.p['students'] + 1):
+        program_id, semester_id = layout.term_for(student_id)
+        yield {
+            'id': student_id, 'student_code': f'STU{student_id:06d}', 'username': f'student{student_id}',
+            'email': f'student{student_id}@bench.lls', 'password_hash': password_hash,
+            'full_name': f'Student {student_id}', 'program_id': program_id, 'semester_id': semester_id,
+            'enrollment_date': date(2025, 9, 1),
+        }
+
+
+def _enrollment_rows(layout):
+    ids = itertools.count(1)
+    for student_id in range(1, layout.p['students'] + 1):
+        for course_id in layout.courses_by_term[layout.term_for(student_id)]:
+            yield {'id': next(ids), 'student_id': student_id, 'course_id': course_id, 'status': 'active'}
+
+
+def _attempt_rows(layout, rng, correct_answers):
+    ids = itertools.count(1)
+    rate = layout.p['attempt_rate']
+    for student_id in range(1, layout.p['students'] + 1):
+        for course_id in layout.courses_by_term[layout.term_for(student_id)]:
+            for mcq_id in layout.mcq_ids(course_id):
+                if rng.random() >= rate:
+                    continue
+                correct = rng.random() < 0.65
+                answer = correct_answers[mcq_id] if correct else rng.choice('ABCD'.replace(correct_answers[mcq_id], ''))
+                yield {
+                    'id': next(ids), 'student_id': student_id, 'mcq_id': mcq_id, 'selected_answer': answer,
+                    'is_correct': correct, 'attempted_at': layout.now - timedelta(minutes=rng.randrange(60 * 24 * 90)),
+                }
+
+
+def _submission_rows(layout, rng, evaluations):
+    """Submissions; evaluation rows for the graded ones are appended to ``evaluations``."""
+    ids = itertools.count(1)
+    p = layout.p
+    for student_id in range(1, p['students'] + 1):
+        for course_id in layout.courses_by_term[layout.term_for(student_id)]:
+            for assignment_id in layout.assignment_ids(course_id):
+                if rng.random() >= p['submission_rate']:
+                    continue
+                submission_id = next(ids)
+                graded = rng.random() < p['evaluation_rate']
+                yield {
+                    'id': submission_id, 'assignment_id': assignment_id, 'student_id': student_id,
+                    'submission_text': 'Antwort', 'submitted_at': layout.now - timedelta(days=rng.randrange(60)),
+                    'status': 'evaluated' if graded else 'submitted',
+                }
+                if graded:
+                    evaluations.append({
+                        'id': submission_id, 'submission_id': submission_id, 'staff_id': layout.staff_for(course_id),
+                        'marks_obtained': rng.randint(0, layout.assignment_max_marks(assignment_id)),
+                        'feedback': 'Gut', 'status': 'evaluated',
+                    })
+
+
+def _notification_rows(layout, rng):
+    ids = itertools.count(1)
+    for student_id in range(1, layout.p['students'] + 1):
+        for n in range(layout.p['notifications_per_student']):
+            kind = NOTIFICATION_TYPES[n % len(NOTIFICATION_TYPES)]
+            yield {
+                'id': next(ids), 'user_type': 'student', 'user_id': student_id, 'title': kind.replace('_', ' ').title(),
+                'message': 'Synthetic notification', 'notification_type': kind, 'reference_type': 'assignment',
+                'reference_id': rng.randint(1, len(layout.courses) * layout.p['assignments_per_course']),
+                'is_read': rng.random() < 0.7, 'email_sent': False,
+                'created_at': layout.now - timedelta(hours=rng.randrange(24 * 90)),
+            }
+
+
+# -- loading ---------------------------------------------------------------
+
+def _insert(conn, model, rows, batch_size):
+    table = model.__table__
+    inserted = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return inserted
+        conn.execute(table.insert(), batch)
+        inserted += len(batch)
+
+
+def _reset_sequences(conn, models):
+    if conn.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+def seed(engine, log=print, **overrides):
+    """Wipe ``engine``'s database and load the synthetic data set. Returns row counts."""
+    params = dict(DEFAULTS, **overrides)
+    rng = random.Random(params['seed'])
+    layout = ScaleLayout(params)
+    password_hash = generate_password_hash('bench123', method='pbkdf2:sha256:1000')
+    batch = params['batch_size']
+
+    db.metadata.drop_all(engine)
+    migrations.schema_version.drop(engine, checkfirst=True)
+    migrations.upgrade(engine, log=lambda msg: None)
+
+    # Loading into unindexed tables and indexing once is much faster than index maintenance per row
+    indexes = list(secondary_indexes())
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for index in indexes:
+            ops.drop_index(conn, index)
+
+    counts = {}
+    timings = {}
+
+    def load(model, rows):
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA synchronous=OFF')
+            counts[model.__tablename__] = _insert(conn, model, rows, batch)
+        timings[model.__tablename__] = round(time.perf_counter() - start, 2)
+        log(f'  {model.__tablename__:<16} {counts[model.__tablename__]:>10,} rows  {timings[model.__tablename__]:7.2f}s')
+
+    log(f"Seeding {params['students']:,} students into {engine.url.render_as_string(hide_password=True)}")
+    for model, rows in _structure_rows(layout, password_hash):
+        load(model, rows)
+    load(StudyMaterial, _material_rows(layout))
+    mcq_rows = list(_mcq_rows(layout, rng))
+    correct_answers = {row['id']: row['correct_answer'] for row in mcq_rows}
+    load(MCQ, mcq_rows)
+    load(Assignment, _assignment_rows(layout))
+    load(Student, _student_rows(layout, password_hash))
+    load(StudentCourse, _enrollment_rows(layout))
+    load(MCQAttempt, _attempt_rows(layout, rng, correct_answers))
+    evaluations = []
+    load(Submission, _submission_rows(layout, rng, evaluations))
+    load(Evaluation, evaluations)
+    load(Notification, _notification_rows(layout, rng))
+
+    # Core inserts bypass the ORM hooks that maintain the score summaries and the material hierarchy
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        rebuild_scores(conn)
+    log(f'  {"score summaries":<16} {"rebuilt":>10} {round(time.perf_counter() - start, 2):7.2f}s')
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        rebuild_hierarchy(conn)
+    log(f'  {"material tree":<16} {"rebuilt":>10} {round(time.perf_counter() - start, 2):7.2f}s')
+
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for index in indexes:
+            ops.create_index(conn, index)
+        _reset_sequences(conn, [
+            AcademicYear, Semester, Program, Course, Staff, StaffCourse, StudyMaterial, MCQ, Assignment,
+            Student, StudentCourse, MCQAttempt, Submission, Evaluation, Notification,
+        ])
+        if conn.dialect.name in ('sqlite', 'postgresql'):
+            conn.exec_driver_sql('ANALYZE')
+    log(f'  {"indexes":<16} {len(indexes):>10} built {round(time.perf_counter() - start, 2):7.2f}s')
+    # Version stamps restarted with the new database; cached payloads are stale
+    cache.clear_all()
+    return counts
+
+
+def sample_ids(engine):
+    """Representative ids for the endpoint benchmark (the busiest staff member, course and student)."""
+    with engine.connect() as conn:
+        staff_id = conn.execute(
+            select(StaffCourse.staff_id).group_by(StaffCourse.staff_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        course_id = conn.execute(
+            select(StudentCourse.course_id).group_by(StudentCourse.course_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        student_id = conn.execute(
+            select(StudentCourse.student_id).where(StudentCourse.course_id == course_id).limit(1)
+        ).scalar()
+        material_id = conn.execute(
+            select(MCQ.study_material_id).where(MCQ.course_id == course_id, MCQ.study_material_id.isnot(None)).limit(1)
+        ).scalar()
+    return {'staff_id': staff_id, 'course_id': course_id, 'student_id': student_id, 'material_id': material_id}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = vars(parser.parse_args())
+    url = args.pop('database_url')
+
+    if url.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(os.path.abspath(url[len('sqlite:///'):])), exist_ok=True)
+    engine = create_engine(url)
+    start = time.perf_counter()
+    counts = seed(engine, **args)
+    print(f'Done: {sum(counts.values()):,} rows in {time.perf_counter() - start:.1f}s')
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
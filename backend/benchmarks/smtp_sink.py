@@ -0,0 +1,171 @@
+"""
+A local SMTP sink: accepts and discards mail, for benchmarks and tests.
+
+Speaks enough ESMTP for smtplib (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT) and advertises PIPELINING. ``latency`` simulates the
+network: replies are held back that long whenever the sink has answered
+everything the client sent and must wait for more, i.e. once per round
+trip, so pipelined commands share one delay as they would on a real link.
+
+    with SMTPSink(latency=0.02) as sink:
+        smtplib.SMTP(*sink.address).sendmail(...)
+        sink.messages   # [(mail_from, [rcpt, ...], data), ...]
+"""
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.buffer = b''
+        self.pending = []
+        self.sent_on_connection = 0
+        self.server.sink._connected()
+
+    def reply(self, line):
+        self.pending.append(line)
+
+    def flush(self):
+        if self.pending:
+            if self.server.sink.latency:
+                time.sleep(self.server.sink.latency)
+            self.request.sendall(''.join(f'{line}\r\n' for line in self.pending).encode())
+            self.pending = []
+
+    def readline(self):
+        while b'\n' not in self.buffer:
+            self.flush()
+            chunk = self.request.recv(65536)
+            if not chunk:
+                raise ConnectionError
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return line.rstrip(b'\r').decode('utf-8', 'replace')
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 sink ESMTP')
+        mail_from, rcpts = None, []
+        try:
+            while True:
+                line = self.readline()
+                verb, _, arg = line.partition(' ')
+                verb = verb.upper()
+                sink.commands.append(verb)
+                if verb in ('EHLO', 'HELO'):
+                    extensions = ['AUTH PLAIN LOGIN'] + (['PIPELINING'] if sink.pipelining else [])
+                    lines = ['sink'] + extensions
+                    for i, ext in enumerate(lines):
+                        self.reply(f"250{'-' if i < len(lines) - 1 else ' '}{ext}")
+                elif verb == 'AUTH':
+                    if arg.upper().startswith('LOGIN'):
+                        parts = arg.split()
+                        if len(parts) < 2:
+                            self.reply('334 VXNlcm5hbWU6')
+                            self.readline()
+                        self.reply('334 UGFzc3dvcmQ6')
+                        self.readline()
+                    self.reply('235 Authentication successful')
+                elif verb == 'MAIL':
+                    mail_from, rcpts = arg.partition(':')[2].strip('<> '), []
+                    self.reply('250 OK')
+                elif verb == 'RCPT':
+                    rcpt = arg.partition(':')[2].strip('<> ')
+                    if rcpt in sink.reject:
+                        self.reply('550 No such user')
+                    else:
+                        rcpts.append(rcpt)
+                        self.reply('250 OK')
+                elif verb == 'DATA':
+                    if mail_from is None or not rcpts:
+                        self.reply('503 Bad sequence of commands')
+                        continue
+                    self.reply('354 End data with <CR><LF>.<CR><LF>')
+                    lines = []
+                    while True:
+                        data_line = self.readline()
+                        if data_line == '.':
+                            break
+                        lines.append(data_line[1:] if data_line.startswith('..') else data_line)
+                    sink._received(mail_from, rcpts, '\r\n'.join(lines))
+                    mail_from, rcpts = None, []
+                    self.sent_on_connection += 1
+                    self.reply('250 OK queued')
+                    if sink.drop_after and self.sent_on_connection >= sink.drop_after:
+                        self.flush()
+                        return
+                elif verb == 'RSET':
+                    mail_from, rcpts = None, []
+                    self.reply('250 OK')
+                elif verb == 'NOOP':
+                    self.reply('250 OK')
+                elif verb == 'QUIT':
+                    self.reply('221 Bye')
+                    self.flush()
+                    return
+                else:
+                    self.reply('502 Command not implemented')
+        except (ConnectionError, OSError):
+            return
+
+    def finish(self):
+        self.server.sink._disconnected()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Threaded SMTP server on localhost. ``reject``: recipients answered with 550;
+    ``drop_after``: close each connection after that many messages."""
+
+    def __init__(self, latency=0.0, pipelining=True, reject=(), drop_after=None):
+        self.latency = latency
+        self.pipelining = pipelining
+        self.reject = set(reject)
+        self.drop_after = drop_after
+        self.messages = []
+        self.commands = []
+        self.connections = 0
+        self.open_connections = 0
+        self.max_open_connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def _connected(self):
+        with self._lock:
+            self.connections += 1
+            self.open_connections += 1
+            self.max_open_connections = max(self.max_open_connections, self.open_connections)
+
+    def _disconnected(self):
+        with self._lock:
+            self.open_connections -= 1
+
+    def _received(self, mail_from, rcpts, data):
+        with self._lock:
+            self.messages.append((mail_from, rcpts, data))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name='smtp-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
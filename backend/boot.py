@@ -0,0 +1,44 @@
+"""
+Pre-fork boot helpers.
+
+With gunicorn's ``preload_app`` the app is imported once in the master and
+workers are forked from it. Doing the expensive one-time work in the master
+(mapper configuration, dialect initialisation) means every worker starts
+ready to serve, and ``gc.freeze()`` keeps those objects out of the garbage
+collector so their pages stay shared copy-on-write instead of being touched
+(and copied) by each worker's first collection.
+"""
+import gc
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from models import db
+
+
+def prepare_for_fork(app):
+    """Finish all lazy initialisation in the master process, then freeze the heap."""
+    configure_mappers()
+
+    with app.app_context():
+        engine = db.engine
+        # The first connection runs dialect initialisation (server version,
+        # isolation level, etc.); later connections reuse the result.
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        # Sockets must never be shared between processes: close the warm-up
+        # connection so each worker opens its own.
+        engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+
+
+def reset_after_fork(app):
+    """Make sure a forked worker does not reuse connections opened by its parent."""
+    with app.app_context():
+        db.engine.dispose(close=False)
+    from services.email_outbox import dispatcher
+    from services.scheduler import scheduler
+    dispatcher.reset_after_fork()
+    scheduler.reset_after_fork()
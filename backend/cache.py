@@ -0,0 +1,255 @@
+"""
+Versioned payload cache.
+
+Derived read payloads (e.g. the answer-free question list of a quiz) are
+cached per worker process and tagged with the versions of the *scopes*
+they depend on, strings such as ``course:12``. Versions live in the ``cache_version`` table so
+every worker sees the same value; they are bumped from an ``after_flush``
+hook inside the transaction that changes the underlying rows, so a new
+version becomes visible together with the rows it describes and a rolled-back
+write bumps nothing. The bump runs in a savepoint and is retried once; if it
+still fails the write goes ahead and, once it has committed, the process
+drops its own cached payloads of those scopes and bumps them in a
+transaction of its own. A reader therefore pays one primary-key lookup per
+request and rebuilds only after a write committed.
+
+Models opt in with ``invalidates()`` (a model may have several rules, one
+per cache that depends on it):
+
+    invalidates(MCQ, lambda mcq: scopes('course', 'course_id', mcq))
+
+Scopes in use:
+
+- ``course:<id>``         course content: the course row, its MCQs and assignments
+- ``course-scores:<id>``  enrollments and any student's scores in the course
+- ``student:<id>``        the student row, their enrollments and their scores
+- ``staff:<id>``          the staff member's course allocations
+- ``students``            any student row (names shown in staff reports)
+- ``admin-reports:<table>`` any row of a table the admin staff/course reports aggregate
+
+Score changes are bumped by services/score_service.py, which already knows
+the (student, course) pairs a flush touched. Bulk
+``Query.update()``/``Query.delete()`` bypass the unit of work and must
+call ``bump_scopes()`` themselves.
+
+Every cache reports hits, misses and evictions to the metrics registry
+(``lls_cache_requests_total``, ``lls_cache_evictions_total``) and its size
+at scrape time (``lls_cache_entries``).
+"""
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from metrics import registry as metrics
+from models import db, CacheVersion
+
+logger = logging.getLogger('lls.cache')
+
+# Tries at bumping a flush's scopes before the write goes ahead without
+BUMP_ATTEMPTS = 2
+
+_rules = {}
+_caches = weakref.WeakSet()
+
+
+def invalidates(model, scopes_for):
+    """Register ``scopes_for(instance)`` -> scopes to bump when ``model`` rows change."""
+    _rules.setdefault(model, []).append(scopes_for)
+
+
+def scopes(prefix, attribute, instance):
+    """``prefix:<value>`` for the current and the previous value of ``attribute``.
+
+    The previous value matters when a row moves, e.g. an MCQ re-assigned to
+    another course invalidates both courses.
+    """
+    state = inspect(instance)
+    values = {getattr(instance, attribute)}
+    history = state.attrs[attribute].history
+    values.update(history.deleted or ())
+    return {f'{prefix}:{value}' for value in values if value is not None}
+
+
+def bump_versions(connection, scope_names):
+    """Increment the version of every scope, creating missing rows."""
+    table = CacheVersion.__table__
+    dialect = connection.dialect.name
+    # Sorted so concurrent writers lock rows in the same order
+    names = sorted(scope_names)
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values([{'scope': name, 'version': 1} for name in names])
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.scope], set_={'version': table.c.version + 1})
+        connection.execute(stmt)
+        return
+    for name in names:
+        result = connection.execute(update(table).where(table.c.scope == name).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(scope=name, version=1))
+
+
+def bump_scopes(session, scope_names):
+    """Bump ``scope_names`` inside ``session``'s transaction; they commit or roll back with it."""
+    if not scope_names:
+        return
+    session.info.setdefault('cache_bumped', set()).update(scope_names)
+    connection = session.connection()
+    for attempt in range(1, BUMP_ATTEMPTS + 1):
+        try:
+            with connection.begin_nested():
+                bump_versions(connection, scope_names)
+            return
+        except SQLAlchemyError as e:
+            logger.warning('Cache version bump failed (attempt %d of %d): %s', attempt, BUMP_ATTEMPTS, e)
+    # Let the write commit; its scopes are dealt with after the commit
+    session.info.setdefault('cache_unbumped', set()).update(scope_names)
+    session.info['cache_bump_engine'] = connection.engine
+
+
+def uncommitted_scopes(session):
+    """Scopes ``session`` has bumped in its current, not yet committed transaction."""
+    return session.info.get('cache_bumped', ())
+
+
+def discard_scopes(scope_names):
+    """Drop this process's cached payloads that depend on any of ``scope_names``."""
+    for cache in list(_caches):
+        cache.discard(scope_names)
+
+
+def current_versions(scope_names):
+    """Version tuple for ``scope_names`` (0 for scopes never bumped), in one query."""
+    rows = dict(db.session.execute(
+        select(CacheVersion.scope, CacheVersion.version).where(CacheVersion.scope.in_(scope_names))
+    ).all())
+    return tuple(rows.get(name, 0) for name in scope_names)
+
+
+def clear_all():
+    """Empty every cache, e.g. after the database was replaced underneath the process."""
+    for cache in list(_caches):
+        cache.clear()
+
+
+def collect_metrics():
+    """Scrape-time sizes of every cache, for the metrics registry."""
+    values = []
+    for cache in sorted(_caches, key=lambda c: c.name):
+        labels = (('cache', cache.name),)
+        values.append(('lls_cache_entries', labels, len(cache)))
+        values.append(('lls_cache_max_entries', labels, cache.maxsize))
+    return values
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_changed_scopes(session, flush_context):
+    if not _rules:
+        return
+    changed = set()
+    for instance in chain(session.new, session.deleted, session.dirty):
+        rules = _rules.get(type(instance))
+        if not rules:
+            continue
+        if instance in session.dirty and not session.is_modified(instance, include_collections=False):
+            continue
+        for rule in rules:
+            changed.update(rule(instance))
+    bump_scopes(session, changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _settle_committed_scopes(session):
+    session.info.pop('cache_bumped', None)
+    names = session.info.pop('cache_unbumped', None)
+    engine = session.info.pop('cache_bump_engine', None)
+    if not names:
+        return
+    discard_scopes(names)
+    try:
+        with engine.begin() as connection:
+            bump_versions(connection, names)
+    except SQLAlchemyError:
+        # Other workers keep their payloads of these scopes until the scopes are next bumped
+        logger.exception('Failed to bump cache versions for %s', sorted(names))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_scopes(session):
+    for key in ('cache_bumped', 'cache_unbumped', 'cache_bump_engine'):
+        session.info.pop(key, None)
+
+
+class VersionedCache:
+    """Thread-safe LRU of ``key -> (version, value, expires_at)``, bounded to ``maxsize`` entries."""
+
+    def __init__(self, name, maxsize=512):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._labels = {result: (('cache', name), ('result', result)) for result in ('hit', 'miss')}
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version or (entry[2] is not None and datetime.utcnow() >= entry[2]):
+                hit = None
+            else:
+                self._data.move_to_end(key)
+                hit = entry[1]
+        metrics.inc('lls_cache_requests_total', self._labels['miss' if hit is None else 'hit'])
+        return hit
+
+    def set(self, key, version, value, expires_at=None):
+        evicted = 0
+        with self._lock:
+            self._data[key] = (version, value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.inc('lls_cache_evictions_total', (('cache', self.name),), evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, scope_names):
+        """Drop the entries built from any of ``scope_names``."""
+        scope_names = set(scope_names)
+        with self._lock:
+            for key in [k for k, entry in self._data.items() if not scope_names.isdisjoint(entry[0][0])]:
+                del self._data[key]
+
+    def get_or_build(self, key, scope_names, build, expires=None):
+        """Return the cached value for ``key``, rebuilding it if any of its scopes moved on.
+
+        ``expires(value)`` may return a UTC datetime after which the value is
+        stale regardless of writes (e.g. the next due date it depends on).
+        """
+        scope_names = tuple(scope_names)
+        if not set(scope_names).isdisjoint(uncommitted_scopes(db.session)):
+            # This request changed a scope it has not committed yet: the
+            # payload would show uncommitted rows, so it is not cached
+            return build()
+        version = (scope_names, current_versions(scope_names))
+        value = self.get(key, version)
+        if value is None:
+            value = build()
+            self.set(key, version, value, expires(value) if expires else None)
+        return value
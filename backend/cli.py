@@ -0,0 +1,152 @@
+"""
+Flask CLI commands for database operations.
+
+    flask --app app db upgrade            # apply pending migrations
+    flask --app app db downgrade 1        # revert down to revision 1
+    flask --app app db current
+    flask --app app db history
+    flask --app app create-admin          # one-shot default admin bootstrap
+    flask --app app scores rebuild        # recompute the course score summaries
+    flask --app app materials rebuild-hierarchy   # backfill the study material closure table
+    flask --app app email drain           # deliver every queued email that is due
+    flask --app app email retry-dead      # re-queue dead-lettered emails
+    flask --app app reminders send        # create today's deadline reminders now
+"""
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash
+
+import migrations
+from models import db, Admin
+
+db_cli = AppGroup('db', help='Schema migration commands.')
+scores_cli = AppGroup('scores', help='Course score summary commands.')
+materials_cli = AppGroup('materials', help='Study material commands.')
+email_cli = AppGroup('email', help='Email outbox commands.')
+reminders_cli = AppGroup('reminders', help='Deadline reminder commands.')
+
+
+@db_cli.command('upgrade')
+@click.option('--revision', type=int, default=None, help='Stop at this revision (default: latest).')
+def upgrade_command(revision):
+    """Apply pending migrations."""
+    applied = migrations.upgrade(db.engine, target=revision, log=click.echo)
+    if not applied:
+        click.echo('Database is up to date.')
+    click.echo(f'Current revision: {migrations.current_revision(db.engine)}')
+
+
+@db_cli.command('downgrade')
+@click.argument('revision', type=int, required=False)
+def downgrade_command(revision):
+    """Revert migrations newer than REVISION (default: one step back)."""
+    current = migrations.current_revision(db.engine)
+    target = current - 1 if revision is None else revision
+    try:
+        migrations.downgrade(db.engine, target=target, log=click.echo)
+    except migrations.MigrationError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Current revision: {migrations.current_revision(db.engine)}')
+
+
+@db_cli.command('current')
+def current_command():
+    """Show the applied revision and the latest available one."""
+    click.echo(f'Current revision: {migrations.current_revision(db.engine)}')
+    click.echo(f'Head revision:    {migrations.head_revision()}')
+
+
+@db_cli.command('history')
+def history_command():
+    """List all migrations and whether they are applied."""
+    applied = set(migrations.applied_revisions(db.engine))
+    for migration in migrations.load_migrations():
+        mark = 'x' if migration.revision in applied else ' '
+        click.echo(f'[{mark}] {migration.revision:04d}  {migration.description}')
+
+
+@scores_cli.command('rebuild')
+@click.option('--course-id', type=int, multiple=True, help='Only rebuild these courses (repeatable).')
+def rebuild_scores_command(course_id):
+    """Recompute the course score summaries from the source tables."""
+    from services.score_service import rebuild_scores
+    with db.engine.begin() as conn:
+        courses = rebuild_scores(conn, list(course_id) or None)
+    click.echo(f'Rebuilt score summaries for {len(courses)} course(s).')
+
+
+@materials_cli.command('rebuild-hierarchy')
+def rebuild_hierarchy_command():
+    """Recompute the study material closure table from parent_id."""
+    from services.material_service import rebuild_hierarchy
+    with db.engine.begin() as conn:
+        count = rebuild_hierarchy(conn)
+    click.echo(f'Indexed the hierarchy of {count} study material(s).')
+
+
+@email_cli.command('drain')
+def drain_email_command():
+    """Deliver every queued email that is due."""
+    from services.email_outbox import drain, mail_configured
+    if not mail_configured(current_app.config):
+        raise click.ClickException('MAIL_USERNAME and MAIL_PASSWORD are not configured.')
+    outcome = drain()
+    click.echo(f"Sent {outcome['sent']}, will retry {outcome['retry']}, dead-lettered {outcome['dead']}.")
+
+
+@email_cli.command('retry-dead')
+def retry_dead_email_command():
+    """Re-queue dead-lettered emails with a fresh attempt budget."""
+    from services.email_outbox import retry_dead
+    click.echo(f'Re-queued {retry_dead()} email(s).')
+
+
+@reminders_cli.command('send')
+@click.option('--window-hours', type=int, default=None,
+              help='Remind about assignments due within this many hours (default: DEADLINE_REMINDER_WINDOW_HOURS).')
+def send_reminders_command(window_hours):
+    """Remind students who have not submitted assignments due soon (once per assignment per day)."""
+    from datetime import timedelta
+    from services.notification_service import send_deadline_reminders
+    window = timedelta(hours=window_hours) if window_hours is not None else None
+    click.echo(f'Created {send_deadline_reminders(window=window)} deadline reminder(s).')
+
+
+def ensure_default_admin(username='admin', email='admin@lls.edu', password='admin123'):
+    """Create the default admin account if it does not exist. Returns True if created."""
+    if Admin.query.filter_by(username=username).first():
+        return False
+    admin = Admin(
+        username=username,
+        email=email,
+        password_hash=generate_password_hash(password),
+        full_name="System Administrator",
+        phone="0000000000"
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+
+@click.command('create-admin')
+@click.option('--username', default='admin')
+@click.option('--email', default='admin@lls.edu')
+@click.option('--password', default=lambda: os.environ.get('ADMIN_PASSWORD', 'admin123'))
+def create_admin_command(username, email, password):
+    """Create the default admin user if it is missing."""
+    if ensure_default_admin(username, email, password):
+        click.echo(f"✅ Admin user '{username}' created.")
+    else:
+        click.echo(f"✅ Admin user '{username}' already exists.")
+
+
+def register_commands(app):
+    app.cli.add_command(db_cli)
+    app.cli.add_command(scores_cli)
+    app.cli.add_command(materials_cli)
+    app.cli.add_command(email_cli)
+    app.cli.add_command(reminders_cli)
+    app.cli.add_command(create_admin_command)
@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv
+from database import default_profile, engine_options, sqlite_pragmas
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,6 +14,16 @@ class Config:
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = database_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool profile: direct | pgbouncer-transaction | sqlite-single-node
+    DB_POOL_PROFILE = os.environ.get('DB_POOL_PROFILE') or default_profile(database_url)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DB_POOL_PROFILE, database_url)
+    # Applied on every SQLite connection when the sqlite-single-node profile is active
+    SQLITE_PRAGMAS = sqlite_pragmas()
+
+    # Shared secret for /api/internal/* and /metrics (header X-Internal-Token);
+    # unset = closed, except in debug and testing
+    INTERNAL_API_TOKEN = os.environ.get('INTERNAL_API_TOKEN') or ''
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max upload size
     
@@ -23,6 +34,34 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME') or ''
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD') or ''
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@lls.edu'
+
+    # Email outbox delivery (services/email_outbox.py): sender threads per
+    # process, attempts before a message is dead-lettered, retry backoff and
+    # messages per second per SMTP provider ("smtp.gmail.com=2,smtp.sendgrid.net=20")
+    EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS') or 2)
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS') or 6)
+    EMAIL_RETRY_BASE_SECONDS = float(os.environ.get('EMAIL_RETRY_BASE_SECONDS') or 30)
+    EMAIL_RETRY_MAX_SECONDS = float(os.environ.get('EMAIL_RETRY_MAX_SECONDS') or 3600)
+    EMAIL_RATE_LIMIT = float(os.environ.get('EMAIL_RATE_LIMIT') or 5)
+    EMAIL_PROVIDER_RATE_LIMITS = {
+        host.strip(): float(rate)
+        for host, _, rate in (item.partition('=') for item in os.environ.get('EMAIL_PROVIDER_RATE_LIMITS', '').split(','))
+        if host.strip() and rate
+    }
+    # Pooled SMTP sessions per process (services/smtp_pool.py): how many may be
+    # open at once, messages sent through one before it is replaced, and how
+    # long one may sit idle before it is closed rather than reused
+    EMAIL_SMTP_SESSIONS = int(os.environ.get('EMAIL_SMTP_SESSIONS') or 2)
+    EMAIL_SMTP_SESSION_MESSAGES = int(os.environ.get('EMAIL_SMTP_SESSION_MESSAGES') or 100)
+    EMAIL_SMTP_IDLE_SECONDS = float(os.environ.get('EMAIL_SMTP_IDLE_SECONDS') or 60)
+
+    # Periodic jobs (services/scheduler.py), run by one web worker per interval.
+    # Opt-in: `flask reminders send` (e.g. from cron) covers deployments that
+    # leave it off. Deadline reminders go to students who have not submitted an
+    # assignment due within the window; an interval of 0 disables the job.
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'false').lower() in ['true', '1', 'yes']
+    DEADLINE_REMINDER_INTERVAL_SECONDS = int(os.environ.get('DEADLINE_REMINDER_INTERVAL_SECONDS') or 3600)
+    DEADLINE_REMINDER_WINDOW_HOURS = int(os.environ.get('DEADLINE_REMINDER_WINDOW_HOURS') or 72)
     
     # App settings
     APP_NAME = 'LLS - Learning Management System'
@@ -0,0 +1,163 @@
+"""
+Database engine profiles and connection-pool statistics.
+
+The profile is chosen with the DB_POOL_PROFILE environment variable:
+
+- ``direct``: app connects straight to PostgreSQL. Bounded QueuePool with
+  pre-ping (survives managed-Postgres idle disconnects), recycle and
+  overflow limits.
+- ``pgbouncer-transaction``: PgBouncer in transaction mode does the pooling,
+  so the app uses NullPool and disables server-side prepared statements,
+  which do not survive a server connection switch.
+- ``sqlite-single-node``: small deployments on a local SQLite file. WAL,
+  busy-timeout and cache PRAGMAs are applied to every connection.
+
+If DB_POOL_PROFILE is unset, SQLite URLs get ``sqlite-single-node`` and
+everything else gets ``direct``.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+PROFILES = ('direct', 'pgbouncer-transaction', 'sqlite-single-node')
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_time_total += waited
+                if waited > self.wait_time_max:
+                    self.wait_time_max = waited
+
+
+def default_profile(database_uri):
+    return 'sqlite-single-node' if database_uri.startswith('sqlite') else 'direct'
+
+
+def engine_options(profile, database_uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for a pool profile."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE '{profile}'. Expected one of: {', '.join(PROFILES)}")
+
+    if profile == 'direct':
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+            # Reuse the most recently returned connection so idle ones can time out server-side
+            'pool_use_lifo': True,
+        }
+
+    if profile == 'pgbouncer-transaction':
+        options = {'poolclass': NullPool}
+        driver = make_url(database_uri).drivername
+        if driver == 'postgresql+psycopg':
+            # psycopg 3 prepares statements after a few executions by default
+            options['connect_args'] = {'prepare_threshold': None}
+        elif driver == 'postgresql+asyncpg':
+            options['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+        return options
+
+    # sqlite-single-node: keep Flask-SQLAlchemy's pool defaults (StaticPool for
+    # in-memory databases) and let writers wait for the lock instead of failing.
+    return {
+        'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000},
+    }
+
+
+def sqlite_pragmas():
+    """Per-connection PRAGMAs for the sqlite-single-node profile.
+
+    WAL lets quiz readers run while a submission is being written and turns
+    each commit into an append; synchronous=NORMAL is durable in WAL mode
+    except for the last transactions on power loss. busy_timeout makes a
+    second writer wait for the lock instead of raising "database is locked".
+    """
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        # Negative values are KiB
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 64 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Apply ``pragmas`` to every new DBAPI connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def configure_engine(app, engine):
+    """Engine-level hooks that depend on the selected profile."""
+    if app.config.get('DB_POOL_PROFILE') == 'sqlite-single-node':
+        install_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
+
+
+def pool_stats(engine):
+    """Snapshot of the engine's connection pool for monitoring."""
+    pool = engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'dialect': engine.dialect.name,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                'checkouts': pool.checkouts,
+                'timeouts': pool.timeouts,
+                'wait_time_total_ms': round(pool.wait_time_total * 1000, 3),
+                'wait_time_max_ms': round(pool.wait_time_max * 1000, 3),
+                'wait_time_avg_ms': round(pool.wait_time_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            })
+    return stats
@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration: gunicorn -c gunicorn.conf.py app:app
+
+Set PRELOAD_APP=false to fall back to importing the app in every worker.
+Set METRICS_DIR to a writable directory to serve /metrics for all workers.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+preload_app = os.environ.get('PRELOAD_APP', 'true').lower() in ['true', '1', 'yes']
+metrics_dir = os.environ.get('METRICS_DIR')
+
+
+def on_starting(server):
+    if metrics_dir:
+        from metrics import clear_directory
+        os.makedirs(metrics_dir, exist_ok=True)
+        clear_directory(metrics_dir)
+
+
+def when_ready(server):
+    if preload_app:
+        from app import app
+        from boot import prepare_for_fork
+        prepare_for_fork(app)
+        server.log.info("App preloaded: mappers configured, engine initialised, heap frozen")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import app
+        from boot import reset_after_fork
+        reset_after_fork(app)
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        from metrics import mark_process_dead
+        mark_process_dead(metrics_dir, worker.pid)
@@ -1,11 +1,12 @@
 from app import create_app, db
+import migrations
 
 def init_db():
     app = create_app()
     with app.app_context():
-        # Create all tables defined in models.py
-        db.create_all()
-        print("Database initialized successfully using SQLAlchemy models.")
+        # Apply all schema migrations (creates the tables on a new database)
+        migrations.upgrade(db.engine)
+        print("Database initialized successfully using schema migrations.")
 
 if __name__ == '__main__':
     init_db()
@@ -0,0 +1,379 @@
+"""
+Prometheus metrics for HTTP requests, database time and worker resources.
+
+Request metrics are labelled by blueprint and endpoint (never by raw path, so
+cardinality stays bounded by the route table). Samples are recorded into a
+per-thread shard, so the request hot path takes no lock; shards are only
+summed when /metrics is scraped. Each scrape folds the shards of threads
+that have exited into one base shard, so a server that recycles its
+threads does not accumulate shards.
+
+Gauges that describe the current state of a process (DB pool, email sender
+threads, requests in flight) are read at scrape time by collector callbacks.
+
+Multi-process mode (gunicorn): set METRICS_DIR to a directory shared by all
+workers of one server and emptied on start (gunicorn.conf.py does this).
+Each worker writes a snapshot of its samples to ``metrics-<pid>.json`` at
+most every METRICS_FLUSH_INTERVAL seconds and whenever it serves /metrics,
+and /metrics merges every snapshot, so any worker answers for the whole
+server. Counters and histograms of workers that exited are kept; their
+gauges are dropped by ``mark_process_dead()`` from the child_exit hook.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'lls_http_requests_total': ('counter', 'HTTP requests by endpoint and status.', None),
+    'lls_http_request_duration_seconds': ('histogram', 'Request latency in seconds.', LATENCY_BUCKETS),
+    'lls_http_response_size_bytes': ('histogram', 'Response body size in bytes.', SIZE_BUCKETS),
+    'lls_http_request_db_seconds': ('histogram', 'Time spent in SQL statements per request.', LATENCY_BUCKETS),
+    'lls_http_request_db_queries_total': ('counter', 'SQL statements executed by requests.', None),
+    'lls_http_requests_in_flight': ('gauge', 'Requests currently being handled.', None),
+    'lls_email_threads': ('gauge', 'Background email sender threads alive.', None),
+    'lls_email_deliveries_total': ('counter', 'Outbox delivery attempts by result (sent/retry/dead).', None),
+    'lls_cache_requests_total': ('counter', 'Payload cache lookups by cache and result (hit/miss).', None),
+    'lls_cache_evictions_total': ('counter', 'Payload cache entries evicted by the size bound.', None),
+    'lls_cache_entries': ('gauge', 'Entries held by each payload cache.', None),
+    'lls_cache_max_entries': ('gauge', 'Size bound of each payload cache.', None),
+    'lls_db_pool_size': ('gauge', 'Configured connection pool size.', None),
+    'lls_db_pool_checked_out': ('gauge', 'Connections currently checked out.', None),
+    'lls_db_pool_checked_in': ('gauge', 'Idle connections held by the pool.', None),
+    'lls_db_pool_overflow': ('gauge', 'Connections open beyond pool_size.', None),
+    'lls_db_pool_checkouts_total': ('counter', 'Connection checkouts.', None),
+    'lls_db_pool_timeouts_total': ('counter', 'Checkouts that timed out waiting for a connection.', None),
+    'lls_db_pool_wait_seconds_total': ('counter', 'Total time spent waiting for a connection.', None),
+}
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Shard:
+    __slots__ = ('counters', 'histograms', 'in_flight', 'thread')
+
+    def __init__(self, thread=None):
+        self.counters = {}     # (name, labels) -> float
+        self.histograms = {}   # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.in_flight = 0
+        self.thread = weakref.ref(thread) if thread is not None else None
+
+    def exited(self):
+        if self.thread is None:
+            return False   # the base shard
+        thread = self.thread()
+        return thread is None or not thread.is_alive()
+
+
+class MetricsRegistry:
+    """Per-process metric store with lock-free recording."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._base = _Shard()                  # samples of threads that have exited
+        self._shards = [self._base]
+        self._shards_lock = threading.Lock()   # taken once per thread, on first use, and by scrapes
+        self._flush_lock = threading.Lock()
+        self._collectors = {}
+        self._last_flush = 0.0
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels, amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = METRICS[name][2]
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(buckets) + 2)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def track_in_flight(self, delta):
+        self._shard().in_flight += delta
+
+    def register_collector(self, name, collect):
+        """``collect()`` returns (metric name, labels, value) tuples at scrape time."""
+        self._collectors[name] = collect
+
+    def reset(self):
+        with self._shards_lock:
+            self._base = _Shard()
+            self._shards = [self._base]
+        self._local = threading.local()
+
+    def _live_shards(self):
+        """The current shards, after folding those of exited threads into the base shard."""
+        with self._shards_lock:
+            exited = [shard for shard in self._shards if shard.exited()]
+            if exited:
+                # A new base rather than an in-place merge: a concurrent scrape
+                # may still be reading the old base and the exited shards
+                base = _Shard()
+                _merge(base.counters, base.histograms, self._base.counters.items(), self._base.histograms.items())
+                for shard in exited:
+                    _merge(base.counters, base.histograms, shard.counters.items(), shard.histograms.items())
+                folded = {id(shard) for shard in exited}
+                self._shards = [base] + [s for s in self._shards if s is not self._base and id(s) not in folded]
+                self._base = base
+            return list(self._shards)
+
+    # -- reading --------------------------------------------------------
+
+    def samples(self):
+        """Sum of every thread's samples: (counters, histograms)."""
+        counters, histograms = {}, {}
+        for shard in self._live_shards():
+            _merge(counters, histograms, _stable_items(shard.counters), _stable_items(shard.histograms))
+        return counters, histograms
+
+    def collected(self):
+        # An exited thread's in-flight count is dropped with its shard
+        in_flight = sum(shard.in_flight for shard in self._live_shards())
+        values = [('lls_http_requests_in_flight', (), in_flight)]
+        for collect in list(self._collectors.values()):
+            values.extend(collect())
+        return values
+
+    # -- multi-process --------------------------------------------------
+
+    def flush(self, directory, force=False, interval=0.0):
+        """Write this process's snapshot to ``directory``. Cheap no-op within ``interval``."""
+        now = time.monotonic()
+        if not force and now - self._last_flush < interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return   # another thread is already writing the snapshot
+        try:
+            self._last_flush = now
+            counters, histograms = self.samples()
+            payload = {
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+                'collected': [[name, labels, value] for name, labels, value in self.collected()],
+            }
+            _write_snapshot(directory, os.getpid(), payload)
+        finally:
+            self._flush_lock.release()
+
+    def render(self, directory=None):
+        """Prometheus text exposition of this process, or of every process in ``directory``."""
+        if not directory:
+            counters, histograms = self.samples()
+            return render_text(counters, histograms, self.collected())
+
+        self.flush(directory, force=True)
+        counters, histograms, collected = {}, {}, []
+        for path in sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))):
+            snapshot = _read_snapshot(path)
+            if snapshot is None:
+                continue
+            _merge(
+                counters, histograms,
+                (((name, _tuple_labels(labels)), value) for name, labels, value in snapshot['counters']),
+                (((name, _tuple_labels(labels)), values) for name, labels, values in snapshot['histograms']),
+            )
+            pid = str(snapshot['pid'])
+            for name, labels, value in snapshot['collected']:
+                collected.append((name, _tuple_labels(labels) + (('pid', pid),), value))
+        return render_text(counters, histograms, collected)
+
+
+def _stable_items(mapping):
+    # Another thread may add a key while we copy; retry rather than lock the hot path
+    while True:
+        try:
+            return [(key, list(value) if isinstance(value, list) else value) for key, value in list(mapping.items())]
+        except RuntimeError:
+            continue
+
+
+def _tuple_labels(labels):
+    return tuple(tuple(pair) for pair in labels)
+
+
+def _merge(counters, histograms, counter_items, histogram_items):
+    for key, value in counter_items:
+        counters[key] = counters.get(key, 0) + value
+    for key, values in histogram_items:
+        total = histograms.get(key)
+        if total is None:
+            histograms[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                total[i] += value
+
+
+def _write_snapshot(directory, pid, payload):
+    payload = dict(payload, pid=pid)
+    path = os.path.join(directory, f'metrics-{pid}.json')
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)   # readers never see a half-written file
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def mark_process_dead(directory, pid):
+    """Drop the gauges of an exited worker, keeping its counters and histograms."""
+    snapshot = _read_snapshot(os.path.join(directory, f'metrics-{pid}.json'))
+    if snapshot is not None:
+        snapshot['collected'] = []
+        _write_snapshot(directory, pid, snapshot)
+
+
+def clear_directory(directory):
+    """Remove snapshots left by a previous server run."""
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json*')):
+        os.remove(path)
+
+
+# -- text format -----------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_text(counters, histograms, collected):
+    series = {}
+    for (name, labels), value in sorted(counters.items()):
+        series.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for name, labels, value in collected:
+        series.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), values in sorted(histograms.items()):
+        buckets = METRICS[name][2]
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(buckets + (float('inf'),), values[:-1]):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+    out = []
+    for name in sorted(series):
+        kind, help_text, _ = METRICS.get(name, ('untyped', '', None))
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} {kind}')
+        out.extend(series[name])
+    return '\n'.join(out) + '\n'
+
+
+# -- Flask integration -----------------------------------------------------
+
+registry = MetricsRegistry()
+
+
+def _pool_collector(app):
+    def collect():
+        from database import pool_stats
+        from models import db
+        with app.app_context():
+            stats = pool_stats(db.engine)
+        values = []
+        for key, name in (('size', 'lls_db_pool_size'), ('checked_out', 'lls_db_pool_checked_out'),
+                          ('checked_in', 'lls_db_pool_checked_in'), ('overflow', 'lls_db_pool_overflow'),
+                          ('checkouts', 'lls_db_pool_checkouts_total'), ('timeouts', 'lls_db_pool_timeouts_total')):
+            if key in stats:
+                values.append((name, (), stats[key]))
+        if 'wait_time_total_ms' in stats:
+            values.append(('lls_db_pool_wait_seconds_total', (), stats['wait_time_total_ms'] / 1000))
+        return values
+    return collect
+
+
+def _email_collector():
+    from services.notification_service import NotificationService
+    return [('lls_email_threads', (), NotificationService.active_email_threads())]
+
+
+def _cache_collector():
+    import cache
+    return cache.collect_metrics()
+
+
+def init_app(app, metrics=None):
+    metrics = metrics or registry
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('METRICS_DIR', os.environ.get('METRICS_DIR'))
+    app.config.setdefault('METRICS_FLUSH_INTERVAL', float(os.environ.get('METRICS_FLUSH_INTERVAL') or 5))
+    app.extensions['metrics'] = metrics
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    metrics.register_collector('db_pool', _pool_collector(app))
+    metrics.register_collector('email_threads', _email_collector)
+    metrics.register_collector('caches', _cache_collector)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        metrics.track_in_flight(1)
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        labels = _labels(blueprint=request.blueprint or '', endpoint=request.endpoint or 'unmatched')
+        metrics.observe('lls_http_request_duration_seconds', labels, time.perf_counter() - start)
+        metrics.inc('lls_http_requests_total', labels + (('method', request.method), ('status', str(response.status_code))))
+        size = response.content_length
+        if size is not None:
+            metrics.observe('lls_http_response_size_bytes', labels, size)
+        stats = g.get('query_stats')
+        if stats is not None:
+            metrics.observe('lls_http_request_db_seconds', labels, stats.total_time)
+            metrics.inc('lls_http_request_db_queries_total', labels, stats.count)
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        if g.pop('metrics_start', None) is not None:
+            metrics.track_in_flight(-1)
+            directory = app.config['METRICS_DIR']
+            if directory:
+                metrics.flush(directory, interval=app.config['METRICS_FLUSH_INTERVAL'])
@@ -0,0 +1,145 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module in this package named ``mNNNN_<slug>.py`` that
+defines:
+
+- ``revision``: integer, strictly increasing
+- ``description``: one line shown by ``flask db history``
+- ``upgrade(conn)`` and ``downgrade(conn)``
+- ``transactional`` (optional, default True): set to False for migrations
+  that must run outside a transaction, e.g. CREATE INDEX CONCURRENTLY
+
+Applied revisions are recorded in the ``schema_version`` table. Migrations
+are run explicitly (``flask db upgrade``) before workers start, so the app
+factory never issues DDL.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+
+VERSION_TABLE = 'schema_version'
+
+# Arbitrary key for pg_advisory_lock so that concurrent deploys don't race
+_ADVISORY_LOCK_KEY = 7_311_602
+
+_version_metadata = MetaData()
+schema_version = Table(
+    VERSION_TABLE,
+    _version_metadata,
+    Column('revision', Integer, primary_key=True, autoincrement=False),
+    Column('description', String(200)),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+def load_migrations():
+    """Return every migration module in this package, sorted by revision."""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if not info.name.startswith('m'):
+            continue
+        module = importlib.import_module(f'{__name__}.{info.name}')
+        if hasattr(module, 'revision'):
+            modules.append(module)
+    modules.sort(key=lambda m: m.revision)
+    revisions = [m.revision for m in modules]
+    if len(revisions) != len(set(revisions)):
+        raise MigrationError(f'Duplicate migration revisions: {revisions}')
+    return modules
+
+
+def applied_revisions(engine):
+    """Revisions already recorded in the version table (empty for a new database)."""
+    with engine.begin() as conn:
+        _version_metadata.create_all(conn, checkfirst=True)
+        return [row.revision for row in conn.execute(select(schema_version.c.revision).order_by(schema_version.c.revision))]
+
+
+def current_revision(engine):
+    revisions = applied_revisions(engine)
+    return revisions[-1] if revisions else 0
+
+
+def head_revision():
+    migrations = load_migrations()
+    return migrations[-1].revision if migrations else 0
+
+
+def _run(engine, migration, direction):
+    step = getattr(migration, direction)
+    if getattr(migration, 'transactional', True):
+        with engine.begin() as conn:
+            step(conn)
+            _record(conn, migration, direction)
+    else:
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            step(conn)
+        with engine.begin() as conn:
+            _record(conn, migration, direction)
+
+
+def _record(conn, migration, direction):
+    if direction == 'upgrade':
+        conn.execute(schema_version.insert().values(
+            revision=migration.revision,
+            description=migration.description,
+            applied_at=datetime.utcnow(),
+        ))
+    else:
+        conn.execute(schema_version.delete().where(schema_version.c.revision == migration.revision))
+
+
+class _deploy_lock:
+    """Serialize migration runs across processes (PostgreSQL only)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.conn = None
+
+    def __enter__(self):
+        if self.engine.dialect.name == 'postgresql':
+            self.conn = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+            self.conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': _ADVISORY_LOCK_KEY})
+        return self
+
+    def __exit__(self, *exc):
+        if self.conn is not None:
+            self.conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': _ADVISORY_LOCK_KEY})
+            self.conn.close()
+
+
+def upgrade(engine, target=None, log=print):
+    """Apply every pending migration up to ``target`` (default: latest)."""
+    applied_now = []
+    with _deploy_lock(engine):
+        done = set(applied_revisions(engine))
+        for migration in load_migrations():
+            if migration.revision in done:
+                continue
+            if target is not None and migration.revision > target:
+                break
+            log(f'Applying {migration.revision:04d}: {migration.description}')
+            _run(engine, migration, 'upgrade')
+            applied_now.append(migration.revision)
+    return applied_now
+
+
+def downgrade(engine, target, log=print):
+    """Revert applied migrations newer than ``target``, newest first."""
+    reverted = []
+    with _deploy_lock(engine):
+        done = set(applied_revisions(engine))
+        for migration in reversed(load_migrations()):
+            if migration.revision <= target or migration.revision not in done:
+                continue
+            log(f'Reverting {migration.revision:04d}: {migration.description}')
+            _run(engine, migration, 'downgrade')
+            reverted.append(migration.revision)
+    return reverted
@@ -0,0 +1,14 @@
+"""Create any missing tables from the models (databases built by db.create_all() are left as-is)."""
+from migrations import MigrationError
+
+revision = 1
+description = 'Baseline schema'
+
+
+def upgrade(conn):
+    from models import db
+    db.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def downgrade(conn):
+    raise MigrationError('The baseline migration cannot be reverted')
@@ -0,0 +1,50 @@
+"""Secondary indexes for the hot foreign-key columns, built online."""
+from migrations import ops
+
+revision = 2
+description = 'Secondary indexes for foreign-key lookups'
+transactional = False
+
+INDEXES = [
+    ('course', 'ix_course_program_semester'),
+    ('staff_course', 'ix_staff_course_course_id'),
+    ('study_material', 'ix_study_material_course_parent'),
+    ('study_material', 'ix_study_material_parent_id'),
+    ('assignment', 'ix_assignment_course_due'),
+    ('assignment', 'ix_assignment_staff_id'),
+    ('assignment', 'ix_assignment_study_material_id'),
+    ('mcq', 'ix_mcq_course_id'),
+    ('mcq', 'ix_mcq_staff_id'),
+    ('mcq', 'ix_mcq_study_material_id'),
+    ('student', 'ix_student_program_semester'),
+    ('submission', 'ix_submission_student_assignment'),
+    ('evaluation', 'ix_evaluation_staff_id'),
+    ('mcq_attempt', 'ix_mcq_attempt_student_mcq'),
+    ('mcq_attempt', 'ix_mcq_attempt_mcq_id'),
+    ('communication', 'ix_communication_receiver'),
+    ('communication', 'ix_communication_sender'),
+    ('feedback', 'ix_feedback_student_id'),
+    ('feedback', 'ix_feedback_course_id'),
+    ('feedback', 'ix_feedback_staff_id'),
+    ('notification', 'ix_notification_user_unread'),
+    ('notification', 'ix_notification_user_created'),
+    ('notification', 'ix_notification_type_reference'),
+    ('student_course', 'ix_student_course_course_status'),
+]
+
+
+def _indexes():
+    from models import db
+    for table_name, index_name in INDEXES:
+        table = db.metadata.tables[table_name]
+        yield next(i for i in table.indexes if i.name == index_name)
+
+
+def upgrade(conn):
+    for index in _indexes():
+        ops.create_index(conn, index)
+
+
+def downgrade(conn):
+    for index in _indexes():
+        ops.drop_index(conn, index)
@@ -0,0 +1,15 @@
+"""Version stamps for the payload cache."""
+from migrations import ops
+
+revision = 3
+description = 'Cache version stamps'
+
+
+def upgrade(conn):
+    from models import CacheVersion
+    ops.create_table(conn, CacheVersion.__table__)
+
+
+def downgrade(conn):
+    from models import CacheVersion
+    ops.drop_table(conn, CacheVersion.__table__)
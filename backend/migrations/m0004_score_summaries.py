@@ -0,0 +1,19 @@
+"""Incrementally maintained course score summaries, backfilled from existing data."""
+from migrations import ops
+
+revision = 4
+description = 'Course score summary tables'
+
+
+def upgrade(conn):
+    from models import CourseScoreTotal, StudentCourseScore
+    from services.score_service import rebuild_scores
+    ops.create_table(conn, CourseScoreTotal.__table__)
+    ops.create_table(conn, StudentCourseScore.__table__)
+    rebuild_scores(conn)
+
+
+def downgrade(conn):
+    from models import CourseScoreTotal, StudentCourseScore
+    ops.drop_table(conn, StudentCourseScore.__table__)
+    ops.drop_table(conn, CourseScoreTotal.__table__)
@@ -0,0 +1,17 @@
+"""Closure table indexing the study material hierarchy, backfilled from parent_id."""
+from migrations import ops
+
+revision = 5
+description = 'Study material hierarchy closure table'
+
+
+def upgrade(conn):
+    from models import StudyMaterialClosure
+    from services.material_service import rebuild_hierarchy
+    ops.create_table(conn, StudyMaterialClosure.__table__)
+    rebuild_hierarchy(conn)
+
+
+def downgrade(conn):
+    from models import StudyMaterialClosure
+    ops.drop_table(conn, StudyMaterialClosure.__table__)
@@ -0,0 +1,29 @@
+"""Indexes on the (sort key, id) orderings that list endpoints page through, built online."""
+from migrations import ops
+
+revision = 6
+description = 'Keyset pagination indexes'
+transactional = False
+
+INDEXES = [
+    ('mcq', 'ix_mcq_created'),
+    ('study_material', 'ix_study_material_upload'),
+    ('feedback', 'ix_feedback_submitted'),
+]
+
+
+def _indexes():
+    from models import db
+    for table_name, index_name in INDEXES:
+        table = db.metadata.tables[table_name]
+        yield next(i for i in table.indexes if i.name == index_name)
+
+
+def upgrade(conn):
+    for index in _indexes():
+        ops.create_index(conn, index)
+
+
+def downgrade(conn):
+    for index in _indexes():
+        ops.drop_index(conn, index)
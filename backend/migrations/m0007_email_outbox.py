@@ -0,0 +1,15 @@
+"""Durable outbox for notification emails."""
+from migrations import ops
+
+revision = 7
+description = 'Email outbox'
+
+
+def upgrade(conn):
+    from models import EmailOutbox
+    ops.create_table(conn, EmailOutbox.__table__)
+
+
+def downgrade(conn):
+    from models import EmailOutbox
+    ops.drop_table(conn, EmailOutbox.__table__)
@@ -0,0 +1,23 @@
+"""Lease table for periodic jobs and the due-date index the reminder job scans."""
+from migrations import ops
+
+revision = 8
+description = 'Job leases and assignment due-date index'
+transactional = False
+
+
+def _due_index():
+    from models import Assignment
+    return next(i for i in Assignment.__table__.indexes if i.name == 'ix_assignment_due')
+
+
+def upgrade(conn):
+    from models import JobLock
+    ops.create_table(conn, JobLock.__table__)
+    ops.create_index(conn, _due_index())
+
+
+def downgrade(conn):
+    from models import JobLock
+    ops.drop_index(conn, _due_index())
+    ops.drop_table(conn, JobLock.__table__)
@@ -0,0 +1,35 @@
+"""ON DELETE CASCADE from the score summaries to their student and course.
+
+The summary tables only hold derived data, so databases created before the
+foreign keys cascaded get the tables rebuilt rather than altered in place
+(SQLite cannot alter a constraint).
+"""
+from sqlalchemy import inspect
+
+from migrations import ops
+
+revision = 9
+description = 'Cascade score summary rows with their student and course'
+
+
+def _cascades(conn, table_name):
+    return all((fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE'
+               for fk in inspect(conn).get_foreign_keys(table_name))
+
+
+def upgrade(conn):
+    from models import CourseScoreTotal, StudentCourseScore
+    from services.score_service import rebuild_scores
+    tables = (StudentCourseScore.__table__, CourseScoreTotal.__table__)
+    if all(ops.table_exists(conn, t.name) and _cascades(conn, t.name) for t in tables):
+        return
+    for table in tables:
+        ops.drop_table(conn, table)
+    for table in reversed(tables):
+        ops.create_table(conn, table)
+    rebuild_scores(conn)
+
+
+def downgrade(conn):
+    # The cascading keys are also valid for revision 8
+    pass
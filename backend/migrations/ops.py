@@ -0,0 +1,64 @@
+"""
+Idempotent schema operations shared by the migration scripts.
+
+The baseline migration builds whatever tables are missing from the current
+models, so a fresh database may already contain objects that a later
+migration introduces. Every helper here therefore checks before it acts.
+"""
+from sqlalchemy import inspect, text
+
+
+def table_exists(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def column_exists(conn, table_name, column_name):
+    if not table_exists(conn, table_name):
+        return False
+    return any(c['name'] == column_name for c in inspect(conn).get_columns(table_name))
+
+
+def index_exists(conn, table_name, index_name):
+    if not table_exists(conn, table_name):
+        return False
+    return any(i['name'] == index_name for i in inspect(conn).get_indexes(table_name))
+
+
+def create_table(conn, table):
+    """Create a table (and its declared indexes) if it does not exist yet."""
+    table.create(bind=conn, checkfirst=True)
+
+
+def drop_table(conn, table):
+    table.drop(bind=conn, checkfirst=True)
+
+
+def add_column(conn, table_name, column):
+    """Add a nullable column to an existing table."""
+    if column_exists(conn, table_name, column.name):
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type}'))
+
+
+def create_index(conn, index, concurrently=True):
+    """Create an index declared on a model.
+
+    On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY so that
+    writes to the table are not blocked; the calling migration must then be
+    non-transactional (``transactional = False``).
+    """
+    table_name = index.table.name
+    if not table_exists(conn, table_name) or index_exists(conn, table_name, index.name):
+        return
+    columns = ', '.join(column.name for column in index.columns)
+    unique = 'UNIQUE ' if index.unique else ''
+    online = ' CONCURRENTLY' if concurrently and conn.dialect.name == 'postgresql' else ''
+    conn.execute(text(f'CREATE {unique}INDEX{online} IF NOT EXISTS {index.name} ON {table_name} ({columns})'))
+
+
+def drop_index(conn, index, concurrently=True):
+    if not index_exists(conn, index.table.name, index.name):
+        return
+    online = ' CONCURRENTLY' if concurrently and conn.dialect.name == 'postgresql' else ''
+    conn.execute(text(f'DROP INDEX{online} IF EXISTS {index.name}'))
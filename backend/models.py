@@ -86,11 +86,13 @@ class Course(db.Model):
     results = db.relationship('Result', backref='course', lazy=True)
     feedbacks = db.relationship('Feedback', backref='course', lazy=True)
 
+    __table_args__ = (db.Index('ix_course_program_semester', 'program_id', 'semester_id'),)
+
 class StaffCourse(db.Model):
     __tablename__ = 'staff_course'
     id = db.Column(db.Integer, primary_key=True)
     staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'))
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), index=True)
     academic_year_id = db.Column(db.Integer, db.ForeignKey('academic_year.id'))
     assigned_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -114,6 +116,27 @@ class StudyMaterial(db.Model):
     assignments = db.relationship('Assignment', backref='study_material', lazy=True)
     mcqs = db.relationship('MCQ', backref='study_material', lazy=True)
 
+    __table_args__ = (
+        # Course material listings filter on (staff_course_id, parent_id) and order by upload_date
+        db.Index('ix_study_material_course_parent', 'staff_course_id', 'parent_id', 'upload_date'),
+        db.Index('ix_study_material_parent_id', 'parent_id'),
+        db.Index('ix_study_material_upload', 'upload_date', 'id'),
+    )
+
+class StudyMaterialClosure(db.Model):
+    """Hierarchy index: one row per (ancestor, descendant) pair, self at depth 0 (maintained by material_service)."""
+    __tablename__ = 'study_material_closure'
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('study_material.id', ondelete='CASCADE'), primary_key=True,
+                            autoincrement=False)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('study_material.id', ondelete='CASCADE'), primary_key=True,
+                              autoincrement=False)
+    depth = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # The primary key serves subtree lookups; breadcrumbs go from the descendant up
+        db.Index('ix_study_material_closure_descendant', 'descendant_id', 'depth'),
+    )
+
 # -----------------------------------------------------
 # Assessment Models
 # -----------------------------------------------------
@@ -124,8 +147,8 @@ class Assignment(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
-    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'))
-    study_material_id = db.Column(db.Integer, db.ForeignKey('study_material.id'))
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), index=True)
+    study_material_id = db.Column(db.Integer, db.ForeignKey('study_material.id'), index=True)
     due_date = db.Column(db.DateTime)
     max_marks = db.Column(db.Numeric(5,2))
     file_path = db.Column(db.String(500))
@@ -133,6 +156,13 @@ class Assignment(db.Model):
 
     submissions = db.relationship('Submission', backref='assignment', lazy=True)
 
+    # Dashboards and reminders filter a course's assignments by due date
+    __table_args__ = (
+        db.Index('ix_assignment_course_due', 'course_id', 'due_date'),
+        # The deadline reminder job scans every course's assignments due in its window
+        db.Index('ix_assignment_due', 'due_date'),
+    )
+
 class MCQ(db.Model):
     __tablename__ = 'mcq'
     id = db.Column(db.Integer, primary_key=True)
@@ -143,14 +173,19 @@ class MCQ(db.Model):
     option_d = db.Column(db.String(500))
     correct_answer = db.Column(db.String(1), nullable=False)
     marks = db.Column(db.Numeric(5,2), default=1.00)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
-    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'))
-    study_material_id = db.Column(db.Integer, db.ForeignKey('study_material.id'))
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), index=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), index=True)
+    study_material_id = db.Column(db.Integer, db.ForeignKey('study_material.id'), index=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     attempts = db.relationship('MCQAttempt', backref='mcq', lazy=True)
 
+    __table_args__ = (
+        # Keyset pagination of the question list (pagination.py)
+        db.Index('ix_mcq_created', 'created_at', 'id'),
+    )
+
 # -----------------------------------------------------
 # Student Management Models
 # -----------------------------------------------------
@@ -175,6 +210,9 @@ class Student(db.Model):
     feedbacks = db.relationship('Feedback', backref='student', lazy=True)
     mcq_attempts = db.relationship('MCQAttempt', backref='student', lazy=True)
 
+    # Course notifications resolve recipients by program and semester
+    __table_args__ = (db.Index('ix_student_program_semester', 'program_id', 'semester_id'),)
+
 class Payment(db.Model):
     __tablename__ = 'payment'
     id = db.Column(db.Integer, primary_key=True)
@@ -203,13 +241,16 @@ class Submission(db.Model):
     status = db.Column(db.String(20), default='submitted')
 
     evaluation = db.relationship('Evaluation', uselist=False, backref='submission')
-    __table_args__ = (db.UniqueConstraint('assignment_id', 'student_id', name='unique_student_submission'),)
+    __table_args__ = (
+        db.UniqueConstraint('assignment_id', 'student_id', name='unique_student_submission'),
+        db.Index('ix_submission_student_assignment', 'student_id', 'assignment_id'),
+    )
 
 class Evaluation(db.Model):
     __tablename__ = 'evaluation'
     id = db.Column(db.Integer, primary_key=True)
     submission_id = db.Column(db.Integer, db.ForeignKey('submission.id'), unique=True)
-    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'))
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), index=True)
     marks_obtained = db.Column(db.Numeric(5,2))
     feedback = db.Column(db.Text)
     evaluated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -238,6 +279,12 @@ class MCQAttempt(db.Model):
     is_correct = db.Column(db.Boolean)
     attempted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Covers "has this student attempted these questions" without touching the table
+        db.Index('ix_mcq_attempt_student_mcq', 'student_id', 'mcq_id', 'is_correct'),
+        db.Index('ix_mcq_attempt_mcq_id', 'mcq_id'),
+    )
+
 # -----------------------------------------------------
 # Certificate Models
 # -----------------------------------------------------
@@ -286,17 +333,26 @@ class Communication(db.Model):
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     read_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_communication_receiver', 'receiver_type', 'receiver_id', 'sent_at'),
+        db.Index('ix_communication_sender', 'sender_type', 'sender_id', 'sent_at'),
+    )
+
 class Feedback(db.Model):
     __tablename__ = 'feedback'
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student.id'))
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
-    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'))
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), index=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), index=True)
     rating = db.Column(db.Integer)
     feedback_text = db.Column(db.Text)
     is_anonymous = db.Column(db.Boolean, default=False)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_feedback_submitted', 'submitted_at', 'id'),
+    )
+
 # -----------------------------------------------------
 # Notification Models
 # -----------------------------------------------------
@@ -316,6 +372,57 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        # Unread badge counts
+        db.Index('ix_notification_user_unread', 'user_type', 'user_id', 'is_read'),
+        # Newest-first notification feed
+        db.Index('ix_notification_user_created', 'user_type', 'user_id', 'created_at'),
+        # Deadline reminder de-duplication
+        db.Index('ix_notification_type_reference', 'notification_type', 'reference_id', 'user_id'),
+    )
+
+class EmailOutbox(db.Model):
+    """
+    Email waiting to be delivered, written in the same transaction as its
+    Notification and drained by services/email_outbox.py.
+    Status: pending -> sending -> sent, or dead after the last failed attempt.
+    """
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    notification_id = db.Column(db.Integer, db.ForeignKey('notification.id', ondelete='SET NULL'), index=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text)
+    provider = db.Column(db.String(120), nullable=False)  # SMTP relay, the unit of rate limiting
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    notification = db.relationship('Notification', backref=db.backref('emails', lazy=True, passive_deletes=True))
+
+    __table_args__ = (
+        # Workers claim due rows in next_attempt_at order
+        db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+
+class JobLock(db.Model):
+    """
+    Lease on a periodic job (see services/scheduler.py): the process holding
+    an unexpired lease runs the job, so one gunicorn worker (or host) runs it
+    per interval however many are up.
+    """
+    __tablename__ = 'job_lock'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(64), nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=False)
+
 
 # -----------------------------------------------------
 # Student Course Enrollment Models
@@ -337,7 +444,10 @@ class StudentCourse(db.Model):
     student = db.relationship('Student', backref=db.backref('enrolled_courses', lazy=True))
     course = db.relationship('Course', backref=db.backref('enrolled_students', lazy=True))
     
-    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='unique_student_course_enrollment'),)
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'course_id', name='unique_student_course_enrollment'),
+        db.Index('ix_student_course_course_status', 'course_id', 'status', 'student_id'),
+    )
 
 
 # -----------------------------------------------------
@@ -371,3 +481,52 @@ class StudentExam(db.Model):
     staff = db.relationship('Staff', backref=db.backref('graded_exams', lazy=True))
     
     __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='unique_student_exam'),)
+
+
+# -----------------------------------------------------
+# Cache Models
+# -----------------------------------------------------
+
+class CacheVersion(db.Model):
+    """
+    Version stamp per cache scope (e.g. 'course:12'), shared by all workers.
+    Bumped in the writing transaction; cached payloads built at an older
+    version are ignored.
+    """
+    __tablename__ = 'cache_version'
+    scope = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+
+# -----------------------------------------------------
+# Score Summary Models
+# -----------------------------------------------------
+
+class CourseScoreTotal(db.Model):
+    """Per-course maxima used by result and progress endpoints (maintained by score_service)."""
+    __tablename__ = 'course_score_total'
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True,
+                          autoincrement=False)
+    assignment_count = db.Column(db.Integer, nullable=False, default=0)
+    assignment_total_marks = db.Column(db.Numeric(10,2), nullable=False, default=0)
+    last_due_date = db.Column(db.DateTime)
+    mcq_count = db.Column(db.Integer, nullable=False, default=0)
+    quiz_total_marks = db.Column(db.Numeric(10,2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StudentCourseScore(db.Model):
+    """Per-student running totals for a course (maintained by score_service)."""
+    __tablename__ = 'student_course_score'
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), primary_key=True,
+                           autoincrement=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True,
+                          autoincrement=False)
+    submitted_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    assignment_earned = db.Column(db.Numeric(10,2), nullable=False, default=0)
+    quiz_attempted_count = db.Column(db.Integer, nullable=False, default=0)
+    quiz_correct_count = db.Column(db.Integer, nullable=False, default=0)
+    quiz_earned = db.Column(db.Numeric(10,2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_student_course_score_course', 'course_id'),)
@@ -0,0 +1,153 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+List endpoints return one page of a stable ordering, ``(sort key, id)``,
+instead of the whole table. The client sends back the opaque cursor of the
+page it has to get the next one, and the query seeks past that key with a
+range condition the sort index can answer; page 1000 costs what page 1
+does, where OFFSET would scan and discard every earlier row.
+
+    page = paginate(MCQ.query.filter_by(course_id=1), MCQ.created_at)
+    return page.response([serialize_mcq(m) for m in page.items])
+
+The body stays a JSON array; paging travels in headers:
+
+- ``X-Next-Cursor`` and ``Link: <...>; rel="next"`` while more rows exist
+- ``X-Total-Count`` when asked for with ``?total=exact``, or
+  ``?total=estimate`` (the planner's row estimate on PostgreSQL, an exact
+  count elsewhere)
+
+Query parameters are ``limit`` (default 100, at most 500), ``cursor`` and
+``total``; malformed values are answered with a 400.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import jsonify, request
+from sqlalchemy import and_, or_
+
+from models import db
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+EXPOSED_HEADERS = ['X-Next-Cursor', 'X-Total-Count', 'Link']
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+def _encode(values):
+    values = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != 2:
+            raise ValueError
+        return [datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v for v in values]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise InvalidPage('Invalid cursor')
+
+
+def _limit():
+    limit = request.args.get('limit')
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPage('limit must be an integer')
+    if limit < 1:
+        raise InvalidPage('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _after(sort_column, id_column, key, descending):
+    """Rows strictly after ``key`` in ``sort_column`` (NULLs last), then ``id_column``, order."""
+    value, last_id = key
+    beyond_id = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        return and_(sort_column.is_(None), beyond_id)
+    beyond_value = sort_column < value if descending else sort_column > value
+    return or_(beyond_value, and_(sort_column == value, beyond_id), sort_column.is_(None))
+
+
+def _estimate(query):
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return query.count()
+    compiled = query.statement.compile(dialect=db.session.get_bind().dialect)
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled.string}', compiled.params).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class Page:
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def response(self, body, status=200):
+        response = jsonify(body)
+        response.status_code = status
+        if self.next_cursor:
+            args = request.args.to_dict()
+            args['cursor'] = self.next_cursor
+            args.pop('total', None)
+            response.headers['X-Next-Cursor'] = self.next_cursor
+            response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+        if self.total is not None:
+            response.headers['X-Total-Count'] = str(self.total)
+        return response
+
+
+def paginate(query, sort_column=None, descending=True):
+    """One page of ``query`` ordered by (``sort_column``, id); by id alone when no sort column is given.
+
+    ``query`` is an ORM query over a single model; its own ORDER BY is replaced.
+    """
+    model = query.column_descriptions[0]['entity']
+    id_column = model.id
+    limit = _limit()
+    total_mode = request.args.get('total')
+    if total_mode not in (None, 'exact', 'estimate'):
+        raise InvalidPage('total must be exact or estimate')
+
+    total = None
+    if total_mode:
+        count_query = query.enable_eagerloads(False).order_by(None)
+        total = count_query.count() if total_mode == 'exact' else _estimate(count_query)
+
+    cursor = request.args.get('cursor')
+    if sort_column is None:
+        id_order = id_column.desc() if descending else id_column.asc()
+        if cursor:
+            last_id = _decode(cursor)[1]
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        query = query.order_by(None).order_by(id_order)
+    else:
+        if cursor:
+            query = query.filter(_after(sort_column, id_column, _decode(cursor), descending))
+        direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+        query = query.order_by(None).order_by(direction(sort_column).nulls_last(), direction(id_column))
+
+    # One extra row tells whether another page follows
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = _encode([getattr(last, sort_column.key) if sort_column is not None else None, last.id])
+    return Page(items, next_cursor, total)
+
+
+def init_app(app):
+    @app.errorhandler(InvalidPage)
+    def _invalid_page(error):
+        return jsonify({'error': str(error)}), 400
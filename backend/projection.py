@@ -0,0 +1,105 @@
+"""
+Column projections for list endpoints.
+
+A projection declares the fields an endpoint emits: the SQL columns each
+one is read from, how the values are formatted, and any table it has to be
+joined from. A list query then selects just those columns into plain rows,
+with no ORM entities, identity map or per-row relationship loads, and joins
+only the tables the requested fields need.
+
+    MCQ_FIELDS = Projection(MCQ, [
+        Field('id', MCQ.id),
+        Field('course_name', Course.course_name, joins=[(Course, Course.id == MCQ.course_id)]),
+        ...
+    ])
+
+    fields = MCQ_FIELDS.requested()               # ?fields=id,course_name
+    page = paginate(MCQ_FIELDS.query(fields, MCQ.created_at), MCQ.created_at)
+    return page.response([MCQ_FIELDS.dump(row, fields) for row in page.items])
+
+Clients trim payloads with ``?fields=a,b``; without it every field is
+returned, as before. Unknown field names are answered with a 400.
+"""
+from flask import jsonify, request
+
+from models import db
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class Field:
+    """An output field read from one or more columns.
+
+    ``format`` receives the column values (in order) and returns the JSON
+    value; ``joins`` lists the (target, onclause) outer joins it needs, in
+    the order they have to be applied.
+    """
+
+    def __init__(self, name, *columns, format=None, joins=()):
+        self.name = name
+        self.columns = columns
+        self.format = format
+        self.joins = list(joins)
+
+    def labels(self):
+        if len(self.columns) == 1:
+            return [self.name]
+        return [f'{self.name}__{i}' for i in range(len(self.columns))]
+
+
+class Projection:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = {field.name: field for field in fields}
+
+    def requested(self):
+        """Field names asked for with ``?fields=``, in declaration order; all of them by default."""
+        raw = request.args.get('fields')
+        if not raw:
+            return list(self.fields)
+        names = {name.strip() for name in raw.split(',') if name.strip()}
+        unknown = names - set(self.fields)
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return [name for name in self.fields if name in names]
+
+    def query(self, names, *keys):
+        """A column query for ``names``, led by ``id`` and always including the sort ``keys`` (labelled by key)."""
+        columns, joins = [self.model.id.label('id')], []
+        labels = {'id'}
+        for name in names:
+            field = self.fields[name]
+            for column, label in zip(field.columns, field.labels()):
+                if label not in labels:
+                    columns.append(column.label(label))
+                    labels.add(label)
+            joins += [(target, on) for target, on in field.joins if target not in {t for t, _ in joins}]
+        for key in keys:
+            if key.key not in labels:
+                columns.append(key.label(key.key))
+                labels.add(key.key)
+
+        query = db.session.query(*columns).select_from(self.model)
+        for target, onclause in joins:
+            query = query.outerjoin(target, onclause)
+        return query
+
+    def dump(self, row, names):
+        data = {}
+        for name in names:
+            field = self.fields[name]
+            values = [getattr(row, label) for label in field.labels()]
+            data[name] = field.format(*values) if field.format else values[0]
+        return data
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+def init_app(app):
+    @app.errorhandler(InvalidFields)
+    def _invalid_fields(error):
+        return jsonify({'error': str(error)}), 400
@@ -0,0 +1,184 @@
+"""
+Per-request SQL instrumentation and N+1 detection.
+
+Every statement executed while a request (or a ``count_queries()`` block) is
+active is recorded with its duration and a fingerprint of the SQL text.
+Statements that only differ in their bound parameters share a fingerprint,
+so a fingerprint seen many times in one request is almost always a query
+issued inside a Python loop.
+
+Results are exposed as response headers when QUERY_STATS_HEADERS is on (the
+default in debug mode) and logged as one JSON line per request on the
+``lls.queries`` logger when QUERY_STATS_LOG is on (the default otherwise).
+The ``query_stats_recorded`` signal carries the stats of every finished
+request; the pytest query budget plugin listens to it.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from blinker import Namespace
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('lls.queries')
+
+_signals = Namespace()
+query_stats_recorded = _signals.signal('query-stats-recorded')
+
+_active_collectors = ContextVar('lls_query_collectors', default=())
+_listening = False
+
+# Collapse expanded IN lists so that "IN (?, ?)" and "IN (?, ?, ?)" match
+_IN_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    normalized = _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement.strip()))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class QueryStats:
+    """Queries executed during one request or ``count_queries()`` block."""
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = {}  # fingerprint -> [sql, count, total_time]
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        key, normalized = fingerprint(statement)
+        entry = self.statements.get(key)
+        if entry is None:
+            self.statements[key] = [normalized, 1, duration]
+        else:
+            entry[1] += 1
+            entry[2] += duration
+
+    def repeated(self, threshold):
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        hits = [
+            {'fingerprint': key, 'count': count, 'time_ms': round(total * 1000, 2), 'sql': sql}
+            for key, (sql, count, total) in self.statements.items()
+            if count >= threshold
+        ]
+        return sorted(hits, key=lambda h: h['count'], reverse=True)
+
+    def as_dict(self, repeat_threshold):
+        return {
+            'endpoint': self.endpoint,
+            'query_count': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'distinct_statements': len(self.statements),
+            'repeated': self.repeated(repeat_threshold),
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_collectors.get():
+        conn.info.setdefault('lls_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active_collectors.get()
+    if not collectors:
+        return
+    starts = conn.info.get('lls_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+def _listen():
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+
+@contextmanager
+def count_queries(endpoint=None):
+    """Collect the queries executed inside the block.
+
+        with count_queries() as stats:
+            client.get('/api/students')
+        assert stats.count <= 3
+    """
+    _listen()
+    stats = QueryStats(endpoint)
+    token = _active_collectors.set(_active_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_collectors.reset(token)
+
+
+def current_stats():
+    """Stats for the active request, or None outside a request."""
+    return g.get('query_stats')
+
+
+def init_app(app):
+    app.config.setdefault('QUERY_STATS_ENABLED', True)
+    # None = follow app.debug (headers while developing, log lines in production)
+    app.config.setdefault('QUERY_STATS_HEADERS', None)
+    app.config.setdefault('QUERY_STATS_LOG', None)
+    app.config.setdefault('QUERY_STATS_REPEAT_THRESHOLD', 5)
+
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+    _listen()
+
+    @app.before_request
+    def _start_query_stats():
+        stats = QueryStats(request.endpoint)
+        g.query_stats = stats
+        g.query_stats_token = _active_collectors.set(_active_collectors.get() + (stats,))
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        threshold = app.config['QUERY_STATS_REPEAT_THRESHOLD']
+        send_headers = app.config['QUERY_STATS_HEADERS']
+        if send_headers is None:
+            send_headers = app.debug
+        write_log = app.config['QUERY_STATS_LOG']
+        if write_log is None:
+            write_log = not app.debug and not app.testing
+
+        if send_headers:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time-Ms'] = f'{stats.total_time * 1000:.2f}'
+            repeated = stats.repeated(threshold)
+            if repeated:
+                response.headers['X-Query-Repeated'] = ', '.join(
+                    f"{r['fingerprint']}x{r['count']}" for r in repeated
+                )
+
+        if write_log:
+            payload = stats.as_dict(threshold)
+            payload.update({'method': request.method, 'path': request.path, 'status': response.status_code})
+            logger.info(json.dumps(payload))
+
+        query_stats_recorded.send(app, stats=stats)
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _active_collectors.reset(token)
@@ -20,6 +20,8 @@ from .certificate_templates import template_bp as certificate_templates_bp
 from .report import report_bp
 from .admin_report import admin_report_bp
 from .exam import exam_bp
+from .internal import internal_bp
+from .metrics import metrics_bp
 
 def register_routes(app):
     app.register_blueprint(academic_year_bp)
@@ -43,3 +45,5 @@ def register_routes(app):
     app.register_blueprint(report_bp)
     app.register_blueprint(admin_report_bp)
     app.register_blueprint(exam_bp)
+    app.register_blueprint(internal_bp)
+    app.register_blueprint(metrics_bp)
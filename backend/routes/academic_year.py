@@ -66,7 +66,7 @@ def create():
 
 @academic_year_bp.route('/api/academic-years/<int:id>', methods=['GET'])
 def get_one(id):
-    year = AcademicYear.query.get_or_404(id)
+    year = db.get_or_404(AcademicYear, id)
     return jsonify({
         'id': year.id,
         'year_name': year.year_name,
@@ -77,7 +77,7 @@ def get_one(id):
 @academic_year_bp.route('/api/academic-years/<int:id>', methods=['PUT'])
 def update(id):
     try:
-        year = AcademicYear.query.get_or_404(id)
+        year = db.get_or_404(AcademicYear, id)
         data = request.get_json()
         
         if not data:
@@ -116,7 +116,7 @@ def update(id):
 
 @academic_year_bp.route('/api/academic-years/<int:id>', methods=['DELETE'])
 def delete(id):
-    year = AcademicYear.query.get_or_404(id)
+    year = db.get_or_404(AcademicYear, id)
     db.session.delete(year)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
@@ -1,126 +1,190 @@
-from flask import Blueprint, jsonify
-from models import db, Staff, StaffCourse, Course, Assignment, Submission, Evaluation, StudentCourse, StudyMaterial
+from collections import defaultdict
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, distinct, func, select
+
+from cache import VersionedCache, invalidates
+from models import (
+    db, AcademicYear, Assignment, Course, Evaluation, Program, Semester, Staff, StaffCourse, StudentCourse,
+    StudyMaterial, Submission,
+)
 
 admin_report_bp = Blueprint('admin_report', __name__, url_prefix='/api/admin')
 
+# Both reports run a fixed number of grouped queries, whatever the number of
+# staff and courses; the filters are applied in SQL. They aggregate the
+# whole institution, so each aggregated table has one scope that any write
+# to it bumps, and a report depends only on the tables it reads: a new
+# study material leaves the staff report cached.
+admin_report_cache = VersionedCache('admin_reports', maxsize=256)
+
+
+def _table_scopes(*models):
+    return [f'admin-reports:{model.__tablename__}' for model in models]
+
+
+STAFF_REPORT_SCOPES = _table_scopes(Staff, StaffCourse, Course, Assignment, Submission, Evaluation)
+COURSE_REPORT_SCOPES = _table_scopes(Course, Program, Semester, StudentCourse, StaffCourse, Staff, AcademicYear,
+                                     StudyMaterial, Assignment, Submission, Evaluation)
+for _model in (AcademicYear, Assignment, Course, Evaluation, Program, Semester, Staff, StaffCourse, StudentCourse,
+               StudyMaterial, Submission):
+    invalidates(_model, lambda instance: set(_table_scopes(type(instance))))
+
+
 @admin_report_bp.route('/staff-report', methods=['GET'])
 def get_staff_report():
     """Get report of all staff members with course and grading statistics"""
-    staff_list = Staff.query.all()
-    
+    return jsonify(admin_report_cache.get_or_build('staff-report', STAFF_REPORT_SCOPES, _build_staff_report))
+
+
+def _build_staff_report():
+    staff_list = Staff.query.order_by(Staff.id).all()
+
+    # A course taught in several academic years counts once per staff member
+    staff_courses = select(StaffCourse.staff_id, StaffCourse.course_id).distinct().subquery()
+
+    courses_by_staff = defaultdict(list)
+    for staff_id, course_id, name, code in db.session.execute(
+        select(staff_courses.c.staff_id, Course.id, Course.course_name, Course.course_code)
+        .join(Course, Course.id == staff_courses.c.course_id)
+        .order_by(staff_courses.c.staff_id, Course.id)
+    ):
+        courses_by_staff[staff_id].append({'id': course_id, 'name': name, 'code': code})
+
+    # Grading counts only evaluations made by the staff member themselves
+    stats = {
+        staff_id: (assignments, submissions, graded)
+        for staff_id, assignments, submissions, graded in db.session.execute(
+            select(
+                staff_courses.c.staff_id,
+                func.count(distinct(Assignment.id)),
+                func.count(Submission.id),
+                func.count(Evaluation.id),
+            )
+            .select_from(staff_courses)
+            .join(Assignment, Assignment.course_id == staff_courses.c.course_id)
+            .outerjoin(Submission, Submission.assignment_id == Assignment.id)
+            .outerjoin(Evaluation, and_(
+                Evaluation.submission_id == Submission.id, Evaluation.staff_id == staff_courses.c.staff_id,
+            ))
+            .group_by(staff_courses.c.staff_id)
+        )
+    }
+
     report = []
     for staff in staff_list:
-        # Get courses assigned to this staff
-        staff_courses = StaffCourse.query.filter_by(staff_id=staff.id).all()
-        course_ids = [sc.course_id for sc in staff_courses]
-        courses = Course.query.filter(Course.id.in_(course_ids)).all() if course_ids else []
-        
-        # Get all assignments for staff's courses
-        assignments = Assignment.query.filter(Assignment.course_id.in_(course_ids)).all() if course_ids else []
-        assignment_ids = [a.id for a in assignments]
-        
-        # Get total submissions for these assignments
-        total_submissions = Submission.query.filter(Submission.assignment_id.in_(assignment_ids)).count() if assignment_ids else 0
-        
-        # Get graded submissions (those with evaluations)
-        graded_submissions = db.session.query(Submission).join(Evaluation).filter(
-            Submission.assignment_id.in_(assignment_ids),
-            Evaluation.staff_id == staff.id
-        ).count() if assignment_ids else 0
-        
+        courses = courses_by_staff.get(staff.id, [])
+        assignments_count, total_submissions, graded_submissions = stats.get(staff.id, (0, 0, 0))
         report.append({
             'id': staff.id,
             'staff_code': staff.staff_code,
             'full_name': staff.full_name,
             'email': staff.email,
             'courses_count': len(courses),
-            'courses': [{'id': c.id, 'name': c.course_name, 'code': c.course_code} for c in courses],
-            'assignments_count': len(assignments),
+            'courses': courses,
+            'assignments_count': assignments_count,
             'total_submissions': total_submissions,
             'graded_submissions': graded_submissions,
             'pending_submissions': total_submissions - graded_submissions
         })
-    
-    return jsonify(report)
+
+    return report
 
 
 @admin_report_bp.route('/course-report', methods=['GET'])
 def get_course_report():
     """Get report of all courses with enrollment and submission statistics"""
-    from flask import request
-    from models import AcademicYear
-    
     academic_year_id = request.args.get('academic_year_id', type=int)
     program_id = request.args.get('program_id', type=int)
     semester_id = request.args.get('semester_id', type=int)
-    
-    # Build course query with filters
-    course_query = Course.query
+    return jsonify(admin_report_cache.get_or_build(
+        ('course-report', academic_year_id, program_id, semester_id), COURSE_REPORT_SCOPES,
+        lambda: _build_course_report(academic_year_id, program_id, semester_id),
+    ))
+
+
+def _build_course_report(academic_year_id, program_id, semester_id):
+
+    # Staff allocations, restricted to the academic year if one is given
+    allocations = select(StaffCourse.id, StaffCourse.staff_id, StaffCourse.course_id, StaffCourse.academic_year_id)
+    if academic_year_id:
+        allocations = allocations.where(StaffCourse.academic_year_id == academic_year_id)
+    allocations = allocations.subquery()
+
+    course_ids = select(Course.id)
     if program_id:
-        course_query = course_query.filter_by(program_id=program_id)
+        course_ids = course_ids.where(Course.program_id == program_id)
     if semester_id:
-        course_query = course_query.filter_by(semester_id=semester_id)
-    courses = course_query.all()
-    
+        course_ids = course_ids.where(Course.semester_id == semester_id)
+    if academic_year_id:
+        # Skip courses with no staff assigned in that academic year
+        course_ids = course_ids.where(Course.id.in_(select(allocations.c.course_id)))
+
+    courses = db.session.execute(
+        select(Course.id, Course.course_code, Course.course_name, Program.program_name, Semester.semester_name)
+        .outerjoin(Program, Program.id == Course.program_id)
+        .outerjoin(Semester, Semester.id == Course.semester_id)
+        .where(Course.id.in_(course_ids))
+        .order_by(Course.id)
+    ).all()
+
+    enrolled = dict(db.session.execute(
+        select(StudentCourse.course_id, func.count())
+        .where(StudentCourse.course_id.in_(course_ids), StudentCourse.status == 'active')
+        .group_by(StudentCourse.course_id)
+    ).all())
+
+    staff_by_course = defaultdict(list)
+    for course_id, staff_id, name, year_name in db.session.execute(
+        select(allocations.c.course_id, Staff.id, Staff.full_name, AcademicYear.year_name)
+        .join(Staff, Staff.id == allocations.c.staff_id)
+        .outerjoin(AcademicYear, AcademicYear.id == allocations.c.academic_year_id)
+        .where(allocations.c.course_id.in_(course_ids))
+        .order_by(allocations.c.id)
+    ):
+        staff_by_course[course_id].append({'id': staff_id, 'name': name, 'academic_year': year_name or 'N/A'})
+
+    materials = dict(db.session.execute(
+        select(allocations.c.course_id, func.count(StudyMaterial.id))
+        .join(StudyMaterial, StudyMaterial.staff_course_id == allocations.c.id)
+        .where(allocations.c.course_id.in_(course_ids))
+        .group_by(allocations.c.course_id)
+    ).all())
+
+    submissions = {
+        course_id: (assignments, total, graded)
+        for course_id, assignments, total, graded in db.session.execute(
+            select(
+                Assignment.course_id,
+                func.count(distinct(Assignment.id)),
+                func.count(Submission.id),
+                func.count(Evaluation.id),
+            )
+            .outerjoin(Submission, Submission.assignment_id == Assignment.id)
+            .outerjoin(Evaluation, Evaluation.submission_id == Submission.id)
+            .where(Assignment.course_id.in_(course_ids))
+            .group_by(Assignment.course_id)
+        )
+    }
+
     report = []
     for course in courses:
-        # Get enrolled students count
-        enrolled_students = StudentCourse.query.filter_by(course_id=course.id, status='active').count()
-        
-        # Get staff assigned (filter by academic year if provided)
-        staff_query = StaffCourse.query.filter_by(course_id=course.id)
-        if academic_year_id:
-            staff_query = staff_query.filter_by(academic_year_id=academic_year_id)
-        staff_courses = staff_query.all()
-        
-        # Skip courses with no staff assigned if filtering by academic year
-        if academic_year_id and not staff_courses:
-            continue
-            
-        staff_ids = [sc.staff_id for sc in staff_courses]
-        staff_list = Staff.query.filter(Staff.id.in_(staff_ids)).all() if staff_ids else []
-        
-        # Get study materials count (via staff_course)
-        staff_course_ids = [sc.id for sc in staff_courses]
-        materials_count = StudyMaterial.query.filter(StudyMaterial.staff_course_id.in_(staff_course_ids)).count() if staff_course_ids else 0
-        
-        # Get assignments
-        assignments = Assignment.query.filter_by(course_id=course.id).all()
-        assignment_ids = [a.id for a in assignments]
-        
-        # Get submissions stats
-        total_submissions = Submission.query.filter(Submission.assignment_id.in_(assignment_ids)).count() if assignment_ids else 0
-        graded_submissions = db.session.query(Submission).join(Evaluation).filter(
-            Submission.assignment_id.in_(assignment_ids)
-        ).count() if assignment_ids else 0
-        
-        # Build staff details with their academic years
-        staff_details = []
-        for sc in staff_courses:
-            staff = Staff.query.get(sc.staff_id)
-            ay = AcademicYear.query.get(sc.academic_year_id) if sc.academic_year_id else None
-            if staff:
-                staff_details.append({
-                    'id': staff.id,
-                    'name': staff.full_name,
-                    'academic_year': ay.year_name if ay else 'N/A'
-                })
-        
+        staff_details = staff_by_course.get(course.id, [])
+        assignments_count, total_submissions, graded_submissions = submissions.get(course.id, (0, 0, 0))
         report.append({
             'id': course.id,
             'course_code': course.course_code,
             'course_name': course.course_name,
-            'program': course.program.program_name if course.program else 'N/A',
-            'semester': course.semester.semester_name if course.semester else 'N/A',
-            'enrolled_students': enrolled_students,
+            'program': course.program_name or 'N/A',
+            'semester': course.semester_name or 'N/A',
+            'enrolled_students': enrolled.get(course.id, 0),
             'staff': staff_details,
-            'staff_count': len(staff_list),
-            'materials_count': materials_count,
-            'assignments_count': len(assignments),
+            'staff_count': len({s['id'] for s in staff_details}),
+            'materials_count': materials.get(course.id, 0),
+            'assignments_count': assignments_count,
             'total_submissions': total_submissions,
             'graded_submissions': graded_submissions,
             'pending_submissions': total_submissions - graded_submissions
         })
-    
-    return jsonify(report)
 
+    return report
@@ -2,6 +2,7 @@ import os
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from werkzeug.utils import secure_filename
 from models import db, Assignment, Student, Course, StudentCourse
+from projection import Field, Projection, isoformat
 from services.notification_service import NotificationService
 from datetime import datetime, timezone
 
@@ -22,45 +23,43 @@ def parse_datetime(dt_str):
     except:
         return datetime.strptime(dt_str, '%Y-%m-%dT%H:%M')
 
+# Fields of the assignment list, selected as columns (see projection.py)
+ASSIGNMENT_FIELDS = Projection(Assignment, [
+    Field('id', Assignment.id),
+    Field('title', Assignment.title),
+    Field('description', Assignment.description),
+    Field('course_id', Assignment.course_id),
+    Field('staff_id', Assignment.staff_id),
+    Field('study_material_id', Assignment.study_material_id),
+    Field('due_date', Assignment.due_date, format=isoformat),
+    Field('max_marks', Assignment.max_marks, format=lambda marks: float(marks) if marks else None),
+    Field('file_path', Assignment.file_path),
+    Field('created_at', Assignment.created_at, format=isoformat),
+])
+
 @assignment_bp.route('/api/assignments', methods=['GET'])
 def get_all():
     course_id = request.args.get('course_id')
     staff_id = request.args.get('staff_id')
     study_material_id = request.args.get('study_material_id')
     
-    query = Assignment.query
+    fields = ASSIGNMENT_FIELDS.requested()
+    query = ASSIGNMENT_FIELDS.query(fields)
     if course_id:
-        query = query.filter_by(course_id=int(course_id))
+        query = query.filter(Assignment.course_id == int(course_id))
     if staff_id:
-        query = query.filter_by(staff_id=int(staff_id))
+        query = query.filter(Assignment.staff_id == int(staff_id))
     if study_material_id:
-        query = query.filter_by(study_material_id=int(study_material_id))
+        query = query.filter(Assignment.study_material_id == int(study_material_id))
 
     student_id = request.args.get('student_id')
     if student_id:
-        # Filter assignments for courses the student is explicitly enrolled in
-        enrollments = StudentCourse.query.filter_by(student_id=int(student_id), status='active').all()
-        enrolled_course_ids = [e.course_id for e in enrollments]
-        
-        if enrolled_course_ids:
-            query = query.filter(Assignment.course_id.in_(enrolled_course_ids))
-        else:
-            # No active enrollments, so no assignments
-            return jsonify([])
+        # Only courses the student is actively enrolled in
+        query = query.filter(Assignment.course_id.in_(
+            db.session.query(StudentCourse.course_id).filter_by(student_id=int(student_id), status='active')
+        ))
     
-    assignments = query.all()
-    return jsonify([{
-        'id': a.id,
-        'title': a.title,
-        'description': a.description,
-        'course_id': a.course_id,
-        'staff_id': a.staff_id,
-        'study_material_id': a.study_material_id,
-        'due_date': a.due_date.isoformat() if a.due_date else None,
-        'max_marks': float(a.max_marks) if a.max_marks else None,
-        'file_path': a.file_path,
-        'created_at': a.created_at.isoformat() if a.created_at else None
-    } for a in assignments])
+    return jsonify([ASSIGNMENT_FIELDS.dump(row, fields) for row in query.order_by(Assignment.id)])
 
 @assignment_bp.route('/api/assignments', methods=['POST'])
 def create():
@@ -105,7 +104,7 @@ def create():
 
 @assignment_bp.route('/api/assignments/<int:id>', methods=['GET'])
 def get_one(id):
-    assignment = Assignment.query.get_or_404(id)
+    assignment = db.get_or_404(Assignment, id)
     return jsonify({
         'id': assignment.id,
         'title': assignment.title,
@@ -123,7 +122,7 @@ def download_file(filename):
 
 @assignment_bp.route('/api/assignments/<int:id>', methods=['PUT'])
 def update(id):
-    assignment = Assignment.query.get_or_404(id)
+    assignment = db.get_or_404(Assignment, id)
     
     # Handle potential multipart or JSON
     if request.content_type.startswith('multipart/form-data'):
@@ -153,7 +152,7 @@ def update(id):
 
 @assignment_bp.route('/api/assignments/<int:id>', methods=['DELETE'])
 def delete(id):
-    assignment = Assignment.query.get_or_404(id)
+    assignment = db.get_or_404(Assignment, id)
     db.session.delete(assignment)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
@@ -25,7 +25,7 @@ def get_all_layouts():
 # Get a specific certificate layout
 @certificate_bp.route('/certificate-layouts/<int:id>', methods=['GET'])
 def get_layout(id):
-    layout = CertificateLayout.query.get_or_404(id)
+    layout = db.get_or_404(CertificateLayout, id)
     return jsonify({
         'id': layout.id,
         'layout_name': layout.layout_name,
@@ -80,7 +80,7 @@ def create_layout():
 # Update a certificate layout
 @certificate_bp.route('/certificate-layouts/<int:id>', methods=['PUT'])
 def update_layout(id):
-    layout = CertificateLayout.query.get_or_404(id)
+    layout = db.get_or_404(CertificateLayout, id)
     data = request.json
     
     # Determine new state
@@ -120,7 +120,7 @@ def update_layout(id):
 # Delete a certificate layout
 @certificate_bp.route('/certificate-layouts/<int:id>', methods=['DELETE'])
 def delete_layout(id):
-    layout = CertificateLayout.query.get_or_404(id)
+    layout = db.get_or_404(CertificateLayout, id)
     db.session.delete(layout)
     db.session.commit()
     
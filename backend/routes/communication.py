@@ -1,9 +1,20 @@
 from flask import Blueprint, request, jsonify
 from models import db, Communication, Student, Staff, Notification
+from pagination import InvalidPage, paginate
 from datetime import datetime
 
 communication_bp = Blueprint('communication', __name__)
 
+def _party_names(parties):
+    """{(user_type, user_id): display name} for a page of messages, one query per user type"""
+    names = {}
+    for user_type, model, unknown in (('student', Student, 'Unknown Student'), ('staff', Staff, 'Unknown Staff')):
+        ids = {user_id for kind, user_id in parties if kind == user_type}
+        found = dict(db.session.query(model.id, model.full_name).filter(model.id.in_(ids)).all()) if ids else {}
+        names.update({(user_type, user_id): found.get(user_id, unknown) for user_id in ids})
+    names.update({party: 'Administrator' for party in parties if party[0] == 'admin'})
+    return names
+
 @communication_bp.route('/api/communications', methods=['POST'])
 def send_message():
     """Send a new message"""
@@ -45,10 +56,10 @@ def send_message():
         
         sender_name = "Someone"
         if data['sender_type'] == 'student':
-            s = Student.query.get(data['sender_id'])
+            s = db.session.get(Student, data['sender_id'])
             if s: sender_name = s.full_name
         elif data['sender_type'] == 'staff':
-            s = Staff.query.get(data['sender_id'])
+            s = db.session.get(Staff, data['sender_id'])
             if s: sender_name = s.full_name
         elif data['sender_type'] == 'admin':
             sender_name = "Administrator"
@@ -78,29 +89,19 @@ def send_message():
 def get_inbox(user_type, user_id):
     """Get inbox messages for a user"""
     try:
-        messages = Communication.query.filter_by(
+        page = paginate(Communication.query.filter_by(
             receiver_type=user_type,
             receiver_id=user_id
-        ).order_by(Communication.sent_at.desc()).all()
+        ), Communication.sent_at)
+        names = _party_names({(msg.sender_type, msg.sender_id) for msg in page.items})
         
         result = []
-        for msg in messages:
-            # Get sender details
-            sender_name = 'Unknown'
-            if msg.sender_type == 'student':
-                student = Student.query.get(msg.sender_id)
-                sender_name = student.full_name if student else 'Unknown Student'
-            elif msg.sender_type == 'staff':
-                staff = Staff.query.get(msg.sender_id)
-                sender_name = staff.full_name if staff else 'Unknown Staff'
-            elif msg.sender_type == 'admin':
-                sender_name = 'Administrator'
-            
+        for msg in page.items:
             result.append({
                 'id': msg.id,
                 'sender_type': msg.sender_type,
                 'sender_id': msg.sender_id,
-                'sender_name': sender_name,
+                'sender_name': names.get((msg.sender_type, msg.sender_id), 'Unknown'),
                 'subject': msg.subject,
                 'message': msg.message,
                 'is_read': msg.is_read,
@@ -108,7 +109,9 @@ def get_inbox(user_type, user_id):
                 'read_at': msg.read_at.isoformat() if msg.read_at else None
             })
         
-        return jsonify(result), 200
+        return page.response(result)
+    except InvalidPage:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -116,29 +119,19 @@ def get_inbox(user_type, user_id):
 def get_sent(user_type, user_id):
     """Get sent messages for a user"""
     try:
-        messages = Communication.query.filter_by(
+        page = paginate(Communication.query.filter_by(
             sender_type=user_type,
             sender_id=user_id
-        ).order_by(Communication.sent_at.desc()).all()
+        ), Communication.sent_at)
+        names = _party_names({(msg.receiver_type, msg.receiver_id) for msg in page.items})
         
         result = []
-        for msg in messages:
-            # Get receiver details
-            receiver_name = 'Unknown'
-            if msg.receiver_type == 'student':
-                student = Student.query.get(msg.receiver_id)
-                receiver_name = student.full_name if student else 'Unknown Student'
-            elif msg.receiver_type == 'staff':
-                staff = Staff.query.get(msg.receiver_id)
-                receiver_name = staff.full_name if staff else 'Unknown Staff'
-            elif msg.receiver_type == 'admin':
-                receiver_name = 'Administrator'
-            
+        for msg in page.items:
             result.append({
                 'id': msg.id,
                 'receiver_type': msg.receiver_type,
                 'receiver_id': msg.receiver_id,
-                'receiver_name': receiver_name,
+                'receiver_name': names.get((msg.receiver_type, msg.receiver_id), 'Unknown'),
                 'subject': msg.subject,
                 'message': msg.message,
                 'is_read': msg.is_read,
@@ -146,7 +139,9 @@ def get_sent(user_type, user_id):
                 'read_at': msg.read_at.isoformat() if msg.read_at else None
             })
         
-        return jsonify(result), 200
+        return page.response(result)
+    except InvalidPage:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -154,15 +149,15 @@ def get_sent(user_type, user_id):
 def get_message(message_id):
     """Get a specific message"""
     try:
-        msg = Communication.query.get_or_404(message_id)
+        msg = db.get_or_404(Communication, message_id)
         
         # Get sender details
         sender_name = 'Unknown'
         if msg.sender_type == 'student':
-            student = Student.query.get(msg.sender_id)
+            student = db.session.get(Student, msg.sender_id)
             sender_name = student.full_name if student else 'Unknown Student'
         elif msg.sender_type == 'staff':
-            staff = Staff.query.get(msg.sender_id)
+            staff = db.session.get(Staff, msg.sender_id)
             sender_name = staff.full_name if staff else 'Unknown Staff'
         elif msg.sender_type == 'admin':
             sender_name = 'Administrator'
@@ -170,10 +165,10 @@ def get_message(message_id):
         # Get receiver details
         receiver_name = 'Unknown'
         if msg.receiver_type == 'student':
-            student = Student.query.get(msg.receiver_id)
+            student = db.session.get(Student, msg.receiver_id)
             receiver_name = student.full_name if student else 'Unknown Student'
         elif msg.receiver_type == 'staff':
-            staff = Staff.query.get(msg.receiver_id)
+            staff = db.session.get(Staff, msg.receiver_id)
             receiver_name = staff.full_name if staff else 'Unknown Staff'
         elif msg.receiver_type == 'admin':
             receiver_name = 'Administrator'
@@ -199,7 +194,7 @@ def get_message(message_id):
 def mark_as_read(message_id):
     """Mark a message as read"""
     try:
-        msg = Communication.query.get_or_404(message_id)
+        msg = db.get_or_404(Communication, message_id)
         msg.is_read = True
         msg.read_at = datetime.utcnow()
         db.session.commit()
@@ -213,7 +208,7 @@ def mark_as_read(message_id):
 def delete_message(message_id):
     """Delete a message"""
     try:
-        msg = Communication.query.get_or_404(message_id)
+        msg = db.get_or_404(Communication, message_id)
         db.session.delete(msg)
         db.session.commit()
         
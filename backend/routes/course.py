@@ -66,7 +66,7 @@ def create():
 
 @course_bp.route('/api/courses/<int:id>', methods=['DELETE'])
 def delete(id):
-    course = Course.query.get_or_404(id)
+    course = db.get_or_404(Course, id)
     db.session.delete(course)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
@@ -21,7 +21,7 @@ def get_course_students_with_exams(course_id):
     print(f"DEBUG: fetching students for course {course_id}")
     
     # Get course info
-    course = Course.query.get_or_404(course_id)
+    course = db.get_or_404(Course, course_id)
     
     # First try: Get students enrolled via StudentCourse
     enrollments = StudentCourse.query.filter_by(course_id=course_id, status='active').all()
@@ -72,8 +72,8 @@ def get_student_exam(student_id, course_id):
         course_id=course_id
     ).first()
     
-    student = Student.query.get_or_404(student_id)
-    course = Course.query.get_or_404(course_id)
+    student = db.get_or_404(Student, student_id)
+    course = db.get_or_404(Course, course_id)
     
     return jsonify({
         'student': {
@@ -173,7 +173,7 @@ def save_exam():
 @exam_bp.route('/api/exams/<int:exam_id>', methods=['DELETE'])
 def delete_exam(exam_id):
     """Delete an exam record."""
-    exam = StudentExam.query.get_or_404(exam_id)
+    exam = db.get_or_404(StudentExam, exam_id)
     
     # Delete associated files
     if exam.cca1_file_path and os.path.exists(exam.cca1_file_path):
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from models import db, Feedback, Student, Course, Staff
+from pagination import InvalidPage, paginate
 from datetime import datetime
 
 feedback_bp = Blueprint('feedback', __name__)
@@ -46,30 +47,35 @@ def submit_feedback():
 def get_all_feedback():
     """Get all feedback (admin only)"""
     try:
-        feedbacks = Feedback.query.order_by(Feedback.submitted_at.desc()).all()
+        page = paginate(Feedback.query, Feedback.submitted_at)
+
+        # Names for the whole page, one query per related table
+        def names(column, ids):
+            ids = {i for i in ids if i}
+            return dict(db.session.query(column.class_.id, column).filter(column.class_.id.in_(ids)).all()) if ids else {}
+        students = names(Student.full_name, (fb.student_id for fb in page.items))
+        courses = names(Course.course_name, (fb.course_id for fb in page.items))
+        staff = names(Staff.full_name, (fb.staff_id for fb in page.items))
         
         result = []
-        for fb in feedbacks:
-            # Get related data
-            student = Student.query.get(fb.student_id) if fb.student_id else None
-            course = Course.query.get(fb.course_id) if fb.course_id else None
-            staff = Staff.query.get(fb.staff_id) if fb.staff_id else None
-            
+        for fb in page.items:
             result.append({
                 'id': fb.id,
                 'student_id': fb.student_id,
-                'student_name': student.full_name if student and not fb.is_anonymous else 'Anonymous',
+                'student_name': students.get(fb.student_id, 'Anonymous') if not fb.is_anonymous else 'Anonymous',
                 'course_id': fb.course_id,
-                'course_name': course.course_name if course else None,
+                'course_name': courses.get(fb.course_id),
                 'staff_id': fb.staff_id,
-                'staff_name': staff.full_name if staff else None,
+                'staff_name': staff.get(fb.staff_id),
                 'rating': fb.rating,
                 'feedback_text': fb.feedback_text,
                 'is_anonymous': fb.is_anonymous,
                 'submitted_at': fb.submitted_at.isoformat() if fb.submitted_at else None
             })
         
-        return jsonify(result), 200
+        return page.response(result)
+    except InvalidPage:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -82,7 +88,7 @@ def get_course_feedback(course_id):
         
         result = []
         for fb in feedbacks:
-            student = Student.query.get(fb.student_id) if fb.student_id else None
+            student = db.session.get(Student, fb.student_id) if fb.student_id else None
             
             result.append({
                 'id': fb.id,
@@ -114,8 +120,8 @@ def get_staff_feedback(staff_id):
         
         result = []
         for fb in feedbacks:
-            student = Student.query.get(fb.student_id) if fb.student_id else None
-            course = Course.query.get(fb.course_id) if fb.course_id else None
+            student = db.session.get(Student, fb.student_id) if fb.student_id else None
+            course = db.session.get(Course, fb.course_id) if fb.course_id else None
             
             result.append({
                 'id': fb.id,
@@ -149,8 +155,8 @@ def get_student_feedback(student_id):
         
         result = []
         for fb in feedbacks:
-            course = Course.query.get(fb.course_id) if fb.course_id else None
-            staff = Staff.query.get(fb.staff_id) if fb.staff_id else None
+            course = db.session.get(Course, fb.course_id) if fb.course_id else None
+            staff = db.session.get(Staff, fb.staff_id) if fb.staff_id else None
             
             result.append({
                 'id': fb.id,
@@ -172,11 +178,11 @@ def get_student_feedback(student_id):
 def get_feedback(feedback_id):
     """Get specific feedback"""
     try:
-        fb = Feedback.query.get_or_404(feedback_id)
+        fb = db.get_or_404(Feedback, feedback_id)
         
-        student = Student.query.get(fb.student_id) if fb.student_id else None
-        course = Course.query.get(fb.course_id) if fb.course_id else None
-        staff = Staff.query.get(fb.staff_id) if fb.staff_id else None
+        student = db.session.get(Student, fb.student_id) if fb.student_id else None
+        course = db.session.get(Course, fb.course_id) if fb.course_id else None
+        staff = db.session.get(Staff, fb.staff_id) if fb.staff_id else None
         
         return jsonify({
             'id': fb.id,
@@ -198,7 +204,7 @@ def get_feedback(feedback_id):
 def update_feedback(feedback_id):
     """Update feedback (student can update their own)"""
     try:
-        fb = Feedback.query.get_or_404(feedback_id)
+        fb = db.get_or_404(Feedback, feedback_id)
         data = request.json
         
         if 'rating' in data:
@@ -223,7 +229,7 @@ def update_feedback(feedback_id):
 def delete_feedback(feedback_id):
     """Delete feedback"""
     try:
-        fb = Feedback.query.get_or_404(feedback_id)
+        fb = db.get_or_404(Feedback, feedback_id)
         db.session.delete(fb)
         db.session.commit()
         
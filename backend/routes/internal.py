@@ -0,0 +1,35 @@
+import hmac
+from functools import wraps
+from flask import Blueprint, jsonify, request, current_app
+from models import db
+from database import pool_stats
+
+internal_bp = Blueprint('internal', __name__, url_prefix='/api/internal')
+
+
+def internal_only(view):
+    """Require the X-Internal-Token header to match INTERNAL_API_TOKEN.
+
+    Without a configured token the endpoint is closed, except in debug and
+    TESTING apps.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('INTERNAL_API_TOKEN')
+        if token:
+            allowed = hmac.compare_digest(request.headers.get('X-Internal-Token', ''), token)
+        else:
+            allowed = current_app.debug or current_app.config.get('TESTING', False)
+        if not allowed:
+            return jsonify({'error': 'Forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@internal_bp.route('/pool-stats', methods=['GET'])
+@internal_only
+def get_pool_stats():
+    """Connection pool usage for this worker process"""
+    stats = pool_stats(db.engine)
+    stats['profile'] = current_app.config.get('DB_POOL_PROFILE')
+    return jsonify(stats)
@@ -1,11 +1,21 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, abort
+from sqlalchemy.orm import joinedload
 from models import db, MCQ, MCQAttempt, Course, Student, StudentCourse, StudyMaterial, StaffCourse
+from cache import VersionedCache, invalidates, scopes
+from pagination import paginate
+from projection import Field, Projection, isoformat
 from datetime import datetime
-import openpyxl
 from io import BytesIO
 
 mcq_bp = Blueprint('mcq', __name__)
 
+# Answer-free quiz questions per course / material, shared by every student.
+# Any MCQ write (create, update, delete, import) bumps the affected scopes;
+# course names are part of the payload, so course edits do too.
+quiz_cache = VersionedCache('quiz', maxsize=1024)
+invalidates(MCQ, lambda m: scopes('course', 'course_id', m) | scopes('material', 'study_material_id', m))
+invalidates(Course, lambda c: {f'course:{c.id}'})
+
 def serialize_mcq(m, include_answer=True):
     """Serialize MCQ - optionally hide correct answer for students"""
     data = {
@@ -26,6 +36,23 @@ def serialize_mcq(m, include_answer=True):
         data['correct_answer'] = m.correct_answer
     return data
 
+# Fields of the question list, selected as columns (see projection.py)
+MCQ_FIELDS = Projection(MCQ, [
+    Field('id', MCQ.id),
+    Field('question_text', MCQ.question_text),
+    Field('option_a', MCQ.option_a),
+    Field('option_b', MCQ.option_b),
+    Field('option_c', MCQ.option_c),
+    Field('option_d', MCQ.option_d),
+    Field('marks', MCQ.marks, format=lambda marks: float(marks) if marks else 1.0),
+    Field('course_id', MCQ.course_id),
+    Field('course_name', Course.course_name, joins=[(Course, Course.id == MCQ.course_id)]),
+    Field('staff_id', MCQ.staff_id),
+    Field('study_material_id', MCQ.study_material_id),
+    Field('created_at', MCQ.created_at, format=isoformat),
+    Field('correct_answer', MCQ.correct_answer),
+])
+
 # ----------------------
 # Staff CRUD Operations
 # ----------------------
@@ -37,21 +64,22 @@ def get_all():
     staff_id = request.args.get('staff_id')
     study_material_id = request.args.get('study_material_id')
     
-    query = MCQ.query
+    fields = MCQ_FIELDS.requested()
+    query = MCQ_FIELDS.query(fields, MCQ.created_at)
     if course_id:
-        query = query.filter_by(course_id=course_id)
+        query = query.filter(MCQ.course_id == course_id)
     if staff_id:
-        query = query.filter_by(staff_id=staff_id)
+        query = query.filter(MCQ.staff_id == staff_id)
     if study_material_id:
-        query = query.filter_by(study_material_id=study_material_id)
+        query = query.filter(MCQ.study_material_id == study_material_id)
     
-    mcqs = query.order_by(MCQ.created_at.desc()).all()
-    return jsonify([serialize_mcq(m) for m in mcqs])
+    page = paginate(query, MCQ.created_at)
+    return page.response([MCQ_FIELDS.dump(row, fields) for row in page.items])
 
 @mcq_bp.route('/api/mcqs/<int:mcq_id>', methods=['GET'])
 def get_one(mcq_id):
     """Get single MCQ by ID"""
-    mcq = MCQ.query.get_or_404(mcq_id)
+    mcq = db.get_or_404(MCQ, mcq_id)
     return jsonify(serialize_mcq(mcq))
 
 @mcq_bp.route('/api/mcqs', methods=['POST'])
@@ -79,7 +107,7 @@ def create():
 @mcq_bp.route('/api/mcqs/<int:mcq_id>', methods=['PUT'])
 def update(mcq_id):
     """Update an existing MCQ"""
-    mcq = MCQ.query.get_or_404(mcq_id)
+    mcq = db.get_or_404(MCQ, mcq_id)
     data = request.get_json()
     
     mcq.question_text = data.get('question_text', mcq.question_text)
@@ -98,7 +126,7 @@ def update(mcq_id):
 @mcq_bp.route('/api/mcqs/<int:mcq_id>', methods=['DELETE'])
 def delete(mcq_id):
     """Delete an MCQ"""
-    mcq = MCQ.query.get_or_404(mcq_id)
+    mcq = db.get_or_404(MCQ, mcq_id)
     db.session.delete(mcq)
     db.session.commit()
     return jsonify({'message': 'MCQ deleted successfully'})
@@ -117,6 +145,7 @@ def import_mcqs():
         return jsonify({'error': 'Invalid file type. Please upload .xlsx file'}), 400
 
     try:
+        import openpyxl  # heavy import, only needed by the Excel endpoints
         wb = openpyxl.load_workbook(file)
         sheet = wb.active
         
@@ -201,6 +230,7 @@ def import_mcqs():
 @mcq_bp.route('/api/mcqs/template', methods=['GET'])
 def download_template():
     """Download Excel template for MCQ import"""
+    import openpyxl  # heavy import, only needed by the Excel endpoints
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "MCQ Template"
@@ -247,6 +277,29 @@ def download_template():
 # Student Quiz Operations
 # ----------------------
 
+def _quiz_questions(**filters):
+    mcqs = MCQ.query.options(joinedload(MCQ.course)).filter_by(**filters).order_by(MCQ.id).all()
+    return [serialize_mcq(m, include_answer=False) for m in mcqs]
+
+
+def _with_attempts(questions, student_id):
+    """Overlay the student's 'attempted' flags on the shared question payload."""
+    attempted = set()
+    if student_id and questions:
+        attempted = {row.mcq_id for row in db.session.query(MCQAttempt.mcq_id).filter(
+            MCQAttempt.student_id == int(student_id),
+            MCQAttempt.mcq_id.in_([q['id'] for q in questions])
+        )}
+    return [dict(q, attempted=q['id'] in attempted) for q in questions], len(attempted)
+
+
+def _material_context(material_id):
+    """Material and its course (material -> staff_course -> course) in one query"""
+    return db.session.query(StudyMaterial.id, StaffCourse.course_id).outerjoin(
+        StaffCourse, StaffCourse.id == StudyMaterial.staff_course_id
+    ).filter(StudyMaterial.id == material_id).first()
+
+
 @mcq_bp.route('/api/courses/<int:course_id>/quiz', methods=['GET'])
 def get_course_quiz(course_id):
     """Get all MCQs for a course (for students taking quiz - no answers)"""
@@ -254,7 +307,7 @@ def get_course_quiz(course_id):
     
     # Access control
     if student_id:
-        student = Student.query.get_or_404(int(student_id))
+        student = db.get_or_404(Student, int(student_id))
         
         # Check explicit enrollment first
         enrollment = StudentCourse.query.filter_by(
@@ -266,24 +319,15 @@ def get_course_quiz(course_id):
         if not enrollment:
              return jsonify({'error': 'Access denied: You are not enrolled in this course'}), 403
 
-    mcqs = MCQ.query.filter_by(course_id=course_id).all()
-    
-    # Get student's existing attempts for this course
-    attempted_mcq_ids = []
-    if student_id:
-        attempts = MCQAttempt.query.filter_by(student_id=student_id).all()
-        attempted_mcq_ids = [a.mcq_id for a in attempts]
-    
-    result = []
-    for m in mcqs:
-        mcq_data = serialize_mcq(m, include_answer=False)
-        mcq_data['attempted'] = m.id in attempted_mcq_ids
-        result.append(mcq_data)
+    questions = quiz_cache.get_or_build(
+        ('course', course_id), [f'course:{course_id}'], lambda: _quiz_questions(course_id=course_id)
+    )
+    result, attempted_count = _with_attempts(questions, student_id)
     
     return jsonify({
         'course_id': course_id,
-        'total_questions': len(mcqs),
-        'attempted_count': len([m for m in mcqs if m.id in attempted_mcq_ids]),
+        'total_questions': len(result),
+        'attempted_count': attempted_count,
         'questions': result
     })
 
@@ -292,17 +336,16 @@ def get_material_quiz(material_id):
     """Get all MCQs for a specific study material (for students taking quiz)"""
     student_id = request.args.get('student_id')
     
+    context = _material_context(material_id)
+    course_id = context.course_id if context else None
+
     # 1. Access Control Logic
     if student_id:
-        student = Student.query.get_or_404(int(student_id))
-        material = StudyMaterial.query.get_or_404(material_id)
-        
-        # Determine course ID from material -> staff_course -> course
-        staff_course = StaffCourse.query.get(material.staff_course_id)
-        if not staff_course:
+        student = db.get_or_404(Student, int(student_id))
+        if context is None:
+            abort(404)
+        if course_id is None:
              return jsonify({'error': 'Invalid material context'}), 400
-             
-        course_id = staff_course.course_id
         
         # Check enrollment
         enrollment = StudentCourse.query.filter_by(
@@ -314,32 +357,161 @@ def get_material_quiz(material_id):
         if not enrollment:
              return jsonify({'error': 'Access denied: You are not enrolled in this course'}), 403
 
-    mcqs = MCQ.query.filter_by(study_material_id=material_id).all()
-    
-    # Get student's existing attempts
-    attempted_mcq_ids = []
-    if student_id:
-        attempts = MCQAttempt.query.filter_by(student_id=student_id).all()
-        attempted_mcq_ids = [a.mcq_id for a in attempts]
-    
-    result = []
-    for m in mcqs:
-        mcq_data = serialize_mcq(m, include_answer=False)
-        mcq_data['attempted'] = m.id in attempted_mcq_ids
-        result.append(mcq_data)
+    scope_names = [f'material:{material_id}'] + ([f'course:{course_id}'] if course_id else [])
+    questions = quiz_cache.get_or_build(
+        ('material', material_id), scope_names, lambda: _quiz_questions(study_material_id=material_id)
+    )
+    result, attempted_count = _with_attempts(questions, student_id)
     
     return jsonify({
         'material_id': material_id,
-        'total_questions': len(mcqs),
-        'attempted_count': len([m for m in mcqs if m.id in attempted_mcq_ids]),
+        'total_questions': len(result),
+        'attempted_count': attempted_count,
         'questions': result
     })
 
 
+def _answer_key(**filters):
+    return {
+        row.id: (row.correct_answer, 1.0 if row.marks is None else float(row.marks))
+        for row in db.session.query(MCQ.id, MCQ.correct_answer, MCQ.marks).filter_by(**filters)
+    }
+
+
+def _parse_answer_sheet(data):
+    """Accept [{"mcq_id": 1, "selected_answer": "A"}, ...] or {"1": "A", ...}; returns [(mcq_id, answer)]"""
+    answers = data.get('answers')
+    if isinstance(answers, dict):
+        answers = [{'mcq_id': k, 'selected_answer': v} for k, v in answers.items()]
+    if not isinstance(answers, list) or not answers:
+        raise ValueError('answers must be a non-empty list')
+    parsed = []
+    for item in answers:
+        parsed.append((int(item['mcq_id']), str(item.get('selected_answer') or '').strip().upper()))
+    return parsed
+
+
+def _grade_answer_sheet(student_id, answers, key):
+    """Grade a sheet against ``key`` ({mcq_id: (correct_answer, marks)}) and insert the new attempts."""
+    already = {row.mcq_id for row in db.session.query(MCQAttempt.mcq_id).filter(
+        MCQAttempt.student_id == student_id,
+        MCQAttempt.mcq_id.in_([mcq_id for mcq_id, _ in answers])
+    )}
+
+    results, attempts, seen = [], [], set()
+    for mcq_id, selected in answers:
+        if mcq_id in seen:
+            continue
+        seen.add(mcq_id)
+        if mcq_id not in key:
+            results.append({'mcq_id': mcq_id, 'status': 'invalid', 'error': 'Question is not part of this quiz'})
+            continue
+        if mcq_id in already:
+            results.append({'mcq_id': mcq_id, 'status': 'already_attempted', 'error': 'Already attempted this question'})
+            continue
+        if selected not in ('A', 'B', 'C', 'D'):
+            results.append({'mcq_id': mcq_id, 'status': 'invalid', 'error': 'selected_answer must be A, B, C or D'})
+            continue
+        correct_answer, marks = key[mcq_id]
+        is_correct = selected == correct_answer
+        attempts.append(MCQAttempt(student_id=student_id, mcq_id=mcq_id, selected_answer=selected, is_correct=is_correct))
+        results.append({
+            'mcq_id': mcq_id,
+            'status': 'graded',
+            'selected_answer': selected,
+            'is_correct': is_correct,
+            'correct_answer': correct_answer,
+            'marks': marks,
+            'marks_earned': marks if is_correct else 0
+        })
+
+    if attempts:
+        db.session.add_all(attempts)
+        db.session.commit()
+
+    graded = [r for r in results if r['status'] == 'graded']
+    marks_available = sum(r['marks'] for r in graded)
+    marks_earned = sum(r['marks_earned'] for r in graded)
+    return {
+        'student_id': student_id,
+        'results': results,
+        'graded_count': len(graded),
+        'correct_count': sum(1 for r in graded if r['is_correct']),
+        'rejected_count': len(results) - len(graded),
+        'marks_earned': marks_earned,
+        'marks_available': marks_available,
+        'percentage': round(marks_earned / marks_available * 100, 1) if marks_available else 0,
+        'quiz_total_marks': sum(marks for _, marks in key.values()),
+        'quiz_total_questions': len(key)
+    }
+
+
+def _read_answer_sheet():
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return None, None, (jsonify({'error': 'Invalid answer sheet: expected a JSON object'}), 400)
+    if not data.get('student_id'):
+        return None, None, (jsonify({'error': 'student_id is required'}), 400)
+    try:
+        student_id = int(data['student_id'])
+        answers = _parse_answer_sheet(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return None, None, (jsonify({'error': f'Invalid answer sheet: {e}'}), 400)
+    return student_id, answers, None
+
+
+def _is_enrolled(student_id, course_id):
+    return StudentCourse.query.filter_by(student_id=student_id, course_id=course_id, status='active').first() is not None
+
+
+@mcq_bp.route('/api/courses/<int:course_id>/quiz/submit', methods=['POST'])
+def submit_course_answer_sheet(course_id):
+    """Grade and record a whole course quiz answer sheet in one transaction.
+
+    Questions already attempted, outside the quiz or with an invalid option
+    are reported per question and skipped; the rest are recorded.
+    """
+    student_id, answers, error = _read_answer_sheet()
+    if error:
+        return error
+    if not _is_enrolled(student_id, course_id):
+        return jsonify({'error': 'Access denied: You are not enrolled in this course'}), 403
+
+    key = quiz_cache.get_or_build(
+        ('course-key', course_id), [f'course:{course_id}'], lambda: _answer_key(course_id=course_id)
+    )
+    result = _grade_answer_sheet(student_id, answers, key)
+    result['course_id'] = course_id
+    return jsonify(result)
+
+
+@mcq_bp.route('/api/materials/<int:material_id>/quiz/submit', methods=['POST'])
+def submit_material_answer_sheet(material_id):
+    """Grade and record a whole material quiz answer sheet in one transaction"""
+    student_id, answers, error = _read_answer_sheet()
+    if error:
+        return error
+    context = _material_context(material_id)
+    if context is None:
+        abort(404)
+    if context.course_id is None:
+        return jsonify({'error': 'Invalid material context'}), 400
+    if not _is_enrolled(student_id, context.course_id):
+        return jsonify({'error': 'Access denied: You are not enrolled in this course'}), 403
+
+    key = quiz_cache.get_or_build(
+        ('material-key', material_id), [f'material:{material_id}', f'course:{context.course_id}'],
+        lambda: _answer_key(study_material_id=material_id)
+    )
+    result = _grade_answer_sheet(student_id, answers, key)
+    result['material_id'] = material_id
+    return jsonify(result)
+
+
 @mcq_bp.route('/api/mcqs/<int:mcq_id>/attempt', methods=['POST'])
 def submit_attempt(mcq_id):
     """Submit a student's answer for an MCQ"""
-    mcq = MCQ.query.get_or_404(mcq_id)
+    mcq = db.get_or_404(MCQ, mcq_id)
     data = request.get_json()
     
     student_id = data['student_id']
@@ -388,7 +560,7 @@ def submit_attempt(mcq_id):
 @mcq_bp.route('/api/student/<int:student_id>/quiz-results', methods=['GET'])
 def get_student_results(student_id):
     """Get all quiz results for a student"""
-    student = Student.query.get_or_404(student_id)
+    student = db.get_or_404(Student, student_id)
     
     # Get attempts grouped by course
     attempts = MCQAttempt.query.filter_by(student_id=student_id).all()
@@ -400,7 +572,7 @@ def get_student_results(student_id):
         course_id = mcq.course_id
         
         if course_id not in course_stats:
-            course = Course.query.get(course_id)
+            course = db.session.get(Course, course_id)
             course_stats[course_id] = {
                 'course_id': course_id,
                 'course_name': course.course_name if course else None,
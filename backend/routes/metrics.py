@@ -0,0 +1,13 @@
+from flask import Blueprint, Response, current_app
+from routes.internal import internal_only
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@internal_only
+def get_metrics():
+    """Prometheus scrape endpoint (all workers when METRICS_DIR is set)"""
+    registry = current_app.extensions['metrics']
+    body = registry.render(current_app.config.get('METRICS_DIR'))
+    return Response(body, mimetype='text/plain; version=0.0.4; charset=utf-8')
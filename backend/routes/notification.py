@@ -84,7 +84,7 @@ def mark_all_notifications_read(user_type, user_id):
 def delete_notification(notification_id):
     """Delete a notification"""
     try:
-        notification = Notification.query.get(notification_id)
+        notification = db.session.get(Notification, notification_id)
         if notification:
             db.session.delete(notification)
             db.session.commit()
@@ -129,7 +129,7 @@ def trigger_deadline_check():
     """Manually trigger deadline reminder check (for testing)"""
     try:
         from services.notification_service import send_deadline_reminders
-        send_deadline_reminders()
-        return jsonify({'message': 'Deadline reminders processed'})
+        created = send_deadline_reminders()
+        return jsonify({'message': 'Deadline reminders processed', 'created': created})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -25,7 +25,7 @@ def create():
 
 @program_bp.route('/api/programs/<int:id>', methods=['DELETE'])
 def delete(id):
-    program = Program.query.get_or_404(id)
+    program = db.get_or_404(Program, id)
     db.session.delete(program)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
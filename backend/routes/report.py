@@ -1,139 +1,226 @@
-from flask import Blueprint, request, jsonify
-from models import db, Student, Course, StaffCourse, Assignment, Submission, Evaluation, MCQ, MCQAttempt, Result
-from sqlalchemy import func
+import csv
+import io
+import tempfile
 from datetime import datetime
 
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from sqlalchemy import and_, func, select
+
+from cache import VersionedCache, invalidates, scopes
+from models import (
+    db, Assignment, Course, CourseScoreTotal, StaffCourse, Student, StudentCourse, StudentCourseScore, Submission,
+)
+
 report_bp = Blueprint('report_bp', __name__)
 
+# Staff reports per (staff, course filter). Scores and enrollments bump
+# course-scores:<id>, course content course:<id>, allocations staff:<id> and
+# student renames "students". Missed deadlines change when a due date passes,
+# so entries also expire at the next due date of the staff's courses.
+report_cache = VersionedCache('staff_report', maxsize=1024)
+invalidates(StaffCourse, lambda sc: scopes('staff', 'staff_id', sc))
+invalidates(StudentCourse, lambda e: scopes('course-scores', 'course_id', e))
+invalidates(Student, lambda s: {'students'})
+
+# (key, header) of the exported columns, in order
+REPORT_COLUMNS = [
+    ('student_code', 'Student Code'),
+    ('student_name', 'Student Name'),
+    ('course_code', 'Course Code'),
+    ('course_name', 'Course Name'),
+    ('percent_completed', 'Completed %'),
+    ('percent_left', 'Left %'),
+    ('missed_deadlines', 'Missed Deadlines'),
+    ('marks_obtained', 'Marks Obtained'),
+    ('max_marks', 'Max Marks'),
+    ('percent_marks', 'Marks %'),
+]
+
+EXPORT_BATCH_SIZE = 500
+
+
+def _report_query(staff_id, course_id=None):
+    """One statement for the whole student x course matrix of a staff member.
+
+    Per-student totals come from the score summaries (services/score_service.py);
+    missed deadlines are counted with two grouped subqueries, past-due
+    assignments per course minus the student's submissions to them.
+    """
+    now = datetime.utcnow()
+    course_ids = select(StaffCourse.course_id).where(StaffCourse.staff_id == staff_id)
+    if course_id is not None:
+        course_ids = course_ids.where(StaffCourse.course_id == course_id)
+
+    past_due = (
+        select(Assignment.course_id, func.count(Assignment.id).label('count'))
+        .where(Assignment.course_id.in_(course_ids), Assignment.due_date < now)
+        .group_by(Assignment.course_id)
+        .subquery()
+    )
+    submitted_past_due = (
+        select(Submission.student_id, Assignment.course_id, func.count(Submission.id).label('count'))
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .where(Assignment.course_id.in_(course_ids), Assignment.due_date < now)
+        .group_by(Submission.student_id, Assignment.course_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            StudentCourse.student_id,
+            StudentCourse.course_id,
+            Student.full_name,
+            Student.student_code,
+            Course.course_name,
+            Course.course_code,
+            CourseScoreTotal.assignment_count,
+            CourseScoreTotal.mcq_count,
+            CourseScoreTotal.assignment_total_marks,
+            CourseScoreTotal.quiz_total_marks,
+            StudentCourseScore.submitted_count,
+            StudentCourseScore.quiz_attempted_count,
+            StudentCourseScore.assignment_earned,
+            StudentCourseScore.quiz_earned,
+            past_due.c.count.label('past_due_count'),
+            submitted_past_due.c.count.label('submitted_past_due_count'),
+        )
+        .join(Student, Student.id == StudentCourse.student_id)
+        .join(Course, Course.id == StudentCourse.course_id)
+        .outerjoin(CourseScoreTotal, CourseScoreTotal.course_id == StudentCourse.course_id)
+        .outerjoin(StudentCourseScore, and_(
+            StudentCourseScore.student_id == StudentCourse.student_id,
+            StudentCourseScore.course_id == StudentCourse.course_id,
+        ))
+        .outerjoin(past_due, past_due.c.course_id == StudentCourse.course_id)
+        .outerjoin(submitted_past_due, and_(
+            submitted_past_due.c.student_id == StudentCourse.student_id,
+            submitted_past_due.c.course_id == StudentCourse.course_id,
+        ))
+        .where(StudentCourse.course_id.in_(course_ids), StudentCourse.status == 'active')
+        .order_by(StudentCourse.id)
+    )
+
+
+def _report_row(row):
+    total_items = (row.assignment_count or 0) + (row.mcq_count or 0)
+    completed_items = (row.submitted_count or 0) + (row.quiz_attempted_count or 0)
+    percent_completed = min(100, round((completed_items / (total_items or 1)) * 100, 1))
+
+    total_obtained = float(row.assignment_earned or 0) + float(row.quiz_earned or 0)
+    max_possible = float(row.assignment_total_marks or 0) + float(row.quiz_total_marks or 0)
+    percent_marks = round((total_obtained / max_possible) * 100, 1) if max_possible > 0 else 0
+
+    return {
+        'student_id': row.student_id,
+        'student_name': row.full_name,
+        'student_code': row.student_code,
+        'course_id': row.course_id,
+        'course_name': row.course_name,
+        'course_code': row.course_code,
+        'percent_completed': percent_completed,
+        'percent_left': 100 - percent_completed,
+        'missed_deadlines': (row.past_due_count or 0) - (row.submitted_past_due_count or 0),
+        'marks_obtained': total_obtained,
+        'max_marks': max_possible,
+        'percent_marks': percent_marks
+    }
+
+
+def _iter_report(staff_id, course_id=None):
+    """Report rows fetched in batches, so exports run in constant memory."""
+    stmt = _report_query(staff_id, course_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for row in db.session.execute(stmt):
+        yield _report_row(row)
+
+
+def _course_id_arg():
+    course_id = request.args.get('course_id')
+    return int(course_id) if course_id else None
+
+
+def _build_staff_report(staff_id, course_id, course_ids):
+    rows = db.session.execute(_report_query(staff_id, course_id))
+    report = [_report_row(row) for row in rows]
+    next_due = db.session.query(func.min(Assignment.due_date)).filter(
+        Assignment.course_id.in_(course_ids), Assignment.due_date >= datetime.utcnow()
+    ).scalar()
+    return report, next_due
+
+
 @report_bp.route('/api/reports/staff/<int:staff_id>', methods=['GET'])
 def get_staff_reports(staff_id):
-    course_id = request.args.get('course_id')
-    
     try:
-        # Get courses assigned to staff
-        query = StaffCourse.query.filter_by(staff_id=staff_id)
-        if course_id:
-            query = query.filter_by(course_id=int(course_id))
-            
-        staff_courses = query.all()
-        course_ids = [sc.course_id for sc in staff_courses]
-        
-        if not course_ids:
-            return jsonify([]), 200
-
-        # Get students enrolled in these courses
-        # We need to manually join StudentCourse because it's M2M via a model
-        # Assuming Student has 'enrolled_courses' relationship
-        
-        # Determine total assignments and MCQs per course
-        course_metrics = {}
+        course_id = _course_id_arg()
+        course_ids = select(StaffCourse.course_id).where(StaffCourse.staff_id == staff_id).distinct()
+        if course_id is not None:
+            course_ids = course_ids.where(StaffCourse.course_id == course_id)
+        course_ids = db.session.scalars(course_ids.order_by(StaffCourse.course_id)).all()
+
+        scope_names = [f'staff:{staff_id}', 'students']
         for cid in course_ids:
-            total_assignments = Assignment.query.filter_by(course_id=cid).count()
-            total_mcqs = MCQ.query.filter_by(course_id=cid).count()
-            max_assignment_marks = db.session.query(func.sum(Assignment.max_marks)).filter(Assignment.course_id == cid).scalar() or 0
-            # Assuming 1 mark per MCQ for simplicity if not specified, or sum marks
-            max_mcq_marks = db.session.query(func.sum(MCQ.marks)).filter(MCQ.course_id == cid).scalar() or 0
-            
-            course_metrics[cid] = {
-                'total_items': total_assignments + total_mcqs, # Simplified item count
-                'total_assignments': total_assignments,
-                'total_mcqs': total_mcqs,
-                'max_score': float(max_assignment_marks) + float(max_mcq_marks)
-            }
-
-        student_reports = []
-        
-        # Get all relevant students
-        # Join StudentCourse to filter by course_ids
-        from models import StudentCourse
-        enrollments = StudentCourse.query.filter(StudentCourse.course_id.in_(course_ids), StudentCourse.status == 'active').all()
-        
-        # Process each enrollment (Student + Course Context)
-        for enrollment in enrollments:
-            sid = enrollment.student_id
-            cid = enrollment.course_id
-            student = enrollment.student
-            course = enrollment.course
-            metrics = course_metrics.get(cid, {})
-            
-            # --- Completion Progress ---
-            # Submitted Assignments
-            submitted_assigns = Submission.query.join(Assignment).filter(
-                Assignment.course_id == cid, 
-                Submission.student_id == sid
-            ).count()
-            
-            # Attempted MCQs (Unique MCQs attempted)
-            attempted_mcqs = MCQAttempt.query.join(MCQ).filter(
-                MCQ.course_id == cid,
-                MCQAttempt.student_id == sid
-            ).distinct(MCQAttempt.mcq_id).count() 
-            
-            completed_items = submitted_assigns + attempted_mcqs
-            total_items = metrics.get('total_items', 1) # Avoid div by 0
-            if total_items == 0: total_items = 1
-            
-            percent_completed = min(100, round((completed_items / total_items) * 100, 1))
-            
-            # --- Missed Deadlines ---
-            # Assignments with due_date < now AND no submission
-            missed_assignments = Assignment.query.outerjoin(
-                Submission, 
-                (Submission.assignment_id == Assignment.id) & (Submission.student_id == sid)
-            ).filter(
-                Assignment.course_id == cid,
-                Assignment.due_date < datetime.utcnow(),
-                Submission.id == None # No submission found
-            ).count()
-            
-            # --- Marks / Performance ---
-            # Get Student's result for this course if exists, or calculate on fly
-            # Calculating raw marks for now
-            
-            # Assignment Marks
-            assign_marks = db.session.query(func.sum(Evaluation.marks_obtained)).join(Submission).join(Assignment).filter(
-                Assignment.course_id == cid,
-                Submission.student_id == sid
-            ).scalar() or 0
-            
-            # MCQ Marks
-            # Sum marks of correct attempts (assuming best attempt or latest? Taking sum of unique correct per question simplistically)
-            # A more robust logic might be needed for multiple attempts, but for now:
-            # Get distinct correct attempts
-            correct_mcqs = MCQAttempt.query.join(MCQ).filter(
-                MCQ.course_id == cid,
-                MCQAttempt.student_id == sid,
-                MCQAttempt.is_correct == True
-            ).distinct(MCQAttempt.mcq_id).all()
-            
-            mcq_marks = sum([attempt.mcq.marks for attempt in correct_mcqs])
-            
-            total_obtained = float(assign_marks) + float(mcq_marks)
-            max_possible = metrics.get('max_score', 0)
-            
-            if max_possible > 0:
-                percent_marks = round((total_obtained / max_possible) * 100, 1)
-            else:
-                percent_marks = 0
-                
-            student_reports.append({
-                'student_id': sid,
-                'student_name': student.full_name,
-                'student_code': student.student_code,
-                'course_id': cid,
-                'course_name': course.course_name,
-                'course_code': course.course_code,
-                'percent_completed': percent_completed,
-                'percent_left': 100 - percent_completed,
-                'missed_deadlines': missed_assignments,
-                'marks_obtained': total_obtained,
-                'max_marks': max_possible,
-                'percent_marks': percent_marks
-            })
-
-        return jsonify(student_reports), 200
+            scope_names += [f'course:{cid}', f'course-scores:{cid}']
+        report, _ = report_cache.get_or_build(
+            (staff_id, course_id), scope_names,
+            lambda: _build_staff_report(staff_id, course_id, course_ids),
+            expires=lambda value: value[1],
+        )
+        return jsonify(report), 200
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+
+
+@report_bp.route('/api/reports/staff/<int:staff_id>/export', methods=['GET'])
+def export_staff_reports(staff_id):
+    """Download the staff report as CSV (streamed) or XLSX (?format=xlsx)."""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'xlsx'):
+        return jsonify({'error': 'format must be csv or xlsx'}), 400
+    try:
+        course_id = _course_id_arg()
+    except ValueError:
+        return jsonify({'error': 'course_id must be an integer'}), 400
+
+    filename = f"staff_{staff_id}_report_{datetime.utcnow():%Y%m%d}.{export_format}"
+    if export_format == 'xlsx':
+        return _xlsx_response(_iter_report(staff_id, course_id), filename)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for _, header in REPORT_COLUMNS])
+        for count, report in enumerate(_iter_report(staff_id, course_id), 1):
+            writer.writerow([report[key] for key, _ in REPORT_COLUMNS])
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+
+
+def _xlsx_response(reports, filename):
+    # Write-only workbooks spool rows to disk instead of keeping cells in memory
+    import openpyxl  # heavy import, only needed by the Excel endpoints
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Staff Report')
+    ws.append([header for _, header in REPORT_COLUMNS])
+    for report in reports:
+        ws.append([report[key] for key, _ in REPORT_COLUMNS])
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=filename
+    )
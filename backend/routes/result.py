@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime
 
 from flask import Blueprint, jsonify
 from sqlalchemy.orm import joinedload
 
+from cache import VersionedCache, invalidates, scopes
 from models import (
+    db,
     Assignment,
     Course,
-    MCQ,
-    MCQAttempt,
+    CourseScoreTotal,
     Student,
+    StudentCourseScore,
     Submission,
     StudentCourse
 )
@@ -18,6 +21,14 @@ from models import (
 
 result_bp = Blueprint('result', __name__)
 
+# Course results per student. Score changes bump student:<id> (score_service);
+# course content (names, MCQs, assignments) bumps course:<id>. The payload
+# also depends on time: "final" is released once the last due date passes.
+results_cache = VersionedCache('course_results', maxsize=4096)
+invalidates(Student, lambda s: {f'student:{s.id}'})
+invalidates(StudentCourse, lambda e: scopes('student', 'student_id', e))
+invalidates(Assignment, lambda a: scopes('course', 'course_id', a))
+
 
 def _to_float(value, default: float = 0.0) -> float:
     if value is None:
@@ -37,47 +48,17 @@ def _iso(dt):
         return None
 
 
-def _compute_course_result(student_id: int, course_id: int):
-    now = datetime.utcnow()
-
-    course = Course.query.get_or_404(course_id)
-
-    assignments = Assignment.query.filter_by(course_id=course_id).all()
-    assignment_ids = [a.id for a in assignments]
+def _result_payload(course, totals, score, assignments, submission_by_assignment_id, now):
+    """Result payload of one course from its summary rows and assignment rows."""
+    totals = totals or CourseScoreTotal(course_id=course.id)
+    score = score or StudentCourseScore(course_id=course.id)
 
-    submissions = []
-    if assignment_ids:
-        submissions = (
-            Submission.query.options(joinedload(Submission.evaluation))
-            .filter(Submission.student_id == student_id, Submission.assignment_id.in_(assignment_ids))
-            .all()
-        )
-
-    submission_by_assignment_id = {s.assignment_id: s for s in submissions}
-
-    assignment_total = sum(_to_float(a.max_marks, 0.0) for a in assignments)
-    assignment_earned = 0.0
-    submitted_count = 0
-    graded_count = 0
-
-    last_due_date = None
     assignment_details = []
     for a in assignments:
-        if a.due_date and (last_due_date is None or a.due_date > last_due_date):
-            last_due_date = a.due_date
-
         submission = submission_by_assignment_id.get(a.id)
-        submitted = submission is not None
-        if submitted:
-            submitted_count += 1
-
         marks_obtained = None
-        is_graded = False
         if submission and submission.evaluation and submission.evaluation.marks_obtained is not None:
             marks_obtained = _to_float(submission.evaluation.marks_obtained, 0.0)
-            assignment_earned += marks_obtained
-            is_graded = True
-            graded_count += 1
 
         assignment_details.append(
             {
@@ -85,37 +66,27 @@ def _compute_course_result(student_id: int, course_id: int):
                 'title': a.title,
                 'max_marks': _to_float(a.max_marks, 0.0),
                 'due_date': _iso(a.due_date),
-                'submitted': submitted,
-                'graded': is_graded,
+                'submitted': submission is not None,
+                'graded': marks_obtained is not None,
                 'marks_obtained': marks_obtained,
             }
         )
 
-    all_assignments_submitted = (len(assignments) == 0) or (submitted_count == len(assignments))
+    assignment_count = totals.assignment_count or 0
+    submitted_count = score.submitted_count or 0
+    graded_count = score.graded_count or 0
+    assignment_total = _to_float(totals.assignment_total_marks)
+    assignment_earned = _to_float(score.assignment_earned)
+    last_due_date = totals.last_due_date
+
+    all_assignments_submitted = (assignment_count == 0) or (submitted_count == assignment_count)
     due_passed = bool(last_due_date and now > last_due_date)
     final_released = all_assignments_submitted or due_passed
 
     # Quiz totals are based on all MCQs in the course (not just attempted)
-    mcqs = MCQ.query.filter_by(course_id=course_id).all()
-    mcq_ids = [m.id for m in mcqs]
-
-    attempts = []
-    if mcq_ids:
-        attempts = (
-            MCQAttempt.query.filter(MCQAttempt.student_id == student_id, MCQAttempt.mcq_id.in_(mcq_ids)).all()
-        )
-
-    attempt_by_mcq_id = {a.mcq_id: a for a in attempts}
-
-    quiz_total = sum(_to_float(m.marks, 1.0) for m in mcqs)
-    quiz_earned = 0.0
-    correct_count = 0
-
-    for m in mcqs:
-        attempt = attempt_by_mcq_id.get(m.id)
-        if attempt and attempt.is_correct:
-            correct_count += 1
-            quiz_earned += _to_float(m.marks, 1.0)
+    quiz_total = _to_float(totals.quiz_total_marks)
+    quiz_earned = _to_float(score.quiz_earned)
+    correct_count = score.quiz_correct_count or 0
 
     total_possible = assignment_total + quiz_total
     total_earned = assignment_earned + quiz_earned
@@ -129,7 +100,7 @@ def _compute_course_result(student_id: int, course_id: int):
             'course_name': course.course_name,
         },
         'assignments': {
-            'total_count': len(assignments),
+            'total_count': assignment_count,
             'submitted_count': submitted_count,
             'graded_count': graded_count,
             'earned_marks': round(assignment_earned, 2),
@@ -138,8 +109,8 @@ def _compute_course_result(student_id: int, course_id: int):
             'details': assignment_details,
         },
         'quiz': {
-            'total_questions': len(mcqs),
-            'attempted_count': len(attempts),
+            'total_questions': totals.mcq_count or 0,
+            'attempted_count': score.quiz_attempted_count or 0,
             'correct_count': correct_count,
             'earned_marks': round(quiz_earned, 2),
             'total_marks': round(quiz_total, 2),
@@ -161,6 +132,71 @@ def _compute_course_result(student_id: int, course_id: int):
     return payload
 
 
+def _submissions_by_assignment(student_id, assignment_ids):
+    if not assignment_ids:
+        return {}
+    submissions = (
+        Submission.query.options(joinedload(Submission.evaluation))
+        .filter(Submission.student_id == student_id, Submission.assignment_id.in_(assignment_ids))
+        .all()
+    )
+    return {s.assignment_id: s for s in submissions}
+
+
+def _compute_course_result(student_id: int, course_id: int):
+    """Result of a single course (used by the breakdown endpoint)."""
+    course = db.get_or_404(Course, course_id)
+
+    # Totals come from the incrementally maintained summaries (services/score_service.py);
+    # only the per-assignment details still need the assignment rows.
+    totals = db.session.get(CourseScoreTotal, course_id)
+    score = db.session.get(StudentCourseScore, (student_id, course_id))
+    assignments = Assignment.query.filter_by(course_id=course_id).order_by(Assignment.id).all()
+
+    submissions = {}
+    if score is not None and score.submitted_count:
+        submissions = _submissions_by_assignment(student_id, [a.id for a in assignments])
+
+    return _result_payload(course, totals, score, assignments, submissions, datetime.utcnow())
+
+
+def _compute_course_results(student_id: int, courses):
+    """Results of many courses in a constant number of queries, in the order of ``courses``.
+
+    Equivalent to calling ``_compute_course_result`` per course: summary rows,
+    assignments and submissions are each loaded once for all courses.
+    """
+    course_ids = [c.id for c in courses]
+    if not course_ids:
+        return []
+
+    totals = {t.course_id: t for t in CourseScoreTotal.query.filter(CourseScoreTotal.course_id.in_(course_ids))}
+    scores = {
+        s.course_id: s
+        for s in StudentCourseScore.query.filter(
+            StudentCourseScore.student_id == student_id, StudentCourseScore.course_id.in_(course_ids)
+        )
+    }
+
+    assignments_by_course = defaultdict(list)
+    for a in Assignment.query.filter(Assignment.course_id.in_(course_ids)).order_by(Assignment.id):
+        assignments_by_course[a.course_id].append(a)
+
+    submitted_ids = [
+        a.id
+        for course_id, assignments in assignments_by_course.items()
+        if scores.get(course_id) is not None and scores[course_id].submitted_count
+        for a in assignments
+    ]
+    submissions = _submissions_by_assignment(student_id, submitted_ids)
+
+    now = datetime.utcnow()
+    return [
+        _result_payload(c, totals.get(c.id), scores.get(c.id), assignments_by_course[c.id], submissions, now)
+        for c in courses
+    ]
+
+
 @result_bp.route('/api/student/<int:student_id>/course-results', methods=['GET'])
 def get_student_course_results(student_id: int):
     """Summary results per enrolled course.
@@ -170,35 +206,54 @@ def get_student_course_results(student_id: int):
     - current time is past the last assignment due_date.
     """
 
-    student = Student.query.get_or_404(student_id)
-
-    courses = []
-    enrollments = StudentCourse.query.filter_by(student_id=student.id, status='active').all()
-    for enrollment in enrollments:
-        courses.append(enrollment.course)
-
-    if not courses:
-        # Fallback for legacy data (optional, but safer to just return empty if no enrollments)
-        # Or better yet, we just return what we found. If list is empty, so be it.
-        pass
-
-    course_results = [_compute_course_result(student_id, c.id) for c in courses]
-
-    return jsonify(
-        {
-            'student': {
-                'id': student.id,
-                'full_name': student.full_name,
-                'student_code': student.student_code,
-            },
-            'courses': course_results,
-        }
+    course_ids = [
+        row[0]
+        for row in db.session.query(StudentCourse.course_id)
+        .filter_by(student_id=student_id, status='active')
+        .order_by(StudentCourse.id)
+    ]
+    scope_names = [f'student:{student_id}'] + [f'course:{course_id}' for course_id in course_ids]
+    return jsonify(results_cache.get_or_build(
+        student_id, scope_names, lambda: _build_course_results(student_id), expires=_next_release
+    ))
+
+
+def _build_course_results(student_id: int):
+    student = db.get_or_404(Student, student_id)
+
+    enrollments = (
+        StudentCourse.query.options(joinedload(StudentCourse.course))
+        .filter_by(student_id=student.id, status='active')
+        .order_by(StudentCourse.id)
+        .all()
     )
+    courses = [enrollment.course for enrollment in enrollments if enrollment.course is not None]
+
+    return {
+        'student': {
+            'id': student.id,
+            'full_name': student.full_name,
+            'student_code': student.student_code,
+        },
+        'courses': _compute_course_results(student_id, courses),
+    }
+
+
+def _next_release(payload):
+    """The earliest future last-due-date, when a course's final result gets released."""
+    now = datetime.utcnow()
+    due_dates = [
+        datetime.fromisoformat(course['assignments']['last_due_date'])
+        for course in payload['courses']
+        if course['assignments']['last_due_date']
+    ]
+    upcoming = [due for due in due_dates if due > now]
+    return min(upcoming) if upcoming else None
 
 
 @result_bp.route('/api/student/<int:student_id>/courses/<int:course_id>/result-breakdown', methods=['GET'])
 def get_student_course_result_breakdown(student_id: int, course_id: int):
     """Detailed breakdown for a single course (assignments + quiz + final gating)."""
 
-    Student.query.get_or_404(student_id)
+    db.get_or_404(Student, student_id)
     return jsonify(_compute_course_result(student_id, course_id))
@@ -25,7 +25,7 @@ def create():
 
 @semester_bp.route('/api/semesters/<int:id>', methods=['DELETE'])
 def delete(id):
-    semester = Semester.query.get_or_404(id)
+    semester = db.get_or_404(Semester, id)
     db.session.delete(semester)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash
 from models import db, Staff
+from pagination import paginate
 
 staff_bp = Blueprint('staff', __name__)
 
@@ -18,13 +19,13 @@ def generate_staff_code():
 
 @staff_bp.route('/api/staff', methods=['GET'])
 def get_all():
-    staff_list = Staff.query.all()
-    return jsonify([{
+    page = paginate(Staff.query, descending=False)
+    return page.response([{
         'id': s.id,
         'staff_code': s.staff_code,
         'email': s.email,
         'full_name': s.full_name
-    } for s in staff_list])
+    } for s in page.items])
 
 @staff_bp.route('/api/staff', methods=['POST'])
 def create():
@@ -55,7 +56,7 @@ def create():
 
 @staff_bp.route('/api/staff/<int:id>', methods=['DELETE'])
 def delete(id):
-    staff = Staff.query.get_or_404(id)
+    staff = db.get_or_404(Staff, id)
     db.session.delete(staff)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
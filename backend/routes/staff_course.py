@@ -67,7 +67,7 @@ def create():
 
 @staff_course_bp.route('/api/staff-courses/<int:id>', methods=['DELETE'])
 def delete(id):
-    allocation = StaffCourse.query.get_or_404(id)
+    allocation = db.get_or_404(StaffCourse, id)
     db.session.delete(allocation)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash
 from models import db, Student, StudentCourse, Course, Program, Semester
+from pagination import paginate
 from datetime import datetime
 
 student_bp = Blueprint('student', __name__)
@@ -24,8 +25,8 @@ def generate_student_code():
 
 @student_bp.route('/api/students', methods=['GET'])
 def get_all():
-    students = Student.query.all()
-    return jsonify([{
+    page = paginate(Student.query, descending=False)
+    return page.response([{
         'id': s.id,
         'student_code': s.student_code,
         'username': s.username,
@@ -34,7 +35,7 @@ def get_all():
         'program_id': s.program_id,
         'semester_id': s.semester_id,
         'enrollment_date': s.enrollment_date.isoformat() if s.enrollment_date else None
-    } for s in students])
+    } for s in page.items])
 
 @student_bp.route('/api/students', methods=['POST'])
 def create():
@@ -102,7 +103,7 @@ def register_student():
         course_ids = data.get('course_ids', [])
         for course_id in course_ids:
             # Verify course exists and belongs to the selected program/semester
-            course = Course.query.get(course_id)
+            course = db.session.get(Course, course_id)
             if course:
                 enrollment = StudentCourse(
                     student_id=student.id,
@@ -153,7 +154,7 @@ def get_enrolled_courses(student_id):
 @student_bp.route('/api/students/<int:student_id>/courses/available', methods=['GET'])
 def get_available_courses(student_id):
     """Get courses available for enrollment (not already enrolled)"""
-    student = Student.query.get_or_404(student_id)
+    student = db.get_or_404(Student, student_id)
     
     # Get already enrolled course IDs
     enrolled_ids = [e.course_id for e in StudentCourse.query.filter_by(student_id=student_id).all()]
@@ -183,7 +184,7 @@ def enroll_in_course(student_id):
     if not course_ids:
         return jsonify({'error': 'No courses specified'}), 400
     
-    student = Student.query.get_or_404(student_id)
+    student = db.get_or_404(Student, student_id)
     enrolled = []
     already_enrolled = []
     
@@ -239,7 +240,7 @@ def drop_course(student_id, course_id):
 
 @student_bp.route('/api/students/<int:id>', methods=['DELETE'])
 def delete(id):
-    student = Student.query.get_or_404(id)
+    student = db.get_or_404(Student, id)
     db.session.delete(student)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
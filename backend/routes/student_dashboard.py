@@ -1,14 +1,29 @@
-from flask import Blueprint, jsonify
-from models import db, Student, Course, StudentCourse, StaffCourse, StudyMaterial, Assignment, Submission, Result, MCQ
-from datetime import datetime, timezone
+import hashlib
+import json
+
+from flask import Blueprint, Response, abort, jsonify, request
+from sqlalchemy import func, select
+from cache import VersionedCache, invalidates
+from services.course_service import primary_staff_course, primary_staff_courses
+from services.material_service import load_tree, material_counts, walk
+from models import (
+    db, Student, Course, StudentCourse, StudyMaterial, Assignment, Submission, Result, Program,
+    Semester,
+)
+from datetime import datetime
 
 student_dashboard_bp = Blueprint('student_dashboard', __name__)
 
-def serialize_material(m):
-    """Serialize a study material for the API response"""
-    # Count MCQs linked to this material
-    mcq_count = MCQ.query.filter_by(study_material_id=m.id).count()
-    
+UPCOMING_LIMIT = 5
+
+# Dashboard payload + ETag per student. Enrollments and submissions bump
+# student:<id>, assignments course:<id>, program/semester renames "catalog".
+dashboard_cache = VersionedCache('student_dashboard', maxsize=4096)
+invalidates(Program, lambda p: {'catalog'})
+invalidates(Semester, lambda s: {'catalog'})
+
+def serialize_material(m, counts):
+    """Serialize a study material tree (children already linked by material_service)"""
     return {
         'id': m.id,
         'title': m.title,
@@ -17,140 +32,210 @@ def serialize_material(m):
         'file_type': m.file_type,
         'thumbnail_path': m.thumbnail_path,
         'upload_date': m.upload_date.isoformat() if m.upload_date else None,
-        'mcq_count': mcq_count,
-        'children': [serialize_material(c) for c in m.children]
+        'mcq_count': counts[m.id]['mcq_count'],
+        'assignment_count': counts[m.id]['assignment_count'],
+        'children': [serialize_material(c, counts) for c in m.children]
     }
 
 
-@student_dashboard_bp.route('/api/student/<int:student_id>/dashboard', methods=['GET'])
-def get_dashboard(student_id):
-    """Get dashboard statistics for a student"""
-    student = Student.query.get_or_404(student_id)
-    
-    # Get courses for student's program and semester
-    # Get enrolled courses
-    courses = Course.query.join(StudentCourse).filter(
-        StudentCourse.student_id == student_id,
-        StudentCourse.status == 'active'
-    ).all()
-    
-    # Get all assignments for these courses
-    course_ids = [c.id for c in courses]
-    assignments = Assignment.query.filter(Assignment.course_id.in_(course_ids)).all()
-    
-    # Get student's submissions
-    submissions = Submission.query.filter_by(student_id=student_id).all()
-    submitted_assignment_ids = [s.assignment_id for s in submissions]
-    
-    # Calculate pending vs completed
-    pending = [a for a in assignments if a.id not in submitted_assignment_ids and a.due_date]
-    
-    # Sort pending by due_date
-    pending.sort(key=lambda x: x.due_date)
+def _dashboard_payload(student_id):
+    """Dashboard data in two statements: student + counts, then the next pending assignments."""
+    enrolled = (
+        select(StudentCourse.course_id)
+        .join(Course, Course.id == StudentCourse.course_id)
+        .where(StudentCourse.student_id == student_id, StudentCourse.status == 'active')
+    )
+    student = db.session.execute(
+        select(
+            Student.id,
+            Student.full_name,
+            Student.student_code,
+            Program.program_name,
+            Semester.semester_name,
+            select(func.count()).select_from(enrolled.subquery()).scalar_subquery().label('enrolled_courses'),
+            select(func.count(Assignment.id)).where(Assignment.course_id.in_(enrolled))
+            .scalar_subquery().label('total_assignments'),
+            select(func.count(Submission.id)).where(Submission.student_id == student_id)
+            .scalar_subquery().label('completed_assignments'),
+        )
+        .outerjoin(Program, Program.id == Student.program_id)
+        .outerjoin(Semester, Semester.id == Student.semester_id)
+        .where(Student.id == student_id)
+    ).first()
+    if student is None:
+        abort(404)
 
-    # Filter for strictly upcoming assignments (future due date)
-    now = datetime.utcnow()
-    upcoming_pending = [a for a in pending if a.due_date and a.due_date.replace(tzinfo=None) > now]
-    
-    # Serialize upcoming assignments (next 5)
-    upcoming_data = []
-    for a in upcoming_pending[:5]:
-        upcoming_data.append({
-            'id': a.id,
-            'title': a.title,
-            'due_date': a.due_date.isoformat() if a.due_date else None,
-            'course_name': a.course.course_name if a.course else 'Unknown Course',
-            'course_id': a.course_id
-        })
+    # Pending = not submitted by this student and due in the future; the
+    # window count is the total before LIMIT
+    submitted = select(Submission.id).where(
+        Submission.assignment_id == Assignment.id, Submission.student_id == student_id
+    )
+    upcoming = db.session.execute(
+        select(
+            Assignment.id,
+            Assignment.title,
+            Assignment.due_date,
+            Assignment.course_id,
+            Course.course_name,
+            func.count().over().label('pending_count'),
+        )
+        .join(Course, Course.id == Assignment.course_id)
+        .where(
+            Assignment.course_id.in_(enrolled),
+            Assignment.due_date > datetime.utcnow(),
+            ~submitted.exists(),
+        )
+        .order_by(Assignment.due_date, Assignment.id)
+        .limit(UPCOMING_LIMIT)
+    ).all()
 
-    return jsonify({
+    return {
         'student': {
             'id': student.id,
             'full_name': student.full_name,
             'student_code': student.student_code,
-            'program': student.program.program_name if student.program else None,
-            'semester': student.semester.semester_name if student.semester else None
+            'program': student.program_name,
+            'semester': student.semester_name
         },
         'stats': {
-            'enrolled_courses': len(courses),
-            'pending_assignments': len(upcoming_pending),
-            'completed_assignments': len(submissions),
-            'total_assignments': len(assignments)
+            'enrolled_courses': student.enrolled_courses,
+            'pending_assignments': upcoming[0].pending_count if upcoming else 0,
+            'completed_assignments': student.completed_assignments,
+            'total_assignments': student.total_assignments
         },
-        'upcoming_assignments': upcoming_data
-    })
+        'upcoming_assignments': [
+            {
+                'id': a.id,
+                'title': a.title,
+                'due_date': a.due_date.isoformat(),
+                'course_name': a.course_name,
+                'course_id': a.course_id
+            }
+            for a in upcoming
+        ]
+    }
+
+
+def _dashboard_expiry(entry):
+    """The dashboard changes without any write once the next upcoming assignment falls due."""
+    upcoming = entry[0]['upcoming_assignments']
+    return datetime.fromisoformat(upcoming[0]['due_date']) if upcoming else None
+
+
+@student_dashboard_bp.route('/api/student/<int:student_id>/dashboard', methods=['GET'])
+def get_dashboard(student_id):
+    """Get dashboard statistics for a student
+
+    The response carries a strong ETag of the body; an If-None-Match that
+    still matches the cached entry is answered with 304 after the version
+    check alone, without running the dashboard queries.
+    """
+    course_ids = db.session.scalars(
+        select(StudentCourse.course_id)
+        .where(StudentCourse.student_id == student_id, StudentCourse.status == 'active')
+        .order_by(StudentCourse.course_id)
+    ).all()
+    scope_names = [f'student:{student_id}', 'catalog'] + [f'course:{course_id}' for course_id in course_ids]
+
+    def build():
+        payload = _dashboard_payload(student_id)
+        body = json.dumps(payload, sort_keys=True).encode()
+        return payload, hashlib.sha256(body).hexdigest()[:32]
+
+    payload, etag = dashboard_cache.get_or_build(student_id, scope_names, build, expires=_dashboard_expiry)
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @student_dashboard_bp.route('/api/student/<int:student_id>/courses', methods=['GET'])
 def get_courses(student_id):
     """Get enrolled courses for a student based on their program and semester"""
-    student = Student.query.get_or_404(student_id)
-    
-    # Get courses for student's program and semester
-    # Get enrolled courses
-    courses = Course.query.join(StudentCourse).filter(
-        StudentCourse.student_id == student_id,
-        StudentCourse.status == 'active'
+    # One statement: enrolled courses with grouped material and assignment
+    # counts; materials are those of the course's primary staff allocation
+    enrolled = select(StudentCourse.course_id).where(
+        StudentCourse.student_id == student_id, StudentCourse.status == 'active'
+    )
+    primary = primary_staff_courses(enrolled)
+    materials = (
+        select(StudyMaterial.staff_course_id, func.count(StudyMaterial.id).label('count'))
+        .where(StudyMaterial.staff_course_id.in_(select(primary.c.staff_course_id)), StudyMaterial.parent_id.is_(None))
+        .group_by(StudyMaterial.staff_course_id)
+        .subquery()
+    )
+    assignments = (
+        select(Assignment.course_id, func.count(Assignment.id).label('count'))
+        .where(Assignment.course_id.in_(enrolled))
+        .group_by(Assignment.course_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Course.id,
+            Course.course_code,
+            Course.course_name,
+            primary.c.staff_course_id,
+            func.coalesce(materials.c.count, 0).label('materials_count'),
+            func.coalesce(assignments.c.count, 0).label('assignments_count'),
+        )
+        .join(StudentCourse, StudentCourse.course_id == Course.id)
+        .outerjoin(primary, primary.c.course_id == Course.id)
+        .outerjoin(materials, materials.c.staff_course_id == primary.c.staff_course_id)
+        .outerjoin(assignments, assignments.c.course_id == Course.id)
+        .where(StudentCourse.student_id == student_id, StudentCourse.status == 'active')
+        .order_by(StudentCourse.id)
     ).all()
-    
-    result = []
-    for course in courses:
-        # Get staff course to access materials
-        staff_course = StaffCourse.query.filter_by(course_id=course.id).first()
-        materials_count = 0
-        if staff_course:
-            materials_count = StudyMaterial.query.filter_by(
-                staff_course_id=staff_course.id,
-                parent_id=None
-            ).count()
-        
-        # Get assignments count
-        assignments_count = Assignment.query.filter_by(course_id=course.id).count()
-        
-        result.append({
-            'id': course.id,
-            'course_code': course.course_code,
-            'course_name': course.course_name,
-            'materials_count': materials_count,
-            'assignments_count': assignments_count,
-            'staff_course_id': staff_course.id if staff_course else None
-        })
-    
-    return jsonify(result)
+    if not rows:
+        db.get_or_404(Student, student_id)
+
+    return jsonify([
+        {
+            'id': row.id,
+            'course_code': row.course_code,
+            'course_name': row.course_name,
+            'materials_count': row.materials_count,
+            'assignments_count': row.assignments_count,
+            'staff_course_id': row.staff_course_id
+        }
+        for row in rows
+    ])
 
 @student_dashboard_bp.route('/api/student/<int:student_id>/courses/<int:course_id>/materials', methods=['GET'])
 def get_course_materials(student_id, course_id):
     """Get study materials for a specific course"""
-    student = Student.query.get_or_404(student_id)
-    course = Course.query.get_or_404(course_id)
+    student = db.get_or_404(Student, student_id)
+    course = db.get_or_404(Course, course_id)
     
     # Verify student has access to this course
     if course.program_id != student.program_id or course.semester_id != student.semester_id:
         return jsonify({'error': 'Access denied to this course'}), 403
     
     # Get staff course
-    staff_course = StaffCourse.query.filter_by(course_id=course_id).first()
+    staff_course = primary_staff_course(course_id)
     if not staff_course:
         return jsonify([])
     
-    # Get root-level materials (no parent)
-    materials = StudyMaterial.query.filter_by(
-        staff_course_id=staff_course.id,
-        parent_id=None
-    ).order_by(StudyMaterial.upload_date.desc()).all()
-    
+    # The whole tree in one query, counts in another; roots newest first
+    materials = load_tree([staff_course.id])
+    counts = material_counts([m.id for m in walk(materials)])
+
     return jsonify({
         'course': {
             'id': course.id,
             'course_code': course.course_code,
             'course_name': course.course_name
         },
-        'materials': [serialize_material(m) for m in materials]
+        'materials': [serialize_material(m, counts) for m in materials]
     })
 
 @student_dashboard_bp.route('/api/student/<int:student_id>/results', methods=['GET'])
 def get_results(student_id):
     """Get all results for a student"""
-    student = Student.query.get_or_404(student_id)
+    student = db.get_or_404(Student, student_id)
     
     results = Result.query.filter_by(student_id=student_id).all()
     
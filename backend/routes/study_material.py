@@ -1,7 +1,11 @@
 import os
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from sqlalchemy import select
 from werkzeug.utils import secure_filename
 from models import db, StudyMaterial, StaffCourse
+from pagination import paginate
+from services.course_service import primary_staff_course
+from services.material_service import ancestors, delete_subtree, is_descendant, load_children, load_tree, subtree
 from services.notification_service import NotificationService
 from datetime import datetime
 
@@ -28,6 +32,11 @@ def serialize_material(m, include_children=False):
         data['children'] = [serialize_material(c, False) for c in m.children]
     return data
 
+def serialize_tree(m):
+    data = serialize_material(m)
+    data['children'] = [serialize_tree(c) for c in m.children]
+    return data
+
 def _process_file_upload(file, file_type):
     """Internal helper to save file and generate thumbnail if needed"""
     if not (file and file.filename and allowed_file(file.filename)):
@@ -70,19 +79,45 @@ def get_all():
     if parent_only == 'true':
         query = query.filter_by(parent_id=None)
     
-    materials = query.order_by(StudyMaterial.upload_date.desc()).all()
-    return jsonify([serialize_material(m, include_children=True) for m in materials])
+    page = paginate(query, StudyMaterial.upload_date)
+    load_children(page.items)
+    return page.response([serialize_material(m, include_children=True) for m in page.items])
+
+def _check_parent(parent_id, staff_course_id, material_id=None):
+    """Validate a requested parent; returns (parent_id as int or None, error response or None).
+
+    The parent must exist and belong to the same staff course (the closure
+    table and load_tree() assume a tree never spans courses); a material
+    being moved must not go below itself.
+    """
+    if parent_id is None:
+        return None, None
+    try:
+        parent_id = int(parent_id)
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'parent_id must be an integer'}), 400)
+    parent = db.session.get(StudyMaterial, parent_id)
+    if parent is None:
+        return None, (jsonify({'error': 'Parent material not found'}), 404)
+    if parent.staff_course_id != staff_course_id:
+        return None, (jsonify({'error': 'Parent material belongs to another course'}), 400)
+    if material_id is not None and is_descendant(parent_id, material_id):
+        return None, (jsonify({'error': 'A material cannot be moved below itself'}), 400)
+    return parent_id, None
 
 @study_material_bp.route('/api/study-materials', methods=['POST'])
 def create():
     data = request.get_json()
+    parent_id, error = _check_parent(data.get('parent_id'), data.get('staff_course_id'))
+    if error:
+        return error
     material = StudyMaterial(
         title=data['title'],
         description=data.get('description'),
         file_path=data.get('file_path'),
         file_type=data.get('file_type', 'video'),
         staff_course_id=data.get('staff_course_id'),
-        parent_id=data.get('parent_id')
+        parent_id=parent_id
     )
     db.session.add(material)
     db.session.commit()
@@ -97,27 +132,54 @@ def create():
 
 @study_material_bp.route('/api/study-materials/<int:id>', methods=['GET'])
 def get_one(id):
-    material = StudyMaterial.query.get_or_404(id)
+    material = db.get_or_404(StudyMaterial, id)
+    load_children([material])
     return jsonify(serialize_material(material, include_children=True))
 
 @study_material_bp.route('/api/study-materials/<int:id>', methods=['PUT'])
 def update(id):
-    material = StudyMaterial.query.get_or_404(id)
+    material = db.get_or_404(StudyMaterial, id)
     data = request.get_json()
     material.title = data.get('title', material.title)
     material.description = data.get('description', material.description)
     material.file_path = data.get('file_path', material.file_path)
     material.file_type = data.get('file_type', material.file_type)
+    # Moving a material takes its whole subtree along
+    if 'parent_id' in data and data['parent_id'] != material.parent_id:
+        parent_id, error = _check_parent(data['parent_id'], material.staff_course_id, material.id)
+        if error:
+            return error
+        material.parent_id = parent_id
     db.session.commit()
     return jsonify({'message': 'Updated successfully'})
 
 @study_material_bp.route('/api/study-materials/<int:id>', methods=['DELETE'])
 def delete(id):
-    material = StudyMaterial.query.get_or_404(id)
+    # ?recursive=true deletes everything below the material too; otherwise its children become roots
+    material = db.get_or_404(StudyMaterial, id)
+    if request.args.get('recursive') == 'true':
+        deleted = delete_subtree(id)
+        db.session.commit()
+        return jsonify({'message': 'Deleted successfully', 'deleted': deleted})
     db.session.delete(material)
     db.session.commit()
     return jsonify({'message': 'Deleted successfully'})
 
+@study_material_bp.route('/api/study-materials/<int:id>/subtree', methods=['GET'])
+def get_subtree(id):
+    max_depth = request.args.get('max_depth', type=int)
+    nodes = subtree(id, max_depth)
+    if not nodes:
+        return jsonify({'error': 'Material not found'}), 404
+    return jsonify(serialize_tree(nodes[0]))
+
+@study_material_bp.route('/api/study-materials/<int:id>/breadcrumbs', methods=['GET'])
+def get_breadcrumbs(id):
+    path = ancestors(id)
+    if not path:
+        return jsonify({'error': 'Material not found'}), 404
+    return jsonify([{'id': m.id, 'title': m.title} for m in path])
+
 # Download study material files
 @study_material_bp.route('/api/study-materials/download/<filename>')
 def download_file(filename):
@@ -132,25 +194,18 @@ def serve_thumbnail(filename):
 # Get materials by course
 @study_material_bp.route('/api/courses/<int:course_id>/materials', methods=['GET'])
 def get_by_course(course_id):
-    from models import StaffCourse
-    staff_courses = StaffCourse.query.filter_by(course_id=course_id).all()
-    staff_course_ids = [sc.id for sc in staff_courses]
-    
-    # Get only parent materials (parent_id is None)
-    materials = StudyMaterial.query.filter(
-        StudyMaterial.staff_course_id.in_(staff_course_ids),
-        StudyMaterial.parent_id == None
-    ).order_by(StudyMaterial.upload_date.desc()).all()
-    
+    staff_course_ids = select(StaffCourse.id).where(StaffCourse.course_id == course_id)
+
+    # Parent materials (parent_id is None), newest first, with their children
+    materials = load_tree(staff_course_ids)
+
     return jsonify([serialize_material(m, include_children=True) for m in materials])
 
 # Add material to a course (with file upload support)
 @study_material_bp.route('/api/courses/<int:course_id>/materials', methods=['POST'])
 def add_to_course(course_id):
-    from models import StaffCourse
-    
     try:
-        staff_course = StaffCourse.query.filter_by(course_id=course_id).first()
+        staff_course = primary_staff_course(course_id)
         
         if not staff_course:
             return jsonify({'error': 'Course not found or no staff assigned'}), 404
@@ -178,13 +233,16 @@ def add_to_course(course_id):
         else:
             # JSON request
             data = request.get_json()
+            parent_id, error = _check_parent(data.get('parent_id'), staff_course.id)
+            if error:
+                return error
             material = StudyMaterial(
                 title=data['title'],
                 description=data.get('description'),
                 file_path=data.get('file_path', data.get('video_url', '')),
                 file_type=data.get('file_type', 'youtube'),
                 staff_course_id=staff_course.id,
-                parent_id=data.get('parent_id')
+                parent_id=parent_id
             )
     
         db.session.add(material)
@@ -202,7 +260,7 @@ def add_to_course(course_id):
 
 @study_material_bp.route('/api/study-materials/<int:parent_id>/children', methods=['POST'])
 def add_child(parent_id):
-    parent = StudyMaterial.query.get_or_404(parent_id)
+    parent = db.get_or_404(StudyMaterial, parent_id)
     
     try:
         if request.content_type and 'multipart/form-data' in request.content_type:
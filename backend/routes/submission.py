@@ -2,9 +2,10 @@ import os
 import sys
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from werkzeug.utils import secure_filename
-from models import db, Submission, Assignment, Evaluation, Student
+from models import db, Submission, Assignment, Course, Evaluation, Student
 from datetime import datetime
-from sqlalchemy.orm import joinedload
+from pagination import paginate
+from projection import Field, Projection, isoformat
 
 # Add parent directory to path to import services
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,7 +29,7 @@ def create():
         return jsonify({'error': 'Missing assignment_id or student_id'}), 400
         
     # Check if assignment exists and is not overdue
-    assignment = Assignment.query.get(assignment_id)
+    assignment = db.session.get(Assignment, assignment_id)
     if not assignment:
         return jsonify({'error': 'Assignment not found'}), 404
         
@@ -67,6 +68,41 @@ def create():
     
     return jsonify({'id': submission.id, 'message': 'Submitted successfully'}), 201
 
+_ASSIGNMENT_JOIN = (Assignment, Assignment.id == Submission.assignment_id)
+
+# Fields of the submission list, selected as columns (see projection.py).
+# Nested objects are built from several columns and are None when the row is missing.
+SUBMISSION_FIELDS = Projection(Submission, [
+    Field('id', Submission.id),
+    Field('assignment_id', Submission.assignment_id),
+    Field('student_id', Submission.student_id),
+    Field('student', Student.id, Student.student_code, Student.full_name, Student.username,
+          format=lambda id, code, name, username: {
+              'id': id, 'student_code': code, 'full_name': name, 'username': username,
+          } if id is not None else None,
+          joins=[(Student, Student.id == Submission.student_id)]),
+    Field('assignment', Assignment.id, Assignment.title, Assignment.course_id,
+          format=lambda id, title, course_id: {
+              'id': id, 'title': title, 'course_id': course_id,
+          } if id is not None else None,
+          joins=[_ASSIGNMENT_JOIN]),
+    Field('course', Course.id, Course.course_code, Course.course_name,
+          format=lambda id, code, name: {
+              'id': id, 'course_code': code, 'course_name': name,
+          } if id is not None else None,
+          joins=[_ASSIGNMENT_JOIN, (Course, Course.id == Assignment.course_id)]),
+    Field('submission_text', Submission.submission_text),
+    Field('file_path', Submission.file_path),
+    Field('submitted_at', Submission.submitted_at, format=isoformat),
+    Field('status', Submission.status),
+    Field('evaluation', Evaluation.id, Evaluation.marks_obtained, Evaluation.feedback,
+          format=lambda id, marks, feedback: {
+              'marks_obtained': float(marks) if marks else None,
+              'feedback': feedback,
+          } if id is not None else None,
+          joins=[(Evaluation, Evaluation.submission_id == Submission.id)]),
+])
+
 @submission_bp.route('/api/submissions', methods=['GET'])
 def get_all():
     assignment_id = request.args.get('assignment_id')
@@ -74,54 +110,24 @@ def get_all():
     staff_id = request.args.get('staff_id')
     course_id = request.args.get('course_id')
     
-    query = Submission.query.options(
-        joinedload(Submission.evaluation),
-        joinedload(Submission.assignment).joinedload(Assignment.course),
-        joinedload(Submission.student),
-    )
+    fields = SUBMISSION_FIELDS.requested()
+    query = SUBMISSION_FIELDS.query(fields)
     if assignment_id:
-        query = query.filter_by(assignment_id=assignment_id)
+        query = query.filter(Submission.assignment_id == assignment_id)
     if student_id:
-        query = query.filter_by(student_id=student_id)
+        query = query.filter(Submission.student_id == student_id)
 
     # Optional staff/course filtering (used by staff UI)
     if staff_id or course_id:
-        query = query.join(Assignment, Submission.assignment_id == Assignment.id)
+        assignments = db.session.query(Assignment.id)
         if staff_id:
-            query = query.filter(Assignment.staff_id == int(staff_id))
+            assignments = assignments.filter(Assignment.staff_id == int(staff_id))
         if course_id:
-            query = query.filter(Assignment.course_id == int(course_id))
+            assignments = assignments.filter(Assignment.course_id == int(course_id))
+        query = query.filter(Submission.assignment_id.in_(assignments))
         
-    submissions = query.all()
-    return jsonify([{
-        'id': s.id,
-        'assignment_id': s.assignment_id,
-        'student_id': s.student_id,
-        'student': {
-            'id': s.student.id,
-            'student_code': s.student.student_code,
-            'full_name': s.student.full_name,
-            'username': s.student.username,
-        } if getattr(s, 'student', None) else None,
-        'assignment': {
-            'id': s.assignment.id,
-            'title': s.assignment.title,
-            'course_id': s.assignment.course_id,
-        } if getattr(s, 'assignment', None) else None,
-        'course': {
-            'id': s.assignment.course.id,
-            'course_code': s.assignment.course.course_code,
-            'course_name': s.assignment.course.course_name,
-        } if getattr(s, 'assignment', None) and getattr(s.assignment, 'course', None) else None,
-        'submission_text': s.submission_text,
-        'file_path': s.file_path,
-        'submitted_at': s.submitted_at.isoformat(),
-        'status': s.status,
-        'evaluation': {
-            'marks_obtained': float(s.evaluation.marks_obtained) if s.evaluation and s.evaluation.marks_obtained else None,
-            'feedback': s.evaluation.feedback if s.evaluation else None
-        } if s.evaluation else None
-    } for s in submissions])
+    page = paginate(query, descending=False)
+    return page.response([SUBMISSION_FIELDS.dump(row, fields) for row in page.items])
 
 @submission_bp.route('/api/submissions/download/<filename>')
 def download_file(filename):
@@ -129,7 +135,7 @@ def download_file(filename):
 
 @submission_bp.route('/api/submissions/<int:id>/evaluate', methods=['POST'])
 def evaluate(id):
-    submission = Submission.query.get_or_404(id)
+    submission = db.get_or_404(Submission, id)
     data = request.get_json()
     
     evaluation = Evaluation.query.filter_by(submission_id=id).first()
@@ -0,0 +1,49 @@
+"""
+Course Service - Staff-course resolution shared by the course and material routes
+
+A course can have several StaffCourse rows (one per staff member and
+academic year). Views that need a single one - where a student's materials
+live, where a new material is attached - use the *primary* allocation:
+the one in the most recent academic year (by start date, allocations
+without a year last), oldest allocation first among equals.
+"""
+from sqlalchemy import func, select
+
+from models import AcademicYear, StaffCourse
+
+
+def _primary_rank():
+    return func.row_number().over(
+        partition_by=StaffCourse.course_id,
+        order_by=(AcademicYear.start_date.desc().nulls_last(), StaffCourse.id),
+    )
+
+
+def primary_staff_courses(course_ids=None):
+    """Subquery of (course_id, staff_course_id) with the primary allocation of each course.
+
+    ``course_ids`` may be a list or a select of ids to restrict the ranking to.
+    """
+    ranked = (
+        select(StaffCourse.course_id, StaffCourse.id.label('staff_course_id'), _primary_rank().label('rank'))
+        .outerjoin(AcademicYear, AcademicYear.id == StaffCourse.academic_year_id)
+    )
+    if course_ids is not None:
+        ranked = ranked.where(StaffCourse.course_id.in_(course_ids))
+    ranked = ranked.subquery()
+    return (
+        select(ranked.c.course_id, ranked.c.staff_course_id)
+        .where(ranked.c.rank == 1)
+        .subquery()
+    )
+
+
+def primary_staff_course(course_id):
+    """The primary StaffCourse of a course, or None if nobody teaches it."""
+    return (
+        StaffCourse.query
+        .outerjoin(AcademicYear, AcademicYear.id == StaffCourse.academic_year_id)
+        .filter(StaffCourse.course_id == course_id)
+        .order_by(AcademicYear.start_date.desc().nulls_last(), StaffCourse.id)
+        .first()
+    )
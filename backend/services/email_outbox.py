@@ -0,0 +1,319 @@
+"""
+Email Outbox - Durable, rate-limited email delivery
+
+Notification emails are not sent from the request. ``enqueue_email()`` adds
+an ``email_outbox`` row to the current session, so the message commits (or
+rolls back) together with its Notification, and a process restart never
+loses it. Committing wakes a small pool of sender threads (``EMAIL_WORKERS``
+per process, started on first use so forked gunicorn workers each get
+their own) that drain the table:
+
+- Rows are claimed in batches with a lease (``SKIP LOCKED`` on PostgreSQL),
+  so any number of processes can drain the same outbox. A row whose sender
+  died mid-send is claimed again once its lease expires; delivery is
+  therefore at least once.
+- Each provider (SMTP relay) is held to ``EMAIL_RATE_LIMIT`` messages per
+  second per process, or its entry in ``EMAIL_PROVIDER_RATE_LIMITS``.
+- A failed send is retried with exponential backoff and jitter, starting at
+  ``EMAIL_RETRY_BASE_SECONDS``. After ``EMAIL_MAX_ATTEMPTS``, or straight
+  away on a permanent 5xx rejection, the row is dead-lettered
+  (``status='dead'``) with its last error.
+- A delivered message sets ``Notification.email_sent`` in the same
+  transaction that marks the row sent.
+
+``flask email drain`` delivers everything due from the command line, and
+``flask email retry-dead`` re-queues dead-lettered messages.
+"""
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, event, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from metrics import registry as metrics
+from models import db, EmailOutbox, Notification
+
+EMAIL_THREAD_NAME = 'lls-email'
+BATCH_SIZE = 20
+LEASE = timedelta(minutes=5)
+# Sender threads also poll, for retries coming due and rows queued by other processes
+POLL_INTERVAL = 5.0
+
+
+def mail_configured(config):
+    return bool(config.get('MAIL_USERNAME') and config.get('MAIL_PASSWORD'))
+
+
+def provider(config):
+    """The provider (SMTP relay) outbox rows are rate-limited under."""
+    return config.get('MAIL_SERVER') or 'default'
+
+
+def enqueue_email(to_email, subject, body, html_body=None, notification=None):
+    """Add an outbox row to the current session; it is delivered once the session commits."""
+    message = EmailOutbox(
+        to_email=to_email,
+        subject=subject[:200],
+        body=body,
+        html_body=html_body,
+        provider=provider(current_app.config),
+        status='pending',
+        next_attempt_at=datetime.utcnow(),
+    )
+    if notification is not None:
+        message.notification = notification
+    db.session.add(message)
+    db.session.info['email_enqueued'] = True
+    return message
+
+
+def build_message(sender, to_email, subject, body, html_body=None):
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg.attach(MIMEText(body, 'plain'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def smtp_transport(config):
+    """A ``send(message)`` callable delivering through this process's pooled SMTP sessions."""
+    pool = dispatcher.smtp_pool(config)
+    sender = config.get('MAIL_DEFAULT_SENDER')
+
+    def send(message):
+        msg = build_message(sender, message.to_email, message.subject, message.body, message.html_body)
+        pool.send(sender, [message.to_email], msg.as_string())
+    return send
+
+
+def _is_permanent(error):
+    """Rejections retrying cannot fix (bad recipient, 5xx other than authentication)."""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def backoff(attempts, config):
+    """Delay before retry number ``attempts`` (1-based): exponential with jitter, capped."""
+    base = config.get('EMAIL_RETRY_BASE_SECONDS', 30)
+    cap = config.get('EMAIL_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap) * random.uniform(0.5, 1.0))
+
+
+class RateLimiter:
+    """Token bucket per provider; ``acquire()`` blocks until the provider may send again."""
+
+    def __init__(self, default_rate, rates=None):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, provider):
+        rate = self.rates.get(provider, self.default_rate)
+        if not rate or rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(provider, now))
+            self._next_slot[provider] = slot + 1.0 / rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _claim(limit):
+    """Lease up to ``limit`` due rows to this caller; returns them as detached snapshots."""
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    candidate = aliased(EmailOutbox)
+    due = (
+        select(candidate.id)
+        .where(or_(
+            and_(candidate.status == 'pending', candidate.next_attempt_at <= now),
+            and_(candidate.status == 'sending', candidate.locked_until < now),
+        ))
+        .order_by(candidate.next_attempt_at, candidate.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    db.session.execute(
+        update(EmailOutbox).where(EmailOutbox.id.in_(due))
+        .values(status='sending', claimed_by=token, locked_until=now + LEASE),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+    rows = db.session.execute(
+        select(EmailOutbox.id, EmailOutbox.notification_id, EmailOutbox.to_email, EmailOutbox.subject,
+               EmailOutbox.body, EmailOutbox.html_body, EmailOutbox.provider, EmailOutbox.attempts)
+        .where(EmailOutbox.claimed_by == token, EmailOutbox.status == 'sending')
+        .order_by(EmailOutbox.id)
+    ).all()
+    db.session.commit()
+    return token, rows
+
+
+def _record(message, token, **values):
+    """Store the outcome of a delivery attempt, unless the lease was lost to another sender."""
+    values.update(attempts=message.attempts + 1, claimed_by=None, locked_until=None)
+    result = db.session.execute(
+        update(EmailOutbox).where(EmailOutbox.id == message.id, EmailOutbox.claimed_by == token).values(**values),
+        execution_options={'synchronize_session': False},
+    )
+    if result.rowcount and values['status'] == 'sent' and message.notification_id:
+        db.session.execute(
+            update(Notification).where(Notification.id == message.notification_id).values(email_sent=True),
+            execution_options={'synchronize_session': False},
+        )
+    db.session.commit()
+
+
+def process_batch(transport=None, limiter=None, limit=BATCH_SIZE):
+    """Claim and deliver one batch of due messages. Returns {'sent': n, 'retry': n, 'dead': n}."""
+    config = current_app.config
+    transport = transport or smtp_transport(config)
+    limiter = limiter or dispatcher.limiter(config)
+    max_attempts = config.get('EMAIL_MAX_ATTEMPTS', 6)
+    outcome = {'sent': 0, 'retry': 0, 'dead': 0}
+
+    token, messages = _claim(limit)
+    for message in messages:
+        limiter.acquire(message.provider)
+        try:
+            transport(message)
+        except Exception as e:
+            attempts = message.attempts + 1
+            if attempts >= max_attempts or _is_permanent(e):
+                _record(message, token, status='dead', last_error=str(e)[:2000])
+                current_app.logger.error(f"Email dead-lettered after {attempts} attempt(s): "
+                                         f"{message.subject} to {message.to_email}: {e}")
+                result = 'dead'
+            else:
+                _record(message, token, status='pending', last_error=str(e)[:2000],
+                        next_attempt_at=datetime.utcnow() + backoff(attempts, config))
+                current_app.logger.warning(f"Email failed (attempt {attempts}), will retry: {e}")
+                result = 'retry'
+        else:
+            _record(message, token, status='sent', sent_at=datetime.utcnow(), last_error=None)
+            current_app.logger.info(f"Email sent: {message.subject} to {message.to_email}")
+            result = 'sent'
+        outcome[result] += 1
+        metrics.inc('lls_email_deliveries_total', (('result', result),))
+    return outcome
+
+
+def drain(transport=None, limiter=None):
+    """Deliver batches until nothing is due. Returns the summed outcome."""
+    total = {'sent': 0, 'retry': 0, 'dead': 0}
+    while True:
+        outcome = process_batch(transport, limiter)
+        for key, count in outcome.items():
+            total[key] += count
+        if not any(outcome.values()):
+            return total
+
+
+def retry_dead():
+    """Re-queue every dead-lettered message with a fresh attempt budget. Returns how many."""
+    result = db.session.execute(
+        update(EmailOutbox).where(EmailOutbox.status == 'dead')
+        .values(status='pending', attempts=0, next_attempt_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+class EmailDispatcher:
+    """The per-process pool of sender threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._limiter = None
+        self._pool = None
+
+    def limiter(self, config):
+        with self._lock:
+            if self._limiter is None:
+                self._limiter = RateLimiter(config.get('EMAIL_RATE_LIMIT', 5),
+                                            config.get('EMAIL_PROVIDER_RATE_LIMITS', {}))
+            return self._limiter
+
+    def smtp_pool(self, config):
+        from services.smtp_pool import SMTPPool  # deferred: pulls in smtplib and ssl
+        with self._lock:
+            if self._pool is None:
+                self._pool = SMTPPool(
+                    config.get('MAIL_SERVER'), config.get('MAIL_PORT'),
+                    config.get('MAIL_USERNAME'), config.get('MAIL_PASSWORD'),
+                    use_tls=config.get('MAIL_USE_TLS', True),
+                    max_sessions=config.get('EMAIL_SMTP_SESSIONS', 2),
+                    max_messages=config.get('EMAIL_SMTP_SESSION_MESSAGES', 100),
+                    idle_timeout=config.get('EMAIL_SMTP_IDLE_SECONDS', 60),
+                )
+            return self._pool
+
+    def reset_after_fork(self):
+        """Forget the parent's sender threads and SMTP sessions; the sockets belong to the parent."""
+        # A parent thread may have held the lock when the process forked
+        self._lock = threading.Lock()
+        self._threads = []
+        if self._pool is not None:
+            self._pool.close(quit=False)
+            self._pool = None
+
+    def active_threads(self):
+        return sum(1 for t in self._threads if t.is_alive())
+
+    def wake(self, app):
+        """Start the sender threads if needed and have one look at the outbox now."""
+        workers = app.config.get('EMAIL_WORKERS', 2)
+        if workers <= 0 or not mail_configured(app.config):
+            return
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for _ in range(workers - len(self._threads)):
+                thread = threading.Thread(target=self._run, args=(app,), name=EMAIL_THREAD_NAME, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self._wake.set()
+
+    def _run(self, app):
+        while True:
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            busy = True
+            while busy:
+                try:
+                    with app.app_context():
+                        busy = any(process_batch().values())
+                except Exception as e:
+                    app.logger.error(f"Email sender failed: {e}")
+                    busy = False
+
+
+dispatcher = EmailDispatcher()
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_senders(session):
+    if session.info.pop('email_enqueued', False) and has_app_context():
+        dispatcher.wake(current_app._get_current_object())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_enqueued(session):
+    session.info.pop('email_enqueued', None)
@@ -0,0 +1,231 @@
+"""
+Material Service - Study material trees without per-node queries
+
+Materials form a tree through ``parent_id``. Serializers walk
+``material.children``, which would lazy-load one level per node; the
+loaders here fetch the nodes in one query and fill in ``children`` on every
+loaded material, so walking the tree afterwards touches the database no
+more. Per-material MCQ and assignment counts come from one grouped query.
+
+The ``study_material_closure`` table indexes the hierarchy: one row per
+(ancestor, descendant) pair with their distance. Subtrees, breadcrumbs and
+subtree deletes are single indexed lookups on it. An ``after_flush`` hook
+keeps it in step with inserts, ``parent_id`` changes and deletes made
+through the ORM; rows written any other way need ``flask materials
+rebuild-hierarchy``.
+"""
+from collections import defaultdict
+
+from sqlalchemy import delete, event, func, inspect, literal, or_, select, true, union_all, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from cache import bump_scopes
+from models import db, Assignment, MCQ, StaffCourse, StudyMaterial, StudyMaterialClosure
+
+_closure = StudyMaterialClosure.__table__
+_CLOSURE_COLUMNS = ['ancestor_id', 'descendant_id', 'depth']
+
+
+def link_children(parents, nodes):
+    """Set ``children`` of every material in ``parents`` to its nodes from ``nodes`` (oldest first)."""
+    by_parent = defaultdict(list)
+    for node in nodes:
+        by_parent[node.parent_id].append(node)
+    for parent in parents:
+        set_committed_value(parent, 'children', sorted(by_parent.get(parent.id, ()), key=lambda m: m.id))
+
+
+def load_tree(staff_course_ids):
+    """Every material of the staff courses in one query; returns the roots, newest first, with children linked."""
+    materials = (
+        StudyMaterial.query
+        .filter(StudyMaterial.staff_course_id.in_(staff_course_ids))
+        .order_by(StudyMaterial.upload_date.desc(), StudyMaterial.id)
+        .all()
+    )
+    link_children(materials, materials)
+    return [m for m in materials if m.parent_id is None]
+
+
+def load_children(materials):
+    """Load the direct children of ``materials`` in one query and link them."""
+    ids = [m.id for m in materials]
+    children = StudyMaterial.query.filter(StudyMaterial.parent_id.in_(ids)).all() if ids else []
+    link_children(materials, children)
+    return children
+
+
+def walk(roots):
+    """Every material of the (already linked) trees, depth first."""
+    for material in roots:
+        yield material
+        yield from walk(material.children)
+
+
+def material_counts(material_ids):
+    """{material_id: {'mcq_count': n, 'assignment_count': n}} from one grouped query."""
+    counts = {material_id: {'mcq_count': 0, 'assignment_count': 0} for material_id in material_ids}
+    if not counts:
+        return counts
+    ids = list(counts)
+    rows = db.session.execute(union_all(
+        select(MCQ.study_material_id, literal('mcq_count'), func.count(MCQ.id))
+        .where(MCQ.study_material_id.in_(ids)).group_by(MCQ.study_material_id),
+        select(Assignment.study_material_id, literal('assignment_count'), func.count(Assignment.id))
+        .where(Assignment.study_material_id.in_(ids)).group_by(Assignment.study_material_id),
+    ))
+    for material_id, kind, count in rows:
+        counts[material_id][kind] = count
+    return counts
+
+
+# -- hierarchy index -------------------------------------------------------
+
+def subtree(material_id, max_depth=None):
+    """The material and its descendants down to ``max_depth`` levels, parents first, children linked.
+
+    Materials at the depth limit get an empty ``children`` list.
+    """
+    query = (
+        StudyMaterial.query
+        .join(StudyMaterialClosure, StudyMaterialClosure.descendant_id == StudyMaterial.id)
+        .filter(StudyMaterialClosure.ancestor_id == material_id)
+    )
+    if max_depth is not None:
+        query = query.filter(StudyMaterialClosure.depth <= max_depth)
+    nodes = query.order_by(StudyMaterialClosure.depth, StudyMaterial.id).all()
+    link_children(nodes, nodes)
+    return nodes
+
+
+def ancestors(material_id):
+    """Breadcrumb of a material: the root first, the material itself last."""
+    return (
+        StudyMaterial.query
+        .join(StudyMaterialClosure, StudyMaterialClosure.ancestor_id == StudyMaterial.id)
+        .filter(StudyMaterialClosure.descendant_id == material_id)
+        .order_by(StudyMaterialClosure.depth.desc())
+        .all()
+    )
+
+
+def is_descendant(material_id, ancestor_id):
+    """Whether ``material_id`` is ``ancestor_id`` or lies below it."""
+    return db.session.execute(
+        select(StudyMaterialClosure.depth)
+        .where(StudyMaterialClosure.ancestor_id == ancestor_id, StudyMaterialClosure.descendant_id == material_id)
+    ).first() is not None
+
+
+def delete_subtree(material_id):
+    """Delete a material and all its descendants; returns how many were deleted.
+
+    Their assignments and MCQs are kept but detached, as deleting a single
+    material through the ORM does. The statements bypass the unit of work,
+    so the cache scopes of the deleted materials are bumped here.
+    """
+    rows = db.session.execute(
+        select(StudyMaterial.id, StaffCourse.course_id)
+        .join(StudyMaterialClosure, StudyMaterialClosure.descendant_id == StudyMaterial.id)
+        .outerjoin(StaffCourse, StaffCourse.id == StudyMaterial.staff_course_id)
+        .where(StudyMaterialClosure.ancestor_id == material_id)
+    ).all()
+    ids = [row.id for row in rows]
+    if not ids:
+        return 0
+    db.session.execute(update(MCQ).where(MCQ.study_material_id.in_(ids)).values(study_material_id=None))
+    db.session.execute(update(Assignment).where(Assignment.study_material_id.in_(ids)).values(study_material_id=None))
+    db.session.execute(delete(StudyMaterialClosure).where(StudyMaterialClosure.descendant_id.in_(ids)))
+    db.session.execute(delete(StudyMaterial).where(StudyMaterial.id.in_(ids)))
+
+    changed = {'admin-reports:study_material'} | {f'material:{i}' for i in ids}
+    changed.update(f'course:{row.course_id}' for row in rows if row.course_id is not None)
+    bump_scopes(db.session, changed)
+    return len(ids)
+
+
+def rebuild_hierarchy(conn):
+    """Recompute the closure table from ``parent_id``, one statement per tree level. Returns the material count."""
+    material = StudyMaterial.__table__
+    conn.execute(delete(_closure))
+    count = conn.execute(_closure.insert().from_select(
+        _CLOSURE_COLUMNS, select(material.c.id, material.c.id, literal(0))
+    )).rowcount
+    depth = 0
+    while True:
+        link = _closure.alias()
+        inserted = conn.execute(_closure.insert().from_select(
+            _CLOSURE_COLUMNS,
+            select(link.c.ancestor_id, material.c.id, link.c.depth + 1)
+            .join(material, material.c.parent_id == link.c.descendant_id)
+            .where(link.c.depth == depth),
+        )).rowcount
+        if not inserted:
+            return count
+        depth += 1
+
+
+def _link(conn, material_id, parent_id):
+    """Index a new material: itself, plus every ancestor of its parent one level further away."""
+    rows = select(literal(material_id), literal(material_id), literal(0))
+    if parent_id is not None:
+        rows = union_all(rows, select(_closure.c.ancestor_id, literal(material_id), _closure.c.depth + 1)
+                         .where(_closure.c.descendant_id == parent_id))
+    conn.execute(_closure.insert().from_select(_CLOSURE_COLUMNS, rows))
+
+
+def _move(conn, material_id, parent_id):
+    """Re-attach the subtree of ``material_id`` below ``parent_id`` (None: make it a root)."""
+    inner = _closure.alias()
+    members = select(inner.c.descendant_id).where(inner.c.ancestor_id == material_id)
+    if parent_id is not None and conn.execute(
+        select(_closure.c.depth).where(_closure.c.ancestor_id == material_id, _closure.c.descendant_id == parent_id)
+    ).first():
+        raise ValueError(f'Study material {parent_id} is inside the subtree of {material_id}')
+
+    # Cut the links from outside the subtree, then join the subtree to the new parent's ancestors
+    conn.execute(delete(_closure).where(_closure.c.descendant_id.in_(members), _closure.c.ancestor_id.not_in(members)))
+    if parent_id is not None:
+        above, below = _closure.alias(), _closure.alias()
+        conn.execute(_closure.insert().from_select(
+            _CLOSURE_COLUMNS,
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above).join(below, true())  # every new ancestor x every subtree member
+            .where(above.c.descendant_id == parent_id, below.c.ancestor_id == material_id),
+        ))
+
+
+def _parents_first(materials):
+    pending = {m.id: m for m in materials}
+    ordered = []
+
+    def visit(material):
+        del pending[material.id]
+        if material.parent_id in pending:
+            visit(pending[material.parent_id])
+        ordered.append(material)
+
+    while pending:
+        visit(next(iter(pending.values())))
+    return ordered
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_hierarchy(session, flush_context):
+    new = [o for o in session.new if isinstance(o, StudyMaterial)]
+    deleted = [o for o in session.deleted if isinstance(o, StudyMaterial)]
+    moved = [o for o in session.dirty
+             if isinstance(o, StudyMaterial) and o not in session.deleted
+             and inspect(o).attrs.parent_id.history.has_changes()]
+    if not (new or deleted or moved):
+        return
+    conn = session.connection()
+    if deleted:
+        ids = [o.id for o in deleted]
+        conn.execute(delete(_closure).where(or_(_closure.c.ancestor_id.in_(ids), _closure.c.descendant_id.in_(ids))))
+    for material in _parents_first(new):
+        _link(conn, material.id, material.parent_id)
+    # Deleting a material detaches its children, which arrive here as moves to the root
+    for material in moved:
+        _move(conn, material.id, material.parent_id)
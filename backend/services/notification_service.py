@@ -1,41 +1,91 @@
 """
 Notification Service - Handles all notifications and email sending
+
+Emails are not sent from the request: they go into the email outbox in the
+same commit as their notification and are delivered by the outbox's sender
+threads (see services/email_outbox.py).
 """
-import smtplib
-import threading
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from flask import current_app
-from models import db, Notification, Student, Staff, Assignment, Submission, Evaluation
+from sqlalchemy import and_, exists, false, func, insert, literal, select, union
+from models import db, Notification, Student, StudentCourse, Staff, StaffCourse, Assignment, Submission, Evaluation, \
+    Course, EmailOutbox
+from services.email_outbox import dispatcher, enqueue_email, mail_configured, provider, smtp_transport
+from services.scheduler import scheduler
+
+# Stands for each recipient's name in course-wide message templates
+STUDENT_NAME = '{student_name}'
+
+
+def course_student_ids(course):
+    """Select of the ids of a course's students: active enrolments plus its program/semester cohort."""
+    enrolled = select(StudentCourse.student_id).where(
+        StudentCourse.course_id == course.id, StudentCourse.status == 'active'
+    )
+    if course.program_id and course.semester_id:
+        enrolled = union(enrolled, select(Student.id).where(
+            Student.program_id == course.program_id, Student.semester_id == course.semester_id
+        ))
+    return enrolled
+
+
+def deadline_reminder_content(assignment_title, due_date, student_name, now=None):
+    """The (title, message, html_message) of a deadline reminder."""
+    days_left = (due_date - (now or datetime.utcnow())).days
+    
+    title = f"⏰ Assignment Deadline Reminder: {assignment_title}"
+    message = f"""Dear {student_name},
 
+This is a friendly reminder that you have an upcoming assignment deadline.
 
-def _send_email_background(app, to_email, subject, body, html_body, mail_server, mail_port, mail_username, mail_password, mail_sender, use_tls):
-    """Background thread function to send email without blocking"""
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = mail_sender
-        msg['To'] = to_email
-        
-        text_part = MIMEText(body, 'plain')
-        msg.attach(text_part)
-        
-        if html_body:
-            html_part = MIMEText(html_body, 'html')
-            msg.attach(html_part)
-        
-        with smtplib.SMTP(mail_server, mail_port) as server:
-            if use_tls:
-                server.starttls()
-            server.login(mail_username, mail_password)
-            server.sendmail(mail_sender, to_email, msg.as_string())
-        
-        with app.app_context():
-            app.logger.info(f"Email sent (background): {subject} to {to_email}")
-    except Exception as e:
-        with app.app_context():
-            app.logger.error(f"Failed to send email (background): {str(e)}")
+Assignment Details:
+- Title: {assignment_title}
+- Due Date: {due_date.strftime('%B %d, %Y at %I:%M %p')}
+- Time Remaining: {days_left} day(s)
+
+Please make sure to submit your assignment before the deadline.
+
+Best regards,
+LLS Team"""
+
+    urgency_color = "#ef4444" if days_left <= 1 else "#f59e0b" if days_left <= 3 else "#3b82f6"
+    
+    html_message = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background: {urgency_color}; padding: 20px; border-radius: 10px 10px 0 0;">
+                <h1 style="color: white; margin: 0;">⏰ Deadline Reminder</h1>
+            </div>
+            <div style="background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; border-radius: 0 0 10px 10px;">
+                <p>Dear <strong>{student_name}</strong>,</p>
+                <p>This is a friendly reminder about your upcoming assignment deadline.</p>
+                
+                <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid {urgency_color};">
+                    <h3 style="margin: 0 0 10px 0; color: #374151;">📝 {assignment_title}</h3>
+                    <p style="margin: 5px 0; color: #6b7280;">
+                        <strong>Due Date:</strong> {due_date.strftime('%B %d, %Y at %I:%M %p')}
+                    </p>
+                    <p style="margin: 5px 0; font-size: 18px; font-weight: bold; color: {urgency_color};">
+                        ⏳ {days_left} day(s) remaining
+                    </p>
+                </div>
+                
+                <p style="background: #fef3c7; padding: 10px; border-radius: 5px; color: #92400e;">
+                    ⚠️ Please submit your assignment before the deadline to avoid late penalties.
+                </p>
+                
+                <p style="color: #6b7280; font-size: 14px; margin-top: 20px;">
+                    Best regards,<br>
+                    <strong>LLS Team</strong>
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return title, message, html_message
 
 
 class NotificationService:
@@ -43,8 +93,12 @@ class NotificationService:
     
     @staticmethod
     def create_notification(user_type, user_id, title, message, notification_type=None, 
-                          reference_type=None, reference_id=None, send_email=True):
-        """Create a notification and optionally send email"""
+                          reference_type=None, reference_id=None, send_email=True,
+                          html_message=None, email=None):
+        """Create a notification and, if send_email, queue its email in the same commit.
+
+        ``email`` skips the address lookup when the caller already has it.
+        """
         notification = Notification(
             user_type=user_type,
             user_id=user_id,
@@ -55,79 +109,96 @@ class NotificationService:
             reference_id=reference_id
         )
         db.session.add(notification)
-        db.session.commit()
         
-        # Send email if configured
-        if send_email:
-            email = NotificationService._get_user_email(user_type, user_id)
+        if send_email and mail_configured(current_app.config):
+            email = email or NotificationService._get_user_email(user_type, user_id)
             if email:
-                email_sent = NotificationService.send_email(email, title, message)
-                notification.email_sent = email_sent
-                db.session.commit()
+                enqueue_email(email, title, message, html_message, notification=notification)
         
+        db.session.commit()
         return notification
     
+    @staticmethod
+    def notify_course_students(course, title, message, html_message, notification_type,
+                               reference_type, reference_id):
+        """Notify every student of a course, whatever its size, in one commit.
+
+        The notifications are written by a single INSERT ... SELECT over the
+        recipient query, with STUDENT_NAME in ``message`` replaced by each
+        student's name. When mail is configured, their emails are queued in
+        one bulk insert, linked by the ids the notification insert returned;
+        the outbox sender threads deliver them. Returns the number of
+        students notified.
+        """
+        now = datetime.utcnow()
+        recipients = course_student_ids(course)
+        created = db.session.execute(insert(Notification).from_select(
+            ['user_type', 'user_id', 'title', 'message', 'notification_type', 'reference_type',
+             'reference_id', 'is_read', 'email_sent', 'created_at'],
+            select(
+                literal('student'), Student.id, literal(title),
+                func.replace(literal(message), STUDENT_NAME, Student.full_name),
+                literal(notification_type), literal(reference_type), literal(reference_id),
+                false(), false(), literal(now),
+            ).where(Student.id.in_(recipients))
+        ).returning(Notification.id, Notification.user_id)).all()
+        
+        if created and mail_configured(current_app.config):
+            notification_ids = {row.user_id: row.id for row in created}
+            students = db.session.execute(
+                select(Student.id, Student.email, Student.full_name)
+                .where(Student.id.in_(recipients), Student.email.isnot(None), Student.email != '')
+            ).all()
+            emails = [
+                {'notification_id': notification_ids[student.id], 'to_email': student.email,
+                 'subject': title[:200], 'body': message.replace(STUDENT_NAME, student.full_name),
+                 'html_body': html_message.replace(STUDENT_NAME, student.full_name),
+                 'provider': provider(current_app.config), 'status': 'pending', 'attempts': 0,
+                 'next_attempt_at': now, 'created_at': now}
+                # A student who joined the course after the notification insert gets neither
+                for student in students if student.id in notification_ids
+            ]
+            if emails:
+                db.session.execute(insert(EmailOutbox), emails)
+                db.session.info['email_enqueued'] = True
+        
+        db.session.commit()
+        return len(created)
+    
+    @staticmethod
+    def active_email_threads():
+        """Number of background email sender threads alive"""
+        return dispatcher.active_threads()
+    
     @staticmethod
     def _get_user_email(user_type, user_id):
         """Get email address for a user"""
         if user_type == 'student':
-            student = Student.query.get(user_id)
+            student = db.session.get(Student, user_id)
             return student.email if student else None
         elif user_type == 'staff':
-            staff = Staff.query.get(user_id)
+            staff = db.session.get(Staff, user_id)
             return staff.email if staff else None
         return None
     
     @staticmethod
     def send_email(to_email, subject, body, html_body=None, background=True):
-        """Send an email using SMTP. If background=True, sends in a separate thread."""
+        """Send an email. If background=True, queues it in the outbox; otherwise sends it over SMTP now."""
+        if not mail_configured(current_app.config):
+            current_app.logger.info(f"Email not sent (no credentials): {subject} to {to_email}")
+            return False
+        
+        if background:
+            enqueue_email(to_email, subject, body, html_body)
+            db.session.commit()
+            current_app.logger.info(f"Email queued: {subject} to {to_email}")
+            return True
+        
         try:
-            mail_server = current_app.config.get('MAIL_SERVER')
-            mail_port = current_app.config.get('MAIL_PORT')
-            mail_username = current_app.config.get('MAIL_USERNAME')
-            mail_password = current_app.config.get('MAIL_PASSWORD')
-            mail_sender = current_app.config.get('MAIL_DEFAULT_SENDER')
-            use_tls = current_app.config.get('MAIL_USE_TLS', True)
-            
-            # If no email credentials configured, log and return
-            if not mail_username or not mail_password:
-                current_app.logger.info(f"Email not sent (no credentials): {subject} to {to_email}")
-                return False
-            
-            if background:
-                # Send email in background thread
-                app = current_app._get_current_object()
-                thread = threading.Thread(
-                    target=_send_email_background,
-                    args=(app, to_email, subject, body, html_body, mail_server, mail_port, mail_username, mail_password, mail_sender, use_tls)
-                )
-                thread.daemon = True
-                thread.start()
-                current_app.logger.info(f"Email queued (background): {subject} to {to_email}")
-                return True
-            else:
-                # Send email synchronously
-                msg = MIMEMultipart('alternative')
-                msg['Subject'] = subject
-                msg['From'] = mail_sender
-                msg['To'] = to_email
-                
-                text_part = MIMEText(body, 'plain')
-                msg.attach(text_part)
-                
-                if html_body:
-                    html_part = MIMEText(html_body, 'html')
-                    msg.attach(html_part)
-                
-                with smtplib.SMTP(mail_server, mail_port) as server:
-                    if use_tls:
-                        server.starttls()
-                    server.login(mail_username, mail_password)
-                    server.sendmail(mail_sender, to_email, msg.as_string())
-                
-                current_app.logger.info(f"Email sent: {subject} to {to_email}")
-                return True
-            
+            message = SimpleNamespace(to_email=to_email, subject=subject, body=body, html_body=html_body)
+            smtp_transport(current_app.config)(message)
+            current_app.logger.info(f"Email sent: {subject} to {to_email}")
+            return True
         except Exception as e:
             current_app.logger.error(f"Failed to send email: {str(e)}")
             return False
@@ -139,8 +210,8 @@ class NotificationService:
     @staticmethod
     def notify_assignment_submitted(submission):
         """Notify student that their assignment was submitted successfully AND notify staff"""
-        student = Student.query.get(submission.student_id)
-        assignment = Assignment.query.get(submission.assignment_id)
+        student = db.session.get(Student, submission.student_id)
+        assignment = db.session.get(Assignment, submission.assignment_id)
         
         if not student or not assignment:
             return None
@@ -202,18 +273,13 @@ LLS Team"""
             notification_type='assignment_submitted',
             reference_type='submission',
             reference_id=submission.id,
-            send_email=False  # We'll send HTML email manually
+            html_message=html_message,
+            email=student.email
         )
-        
-        # Send HTML email to student
-        if student.email:
-            NotificationService.send_email(student.email, title, message, html_message)
-            notification.email_sent = True
-            db.session.commit()
 
         # 2. Notify Staff (if assigned)
         if assignment.staff_id:
-            staff = Staff.query.get(assignment.staff_id)
+            staff = db.session.get(Staff, assignment.staff_id)
             if staff:
                 staff_title = f"New Submission: {assignment.title}"
                 staff_message = f"""Dear {staff.full_name},
@@ -269,24 +335,21 @@ LLS Team"""
                     notification_type='assignment_submission_received',
                     reference_type='submission',
                     reference_id=submission.id,
-                    send_email=False
+                    html_message=staff_html_message,
+                    email=staff.email
                 )
 
-                # Send email to staff
-                if staff.email:
-                    NotificationService.send_email(staff.email, staff_title, staff_message, staff_html_message)
-
         return notification
     
     @staticmethod
     def notify_assignment_graded(evaluation):
         """Notify student that their assignment has been graded"""
-        submission = Submission.query.get(evaluation.submission_id)
+        submission = db.session.get(Submission, evaluation.submission_id)
         if not submission:
             return None
             
-        student = Student.query.get(submission.student_id)
-        assignment = Assignment.query.get(submission.assignment_id)
+        student = db.session.get(Student, submission.student_id)
+        assignment = db.session.get(Assignment, submission.assignment_id)
         
         if not student or not assignment:
             return None
@@ -354,53 +417,25 @@ LLS Team"""
             notification_type='assignment_graded',
             reference_type='evaluation',
             reference_id=evaluation.id,
-            send_email=False
+            html_message=html_message,
+            email=student.email
         )
         
-        if student.email:
-            email_sent = NotificationService.send_email(student.email, title, message, html_message)
-            notification.email_sent = email_sent
-            db.session.commit()
-        
         return notification
     
     @staticmethod
     def notify_new_study_material(material):
         """Notify all students in a course that new study material is available"""
-        # Local import to avoid circular dependency
-        from models import StaffCourse, Course, StudentCourse, Student
-        
-        staff_course = StaffCourse.query.get(material.staff_course_id)
+        staff_course = db.session.get(StaffCourse, material.staff_course_id)
         if not staff_course:
-            return
+            return 0
             
-        course = Course.query.get(staff_course.course_id)
+        course = db.session.get(Course, staff_course.course_id)
         if not course:
-            return
+            return 0
 
-        # Find all students enrolled in this course
-        # Method 1: Via StudentCourse enrollment table
-        student_courses = StudentCourse.query.filter_by(course_id=course.id, status='active').all()
-        enrolled_student_ids = {sc.student_id for sc in student_courses}
-        
-        # Method 2: Via program_id and semester_id matching (fallback)
-        if course.program_id and course.semester_id:
-            program_students = Student.query.filter_by(
-                program_id=course.program_id,
-                semester_id=course.semester_id
-            ).all()
-            for s in program_students:
-                enrolled_student_ids.add(s.id)
-        
-        # Get all unique students
-        students = Student.query.filter(Student.id.in_(enrolled_student_ids)).all() if enrolled_student_ids else []
-        
-        for student in students:
-            if not student:
-                continue
-                
-            title = f"📚 New Study Material: {material.title}"
-            message = f"""Dear {student.full_name},
+        title = f"📚 New Study Material: {material.title}"
+        message = f"""Dear {STUDENT_NAME},
 
 New study material has been uploaded for your course "{course.course_name}".
 
@@ -415,92 +450,60 @@ You can access the new material in your student dashboard.
 Best regards,
 LLS Team"""
 
-            html_message = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <div style="background: linear-gradient(135deg, #3b82f6, #2563eb); padding: 20px; border-radius: 10px 10px 0 0;">
-                        <h1 style="color: white; margin: 0;">📚 New Study Material</h1>
-                    </div>
-                    <div style="background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; border-radius: 0 0 10px 10px;">
-                        <p>Dear <strong>{student.full_name}</strong>,</p>
-                        <p>New study material has been uploaded for your course.</p>
-                        
-                        <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #3b82f6;">
-                            <h3 style="margin: 0 0 10px 0; color: #374151;">📖 {material.title}</h3>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Course:</strong> {course.course_name}
-                            </p>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Type:</strong> {material.file_type.capitalize()}
-                            </p>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Uploaded:</strong> {material.upload_date.strftime('%B %d, %Y at %I:%M %p')}
-                            </p>
-                        </div>
-                        
-                        <p>Log in to your dashboard to view or download the material.</p>
-                        
-                        <p style="color: #6b7280; font-size: 14px; margin-top: 20px;">
-                            Best regards,<br>
-                            <strong>LLS Team</strong>
+        html_message = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <div style="background: linear-gradient(135deg, #3b82f6, #2563eb); padding: 20px; border-radius: 10px 10px 0 0;">
+                    <h1 style="color: white; margin: 0;">📚 New Study Material</h1>
+                </div>
+                <div style="background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; border-radius: 0 0 10px 10px;">
+                    <p>Dear <strong>{STUDENT_NAME}</strong>,</p>
+                    <p>New study material has been uploaded for your course.</p>
+                    
+                    <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #3b82f6;">
+                        <h3 style="margin: 0 0 10px 0; color: #374151;">📖 {material.title}</h3>
+                        <p style="margin: 5px 0; color: #6b7280;">
+                            <strong>Course:</strong> {course.course_name}
+                        </p>
+                        <p style="margin: 5px 0; color: #6b7280;">
+                            <strong>Type:</strong> {material.file_type.capitalize()}
+                        </p>
+                        <p style="margin: 5px 0; color: #6b7280;">
+                            <strong>Uploaded:</strong> {material.upload_date.strftime('%B %d, %Y at %I:%M %p')}
                         </p>
                     </div>
+                    
+                    <p>Log in to your dashboard to view or download the material.</p>
+                    
+                    <p style="color: #6b7280; font-size: 14px; margin-top: 20px;">
+                        Best regards,<br>
+                        <strong>LLS Team</strong>
+                    </p>
                 </div>
-            </body>
-            </html>
-            """
-            
-            notification = NotificationService.create_notification(
-                user_type='student',
-                user_id=student.id,
-                title=title,
-                message=message,
-                notification_type='new_study_material',
-                reference_type='study_material',
-                reference_id=material.id,
-                send_email=False
-            )
-            
-            if student.email:
-                email_sent = NotificationService.send_email(student.email, title, message, html_message)
-                notification.email_sent = email_sent
-                db.session.commit()
+            </div>
+        </body>
+        </html>
+        """
+
+        return NotificationService.notify_course_students(
+            course, title, message, html_message,
+            notification_type='new_study_material',
+            reference_type='study_material',
+            reference_id=material.id
+        )
 
     @staticmethod
     def notify_new_assignment(assignment):
         """Notify all students in a course that a new assignment has been posted"""
-        from models import Course, StudentCourse, Student
-        
-        course = Course.query.get(assignment.course_id)
+        course = db.session.get(Course, assignment.course_id)
         if not course:
-            return
+            return 0
 
-        # Find all students enrolled in this course
-        # Method 1: Via StudentCourse enrollment table
-        student_courses = StudentCourse.query.filter_by(course_id=course.id, status='active').all()
-        enrolled_student_ids = {sc.student_id for sc in student_courses}
+        title = f"📝 New Assignment: {assignment.title}"
+        due_date_str = assignment.due_date.strftime('%B %d, %Y at %I:%M %p') if assignment.due_date else "Not set"
         
-        # Method 2: Via program_id and semester_id matching (fallback)
-        if course.program_id and course.semester_id:
-            program_students = Student.query.filter_by(
-                program_id=course.program_id,
-                semester_id=course.semester_id
-            ).all()
-            for s in program_students:
-                enrolled_student_ids.add(s.id)
-        
-        # Get all unique students
-        students = Student.query.filter(Student.id.in_(enrolled_student_ids)).all() if enrolled_student_ids else []
-        
-        for student in students:
-            if not student:
-                continue
-                
-            title = f"📝 New Assignment: {assignment.title}"
-            due_date_str = assignment.due_date.strftime('%B %d, %Y at %I:%M %p') if assignment.due_date else "Not set"
-            
-            message = f"""Dear {student.full_name},
+        message = f"""Dear {STUDENT_NAME},
 
 A new assignment has been posted for your course "{course.course_name}".
 
@@ -515,104 +518,31 @@ Please check the assignment details and submit your work before the deadline.
 Best regards,
 LLS Team"""
 
-            html_message = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <div style="background: linear-gradient(135deg, #f59e0b, #d97706); padding: 20px; border-radius: 10px 10px 0 0;">
-                        <h1 style="color: white; margin: 0;">📝 New Assignment Posted</h1>
-                    </div>
-                    <div style="background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; border-radius: 0 0 10px 10px;">
-                        <p>Dear <strong>{student.full_name}</strong>,</p>
-                        <p>A new assignment has been posted for your course.</p>
-                        
-                        <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #f59e0b;">
-                            <h3 style="margin: 0 0 10px 0; color: #374151;">📄 {assignment.title}</h3>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Course:</strong> {course.course_name}
-                            </p>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Due Date:</strong> {due_date_str}
-                            </p>
-                            <p style="margin: 5px 0; color: #6b7280;">
-                                <strong>Max Marks:</strong> {assignment.max_marks}
-                            </p>
-                        </div>
-                        
-                        <p>Make sure to review the requirements and submit your work on time.</p>
-                        
-                        <p style="color: #6b7280; font-size: 14px; margin-top: 20px;">
-                            Best regards,<br>
-                            <strong>LLS Team</strong>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            notification = NotificationService.create_notification(
-                user_type='student',
-                user_id=student.id,
-                title=title,
-                message=message,
-                notification_type='new_assignment',
-                reference_type='assignment',
-                reference_id=assignment.id,
-                send_email=False
-            )
-            
-            if student.email:
-                email_sent = NotificationService.send_email(student.email, title, message, html_message)
-                notification.email_sent = email_sent
-                db.session.commit()
-
-    @staticmethod
-    def notify_deadline_reminder(assignment, student):
-        """Send deadline reminder for an upcoming assignment"""
-        days_left = (assignment.due_date - datetime.utcnow()).days
-        
-        title = f"⏰ Assignment Deadline Reminder: {assignment.title}"
-        message = f"""Dear {student.full_name},
-
-This is a friendly reminder that you have an upcoming assignment deadline.
-
-Assignment Details:
-- Title: {assignment.title}
-- Due Date: {assignment.due_date.strftime('%B %d, %Y at %I:%M %p')}
-- Time Remaining: {days_left} day(s)
-
-Please make sure to submit your assignment before the deadline.
-
-Best regards,
-LLS Team"""
-
-        urgency_color = "#ef4444" if days_left <= 1 else "#f59e0b" if days_left <= 3 else "#3b82f6"
-        
         html_message = f"""
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: {urgency_color}; padding: 20px; border-radius: 10px 10px 0 0;">
-                    <h1 style="color: white; margin: 0;">⏰ Deadline Reminder</h1>
+                <div style="background: linear-gradient(135deg, #f59e0b, #d97706); padding: 20px; border-radius: 10px 10px 0 0;">
+                    <h1 style="color: white; margin: 0;">📝 New Assignment Posted</h1>
                 </div>
                 <div style="background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; border-radius: 0 0 10px 10px;">
-                    <p>Dear <strong>{student.full_name}</strong>,</p>
-                    <p>This is a friendly reminder about your upcoming assignment deadline.</p>
+                    <p>Dear <strong>{STUDENT_NAME}</strong>,</p>
+                    <p>A new assignment has been posted for your course.</p>
                     
-                    <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid {urgency_color};">
-                        <h3 style="margin: 0 0 10px 0; color: #374151;">📝 {assignment.title}</h3>
+                    <div style="background: white; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #f59e0b;">
+                        <h3 style="margin: 0 0 10px 0; color: #374151;">📄 {assignment.title}</h3>
                         <p style="margin: 5px 0; color: #6b7280;">
-                            <strong>Due Date:</strong> {assignment.due_date.strftime('%B %d, %Y at %I:%M %p')}
+                            <strong>Course:</strong> {course.course_name}
                         </p>
-                        <p style="margin: 5px 0; font-size: 18px; font-weight: bold; color: {urgency_color};">
-                            ⏳ {days_left} day(s) remaining
+                        <p style="margin: 5px 0; color: #6b7280;">
+                            <strong>Due Date:</strong> {due_date_str}
+                        </p>
+                        <p style="margin: 5px 0; color: #6b7280;">
+                            <strong>Max Marks:</strong> {assignment.max_marks}
                         </p>
                     </div>
                     
-                    <p style="background: #fef3c7; padding: 10px; border-radius: 5px; color: #92400e;">
-                        ⚠️ Please submit your assignment before the deadline to avoid late penalties.
-                    </p>
+                    <p>Make sure to review the requirements and submit your work on time.</p>
                     
                     <p style="color: #6b7280; font-size: 14px; margin-top: 20px;">
                         Best regards,<br>
@@ -623,6 +553,20 @@ LLS Team"""
         </body>
         </html>
         """
+
+        return NotificationService.notify_course_students(
+            course, title, message, html_message,
+            notification_type='new_assignment',
+            reference_type='assignment',
+            reference_id=assignment.id
+        )
+
+    @staticmethod
+    def notify_deadline_reminder(assignment, student):
+        """Send deadline reminder for an upcoming assignment"""
+        title, message, html_message = deadline_reminder_content(
+            assignment.title, assignment.due_date, student.full_name
+        )
         
         notification = NotificationService.create_notification(
             user_type='student',
@@ -632,14 +576,10 @@ LLS Team"""
             notification_type='deadline_reminder',
             reference_type='assignment',
             reference_id=assignment.id,
-            send_email=False
+            html_message=html_message,
+            email=student.email
         )
         
-        if student.email:
-            email_sent = NotificationService.send_email(student.email, title, message, html_message)
-            notification.email_sent = email_sent
-            db.session.commit()
-        
         return notification
 
     @staticmethod
@@ -667,7 +607,7 @@ LLS Team"""
     @staticmethod
     def mark_as_read(notification_id):
         """Mark a notification as read"""
-        notification = Notification.query.get(notification_id)
+        notification = db.session.get(Notification, notification_id)
         if notification:
             notification.is_read = True
             notification.read_at = datetime.utcnow()
@@ -688,47 +628,79 @@ LLS Team"""
         db.session.commit()
 
 
-def send_deadline_reminders():
+def send_deadline_reminders(now=None, window=None):
     """
-    Scheduled task to send deadline reminders
-    Should be called by a scheduler (e.g., cron job or APScheduler)
+    Remind every enrolled student who has not submitted about the assignments
+    due within ``window`` (DEADLINE_REMINDER_WINDOW_HOURS), at most once per
+    assignment per UTC day. Returns the number of reminders created.
+
+    One query finds the recipients for all assignments at once: the course's
+    active enrolments and program/semester cohort, anti-joined against
+    submissions and against today's reminders (ix_notification_type_reference).
+    The reminders and their emails are then written with one bulk INSERT each.
+
+    Runs on the scheduler (services/scheduler.py) in one worker per
+    DEADLINE_REMINDER_INTERVAL_SECONDS, and from ``flask reminders send``.
     """
-    from models import Assignment, Student, Submission, StaffCourse, StudentEnrollment
-    
-    # Get assignments due in the next 3 days
-    now = datetime.utcnow()
-    deadline_threshold = now + timedelta(days=3)
-    
-    upcoming_assignments = Assignment.query.filter(
-        Assignment.due_date > now,
-        Assignment.due_date <= deadline_threshold
+    now = now or datetime.utcnow()
+    if window is None:
+        window = timedelta(hours=current_app.config.get('DEADLINE_REMINDER_WINDOW_HOURS', 72))
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    due = and_(Assignment.due_date > now, Assignment.due_date <= now + window)
+    recipients = union(
+        select(Assignment.id.label('assignment_id'), StudentCourse.student_id.label('student_id'))
+        .join(StudentCourse, and_(StudentCourse.course_id == Assignment.course_id, StudentCourse.status == 'active'))
+        .where(due),
+        select(Assignment.id, Student.id)
+        .join(Course, Course.id == Assignment.course_id)
+        .join(Student, and_(Student.program_id == Course.program_id, Student.semester_id == Course.semester_id))
+        .where(due),
+    ).subquery()
+    rows = db.session.execute(
+        select(recipients.c.assignment_id, recipients.c.student_id, Assignment.title, Assignment.due_date,
+               Student.full_name, Student.email)
+        .join(Assignment, Assignment.id == recipients.c.assignment_id)
+        .join(Student, Student.id == recipients.c.student_id)
+        .where(
+            ~exists().where(Submission.assignment_id == recipients.c.assignment_id,
+                            Submission.student_id == recipients.c.student_id),
+            ~exists().where(Notification.notification_type == 'deadline_reminder',
+                            Notification.reference_id == recipients.c.assignment_id,
+                            Notification.user_id == recipients.c.student_id,
+                            Notification.user_type == 'student',
+                            Notification.created_at >= today),
+        )
+        .order_by(recipients.c.assignment_id, recipients.c.student_id)
     ).all()
-    
-    for assignment in upcoming_assignments:
-        # Get course for this assignment
-        course_id = assignment.course_id
-        
-        # Get all students enrolled in this course
-        # This depends on your enrollment logic
-        enrolled_students = Student.query.all()  # Simplified - adjust based on your enrollment model
-        
-        for student in enrolled_students:
-            # Check if student already submitted
-            existing_submission = Submission.query.filter_by(
-                assignment_id=assignment.id,
-                student_id=student.id
-            ).first()
-            
-            if not existing_submission:
-                # Check if we already sent a reminder today
-                existing_reminder = Notification.query.filter_by(
-                    user_type='student',
-                    user_id=student.id,
-                    notification_type='deadline_reminder',
-                    reference_id=assignment.id
-                ).filter(
-                    Notification.created_at >= now.replace(hour=0, minute=0, second=0)
-                ).first()
-                
-                if not existing_reminder:
-                    NotificationService.notify_deadline_reminder(assignment, student)
+    if not rows:
+        return 0
+
+    contents = [deadline_reminder_content(row.title, row.due_date, row.full_name, now) for row in rows]
+    created = db.session.execute(
+        insert(Notification).returning(Notification.id, Notification.reference_id, Notification.user_id),
+        [{'user_type': 'student', 'user_id': row.student_id, 'title': title, 'message': message,
+          'notification_type': 'deadline_reminder', 'reference_type': 'assignment',
+          'reference_id': row.assignment_id, 'is_read': False, 'email_sent': False, 'created_at': now}
+         for row, (title, message, _) in zip(rows, contents)],
+    ).all()
+    notification_ids = {(r.reference_id, r.user_id): r.id for r in created}
+
+    if mail_configured(current_app.config):
+        emails = [
+            {'notification_id': notification_ids[(row.assignment_id, row.student_id)], 'to_email': row.email,
+             'subject': title, 'body': message, 'html_body': html_message,
+             'provider': provider(current_app.config), 'status': 'pending', 'attempts': 0,
+             'next_attempt_at': now, 'created_at': now}
+            for row, (title, message, html_message) in zip(rows, contents)
+            if row.email
+        ]
+        if emails:
+            db.session.execute(insert(EmailOutbox), emails)
+            db.session.info['email_enqueued'] = True
+
+    db.session.commit()
+    return len(rows)
+
+
+scheduler.register('deadline-reminders', 'DEADLINE_REMINDER_INTERVAL_SECONDS', send_deadline_reminders)
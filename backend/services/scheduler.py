@@ -0,0 +1,126 @@
+"""
+Scheduler - Periodic jobs run by exactly one process
+
+When enabled, every web process (each gunicorn worker) runs a scheduler
+thread, started on its first request so forked workers each get their own.
+For each job, once per interval, the thread tries to take the job's lease: a ``job_lock``
+row whose ``locked_until`` lies one interval ahead. Taking it is a single
+conditional UPDATE (or the INSERT of a missing row), which only one process
+can win while the lease is unexpired; the winner runs the job and the
+others wait for the next interval. The lease is not released after a run,
+so it doubles as "ran within the last interval" across restarts and hosts.
+
+    scheduler.register('deadline-reminders', 'DEADLINE_REMINDER_INTERVAL_SECONDS', send_deadline_reminders)
+
+The thread only runs when SCHEDULER_ENABLED is set, and never in a TESTING
+app; a job whose interval setting is 0 (or missing) never runs. ``flask
+reminders send`` runs the reminder job from the command line without a lease.
+"""
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, JobLock
+
+SCHEDULER_THREAD_NAME = 'lls-scheduler'
+# How often the thread looks for a job whose interval has passed
+TICK_SECONDS = 60.0
+
+
+def try_lease(name, holder, ttl):
+    """Take the lease on job ``name`` for ``ttl`` if it has expired; True if ``holder`` got it."""
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(JobLock).where(JobLock.name == name, JobLock.locked_until <= now)
+        .values(holder=holder, locked_until=now + ttl),
+        execution_options={'synchronize_session': False},
+    )
+    if result.rowcount:
+        db.session.commit()
+        return True
+    try:
+        db.session.execute(insert(JobLock).values(name=name, holder=holder, locked_until=now + ttl))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # The row exists and someone else holds an unexpired lease
+        db.session.rollback()
+        return False
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self.holder = self._new_holder()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _new_holder():
+        return f'{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def register(self, name, interval_setting, job):
+        """Run ``job()`` (inside an app context) every ``app.config[interval_setting]`` seconds."""
+        self.jobs[name] = (interval_setting, job)
+
+    def run_pending(self, app):
+        """Run every job whose lease this process can take. Returns the names of the jobs run."""
+        ran = []
+        for name, (interval_setting, job) in list(self.jobs.items()):
+            interval = app.config.get(interval_setting) or 0
+            if interval <= 0:
+                continue
+            with app.app_context():
+                try:
+                    if not try_lease(name, self.holder, timedelta(seconds=interval)):
+                        continue
+                    result = job()
+                    app.logger.info(f"Scheduled job {name} finished: {result}")
+                    ran.append(name)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Scheduled job {name} failed: {e}")
+        return ran
+
+    def ensure_started(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(app,), name=SCHEDULER_THREAD_NAME, daemon=True)
+            self._thread.start()
+
+    def _run(self, app):
+        while not self._stop.is_set():
+            self.run_pending(app)
+            self._stop.wait(TICK_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+    def reset_after_fork(self):
+        """A forked worker starts its own thread, under its own lease holder name."""
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.holder = self._new_holder()
+
+
+scheduler = Scheduler()
+
+
+def init_app(app):
+    if not app.config.get('SCHEDULER_ENABLED') or app.config.get('TESTING'):
+        return
+
+    @app.before_request
+    def _start_scheduler():
+        scheduler.ensure_started(app)
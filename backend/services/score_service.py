@@ -0,0 +1,384 @@
+"""
+Score Service - Incrementally maintained course scores
+
+Two summary tables back the result and progress endpoints:
+
+- ``course_score_total``: per-course maxima (assignment count and marks,
+  last due date, MCQ count and quiz marks)
+- ``student_course_score``: per-(student, course) running totals
+  (submissions, graded submissions and marks, attempts, correct attempts
+  and quiz marks)
+
+They are kept current from an ``after_flush`` hook, inside the transaction
+that writes the source rows:
+
+- New MCQ attempts, new submissions and new or re-marked evaluations add a
+  delta to the student's row with an atomic upsert, so concurrent writers
+  for the same student never lose an update.
+- Rarer structural changes (MCQ or assignment marks changed, rows moved to
+  another course, deletions) recompute the affected rows from the source
+  tables.
+- Deleting a student or a course drops its summary rows (the foreign keys
+  also cascade), and no row is written for it again.
+
+Each flush also bumps the cache scopes of the rows it changed, so cached
+result and report payloads are rebuilt. Rows written outside the ORM (bulk
+loads, manual SQL) are not seen by the hook; run ``flask scores rebuild``
+afterwards.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from cache import bump_scopes, bump_versions
+from models import (
+    Assignment, Course, CourseScoreTotal, Evaluation, MCQ, MCQAttempt, Student, StudentCourseScore, Submission,
+)
+
+STUDENT_FIELDS = (
+    'submitted_count', 'graded_count', 'assignment_earned',
+    'quiz_attempted_count', 'quiz_correct_count', 'quiz_earned',
+)
+COURSE_FIELDS = (
+    'assignment_count', 'assignment_total_marks', 'last_due_date', 'mcq_count', 'quiz_total_marks',
+)
+
+
+def _upsert(conn, model, rows, increment=False):
+    """Insert ``rows`` or, for existing keys, overwrite (or add to) their value columns."""
+    if not rows:
+        return
+    table = model.__table__
+    keys = [c.name for c in table.primary_key.columns]
+    fields = [name for name in rows[0] if name not in keys]
+    now = datetime.utcnow()
+    rows = [dict(row, updated_at=now) for row in rows]
+    dialect = conn.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        values = {
+            name: (table.c[name] + stmt.excluded[name]) if increment else stmt.excluded[name]
+            for name in fields
+        }
+        values['updated_at'] = stmt.excluded.updated_at
+        conn.execute(stmt.on_conflict_do_update(index_elements=keys, set_=values), rows)
+        return
+
+    for row in rows:
+        where = [table.c[k] == row[k] for k in keys]
+        values = {
+            name: (table.c[name] + row[name]) if increment else row[name]
+            for name in fields
+        }
+        values['updated_at'] = row['updated_at']
+        if conn.execute(update(table).where(*where).values(**values)).rowcount == 0:
+            conn.execute(table.insert().values(**row))
+
+
+# -- recomputation ---------------------------------------------------------
+
+def refresh_course_totals(conn, course_ids):
+    """Recompute ``course_score_total`` for ``course_ids``."""
+    course_ids = sorted(set(course_ids) - {None})
+    if not course_ids:
+        return
+    totals = {cid: {'course_id': cid, 'assignment_count': 0, 'assignment_total_marks': 0, 'last_due_date': None,
+                    'mcq_count': 0, 'quiz_total_marks': 0} for cid in course_ids}
+    for row in conn.execute(
+        select(Assignment.course_id, func.count(), func.sum(func.coalesce(Assignment.max_marks, 0)), func.max(Assignment.due_date))
+        .where(Assignment.course_id.in_(course_ids)).group_by(Assignment.course_id)
+    ):
+        totals[row[0]].update(assignment_count=row[1], assignment_total_marks=row[2] or 0, last_due_date=row[3])
+    for row in conn.execute(
+        select(MCQ.course_id, func.count(), func.sum(func.coalesce(MCQ.marks, 1)))
+        .where(MCQ.course_id.in_(course_ids)).group_by(MCQ.course_id)
+    ):
+        totals[row[0]].update(mcq_count=row[1], quiz_total_marks=row[2] or 0)
+    _upsert(conn, CourseScoreTotal, list(totals.values()))
+
+
+def _student_aggregates(conn, course_ids, student_ids=None):
+    """{(student_id, course_id): {field: value}} computed from the source tables."""
+    rows = defaultdict(lambda: dict.fromkeys(STUDENT_FIELDS, 0))
+
+    attempts = (
+        select(
+            MCQAttempt.student_id, MCQ.course_id, func.count(),
+            func.sum(case((MCQAttempt.is_correct, 1), else_=0)),
+            func.sum(case((MCQAttempt.is_correct, func.coalesce(MCQ.marks, 1)), else_=0)),
+        )
+        .join(MCQ, MCQ.id == MCQAttempt.mcq_id)
+        .where(MCQ.course_id.in_(course_ids))
+        .group_by(MCQAttempt.student_id, MCQ.course_id)
+    )
+    submissions = (
+        select(
+            Submission.student_id, Assignment.course_id, func.count(Submission.id),
+            func.count(Evaluation.marks_obtained), func.sum(func.coalesce(Evaluation.marks_obtained, 0)),
+        )
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .outerjoin(Evaluation, Evaluation.submission_id == Submission.id)
+        .where(Assignment.course_id.in_(course_ids))
+        .group_by(Submission.student_id, Assignment.course_id)
+    )
+    if student_ids is not None:
+        attempts = attempts.where(MCQAttempt.student_id.in_(student_ids))
+        submissions = submissions.where(Submission.student_id.in_(student_ids))
+
+    for student_id, course_id, attempted, correct, earned in conn.execute(attempts):
+        rows[(student_id, course_id)].update(
+            quiz_attempted_count=attempted, quiz_correct_count=correct or 0, quiz_earned=earned or 0)
+    for student_id, course_id, submitted, graded, earned in conn.execute(submissions):
+        rows[(student_id, course_id)].update(
+            submitted_count=submitted, graded_count=graded, assignment_earned=earned or 0)
+    return rows
+
+
+def refresh_student_scores(conn, course_ids, pairs=None):
+    """Recompute ``student_course_score`` for whole courses, or only for ``pairs`` of (student_id, course_id)."""
+    if pairs is not None:
+        pairs = {p for p in pairs if None not in p}
+        course_ids = {course_id for _, course_id in pairs}
+    course_ids = sorted(set(course_ids) - {None})
+    if not course_ids:
+        return
+
+    student_ids = sorted({student_id for student_id, _ in pairs}) if pairs is not None else None
+    aggregates = _student_aggregates(conn, course_ids, student_ids)
+
+    table = StudentCourseScore.__table__
+    if pairs is None:
+        # Students who no longer have any activity in the course drop to zero
+        existing = conn.execute(select(table.c.student_id, table.c.course_id).where(table.c.course_id.in_(course_ids)))
+        keys = set(aggregates) | {tuple(row) for row in existing}
+    else:
+        keys = pairs
+    # Activity whose student was deleted (student_id set to NULL) has no row
+    keys = {key for key in keys if None not in key}
+    rows = [dict(aggregates.get(key) or dict.fromkeys(STUDENT_FIELDS, 0), student_id=key[0], course_id=key[1])
+            for key in sorted(keys)]
+    _upsert(conn, StudentCourseScore, rows)
+
+
+def apply_deltas(conn, deltas):
+    """Add {(student_id, course_id): {field: amount}} to the students' running totals."""
+    rows = []
+    for (student_id, course_id), fields in sorted(deltas.items()):
+        if student_id is None or course_id is None or not any(fields.values()):
+            continue
+        row = dict.fromkeys(STUDENT_FIELDS, 0)
+        row.update(fields, student_id=student_id, course_id=course_id)
+        rows.append(row)
+    _upsert(conn, StudentCourseScore, rows, increment=True)
+
+
+def rebuild_scores(conn, course_ids=None):
+    """Recompute both summary tables from scratch (all courses by default). Returns the courses rebuilt."""
+    if course_ids is None:
+        course_ids = [row[0] for row in conn.execute(select(Course.id))]
+        conn.execute(delete(StudentCourseScore.__table__))
+        conn.execute(delete(CourseScoreTotal.__table__))
+    course_ids = sorted(course_ids)
+    # Batches keep the IN lists and the aggregate result sets bounded
+    for start in range(0, len(course_ids), 200):
+        batch = course_ids[start:start + 200]
+        refresh_course_totals(conn, batch)
+        refresh_student_scores(conn, batch)
+        # Student results depend on course:<id>, staff reports on course-scores:<id>
+        bump_versions(conn, {f'{prefix}:{course_id}' for course_id in batch for prefix in ('course', 'course-scores')})
+    return course_ids
+
+
+# -- change tracking -------------------------------------------------------
+
+def _old(instance, attribute):
+    history = inspect(instance).attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(instance, attribute)
+
+
+def _changed(instance, *attributes):
+    state = inspect(instance)
+    return any(state.attrs[a].history.has_changes() for a in attributes)
+
+
+def _number(value):
+    return float(value) if value is not None else 0.0
+
+
+class _FlushChanges:
+    """Classifies the flushed rows into deltas, pair refreshes and course refreshes."""
+
+    def __init__(self, session, deleted_students=(), deleted_courses=()):
+        self.session = session
+        self.conn = session.connection()
+        self.deleted_students = set(deleted_students)
+        self.deleted_courses = set(deleted_courses)
+        self.deltas = defaultdict(lambda: defaultdict(float))
+        self.pairs = set()
+        self.full_courses = set()
+        self.total_courses = set()
+        self._mcq = {}
+        self._assignment_course = {}
+        self._submission = {}
+
+    # Lookups that also see rows deleted in this flush
+    def mcq(self, mcq_id):
+        if mcq_id not in self._mcq:
+            row = self.conn.execute(select(MCQ.course_id, MCQ.marks).where(MCQ.id == mcq_id)).first()
+            self._mcq[mcq_id] = (row[0], row[1]) if row else (None, None)
+        return self._mcq[mcq_id]
+
+    def assignment_course(self, assignment_id):
+        if assignment_id not in self._assignment_course:
+            self._assignment_course[assignment_id] = self.conn.execute(
+                select(Assignment.course_id).where(Assignment.id == assignment_id)).scalar()
+        return self._assignment_course[assignment_id]
+
+    def submission_key(self, submission_id):
+        if submission_id not in self._submission:
+            row = self.conn.execute(
+                select(Submission.student_id, Submission.assignment_id).where(Submission.id == submission_id)).first()
+            self._submission[submission_id] = (row[0], self.assignment_course(row[1])) if row else (None, None)
+        return self._submission[submission_id]
+
+    def prime_deleted(self, instances):
+        for obj in instances:
+            if isinstance(obj, MCQ):
+                self._mcq[obj.id] = (_old(obj, 'course_id'), _old(obj, 'marks'))
+            elif isinstance(obj, Assignment):
+                self._assignment_course[obj.id] = _old(obj, 'course_id')
+        for obj in instances:
+            if isinstance(obj, Submission):
+                self._submission[obj.id] = (_old(obj, 'student_id'), self.assignment_course(_old(obj, 'assignment_id')))
+
+    def add(self, student_id, course_id, **fields):
+        for name, amount in fields.items():
+            self.deltas[(student_id, course_id)][name] += amount
+
+    def collect(self, new, dirty, deleted):
+        self.prime_deleted(deleted)
+
+        for obj in new:
+            if isinstance(obj, (MCQ, Assignment)):
+                self.total_courses.add(obj.course_id)
+            elif isinstance(obj, MCQAttempt):
+                course_id, marks = self.mcq(obj.mcq_id)
+                correct = bool(obj.is_correct)
+                self.add(obj.student_id, course_id, quiz_attempted_count=1, quiz_correct_count=int(correct),
+                         quiz_earned=_number(1 if marks is None else marks) if correct else 0)
+            elif isinstance(obj, Submission):
+                self.add(obj.student_id, self.assignment_course(obj.assignment_id), submitted_count=1)
+            elif isinstance(obj, Evaluation) and obj.marks_obtained is not None:
+                self.add(*self.submission_key(obj.submission_id), graded_count=1, assignment_earned=_number(obj.marks_obtained))
+
+        for obj in dirty:
+            if isinstance(obj, MCQ):
+                if _changed(obj, 'course_id', 'marks'):
+                    self.full_courses.update({_old(obj, 'course_id'), obj.course_id})
+            elif isinstance(obj, Assignment):
+                if _changed(obj, 'course_id', 'max_marks'):
+                    self.full_courses.update({_old(obj, 'course_id'), obj.course_id})
+                elif _changed(obj, 'due_date'):
+                    self.total_courses.add(obj.course_id)
+            elif isinstance(obj, MCQAttempt):
+                if _changed(obj, 'student_id', 'mcq_id', 'is_correct'):
+                    self.pairs.add((_old(obj, 'student_id'), self.mcq(_old(obj, 'mcq_id'))[0]))
+                    self.pairs.add((obj.student_id, self.mcq(obj.mcq_id)[0]))
+            elif isinstance(obj, Submission):
+                if _changed(obj, 'student_id', 'assignment_id'):
+                    self.pairs.add((_old(obj, 'student_id'), self.assignment_course(_old(obj, 'assignment_id'))))
+                    self.pairs.add((obj.student_id, self.assignment_course(obj.assignment_id)))
+            elif isinstance(obj, Evaluation):
+                if _changed(obj, 'submission_id'):
+                    self.pairs.add(self.submission_key(_old(obj, 'submission_id')))
+                    self.pairs.add(self.submission_key(obj.submission_id))
+                elif _changed(obj, 'marks_obtained'):
+                    old, new = _old(obj, 'marks_obtained'), obj.marks_obtained
+                    self.add(*self.submission_key(obj.submission_id),
+                             graded_count=(new is not None) - (old is not None),
+                             assignment_earned=_number(new) - _number(old))
+
+        for obj in deleted:
+            if isinstance(obj, (MCQ, Assignment)):
+                self.full_courses.add(_old(obj, 'course_id'))
+            elif isinstance(obj, MCQAttempt):
+                self.pairs.add((_old(obj, 'student_id'), self.mcq(_old(obj, 'mcq_id'))[0]))
+            elif isinstance(obj, Submission):
+                self.pairs.add(self._submission[obj.id])
+            elif isinstance(obj, Evaluation):
+                self.pairs.add(self.submission_key(_old(obj, 'submission_id')))
+
+    def _live(self, key):
+        return key[0] not in self.deleted_students and key[1] not in self.deleted_courses
+
+    def forget_deleted(self):
+        """Drop the rows of students and courses deleted in this flush (ON DELETE CASCADE where enforced)."""
+        table = StudentCourseScore.__table__
+        if self.deleted_students:
+            self.conn.execute(delete(table).where(table.c.student_id.in_(sorted(self.deleted_students))))
+        if self.deleted_courses:
+            courses = sorted(self.deleted_courses)
+            self.conn.execute(delete(table).where(table.c.course_id.in_(courses)))
+            self.conn.execute(delete(CourseScoreTotal.__table__).where(CourseScoreTotal.course_id.in_(courses)))
+
+    def apply(self):
+        self.forget_deleted()
+        # Rows of deleted parents are gone; upserting them again would violate their foreign keys
+        full = self.full_courses - {None} - self.deleted_courses
+        if full:
+            refresh_course_totals(self.conn, full)
+            refresh_student_scores(self.conn, full)
+        refresh_course_totals(self.conn, self.total_courses - full - self.deleted_courses)
+
+        pairs = {p for p in self.pairs if p[1] not in full and self._live(p)}
+        if pairs:
+            refresh_student_scores(self.conn, (), pairs=pairs)
+        # Recomputed rows already include this flush's inserts
+        deltas = {key: fields for key, fields in self.deltas.items()
+                  if key[1] not in full and key not in pairs and self._live(key)}
+        apply_deltas(self.conn, deltas)
+
+        # Cached result and report payloads built from these rows (see cache.py)
+        changed = {f'student:{student_id}' for student_id in self.deleted_students}
+        changed.update(f'{prefix}:{course_id}' for course_id in self.deleted_courses
+                       for prefix in ('course', 'course-scores'))
+        for course_id in full | (self.total_courses - {None}):
+            changed.update({f'course:{course_id}', f'course-scores:{course_id}'})
+        for student_id, course_id in pairs | {key for key, fields in deltas.items() if any(fields.values())}:
+            if student_id is not None and course_id is not None:
+                changed.update({f'student:{student_id}', f'course-scores:{course_id}'})
+        bump_scopes(self.session, changed)
+
+
+_TRACKED = (MCQ, Assignment, MCQAttempt, Submission, Evaluation)
+
+# Changing an expired attribute normally records no previous value; the old
+# course/marks/owner is needed to fix up the row the change moved away from.
+for _attribute in (
+    MCQ.course_id, MCQ.marks, Assignment.course_id, Assignment.max_marks,
+    MCQAttempt.student_id, MCQAttempt.mcq_id, MCQAttempt.is_correct,
+    Submission.student_id, Submission.assignment_id, Evaluation.submission_id, Evaluation.marks_obtained,
+):
+    event.listen(_attribute, 'set', lambda target, value, oldvalue, initiator: value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_scores(session, flush_context):
+    new = [o for o in session.new if isinstance(o, _TRACKED)]
+    deleted = [o for o in session.deleted if isinstance(o, _TRACKED)]
+    dirty = [o for o in session.dirty
+             if isinstance(o, _TRACKED) and session.is_modified(o, include_collections=False)]
+    deleted_students = {o.id for o in session.deleted if isinstance(o, Student)}
+    deleted_courses = {o.id for o in session.deleted if isinstance(o, Course)}
+    if not (new or dirty or deleted or deleted_students or deleted_courses):
+        return
+    changes = _FlushChanges(session, deleted_students, deleted_courses)
+    changes.collect(new, dirty, deleted)
+    changes.apply()
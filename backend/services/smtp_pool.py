@@ -0,0 +1,207 @@
+"""
+SMTP Pool - Reusable, authenticated SMTP sessions
+
+Opening an SMTP session costs a TCP connect, EHLO, STARTTLS (a TLS
+handshake), a second EHLO and AUTH before the first message, and QUIT after
+it: half a dozen round trips that used to be paid for every email. The pool
+keeps authenticated sessions open and sends many messages through each:
+
+- ``send()`` borrows an idle session (or opens one), delivers the message
+  and hands the session back. At most ``max_sessions`` are open at once;
+  further senders wait for one to be returned.
+- Every message after the first on a session starts with RSET, so nothing
+  left over from an earlier, failed transaction leaks into it.
+- When the server advertises PIPELINING (RFC 2920), RSET, MAIL FROM, every
+  RCPT TO and DATA go out in one write and their replies are read together:
+  two round trips per message (envelope, then body) instead of four or more.
+- A session that has sent ``max_messages`` messages, or sat idle for
+  ``idle_timeout`` seconds (servers drop idle clients), is closed and
+  replaced. A session found dead is replaced and the message retried once,
+  unless the server may already have accepted it.
+
+    pool = SMTPPool('smtp.gmail.com', 587, 'user', 'password', max_sessions=2)
+    pool.send('lls@example.com', ['student@example.com'], msg.as_string())
+"""
+import re
+import smtplib
+import threading
+import time
+
+
+def _quote_data(message):
+    """Normalise line endings to CRLF and dot-stuff lines (RFC 5321 4.5.2)."""
+    data = re.sub(r'(?:\r\n|\n|\r(?!\n))', '\r\n', message)
+    data = re.sub(r'(?m)^\.', '..', data)
+    if not data.endswith('\r\n'):
+        data += '\r\n'
+    return data + '.\r\n'
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def pipelining(self):
+        return self.smtp.has_extn('pipelining')
+
+    def close(self, quit=True):
+        try:
+            if quit:
+                self.smtp.quit()
+            else:
+                self.smtp.close()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class _MessageCommitted(Exception):
+    """The connection failed after the message data was sent; it may have been delivered."""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class SMTPPool:
+    """A bounded pool of authenticated SMTP sessions to one server."""
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_sessions=2, max_messages=100, idle_timeout=60.0, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self.connects += 1
+        return _Session(smtp)
+
+    def _checkout(self):
+        """An idle session that is still worth using, or a new one. Caller holds a slot."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._connect()
+            if now - session.last_used < self.idle_timeout:
+                return session
+            session.close()
+
+    def _checkin(self, session):
+        session.last_used = time.monotonic()
+        if session.sent >= self.max_messages:
+            session.close()
+            return
+        with self._lock:
+            self._idle.append(session)
+
+    def send(self, sender, recipients, message):
+        """Deliver ``message`` (an RFC 5322 string) to ``recipients`` through a pooled session.
+
+        Like ``SMTP.sendmail()``, returns the recipients refused while others
+        were accepted, and raises the smtplib exception of a rejected message;
+        the session stays usable.
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        with self._slots:
+            for attempt in (1, 2):
+                session = self._checkout()
+                reused = session.sent > 0
+                try:
+                    refused = self._transaction(session, sender, recipients, message)
+                except _MessageCommitted as e:
+                    session.close(quit=False)
+                    raise e.error
+                except OSError as e:  # smtplib errors included
+                    if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                        # The server rejected this message; the session itself is fine
+                        self._checkin(session)
+                        raise
+                    session.close(quit=False)
+                    # A pooled session may have been dropped by the server while idle
+                    if reused and attempt == 1:
+                        continue
+                    raise
+                self._checkin(session)
+                return refused
+
+    def _transaction(self, session, sender, recipients, message):
+        smtp = session.smtp
+        first = session.sent == 0
+        session.sent += 1
+        if not session.pipelining:
+            if not first:
+                smtp.rset()
+            return smtp.sendmail(sender, recipients, message)
+
+        commands = ([] if first else ['RSET'])
+        commands.append(f'MAIL FROM:<{sender}>')
+        commands += [f'RCPT TO:<{rcpt}>' for rcpt in recipients]
+        commands.append('DATA')
+        smtp.send(''.join(f'{command}\r\n' for command in commands))
+        replies = [smtp.getreply() for _ in commands]
+
+        if not first:
+            replies.pop(0)
+        mail_reply, data_reply = replies[0], replies[-1]
+        refused = {rcpt: reply for rcpt, reply in zip(recipients, replies[1:-1]) if reply[0] not in (250, 251)}
+        if mail_reply[0] != 250:
+            self._abort(smtp, data_reply)
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], sender)
+        if len(refused) == len(recipients):
+            self._abort(smtp, data_reply)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_reply[0] != 354:
+            raise smtplib.SMTPDataError(*data_reply)
+
+        try:
+            smtp.send(_quote_data(message))
+            code, response = smtp.getreply()
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            raise _MessageCommitted(e)
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+        return refused
+
+    @staticmethod
+    def _abort(smtp, data_reply):
+        """The server accepted a pipelined DATA despite a rejected envelope: end it with no body."""
+        if data_reply[0] == 354:
+            smtp.send('.\r\n')
+            smtp.getreply()
+
+    def close(self, quit=True):
+        """Close every idle session. ``quit=False`` drops them without talking to the server (after fork)."""
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close(quit=quit)
+
+    def idle_sessions(self):
+        with self._lock:
+            return len(self._idle)
@@ -5,9 +5,13 @@ import os
 # Add the backend directory to the path so imports work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import cache
 from app import create_app
 from models import db, Admin, Student, Program, Semester
 
+# Query budget plugin: @pytest.mark.query_budget(n) and the query_budget fixture
+from tests.query_budget import pytest_configure, pytest_runtest_call, query_budget  # noqa: F401
+
 @pytest.fixture
 def app():
     """Create and configure a new app instance for each test."""
@@ -19,6 +23,8 @@ def app():
         SECRET_KEY = 'test-key'
 
     app = create_app(TestConfig)
+    # Every test gets a fresh database, so cached payloads must not carry over
+    cache.clear_all()
 
     with app.app_context():
         db.create_all()
@@ -0,0 +1,65 @@
+"""
+Pytest plugin that fails a test when an endpoint exceeds its query budget.
+
+    @pytest.mark.query_budget(3)
+    def test_course_list(client):
+        client.get('/api/student/1/courses')    # fails if this runs > 3 queries
+
+For a budget on part of a test, use the ``query_budget`` fixture:
+
+    with query_budget(2):
+        client.get('/api/programs')
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from query_stats import count_queries, query_stats_recorded
+
+
+def _describe(stats):
+    lines = [f"{stats.endpoint or '<block>'}: {stats.count} queries"]
+    for hit in stats.repeated(2)[:3]:
+        lines.append(f"  {hit['count']}x {hit['sql'][:160]}")
+    return '\n'.join(lines)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'query_budget(max_queries): fail if any request in the test runs more than max_queries statements'
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+
+    budget = marker.args[0]
+    recorded = []
+
+    def _record(sender, stats, **extra):
+        recorded.append(stats)
+
+    query_stats_recorded.connect(_record, weak=False)
+    try:
+        result = yield
+    finally:
+        query_stats_recorded.disconnect(_record)
+
+    over = [stats for stats in recorded if stats.count > budget]
+    if over:
+        pytest.fail(f'Query budget of {budget} exceeded:\n' + '\n'.join(_describe(s) for s in over), pytrace=False)
+    return result
+
+
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def _budget(max_queries):
+        with count_queries() as stats:
+            yield stats
+        if stats.count > max_queries:
+            pytest.fail(f'Query budget of {max_queries} exceeded:\n{_describe(stats)}', pytrace=False)
+    return _budget
@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from benchmarks.seed_scale import seed
+from models import (
+    db, AcademicYear, Assignment, Course, Evaluation, Program, Semester, Staff, StaffCourse, Student, StudentCourse,
+    StudyMaterial, Submission,
+)
+from query_stats import count_queries
+from tests.test_seed_scale import TINY
+
+
+def _setup():
+    years = [AcademicYear(year_name=name, start_date=date(y, 9, 1), end_date=date(y + 1, 8, 31))
+             for name, y in (('2024-2025', 2024), ('2025-2026', 2025))]
+    program = Program(program_name='German', program_code='GER')
+    semester = Semester(semester_name='Sem 1', semester_number=1)
+    staff = [Staff(staff_code=f'T{i}', username=f't{i}', email=f't{i}@test.com', password_hash='x', full_name=f'T{i}')
+             for i in range(2)]
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S1')
+    db.session.add_all(years + [program, semester, student] + staff)
+    db.session.flush()
+    courses = [
+        Course(course_code='A1', course_name='German A1', program_id=program.id, semester_id=semester.id),
+        Course(course_code='A2', course_name='German A2', program_id=program.id),
+        Course(course_code='B1', course_name='German B1'),
+    ]
+    db.session.add_all(courses)
+    db.session.flush()
+    allocations = [
+        StaffCourse(staff_id=staff[0].id, course_id=courses[0].id, academic_year_id=years[0].id),
+        StaffCourse(staff_id=staff[0].id, course_id=courses[0].id, academic_year_id=years[1].id),
+        StaffCourse(staff_id=staff[1].id, course_id=courses[1].id, academic_year_id=years[1].id),
+    ]
+    db.session.add_all(allocations + [StudentCourse(student_id=student.id, course_id=courses[0].id, status='active')])
+    db.session.flush()
+    db.session.add(StudyMaterial(title='Unit 1', staff_course_id=allocations[1].id))
+    assignments = [Assignment(title=f'A{i}', course_id=courses[0].id, max_marks=10) for i in range(2)]
+    db.session.add_all(assignments)
+    db.session.flush()
+    submissions = [Submission(assignment_id=a.id, student_id=student.id) for a in assignments]
+    db.session.add_all(submissions)
+    db.session.flush()
+    # Graded by the other staff member: counts for the course, not for staff[0]
+    db.session.add_all([
+        Evaluation(submission_id=submissions[0].id, staff_id=staff[0].id, marks_obtained=5),
+        Evaluation(submission_id=submissions[1].id, staff_id=staff[1].id, marks_obtained=6),
+    ])
+    db.session.commit()
+    return years, program, staff, courses
+
+
+def test_staff_report(app, client):
+    _, _, staff, courses = _setup()
+
+    first, second = client.get('/api/admin/staff-report').get_json()
+
+    assert first['id'] == staff[0].id
+    assert first['courses'] == [{'id': courses[0].id, 'name': 'German A1', 'code': 'A1'}]
+    assert (first['assignments_count'], first['total_submissions'], first['graded_submissions'],
+            first['pending_submissions']) == (2, 2, 1, 1)
+    assert (second['courses_count'], second['assignments_count'], second['total_submissions']) == (1, 0, 0)
+
+
+def test_course_report_filters(app, client):
+    years, program, staff, courses = _setup()
+
+    report = client.get('/api/admin/course-report').get_json()
+    assert [c['course_code'] for c in report] == ['A1', 'A2', 'B1']
+    a1 = report[0]
+    assert (a1['program'], a1['semester'], a1['enrolled_students']) == ('German', 'Sem 1', 1)
+    assert [s['academic_year'] for s in a1['staff']] == ['2024-2025', '2025-2026']
+    assert a1['staff_count'] == 1
+    assert (a1['materials_count'], a1['assignments_count'], a1['graded_submissions']) == (1, 2, 2)
+    assert report[2]['program'] == 'N/A'
+
+    by_year = client.get(f'/api/admin/course-report?academic_year_id={years[0].id}').get_json()
+    assert [(c['course_code'], c['materials_count']) for c in by_year] == [('A1', 0)]
+    by_program = client.get(f'/api/admin/course-report?program_id={program.id}').get_json()
+    assert [c['course_code'] for c in by_program] == ['A1', 'A2']
+
+
+# One cache version lookup plus the report's own queries
+@pytest.mark.parametrize('path, max_queries', [
+    ('/api/admin/staff-report', 4),
+    ('/api/admin/course-report', 6),
+    ('/api/admin/course-report?academic_year_id=1&program_id=1', 6),
+])
+def test_query_count_does_not_grow_with_institution_size(app, client, path, max_queries):
+    for size in (1, 4):
+        seed(db.engine, log=lambda msg: None, **dict(TINY, courses_per_term=size, staff=size * 2))
+        with count_queries() as stats:
+            assert client.get(path).status_code == 200
+        assert stats.count <= max_queries
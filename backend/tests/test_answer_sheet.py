@@ -0,0 +1,100 @@
+import pytest
+
+from models import db, MCQ, MCQAttempt, Student
+from query_stats import count_queries
+from tests.test_quiz_cache import _setup
+
+
+def test_course_answer_sheet_is_graded_in_one_request(app, client):
+    course_id, _, student_id, mcq_ids = _setup()
+    db.session.get(MCQ, mcq_ids[2]).marks = 2
+    db.session.commit()
+
+    with count_queries() as stats:
+        response = client.post(f'/api/courses/{course_id}/quiz/submit', json={
+            'student_id': student_id,
+            'answers': [{'mcq_id': mcq_ids[0], 'selected_answer': 'a'},
+                        {'mcq_id': mcq_ids[1], 'selected_answer': 'B'},
+                        {'mcq_id': mcq_ids[2], 'selected_answer': 'A'}],
+        })
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['graded_count'] == 3
+    assert data['correct_count'] == 2
+    assert data['marks_earned'] == 3.0
+    assert data['marks_available'] == 4.0
+    assert data['percentage'] == 75.0
+    assert [r['is_correct'] for r in data['results']] == [True, False, True]
+    assert MCQAttempt.query.filter_by(student_id=student_id).count() == 3
+    # One insert statement for all rows, not one round trip per answer
+    inserts = [sql for sql, _, _ in stats.statements.values() if sql.startswith('INSERT INTO mcq_attempt')]
+    assert len(inserts) == 1
+
+
+def test_zero_mark_questions_earn_nothing(app, client):
+    course_id, _, student_id, mcq_ids = _setup()
+    db.session.get(MCQ, mcq_ids[0]).marks = 0
+    db.session.get(MCQ, mcq_ids[1]).marks = None
+    db.session.commit()
+
+    data = client.post(f'/api/courses/{course_id}/quiz/submit', json={
+        'student_id': student_id,
+        'answers': {str(mcq_ids[0]): 'A', str(mcq_ids[1]): 'A'},
+    }).get_json()
+
+    assert data['correct_count'] == 2
+    # A question without marks counts as 1, one worth 0 marks as 0
+    assert data['marks_earned'] == 1.0
+    assert data['marks_available'] == 1.0
+
+
+def test_answer_sheet_skips_attempted_and_foreign_questions(app, client):
+    course_id, _, student_id, mcq_ids = _setup()
+    client.post(f'/api/mcqs/{mcq_ids[0]}/attempt', json={'student_id': student_id, 'selected_answer': 'A'})
+
+    data = client.post(f'/api/courses/{course_id}/quiz/submit', json={
+        'student_id': student_id,
+        'answers': {str(mcq_ids[0]): 'A', str(mcq_ids[1]): 'A', '9999': 'A'},
+    }).get_json()
+
+    statuses = {r['mcq_id']: r['status'] for r in data['results']}
+    assert statuses == {mcq_ids[0]: 'already_attempted', mcq_ids[1]: 'graded', 9999: 'invalid'}
+    assert data['rejected_count'] == 2
+    assert MCQAttempt.query.filter_by(student_id=student_id).count() == 2
+
+
+def test_material_answer_sheet_only_accepts_material_questions(app, client):
+    _, material_id, student_id, mcq_ids = _setup()
+
+    data = client.post(f'/api/materials/{material_id}/quiz/submit', json={
+        'student_id': student_id,
+        'answers': [{'mcq_id': mcq_id, 'selected_answer': 'A'} for mcq_id in mcq_ids],
+    }).get_json()
+
+    # The third question belongs to the course quiz, not to this material
+    assert data['graded_count'] == 2
+    assert data['quiz_total_questions'] == 2
+
+
+def test_answer_sheet_requires_enrollment(app, client):
+    course_id, _, _, mcq_ids = _setup()
+    other = Student(student_code='S2', username='s2', email='s2@test.com', password_hash='x', full_name='Other')
+    db.session.add(other)
+    db.session.commit()
+
+    response = client.post(f'/api/courses/{course_id}/quiz/submit', json={
+        'student_id': other.id, 'answers': [{'mcq_id': mcq_ids[0], 'selected_answer': 'A'}],
+    })
+    assert response.status_code == 403
+    assert client.post(f'/api/courses/{course_id}/quiz/submit', json={'student_id': other.id}).status_code == 400
+
+
+@pytest.mark.parametrize('body', [
+    {'student_id': 'abc', 'answers': []},
+    [{'student_id': 1}],
+    42,
+])
+def test_malformed_answer_sheet_is_rejected(app, client, body):
+    course_id, _, _, _ = _setup()
+    assert client.post(f'/api/courses/{course_id}/quiz/submit', json=body).status_code == 400
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from database import (
+    TimedQueuePool, default_profile, engine_options, install_sqlite_pragmas, pool_stats, sqlite_pragmas,
+)
+
+
+def test_default_profile_follows_database_url():
+    assert default_profile('sqlite:///lls.db') == 'sqlite-single-node'
+    assert default_profile('postgresql://u:p@db/lls') == 'direct'
+
+
+def test_direct_profile_bounds_pool():
+    options = engine_options('direct', 'postgresql://u:p@db/lls')
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] > 0
+    assert options['max_overflow'] >= 0
+
+
+def test_pgbouncer_profile_disables_pooling_and_prepared_statements():
+    options = engine_options('pgbouncer-transaction', 'postgresql+psycopg://u:p@bouncer/lls')
+    assert options['poolclass'] is NullPool
+    assert options['connect_args'] == {'prepare_threshold': None}
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        engine_options('turbo', 'sqlite:///lls.db')
+
+
+def test_timed_pool_reports_checkouts(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=TimedQueuePool, pool_size=2, max_overflow=1)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        stats = pool_stats(engine)
+        assert stats['checked_out'] == 1
+    stats = pool_stats(engine)
+    assert stats['checked_out'] == 0
+    assert stats['checkouts'] == 1
+    assert stats['wait_time_max_ms'] >= 0
+    engine.dispose()
+
+
+def test_pool_stats_endpoint_requires_token_when_configured(app, client):
+    app.config['INTERNAL_API_TOKEN'] = 'secret'
+    assert client.get('/api/internal/pool-stats').status_code == 403
+
+    response = client.get('/api/internal/pool-stats', headers={'X-Internal-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['dialect'] == 'sqlite'
+
+
+def test_pool_stats_endpoint_is_closed_without_a_token_outside_testing(app, client):
+    app.config.update(TESTING=False, INTERNAL_API_TOKEN='')
+    assert client.get('/api/internal/pool-stats').status_code == 403
+    assert client.get('/api/internal/pool-stats', headers={'X-Internal-Token': ''}).status_code == 403
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/wal.db')
+    install_sqlite_pragmas(engine, sqlite_pragmas())
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == sqlite_pragmas()['busy_timeout']
+    engine.dispose()
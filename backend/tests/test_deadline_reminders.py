@@ -0,0 +1,145 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from config import Config
+from models import db, Assignment, Course, EmailOutbox, JobLock, Notification, Program, Semester, Student, \
+    StudentCourse, Submission
+from services.notification_service import send_deadline_reminders
+from services.scheduler import SCHEDULER_THREAD_NAME, Scheduler, try_lease
+
+NOW = datetime(2026, 3, 10, 9, 0)
+
+
+def _setup(extra_students=0, now=NOW):
+    """Students: submitted, pending (enrolled), cohort (program/semester only), dropped; plus ``extra_students`` pending."""
+    program = Program(program_name='P', program_code='P')
+    semester = Semester(semester_name='S1', semester_number=1)
+    db.session.add_all([program, semester])
+    db.session.flush()
+    course = Course(course_code='C1', course_name='Course', program_id=program.id, semester_id=semester.id)
+    db.session.add(course)
+    db.session.flush()
+
+    names = ['submitted', 'pending', 'cohort', 'dropped'] + [f'extra{i}' for i in range(extra_students)]
+    students = {name: Student(student_code=name, username=name, email=f'{name}@test.com', password_hash='x',
+                              full_name=name.title()) for name in names}
+    students['cohort'].program_id, students['cohort'].semester_id = program.id, semester.id
+    db.session.add_all(students.values())
+    db.session.flush()
+    for name, student in students.items():
+        if name != 'cohort':
+            status = 'dropped' if name == 'dropped' else 'active'
+            db.session.add(StudentCourse(student_id=student.id, course_id=course.id, status=status))
+
+    soon = Assignment(title='Soon', course_id=course.id, due_date=now + timedelta(days=2))
+    later = Assignment(title='Later', course_id=course.id, due_date=now + timedelta(days=10))
+    past = Assignment(title='Past', course_id=course.id, due_date=now - timedelta(hours=1))
+    db.session.add_all([soon, later, past])
+    db.session.flush()
+    db.session.add(Submission(assignment_id=soon.id, student_id=students['submitted'].id))
+    db.session.commit()
+    return soon, {name: s.id for name, s in students.items()}
+
+
+def _reminders():
+    return Notification.query.filter_by(notification_type='deadline_reminder').order_by(Notification.user_id).all()
+
+
+def test_reminds_only_enrolled_students_who_have_not_submitted(app):
+    soon, ids = _setup()
+
+    assert send_deadline_reminders(now=NOW) == 2
+
+    reminders = _reminders()
+    assert [r.user_id for r in reminders] == sorted([ids['pending'], ids['cohort']])
+    reminder = next(r for r in reminders if r.user_id == ids['cohort'])
+    assert (reminder.user_type, reminder.reference_type, reminder.reference_id) == ('student', 'assignment', soon.id)
+    assert reminder.title == '⏰ Assignment Deadline Reminder: Soon'
+    assert reminder.message.startswith('Dear Cohort,')
+    assert '- Time Remaining: 2 day(s)' in reminder.message
+    assert EmailOutbox.query.count() == 0
+
+
+def test_reminders_are_sent_once_per_day(app):
+    _setup()
+
+    assert send_deadline_reminders(now=NOW) == 2
+    assert send_deadline_reminders(now=NOW + timedelta(hours=6)) == 0
+    assert send_deadline_reminders(now=NOW + timedelta(days=1)) == 2
+    assert len(_reminders()) == 4
+
+
+def test_reminders_queue_emails(app):
+    app.config.update(MAIL_USERNAME='lls', MAIL_PASSWORD='secret', EMAIL_WORKERS=0)
+    _, ids = _setup()
+
+    send_deadline_reminders(now=NOW)
+
+    emails = {e.to_email: e for e in EmailOutbox.query}
+    assert set(emails) == {'pending@test.com', 'cohort@test.com'}
+    email = emails['pending@test.com']
+    assert email.notification.user_id == ids['pending']
+    assert email.subject == '⏰ Assignment Deadline Reminder: Soon'
+    assert '<strong>Pending</strong>' in email.html_body
+
+
+@pytest.mark.parametrize('extra', [0, 30])
+def test_statement_count_does_not_grow_with_recipients(app, query_budget, extra):
+    app.config.update(MAIL_USERNAME='lls', MAIL_PASSWORD='secret', EMAIL_WORKERS=0)
+    _setup(extra_students=extra)
+
+    with query_budget(3):
+        assert send_deadline_reminders(now=NOW) == 2 + extra
+
+
+def test_cli_command(app, runner):
+    _setup(now=datetime.utcnow())
+
+    assert 'Created 2 deadline reminder(s).' in runner.invoke(args=['reminders', 'send']).output
+    assert 'Created 0 deadline reminder(s).' in runner.invoke(args=['reminders', 'send']).output
+
+
+def test_lease_goes_to_one_holder_until_it_expires(app):
+    assert try_lease('job', 'worker-1', timedelta(minutes=5)) is True
+    assert try_lease('job', 'worker-2', timedelta(minutes=5)) is False
+    assert try_lease('job', 'worker-1', timedelta(minutes=5)) is False
+
+    db.session.query(JobLock).update({'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert try_lease('job', 'worker-2', timedelta(minutes=5)) is True
+    assert db.session.get(JobLock, 'job').holder == 'worker-2'
+
+
+def test_only_one_worker_runs_a_scheduled_job(app):
+    app.config['TEST_JOB_INTERVAL'] = 3600
+    runs = []
+    workers = [Scheduler(), Scheduler()]
+    for worker in workers:
+        worker.register('test-job', 'TEST_JOB_INTERVAL', lambda: runs.append(1))
+
+    assert workers[0].run_pending(app) == ['test-job']
+    assert workers[1].run_pending(app) == []
+    assert workers[0].run_pending(app) == []
+    assert len(runs) == 1
+
+
+def test_disabled_job_never_runs(app):
+    worker = Scheduler()
+    worker.register('test-job', 'TEST_JOB_INTERVAL', lambda: pytest.fail('should not run'))
+    app.config['TEST_JOB_INTERVAL'] = 0
+    assert worker.run_pending(app) == []
+    assert JobLock.query.count() == 0
+
+
+def test_no_scheduler_thread_in_a_test_app(client):
+    class EnabledTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+        TESTING = True
+        SCHEDULER_ENABLED = True
+
+    create_app(EnabledTestConfig).test_client().get('/')
+    client.get('/')
+    assert SCHEDULER_THREAD_NAME not in {t.name for t in threading.enumerate()}
@@ -0,0 +1,203 @@
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, EmailOutbox, Notification, Student
+from services import email_outbox
+from services.email_outbox import RateLimiter, drain, process_batch
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def mail(app):
+    app.config.update(MAIL_SERVER='smtp.test', MAIL_USERNAME='lls', MAIL_PASSWORD='secret',
+                      MAIL_DEFAULT_SENDER='lls@test.com', EMAIL_WORKERS=0, EMAIL_MAX_ATTEMPTS=3)
+    return app
+
+
+class FakeTransport:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    def __call__(self, message):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((message.to_email, message.subject))
+
+
+NO_LIMIT = RateLimiter(0)
+
+
+def _notify():
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S One')
+    db.session.add(student)
+    db.session.commit()
+    notification = NotificationService.create_notification(
+        'student', student.id, 'Graded', 'Your work was graded', html_message='<p>Graded</p>')
+    return notification.id
+
+
+def _make_due(outbox_id):
+    db.session.query(EmailOutbox).filter_by(id=outbox_id).update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+
+
+def test_email_is_queued_in_the_notification_commit(mail):
+    notification_id = _notify()
+
+    message = db.session.query(EmailOutbox).one()
+    assert (message.notification_id, message.to_email, message.status) == (notification_id, 's1@test.com', 'pending')
+    assert message.html_body == '<p>Graded</p>'
+    assert message.provider == 'smtp.test'
+
+
+def test_nothing_is_queued_without_credentials(app):
+    _notify()
+    assert db.session.query(EmailOutbox).count() == 0
+
+
+def test_rolled_back_notification_leaves_no_email(mail):
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S One')
+    db.session.add(student)
+    db.session.commit()
+    email_outbox.enqueue_email('s1@test.com', 'Hello', 'Body')
+    db.session.rollback()
+    assert db.session.query(EmailOutbox).count() == 0
+
+
+def test_drain_delivers_and_marks_the_notification(mail):
+    notification_id = _notify()
+    transport = FakeTransport()
+
+    assert drain(transport, NO_LIMIT) == {'sent': 1, 'retry': 0, 'dead': 0}
+
+    assert transport.sent == [('s1@test.com', 'Graded')]
+    db.session.expire_all()
+    message = db.session.query(EmailOutbox).one()
+    assert (message.status, message.attempts, message.claimed_by) == ('sent', 1, None)
+    assert message.sent_at is not None
+    assert db.session.get(Notification, notification_id).email_sent is True
+    # Nothing left to claim
+    assert process_batch(transport, NO_LIMIT) == {'sent': 0, 'retry': 0, 'dead': 0}
+
+
+def test_failed_send_is_retried_with_backoff(mail):
+    _notify()
+    transport = FakeTransport(smtplib.SMTPServerDisconnected('connection lost'))
+
+    before = datetime.utcnow()
+    assert drain(transport, NO_LIMIT) == {'sent': 0, 'retry': 1, 'dead': 0}
+    db.session.expire_all()
+    message = db.session.query(EmailOutbox).one()
+    assert (message.status, message.attempts, message.last_error) == ('pending', 1, 'connection lost')
+    # First retry waits 15-30 s (EMAIL_RETRY_BASE_SECONDS with jitter)
+    assert before + timedelta(seconds=14) <= message.next_attempt_at <= datetime.utcnow() + timedelta(seconds=31)
+
+    _make_due(message.id)
+    assert drain(transport, NO_LIMIT) == {'sent': 1, 'retry': 0, 'dead': 0}
+    db.session.expire_all()
+    assert (message.status, message.attempts, message.last_error) == ('sent', 2, None)
+
+
+def test_backoff_grows_and_is_capped(mail):
+    config = {'EMAIL_RETRY_BASE_SECONDS': 10, 'EMAIL_RETRY_MAX_SECONDS': 60}
+    delays = [email_outbox.backoff(n, config).total_seconds() for n in range(1, 6)]
+    assert 5 <= delays[0] <= 10
+    assert 20 <= delays[2] <= 40
+    assert 30 <= delays[4] <= 60
+
+
+def test_dead_letters_after_max_attempts(mail):
+    _notify()
+    transport = FakeTransport(*[smtplib.SMTPServerDisconnected('down')] * 3)
+
+    for expected in ('retry', 'retry', 'dead'):
+        outcome = drain(transport, NO_LIMIT)
+        assert outcome[expected] == 1
+        _make_due(db.session.query(EmailOutbox.id).scalar())
+
+    message = db.session.query(EmailOutbox).one()
+    db.session.refresh(message)
+    assert (message.status, message.attempts) == ('dead', 3)
+    assert drain(transport, NO_LIMIT) == {'sent': 0, 'retry': 0, 'dead': 0}
+
+
+def test_permanent_rejection_dead_letters_at_once(mail):
+    notification_id = _notify()
+    transport = FakeTransport(smtplib.SMTPRecipientsRefused({'s1@test.com': (550, b'No such user')}))
+
+    assert drain(transport, NO_LIMIT) == {'sent': 0, 'retry': 0, 'dead': 1}
+    db.session.expire_all()
+    assert db.session.query(EmailOutbox.status).scalar() == 'dead'
+    assert db.session.get(Notification, notification_id).email_sent is False
+
+
+def test_expired_lease_is_claimed_again(mail):
+    _notify()
+    db.session.query(EmailOutbox).update({'status': 'sending', 'claimed_by': 'gone',
+                                          'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+    assert drain(FakeTransport(), NO_LIMIT)['sent'] == 1
+
+
+def test_stale_sender_cannot_overwrite_a_reclaimed_row(mail):
+    _notify()
+    token, [message] = email_outbox._claim(10)
+    db.session.query(EmailOutbox).update({'claimed_by': 'someone-else'})
+    db.session.commit()
+
+    email_outbox._record(message, token, status='dead', last_error='late')
+
+    db.session.expire_all()
+    assert db.session.query(EmailOutbox.status).scalar() == 'sending'
+
+
+def test_rate_limiter_spaces_sends_per_provider(monkeypatch):
+    clock = [100.0]
+    sleeps = []
+    monkeypatch.setattr(email_outbox.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(email_outbox.time, 'sleep', sleeps.append)
+    limiter = RateLimiter(2, {'fast': 10})
+
+    for _ in range(3):
+        limiter.acquire('smtp.test')
+    limiter.acquire('fast')
+    limiter.acquire('fast')
+
+    assert sleeps == pytest.approx([0.5, 1.0, 0.1])
+
+
+def test_cli_drain_and_retry_dead(mail, runner, monkeypatch):
+    _notify()
+    monkeypatch.setattr(email_outbox, 'smtp_transport', lambda config: FakeTransport(
+        smtplib.SMTPDataError(554, b'Rejected')))
+
+    result = runner.invoke(args=['email', 'drain'])
+    assert 'Sent 0, will retry 0, dead-lettered 1.' in result.output
+
+    result = runner.invoke(args=['email', 'retry-dead'])
+    assert 'Re-queued 1 email(s).' in result.output
+    db.session.expire_all()
+    message = db.session.query(EmailOutbox).one()
+    assert (message.status, message.attempts) == ('pending', 0)
+
+
+def test_drain_delivers_through_pooled_smtp_sessions(mail, monkeypatch):
+    from benchmarks.smtp_sink import SMTPSink
+    monkeypatch.setattr(email_outbox, 'dispatcher', email_outbox.EmailDispatcher())
+    for i in range(3):
+        student = Student(student_code=f'S{i}', username=f's{i}', email=f's{i}@test.com',
+                          password_hash='x', full_name=f'S {i}')
+        db.session.add(student)
+        db.session.commit()
+        NotificationService.create_notification('student', student.id, 'Graded', 'Body')
+
+    with SMTPSink() as sink:
+        mail.config.update(MAIL_SERVER=sink.address[0], MAIL_PORT=sink.address[1], MAIL_USE_TLS=False)
+        assert drain(limiter=NO_LIMIT) == {'sent': 3, 'retry': 0, 'dead': 0}
+
+    assert sink.connections == 1
+    assert sorted(m[1][0] for m in sink.messages) == ['s0@test.com', 's1@test.com', 's2@test.com']
@@ -0,0 +1,171 @@
+from sqlalchemy import select
+
+from models import db, Course, MCQ, Staff, StaffCourse, StudyMaterial, StudyMaterialClosure
+from services.material_service import rebuild_hierarchy
+
+
+def _tree():
+    """a -> (b -> d, c), plus a separate root e; all added in one flush."""
+    a = StudyMaterial(title='a')
+    b = StudyMaterial(title='b', parent=a)
+    c = StudyMaterial(title='c', parent=a)
+    d = StudyMaterial(title='d', parent=b)
+    e = StudyMaterial(title='e')
+    db.session.add_all([d, c, b, a, e])
+    db.session.commit()
+    return {m.title: m.id for m in (a, b, c, d, e)}
+
+
+def _closure():
+    return set(db.session.execute(select(
+        StudyMaterialClosure.ancestor_id, StudyMaterialClosure.descendant_id, StudyMaterialClosure.depth
+    )).all())
+
+
+def _assert_matches_rebuild():
+    incremental = _closure()
+    with db.engine.begin() as conn:
+        rebuild_hierarchy(conn)
+    assert _closure() == incremental
+    return incremental
+
+
+def test_inserts_index_every_ancestor(app):
+    ids = _tree()
+    closure = _assert_matches_rebuild()
+    assert (ids['a'], ids['d'], 2) in closure
+    assert (ids['b'], ids['d'], 1) in closure
+    assert len(closure) == 5 + 4  # self rows, a-b, a-c, b-d, a-d
+
+
+def test_move_and_delete_keep_the_index_current(app, client):
+    ids = _tree()
+
+    # b moves below e, taking d along
+    assert client.put(f"/api/study-materials/{ids['b']}", json={'parent_id': ids['e']}).status_code == 200
+    closure = _assert_matches_rebuild()
+    assert (ids['e'], ids['d'], 2) in closure and (ids['a'], ids['d'], 2) not in closure
+
+    # A material cannot move into its own subtree
+    response = client.put(f"/api/study-materials/{ids['e']}", json={'parent_id': ids['d']})
+    assert response.status_code == 400
+
+    # Deleting a single material through the ORM makes its children roots
+    db.session.delete(db.session.get(StudyMaterial, ids['e']))
+    db.session.commit()
+    closure = _assert_matches_rebuild()
+    assert (ids['b'], ids['d'], 1) in closure
+    assert not {row for row in closure if ids['e'] in row[:2]}
+
+
+def test_move_rejects_a_parent_from_another_course(app, client):
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='T1')
+    courses = [Course(course_code='C1', course_name='Course 1'), Course(course_code='C2', course_name='Course 2')]
+    db.session.add_all([staff] + courses)
+    db.session.flush()
+    allocations = [StaffCourse(staff_id=staff.id, course_id=c.id) for c in courses]
+    db.session.add_all(allocations)
+    db.session.flush()
+    node = StudyMaterial(title='node', staff_course_id=allocations[0].id)
+    other = StudyMaterial(title='other', staff_course_id=allocations[1].id)
+    db.session.add_all([node, other])
+    db.session.commit()
+    before = _closure()
+
+    response = client.put(f'/api/study-materials/{node.id}', json={'parent_id': other.id})
+    assert response.status_code == 400
+    response = client.put(f'/api/study-materials/{node.id}', json={'parent_id': 'abc'})
+    assert response.status_code == 400
+    assert db.session.get(StudyMaterial, node.id).parent_id is None
+    assert _closure() == before
+
+    # A numeric string is accepted for a parent in the same course
+    sibling = StudyMaterial(title='sibling', staff_course_id=allocations[0].id)
+    db.session.add(sibling)
+    db.session.commit()
+    assert client.put(f'/api/study-materials/{node.id}', json={'parent_id': str(sibling.id)}).status_code == 200
+    assert (sibling.id, node.id, 1) in _assert_matches_rebuild()
+
+
+def test_subtree_and_breadcrumbs(app, client):
+    ids = _tree()
+
+    tree = client.get(f"/api/study-materials/{ids['a']}/subtree").get_json()
+    assert [c['title'] for c in tree['children']] == ['b', 'c']
+    assert [g['title'] for g in tree['children'][0]['children']] == ['d']
+
+    shallow = client.get(f"/api/study-materials/{ids['a']}/subtree?max_depth=1").get_json()
+    assert shallow['children'][0]['children'] == []
+
+    crumbs = client.get(f"/api/study-materials/{ids['d']}/breadcrumbs").get_json()
+    assert [c['title'] for c in crumbs] == ['a', 'b', 'd']
+    assert client.get('/api/study-materials/999/breadcrumbs').status_code == 404
+
+
+def test_delete_removes_the_subtree_and_detaches_questions(app, client):
+    ids = _tree()
+    course = Course(course_code='C1', course_name='Course 1')
+    db.session.add(course)
+    db.session.flush()
+    db.session.add(MCQ(question_text='Q', option_a='a', option_b='b', correct_answer='A',
+                       course_id=course.id, study_material_id=ids['d']))
+    db.session.commit()
+
+    response = client.delete(f"/api/study-materials/{ids['b']}?recursive=true")
+
+    assert response.get_json()['deleted'] == 2
+    remaining = db.session.scalars(select(StudyMaterial.title).order_by(StudyMaterial.title)).all()
+    assert remaining == ['a', 'c', 'e']
+    assert MCQ.query.one().study_material_id is None
+    _assert_matches_rebuild()
+
+
+def test_delete_without_recursive_keeps_the_children(app, client):
+    ids = _tree()
+
+    response = client.delete(f"/api/study-materials/{ids['b']}")
+
+    assert response.status_code == 200
+    assert db.session.get(StudyMaterial, ids['b']) is None
+    # d is promoted to a root
+    assert db.session.get(StudyMaterial, ids['d']).parent_id is None
+    assert (ids['a'], ids['d'], 2) not in _assert_matches_rebuild()
+
+
+def test_create_validates_the_parent(app, client):
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='T1')
+    courses = [Course(course_code='C1', course_name='Course 1'), Course(course_code='C2', course_name='Course 2')]
+    db.session.add_all([staff] + courses)
+    db.session.flush()
+    allocations = [StaffCourse(staff_id=staff.id, course_id=c.id) for c in courses]
+    db.session.add_all(allocations)
+    db.session.flush()
+    other = StudyMaterial(title='other', staff_course_id=allocations[1].id)
+    db.session.add(other)
+    db.session.commit()
+    before = _closure()
+
+    for parent_id, status in ((other.id, 400), ('abc', 400), (other.id + 100, 404)):
+        body = {'title': 'new', 'staff_course_id': allocations[0].id, 'parent_id': parent_id}
+        assert client.post('/api/study-materials', json=body).status_code == status
+        body = {'title': 'new', 'parent_id': parent_id}
+        assert client.post(f'/api/courses/{courses[0].id}/materials', json=body).status_code == status
+    assert StudyMaterial.query.count() == 1
+    assert _closure() == before
+
+    body = {'title': 'child', 'parent_id': str(other.id)}
+    response = client.post(f'/api/courses/{courses[1].id}/materials', json=body)
+    assert response.status_code == 201
+    assert (other.id, response.get_json()['id'], 1) in _assert_matches_rebuild()
+
+
+def test_rebuild_command_backfills_existing_rows(app, runner):
+    with db.engine.begin() as conn:
+        conn.execute(StudyMaterial.__table__.insert(), [{'id': 1, 'title': 'root'}])
+        conn.execute(StudyMaterial.__table__.insert(), [{'id': 2, 'title': 'child', 'parent_id': 1}])
+    assert _closure() == set()
+
+    result = runner.invoke(args=['materials', 'rebuild-hierarchy'])
+
+    assert 'Indexed the hierarchy of 2 study material(s).' in result.output
+    assert _closure() == {(1, 1, 0), (2, 2, 0), (1, 2, 1)}
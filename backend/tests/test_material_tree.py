@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Assignment, Course, MCQ, Program, Semester, Staff, StaffCourse, Student, StudyMaterial
+
+
+def _setup(roots=3, children=2):
+    program = Program(program_name='German', program_code='GER')
+    semester = Semester(semester_name='Sem 1', semester_number=1)
+    db.session.add_all([program, semester])
+    db.session.flush()
+    course = Course(course_code='C1', course_name='Course 1', program_id=program.id, semester_id=semester.id)
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S1',
+                      program_id=program.id, semester_id=semester.id)
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='T1')
+    db.session.add_all([course, student, staff])
+    db.session.flush()
+    allocation = StaffCourse(staff_id=staff.id, course_id=course.id)
+    db.session.add(allocation)
+    db.session.flush()
+
+    start = datetime.utcnow() - timedelta(days=30)
+    for r in range(roots):
+        root = StudyMaterial(title=f'R{r}', staff_course_id=allocation.id, upload_date=start + timedelta(days=r))
+        db.session.add(root)
+        db.session.flush()
+        for c in range(children):
+            child = StudyMaterial(title=f'R{r}.{c}', staff_course_id=allocation.id, parent_id=root.id)
+            db.session.add(child)
+            db.session.flush()
+            db.session.add(StudyMaterial(title=f'R{r}.{c}.0', staff_course_id=allocation.id, parent_id=child.id))
+            db.session.add(MCQ(question_text='Q', option_a='a', option_b='b', correct_answer='A',
+                               course_id=course.id, study_material_id=child.id))
+        db.session.add(Assignment(title=f'A{r}', course_id=course.id, study_material_id=root.id))
+    db.session.commit()
+    return student.id, course.id
+
+
+def test_student_material_tree(app, client):
+    student_id, course_id = _setup()
+
+    data = client.get(f'/api/student/{student_id}/courses/{course_id}/materials').get_json()
+
+    roots = data['materials']
+    assert [m['title'] for m in roots] == ['R2', 'R1', 'R0']
+    assert [c['title'] for c in roots[0]['children']] == ['R2.0', 'R2.1']
+    assert [g['title'] for g in roots[0]['children'][0]['children']] == ['R2.0.0']
+    assert roots[0]['assignment_count'] == 1 and roots[0]['mcq_count'] == 0
+    assert roots[0]['children'][1]['mcq_count'] == 1
+    assert roots[0]['children'][0]['children'][0]['children'] == []
+
+
+@pytest.mark.query_budget(5)
+def test_material_views_do_not_query_per_node(app, client):
+    # student, course, primary staff course, the tree, the counts
+    student_id, course_id = _setup(roots=20, children=5)
+    assert len(client.get(f'/api/student/{student_id}/courses/{course_id}/materials').get_json()['materials']) == 20
+
+    by_course = client.get(f'/api/courses/{course_id}/materials').get_json()
+    assert [len(m['children']) for m in by_course] == [5] * 20
+
+    listed = client.get('/api/study-materials?parent_only=true').get_json()
+    assert [len(m['children']) for m in listed] == [5] * 20
@@ -0,0 +1,116 @@
+import os
+import threading
+
+from metrics import MetricsRegistry, mark_process_dead, _labels
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_metrics_endpoint_reports_request_latency(app, client):
+    client.get('/api/programs')
+    client.get('/api/programs')
+
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE lls_http_request_duration_seconds histogram' in body
+    labels = 'blueprint="program",endpoint="program.get_all"'
+    assert _sample(body, f'lls_http_request_duration_seconds_count{{{labels}}}') >= 2
+    assert _sample(body, f'lls_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') >= 2
+    assert _sample(body, f'lls_http_request_db_queries_total{{{labels}}}') >= 2
+    assert _sample(body, f'lls_http_response_size_bytes_count{{{labels}}}') >= 2
+    assert _sample(body, 'lls_http_requests_in_flight') == 1   # the scrape itself
+    assert _sample(body, 'lls_email_threads') == 0
+
+
+def test_metrics_endpoint_requires_token_when_configured(app, client):
+    app.config['INTERNAL_API_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'X-Internal-Token': 'secret'}).status_code == 200
+
+
+def test_metrics_endpoint_is_closed_without_a_token_outside_testing(app, client):
+    app.config.update(TESTING=False, INTERNAL_API_TOKEN='')
+    assert client.get('/metrics').status_code == 403
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    labels = _labels(blueprint='mcq', endpoint='mcq.get_course_quiz')
+    for value in (0.001, 0.02, 0.02, 3.0):
+        registry.observe('lls_http_request_duration_seconds', labels, value)
+    body = registry.render()
+
+    prefix = 'lls_http_request_duration_seconds_bucket{blueprint="mcq",endpoint="mcq.get_course_quiz",le='
+    assert _sample(body, prefix + '"0.005"}') == 1
+    assert _sample(body, prefix + '"0.025"}') == 3
+    assert _sample(body, prefix + '"2.5"}') == 3
+    assert _sample(body, prefix + '"+Inf"}') == 4
+
+
+def test_samples_from_all_threads_are_summed():
+    registry = MetricsRegistry()
+    labels = _labels(blueprint='x', endpoint='x.y')
+
+    def work():
+        for _ in range(1000):
+            registry.inc('lls_http_requests_total', labels)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    counters, _ = registry.samples()
+    assert counters[('lls_http_requests_total', labels)] == 4000
+
+
+def test_shards_of_exited_threads_are_folded():
+    registry = MetricsRegistry()
+    labels = _labels(blueprint='x', endpoint='x.y')
+
+    def work():
+        registry.inc('lls_http_requests_total', labels)
+        registry.observe('lls_http_request_duration_seconds', labels, 0.02)
+
+    for _ in range(3):
+        for t in [threading.Thread(target=work) for _ in range(4)]:
+            t.start()
+            t.join()
+        registry.samples()
+    work()   # this thread is still alive
+
+    counters, histograms = registry.samples()
+    assert counters[('lls_http_requests_total', labels)] == 13
+    assert sum(histograms[('lls_http_request_duration_seconds', labels)][:-1]) == 13
+    # The base shard plus the one of the live thread
+    assert len(registry._shards) == 2
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    directory = str(tmp_path)
+    labels = _labels(blueprint='x', endpoint='x.y')
+
+    # Pretend an exited worker left a snapshot behind
+    other = MetricsRegistry()
+    other.inc('lls_http_requests_total', labels, 5)
+    other.flush(directory, force=True)
+    os.rename(tmp_path / f'metrics-{os.getpid()}.json', tmp_path / 'metrics-1.json')
+    mark_process_dead(directory, 1)
+
+    registry = MetricsRegistry()
+    registry.inc('lls_http_requests_total', labels, 2)
+    body = registry.render(directory)
+
+    assert _sample(body, 'lls_http_requests_total{blueprint="x",endpoint="x.y"}') == 7
+    # Gauges of the dead worker are gone, the live one is labelled by pid
+    assert f'lls_http_requests_in_flight{{pid="{os.getpid()}"}}' in body
+    assert 'pid="1"' not in body
@@ -0,0 +1,87 @@
+from sqlalchemy import inspect, text
+
+import migrations
+from models import db, Admin
+
+
+def _index_names(table_name):
+    return {i['name'] for i in inspect(db.engine).get_indexes(table_name)}
+
+
+def test_upgrade_builds_schema_from_empty_database(app):
+    with app.app_context():
+        db.drop_all()
+        applied = migrations.upgrade(db.engine, log=lambda msg: None)
+
+        assert applied == [m.revision for m in migrations.load_migrations()]
+        assert migrations.current_revision(db.engine) == migrations.head_revision()
+        assert 'mcq_attempt' in inspect(db.engine).get_table_names()
+        assert 'ix_mcq_attempt_student_mcq' in _index_names('mcq_attempt')
+
+        # Running again is a no-op
+        assert migrations.upgrade(db.engine, log=lambda msg: None) == []
+
+
+def test_upgrade_adds_indexes_to_legacy_database(app):
+    """A database created by db.create_all() before indexes existed gets them added."""
+    with app.app_context():
+        for index in db.metadata.tables['notification'].indexes:
+            index.drop(bind=db.engine)
+        assert 'ix_notification_user_unread' not in _index_names('notification')
+
+        migrations.upgrade(db.engine, log=lambda msg: None)
+
+        assert 'ix_notification_user_unread' in _index_names('notification')
+
+
+def test_downgrade_reverts_indexes(app):
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda msg: None)
+        migrations.downgrade(db.engine, target=1, log=lambda msg: None)
+
+        assert migrations.current_revision(db.engine) == 1
+        assert 'ix_mcq_course_id' not in _index_names('mcq')
+
+
+def test_create_admin_command_is_idempotent(app, runner):
+    result = runner.invoke(args=['create-admin'])
+    assert 'created' in result.output
+    result = runner.invoke(args=['create-admin'])
+    assert 'already exists' in result.output
+
+    with app.app_context():
+        assert Admin.query.filter_by(username='admin').count() == 1
+
+
+def test_db_cli_upgrade_and_current(runner):
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0
+    result = runner.invoke(args=['db', 'current'])
+    assert f'Current revision: {migrations.head_revision()}' in result.output
+
+
+def test_score_summaries_are_rebuilt_with_cascading_keys(app):
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda msg: None)
+        # The summary tables as revision 4 created them before their keys cascaded
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE student_course_score'))
+            conn.execute(text('DROP TABLE course_score_total'))
+            conn.execute(text(
+                'CREATE TABLE course_score_total (course_id INTEGER NOT NULL PRIMARY KEY REFERENCES course (id), '
+                'assignment_count INTEGER NOT NULL, assignment_total_marks NUMERIC(10, 2) NOT NULL, '
+                'last_due_date DATETIME, mcq_count INTEGER NOT NULL, quiz_total_marks NUMERIC(10, 2) NOT NULL, '
+                'updated_at DATETIME)'))
+            conn.execute(text(
+                'CREATE TABLE student_course_score (student_id INTEGER NOT NULL REFERENCES student (id), '
+                'course_id INTEGER NOT NULL REFERENCES course (id), submitted_count INTEGER NOT NULL, '
+                'graded_count INTEGER NOT NULL, assignment_earned NUMERIC(10, 2) NOT NULL, '
+                'quiz_attempted_count INTEGER NOT NULL, quiz_correct_count INTEGER NOT NULL, '
+                'quiz_earned NUMERIC(10, 2) NOT NULL, updated_at DATETIME, PRIMARY KEY (student_id, course_id))'))
+            conn.execute(migrations.schema_version.delete().where(migrations.schema_version.c.revision == 9))
+
+        assert migrations.upgrade(db.engine, log=lambda msg: None) == [9]
+
+        for name in ('student_course_score', 'course_score_total'):
+            assert {fk['options'].get('ondelete') for fk in inspect(db.engine).get_foreign_keys(name)} == {'CASCADE'}
+        assert 'ix_student_course_score_course' in _index_names('student_course_score')
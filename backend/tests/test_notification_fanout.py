@@ -0,0 +1,122 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from models import db, Assignment, Course, EmailOutbox, Notification, Program, Semester, Staff, StaffCourse, \
+    Student, StudentCourse, StudyMaterial
+from services import notification_service
+from services.notification_service import NotificationService
+
+
+def _course(enrolled=3, cohort=2):
+    """A course with ``enrolled`` active enrolments and ``cohort`` more students only in its program/semester."""
+    program = Program(program_name='P', program_code='P')
+    semester = Semester(semester_name='S1', semester_number=1)
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='Teacher')
+    db.session.add_all([program, semester, staff])
+    db.session.flush()
+    course = Course(course_code='C1', course_name='Course One', program_id=program.id, semester_id=semester.id)
+    db.session.add(course)
+    db.session.flush()
+
+    students = []
+    for i in range(enrolled + cohort):
+        in_cohort = i >= enrolled or i == 0  # student 0 is both enrolled and in the cohort
+        students.append(Student(student_code=f'S{i}', username=f's{i}', email=f's{i}@test.com', password_hash='x',
+                                full_name=f'Student {i}', program_id=program.id if in_cohort else None,
+                                semester_id=semester.id if in_cohort else None))
+    dropped = Student(student_code='D', username='d', email='d@test.com', password_hash='x', full_name='Dropped')
+    db.session.add_all(students + [dropped])
+    db.session.flush()
+    db.session.add_all([StudentCourse(student_id=s.id, course_id=course.id, status='active') for s in students[:enrolled]])
+    db.session.add(StudentCourse(student_id=dropped.id, course_id=course.id, status='dropped'))
+    allocation = StaffCourse(staff_id=staff.id, course_id=course.id)
+    db.session.add(allocation)
+    db.session.commit()
+    return course, allocation, students
+
+
+def _notifications(notification_type):
+    return {n.user_id: n for n in Notification.query.filter_by(notification_type=notification_type)}
+
+
+def test_new_assignment_reaches_enrolled_and_cohort_students_once(app):
+    course, _, students = _course()
+    assignment = Assignment(title='Essay', course_id=course.id, max_marks=10)
+    db.session.add(assignment)
+    db.session.commit()
+
+    assert NotificationService.notify_new_assignment(assignment) == 5
+
+    notifications = _notifications('new_assignment')
+    assert set(notifications) == {s.id for s in students}
+    first = notifications[students[1].id]
+    assert first.title == '📝 New Assignment: Essay'
+    assert first.message.startswith('Dear Student 1,\n')
+    assert (first.reference_type, first.reference_id, first.is_read, first.email_sent) == \
+        ('assignment', assignment.id, False, False)
+    # No credentials configured: nothing is queued
+    assert EmailOutbox.query.count() == 0
+
+
+def test_new_material_queues_personalised_emails(app):
+    app.config.update(MAIL_USERNAME='lls', MAIL_PASSWORD='secret', EMAIL_WORKERS=0)
+    course, allocation, students = _course()
+    students[2].email = ''
+    db.session.commit()
+    material = StudyMaterial(title='Week 1', file_type='pdf', staff_course_id=allocation.id)
+    db.session.add(material)
+    db.session.commit()
+
+    assert NotificationService.notify_new_study_material(material) == 5
+
+    notifications = _notifications('new_study_material')
+    emails = {e.to_email: e for e in EmailOutbox.query}
+    assert set(emails) == {s.email for s in students if s.email}
+    email = emails['s3@test.com']
+    assert email.notification_id == notifications[students[3].id].id
+    assert email.subject == '📚 New Study Material: Week 1'
+    assert email.body.startswith('Dear Student 3,')
+    assert '<strong>Student 3</strong>' in email.html_body
+    assert email.status == 'pending'
+
+
+@pytest.mark.parametrize('size', [4, 40])
+def test_fanout_statement_count_does_not_grow_with_the_course(app, query_budget, size):
+    app.config.update(MAIL_USERNAME='lls', MAIL_PASSWORD='secret', EMAIL_WORKERS=0)
+    course, _, _ = _course(enrolled=size, cohort=size)
+    assignment = Assignment(title='Essay', course_id=course.id, max_marks=10)
+    db.session.add(assignment)
+    db.session.commit()
+    assignment_id = assignment.id
+
+    with query_budget(4):
+        NotificationService.notify_new_assignment(db.session.get(Assignment, assignment_id))
+
+    assert Notification.query.count() == 2 * size
+    assert EmailOutbox.query.count() == 2 * size
+
+
+def test_emails_link_only_to_the_notifications_just_created(app, monkeypatch):
+    app.config.update(MAIL_USERNAME='lls', MAIL_PASSWORD='secret', EMAIL_WORKERS=0)
+    course, _, students = _course(enrolled=2, cohort=0)
+    outsider = Student(student_code='X', username='x', email='x@test.com', password_hash='x', full_name='Outsider')
+    assignment = Assignment(title='Essay', course_id=course.id, max_marks=10)
+    db.session.add_all([outsider, assignment])
+    db.session.commit()
+
+    # An earlier notification with the same type, reference and timestamp
+    now = datetime(2026, 3, 10, 9, 0)
+    monkeypatch.setattr(notification_service, 'datetime', SimpleNamespace(utcnow=lambda: now))
+    db.session.add(Notification(user_type='student', user_id=outsider.id, title='Old', message='Old',
+                                notification_type='new_assignment', reference_type='assignment',
+                                reference_id=assignment.id, created_at=now))
+    db.session.commit()
+
+    assert NotificationService.notify_new_assignment(assignment) == 2
+
+    created = _notifications('new_assignment')
+    emails = EmailOutbox.query.all()
+    assert {e.to_email for e in emails} == {s.email for s in students}
+    assert {e.notification_id for e in emails} == {created[s.id].id for s in students}
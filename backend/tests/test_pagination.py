@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from models import db, Communication, MCQ, Staff, Student
+
+
+def _pages(client, url):
+    """Every page of a list endpoint, following X-Next-Cursor."""
+    pages, cursor = [], None
+    while True:
+        separator = '&' if '?' in url else '?'
+        response = client.get(url + (f'{separator}cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        pages.append(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return pages
+
+
+def test_pages_cover_every_row_once(app, client):
+    db.session.add_all([
+        Student(student_code=f'S{i}', username=f's{i}', email=f's{i}@test.com', password_hash='x', full_name=f'S{i}')
+        for i in range(7)
+    ])
+    db.session.commit()
+
+    pages = _pages(client, '/api/students?limit=3')
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert [s['student_code'] for p in pages for s in p] == [f'S{i}' for i in range(7)]
+
+
+def test_sort_key_ties_and_nulls(app, client):
+    same = datetime(2026, 1, 1)
+    created = [same, same, same + timedelta(days=1), same, same]
+    db.session.add_all([
+        MCQ(question_text=f'Q{i}', option_a='a', option_b='b', correct_answer='A', created_at=at)
+        for i, at in enumerate(created)
+    ])
+    db.session.commit()
+    # The column default fills in missing timestamps on insert
+    db.session.execute(MCQ.__table__.update().where(MCQ.question_text == 'Q3').values(created_at=None))
+    db.session.commit()
+
+    pages = _pages(client, '/api/mcqs?limit=2')
+
+    # Newest first, ties broken by id (newest id first), NULL timestamps last
+    assert [m['question_text'] for p in pages for m in p] == ['Q2', 'Q4', 'Q1', 'Q0', 'Q3']
+
+
+def test_totals_and_invalid_parameters(app, client):
+    db.session.add_all([Staff(staff_code=f'T{i}', username=f't{i}', email=f't{i}@test.com', password_hash='x',
+                              full_name=f'T{i}') for i in range(3)])
+    db.session.commit()
+
+    response = client.get('/api/staff?limit=2&total=exact')
+    assert response.headers['X-Total-Count'] == '3'
+    assert 'cursor=' in response.headers['Link']
+    assert client.get('/api/staff?total=estimate').headers['X-Total-Count'] == '3'
+
+    assert client.get('/api/staff?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/staff?limit=zero').status_code == 400
+    assert client.get('/api/staff?total=some').status_code == 400
+
+
+def test_inbox_pages_resolve_sender_names(app, client):
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='Sam')
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='Tia')
+    db.session.add_all([student, staff])
+    db.session.flush()
+    start = datetime(2026, 1, 1)
+    db.session.add_all([
+        Communication(sender_type='staff' if i % 2 else 'admin', sender_id=staff.id if i % 2 else 1,
+                      receiver_type='student', receiver_id=student.id, message=f'M{i}',
+                      sent_at=start + timedelta(hours=i))
+        for i in range(5)
+    ])
+    db.session.commit()
+
+    pages = _pages(client, f'/api/communications/inbox/student/{student.id}?limit=2')
+
+    messages = [m for p in pages for m in p]
+    assert [m['message'] for m in messages] == ['M4', 'M3', 'M2', 'M1', 'M0']
+    assert [m['sender_name'] for m in messages[:2]] == ['Administrator', 'Tia']
+    assert client.get(f'/api/communications/inbox/student/{student.id}?cursor=x').status_code == 400
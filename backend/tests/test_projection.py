@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from models import db, Assignment, Course, Evaluation, MCQ, Student, StudentCourse, Submission
+from routes.mcq import serialize_mcq
+
+
+def _setup(n=5):
+    courses = [Course(course_code=f'C{i}', course_name=f'Course {i}') for i in range(2)]
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='Sam')
+    db.session.add_all(courses + [student])
+    db.session.flush()
+    db.session.add(StudentCourse(student_id=student.id, course_id=courses[0].id, status='active'))
+    start = datetime(2026, 1, 1)
+    mcqs = [MCQ(question_text=f'Q{i}', option_a='a', option_b='b', correct_answer='A', marks=2,
+                course_id=courses[i % 2].id, created_at=start + timedelta(hours=i)) for i in range(n)]
+    assignments = [Assignment(title=f'A{i}', course_id=courses[i % 2].id, max_marks=10) for i in range(n)]
+    db.session.add_all(mcqs + assignments)
+    db.session.flush()
+    submissions = [Submission(assignment_id=a.id, student_id=student.id) for a in assignments]
+    db.session.add_all(submissions)
+    db.session.flush()
+    db.session.add(Evaluation(submission_id=submissions[0].id, marks_obtained=7, feedback='ok'))
+    db.session.commit()
+    return courses, student, mcqs, submissions
+
+
+def test_projected_list_matches_the_entity_serializer(app, client, query_budget):
+    _, _, mcqs, _ = _setup(n=30)
+
+    with query_budget(1):
+        data = client.get('/api/mcqs').get_json()
+
+    expected = sorted((serialize_mcq(m) for m in mcqs), key=lambda m: m['created_at'], reverse=True)
+    assert data == expected
+
+
+def test_fields_trim_the_payload(app, client):
+    _setup()
+
+    data = client.get('/api/mcqs?fields=id,course_name').get_json()
+    assert set(data[0]) == {'id', 'course_name'}
+    assert data[0]['course_name'] == 'Course 0'
+
+    response = client.get('/api/mcqs?fields=id,answer')
+    assert response.status_code == 400
+    assert 'answer' in response.get_json()['error']
+
+
+def test_nested_submission_fields(app, client, query_budget):
+    courses, student, _, submissions = _setup()
+    student_id = student.id
+
+    with query_budget(1):
+        data = client.get(f'/api/submissions?student_id={student_id}').get_json()
+
+    assert [s['id'] for s in data] == [s.id for s in submissions]
+    assert data[0]['student'] == {'id': student.id, 'student_code': 'S1', 'full_name': 'Sam', 'username': 's1'}
+    assert data[0]['course'] == {'id': courses[0].id, 'course_code': 'C0', 'course_name': 'Course 0'}
+    assert data[0]['evaluation'] == {'marks_obtained': 7.0, 'feedback': 'ok'}
+    assert data[1]['evaluation'] is None
+
+    trimmed = client.get(f'/api/submissions?course_id={courses[1].id}&fields=assignment').get_json()
+    assert [set(s) for s in trimmed] == [{'assignment'}] * 2
+    assert {s['assignment']['course_id'] for s in trimmed} == {courses[1].id}
+
+
+def test_assignment_list_for_a_student(app, client):
+    courses, student, _, _ = _setup()
+
+    data = client.get(f'/api/assignments?student_id={student.id}&fields=title,max_marks').get_json()
+
+    assert data == [{'title': f'A{i}', 'max_marks': 10.0} for i in (0, 2, 4)]
@@ -0,0 +1,69 @@
+import pytest
+
+from models import db, Course, Staff, StaffCourse, Student
+from query_stats import count_queries, fingerprint
+
+
+def _add_allocations(count):
+    staff = Staff(staff_code='T001', username='teacher', email='t@test.com', password_hash='x', full_name='Teacher')
+    db.session.add(staff)
+    for i in range(count):
+        course = Course(course_code=f'C{i:03d}', course_name=f'Course {i}')
+        db.session.add(course)
+        db.session.flush()
+        db.session.add(StaffCourse(staff_id=staff.id, course_id=course.id))
+    db.session.commit()
+    # Drop the identity map so the endpoint has to load courses itself
+    db.session.expunge_all()
+
+
+def test_fingerprint_ignores_parameters_and_in_list_length():
+    a, _ = fingerprint('SELECT * FROM mcq WHERE id IN (?, ?)')
+    b, _ = fingerprint('SELECT  *  FROM mcq\nWHERE id IN (?, ?, ?, ?)')
+    c, _ = fingerprint('SELECT * FROM student WHERE id = ?')
+    assert a == b
+    assert a != c
+
+
+def test_headers_report_query_count(app, client):
+    app.config['QUERY_STATS_HEADERS'] = True
+    response = client.get('/api/programs')
+
+    assert response.headers['X-Query-Count'] == '1'
+    assert float(response.headers['X-Query-Time-Ms']) >= 0
+    assert 'X-Query-Repeated' not in response.headers
+
+
+def test_headers_off_by_default_outside_debug(client):
+    assert 'X-Query-Count' not in client.get('/api/programs').headers
+
+
+def test_repeated_lookups_are_flagged(app, client):
+    app.config['QUERY_STATS_HEADERS'] = True
+    _add_allocations(6)
+
+    response = client.get('/api/staff-courses?include_course=true')
+
+    assert response.status_code == 200
+    assert 'X-Query-Repeated' in response.headers
+    assert response.headers['X-Query-Repeated'].endswith('x6')
+
+
+def test_count_queries_block(app):
+    with count_queries() as stats:
+        Student.query.count()
+        Student.query.count()
+    assert stats.count == 2
+    assert stats.repeated(2)[0]['count'] == 2
+
+
+@pytest.mark.query_budget(1)
+def test_budget_marker_within_budget(client):
+    assert client.get('/api/programs').status_code == 200
+
+
+def test_budget_fixture_fails_over_budget(app, client, query_budget):
+    _add_allocations(3)
+    with pytest.raises(pytest.fail.Exception, match='Query budget of 2 exceeded'):
+        with query_budget(2):
+            client.get('/api/staff-courses?include_course=true')
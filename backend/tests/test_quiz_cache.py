@@ -0,0 +1,93 @@
+from werkzeug.security import generate_password_hash
+
+from models import db, Course, MCQ, MCQAttempt, Staff, StaffCourse, Student, StudentCourse, StudyMaterial
+from query_stats import count_queries
+
+
+def _setup():
+    course = Course(course_code='GER-A1', course_name='German A1')
+    student = Student(student_code='S1', username='s1', email='s1@test.com',
+                      password_hash=generate_password_hash('x'), full_name='Student One')
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='Teacher')
+    db.session.add_all([course, student, staff])
+    db.session.flush()
+    allocation = StaffCourse(staff_id=staff.id, course_id=course.id)
+    db.session.add_all([allocation, StudentCourse(student_id=student.id, course_id=course.id, status='active')])
+    db.session.flush()
+    material = StudyMaterial(title='Unit 1', staff_course_id=allocation.id)
+    db.session.add(material)
+    db.session.flush()
+    mcqs = [
+        MCQ(question_text=f'Q{i}', option_a='a', option_b='b', correct_answer='A', course_id=course.id,
+            study_material_id=material.id if i < 2 else None)
+        for i in range(3)
+    ]
+    db.session.add_all(mcqs)
+    db.session.commit()
+    return course.id, material.id, student.id, [m.id for m in mcqs]
+
+
+def test_course_quiz_hides_answers_and_flags_attempts(app, client):
+    course_id, _, student_id, mcq_ids = _setup()
+    db.session.add(MCQAttempt(student_id=student_id, mcq_id=mcq_ids[0], selected_answer='A', is_correct=True))
+    db.session.commit()
+
+    data = client.get(f'/api/courses/{course_id}/quiz?student_id={student_id}').get_json()
+
+    assert data['total_questions'] == 3
+    assert data['attempted_count'] == 1
+    assert [q['attempted'] for q in data['questions']] == [True, False, False]
+    assert all('correct_answer' not in q for q in data['questions'])
+    assert data['questions'][0]['course_name'] == 'German A1'
+
+
+def test_cached_payload_is_reused_across_students(app, client):
+    course_id, _, student_id, _ = _setup()
+    client.get(f'/api/courses/{course_id}/quiz?student_id={student_id}')
+
+    with count_queries() as stats:
+        client.get(f'/api/courses/{course_id}/quiz?student_id={student_id}')
+    # student, enrollment, cache version, attempts — the MCQ rows are not reloaded
+    assert stats.count == 4
+    assert not any('FROM mcq ' in sql for sql, _, _ in stats.statements.values())
+
+
+def test_mcq_writes_invalidate_cached_quiz(app, client):
+    course_id, material_id, student_id, mcq_ids = _setup()
+    url = f'/api/courses/{course_id}/quiz?student_id={student_id}'
+    material_url = f'/api/materials/{material_id}/quiz?student_id={student_id}'
+    assert client.get(url).get_json()['total_questions'] == 3
+    assert client.get(material_url).get_json()['total_questions'] == 2
+
+    client.post('/api/mcqs', json={'question_text': 'New', 'option_a': 'a', 'option_b': 'b',
+                                   'correct_answer': 'b', 'course_id': course_id, 'study_material_id': material_id})
+    assert client.get(url).get_json()['total_questions'] == 4
+    assert client.get(material_url).get_json()['total_questions'] == 3
+
+    client.put(f'/api/mcqs/{mcq_ids[0]}', json={'question_text': 'Edited'})
+    assert client.get(url).get_json()['questions'][0]['question_text'] == 'Edited'
+
+    client.delete(f'/api/mcqs/{mcq_ids[1]}')
+    assert client.get(url).get_json()['total_questions'] == 3
+    assert client.get(material_url).get_json()['total_questions'] == 2
+
+
+def test_course_rename_invalidates_material_quiz(app, client):
+    course_id, material_id, _, _ = _setup()
+    client.get(f'/api/materials/{material_id}/quiz')
+
+    db.session.get(Course, course_id).course_name = 'German A1.1'
+    db.session.commit()
+
+    questions = client.get(f'/api/materials/{material_id}/quiz').get_json()['questions']
+    assert questions[0]['course_name'] == 'German A1.1'
+
+
+def test_material_quiz_access_control(app, client):
+    _, material_id, student_id, _ = _setup()
+    assert client.get(f'/api/materials/9999/quiz?student_id={student_id}').status_code == 404
+
+    other = Student(student_code='S2', username='s2', email='s2@test.com', password_hash='x', full_name='Other')
+    db.session.add(other)
+    db.session.commit()
+    assert client.get(f'/api/materials/{material_id}/quiz?student_id={other.id}').status_code == 403
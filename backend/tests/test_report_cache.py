@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+import cache
+from cache import VersionedCache
+from metrics import registry
+from models import db, Assignment, CacheVersion, Evaluation, MCQ, MCQAttempt, StaffCourse, Student, StudyMaterial, \
+    Submission
+from query_stats import count_queries
+from routes.report import report_cache
+from tests.test_staff_report import _setup
+
+
+def _counter(name, cache_name, **labels):
+    counters, _ = registry.samples()
+    key = (name, tuple(sorted(dict(labels, cache=cache_name).items())))
+    return counters.get(key, 0)
+
+
+def test_lru_eviction_expiry_and_metrics(app):
+    lru = VersionedCache('test_lru', maxsize=2)
+    builds = []
+
+    def build(value):
+        builds.append(value)
+        return value
+
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        lru.get_or_build(key, ['scope'], lambda: build(key))
+
+    # 'b' was evicted by 'c' ('a' was used more recently), so it is built twice
+    assert builds == ['a', 'b', 'c', 'b']
+    assert len(lru) == 2
+    assert _counter('lls_cache_requests_total', 'test_lru', result='hit') == 1
+    assert _counter('lls_cache_requests_total', 'test_lru', result='miss') == 4
+    assert _counter('lls_cache_evictions_total', 'test_lru') == 2
+    assert ('lls_cache_entries', (('cache', 'test_lru'),), 2) in cache.collect_metrics()
+
+    past = datetime.utcnow() - timedelta(seconds=1)
+    lru.get_or_build('x', ['scope'], lambda: build('x'), expires=lambda value: past)
+    lru.get_or_build('x', ['scope'], lambda: build('x'))
+    assert builds[-2:] == ['x', 'x']
+
+
+def test_student_results_cached_until_scores_change(app, client):
+    staff_id, course_id, student_ids = _setup()
+    url = f'/api/student/{student_ids[1]}/course-results'
+    first = client.get(url).get_json()
+
+    with count_queries() as stats:
+        assert client.get(url).get_json() == first
+    assert stats.count == 2
+
+    # Another student's activity does not invalidate this student's results
+    mcq_ids = [m.id for m in MCQ.query.order_by(MCQ.id)]
+    db.session.add(MCQAttempt(student_id=student_ids[0], mcq_id=mcq_ids[1], selected_answer='A', is_correct=True))
+    db.session.commit()
+    with count_queries() as stats:
+        client.get(url)
+    assert stats.count == 2
+
+    db.session.add(MCQAttempt(student_id=student_ids[1], mcq_id=mcq_ids[1], selected_answer='A', is_correct=True))
+    db.session.commit()
+    assert client.get(url).get_json()['courses'][0]['quiz']['correct_count'] == 1
+
+    # Course content changes reach every student
+    assignment = Assignment.query.filter_by(title='Future').one()
+    assignment.title = 'Renamed'
+    db.session.commit()
+    titles = [a['title'] for a in client.get(url).get_json()['courses'][0]['assignments']['details']]
+    assert 'Renamed' in titles
+
+
+def test_staff_report_follows_evaluations_and_renames(app, client):
+    staff_id, course_id, student_ids = _setup()
+    url = f'/api/reports/staff/{staff_id}'
+    assert client.get(url).get_json()[0]['marks_obtained'] == 13.0
+
+    evaluation = Evaluation.query.one()
+    evaluation.marks_obtained = 10
+    db.session.commit()
+    assert client.get(url).get_json()[0]['marks_obtained'] == 15.0
+
+    db.session.get(Student, student_ids[1]).full_name = 'Renamed'
+    db.session.commit()
+    assert client.get(url).get_json()[1]['student_name'] == 'Renamed'
+
+
+def test_staff_report_expires_when_a_deadline_passes(app, client):
+    staff_id, _, _ = _setup()
+    url = f'/api/reports/staff/{staff_id}'
+    assert client.get(url).get_json()[1]['missed_deadlines'] == 1
+
+    # Move the future deadline into the past behind the cache's back
+    with db.engine.begin() as conn:
+        conn.execute(Assignment.__table__.update().values(due_date=datetime.utcnow() - timedelta(hours=1)))
+    assert client.get(url).get_json()[1]['missed_deadlines'] == 1
+
+    # The entry expires at the (original) next due date; fast-forward to it
+    (key, (version, value, expires_at)), = report_cache._data.items()
+    assert expires_at > datetime.utcnow()
+    report_cache._data[key] = (version, value, datetime.utcnow())
+    assert client.get(url).get_json()[1]['missed_deadlines'] == 2
+
+
+def test_admin_reports_invalidated_by_submissions(app, client):
+    staff_id, course_id, student_ids = _setup()
+    before = client.get('/api/admin/course-report').get_json()[0]['total_submissions']
+
+    with count_queries() as stats:
+        client.get('/api/admin/course-report')
+    assert stats.count == 1
+
+    assignment = Assignment.query.filter_by(title='Future').one()
+    db.session.add(Submission(assignment_id=assignment.id, student_id=student_ids[1]))
+    db.session.commit()
+    assert client.get('/api/admin/course-report').get_json()[0]['total_submissions'] == before + 1
+    assert client.get('/api/admin/staff-report').get_json()[0]['total_submissions'] == before + 1
+
+
+def test_admin_reports_depend_only_on_the_tables_they_read(app, client):
+    staff_id, course_id, _ = _setup()
+    client.get('/api/admin/staff-report')
+    client.get('/api/admin/course-report')
+
+    allocation = StaffCourse.query.first()
+    db.session.add(StudyMaterial(title='Week 1', staff_course_id=allocation.id))
+    db.session.commit()
+
+    # The staff report does not count materials, so it stays cached
+    with count_queries() as stats:
+        client.get('/api/admin/staff-report')
+    assert stats.count == 1
+    assert client.get('/api/admin/course-report').get_json()[0]['materials_count'] == 1
+
+
+def test_versions_are_bumped_inside_the_writer_transaction(app):
+    staff_id, course_id, student_ids = _setup()
+    scope = f'course-scores:{course_id}'
+    mcq_id = MCQ.query.order_by(MCQ.id).first().id
+
+    def version():
+        return db.session.get(CacheVersion, scope, populate_existing=True).version
+
+    before = version()
+    db.session.add(MCQAttempt(student_id=student_ids[0], mcq_id=mcq_id, selected_answer='A', is_correct=True))
+    db.session.flush()
+    assert version() == before + 1
+    assert scope in cache.uncommitted_scopes(db.session)
+    db.session.commit()
+    assert version() == before + 1
+
+    db.session.add(MCQAttempt(student_id=student_ids[1], mcq_id=mcq_id, selected_answer='A', is_correct=True))
+    db.session.flush()
+    db.session.rollback()
+    assert version() == before + 1
+    assert not cache.uncommitted_scopes(db.session)
+
+
+def test_failed_bump_discards_cached_payloads_after_commit(app, monkeypatch):
+    lru = VersionedCache('test_failed_bump')
+    assert lru.get_or_build('names', ['students'], lambda: 'before') == 'before'
+    bump_versions = cache.bump_versions
+    failures = []
+
+    def failing_bump(connection, scope_names):
+        if not failures:
+            failures.append(1)
+            raise OperationalError('UPDATE cache_version', {}, Exception('lock timeout'))
+        return bump_versions(connection, scope_names)
+
+    # The first try fails and is retried
+    monkeypatch.setattr(cache, 'bump_versions', failing_bump)
+    db.session.add(Student(student_code='S8', username='s8', email='s8@test.com', password_hash='x', full_name='A'))
+    db.session.commit()
+    assert lru.get_or_build('names', ['students'], lambda: 'retried') == 'retried'
+
+    # Every try fails: the write still commits and the entry is dropped
+    def always_fail(connection, scope_names):
+        raise OperationalError('UPDATE cache_version', {}, Exception('lock timeout'))
+
+    monkeypatch.setattr(cache, 'bump_versions', always_fail)
+    db.session.add(Student(student_code='S9', username='s9', email='s9@test.com', password_hash='x', full_name='B'))
+    db.session.commit()
+    assert Student.query.filter_by(student_code='S9').count() == 1
+    assert len(lru) == 0
+
+
+def test_uncommitted_writes_are_not_cached(app):
+    lru = VersionedCache('test_uncommitted')
+    db.session.add(Student(student_code='S9', username='s9', email='s9@test.com', password_hash='x',
+                           full_name='Pending'))
+    db.session.flush()
+
+    assert lru.get_or_build('names', ['students'], lambda: 'uncommitted') == 'uncommitted'
+    db.session.rollback()
+    assert lru.get_or_build('names', ['students'], lambda: 'committed') == 'committed'
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from benchmarks.seed_scale import seed
+from models import db, Assignment, Evaluation, MCQ, MCQAttempt, Student, StudentCourse, Submission
+from query_stats import count_queries
+from routes.result import _compute_course_result, _compute_course_results, _iso, _to_float
+from tests.test_seed_scale import TINY
+
+
+def _reference_result(student_id, course):
+    """Course result aggregated straight from the source tables, without the summaries."""
+    assignments = Assignment.query.filter_by(course_id=course.id).order_by(Assignment.id).all()
+    submissions = {
+        s.assignment_id: s
+        for s in Submission.query.filter(Submission.student_id == student_id,
+                                         Submission.assignment_id.in_([a.id for a in assignments]))
+    }
+    details = []
+    for a in assignments:
+        submission = submissions.get(a.id)
+        evaluation = submission and Evaluation.query.filter_by(submission_id=submission.id).first()
+        marks = _to_float(evaluation.marks_obtained) if evaluation and evaluation.marks_obtained is not None else None
+        details.append({'id': a.id, 'title': a.title, 'max_marks': _to_float(a.max_marks), 'due_date': _iso(a.due_date),
+                        'submitted': submission is not None, 'graded': marks is not None, 'marks_obtained': marks})
+    assignment_total = sum(d['max_marks'] for d in details)
+    assignment_earned = sum(d['marks_obtained'] or 0.0 for d in details)
+    submitted = sum(d['submitted'] for d in details)
+    last_due_date = max((a.due_date for a in assignments if a.due_date), default=None)
+
+    mcqs = MCQ.query.filter_by(course_id=course.id).all()
+    attempts = {
+        a.mcq_id: a
+        for a in MCQAttempt.query.filter(MCQAttempt.student_id == student_id, MCQAttempt.mcq_id.in_([m.id for m in mcqs]))
+    }
+    correct = [m for m in mcqs if m.id in attempts and attempts[m.id].is_correct]
+    quiz_total = sum(_to_float(m.marks, 1.0) for m in mcqs)
+    quiz_earned = sum(_to_float(m.marks, 1.0) for m in correct)
+
+    total_possible = assignment_total + quiz_total
+    total_earned = assignment_earned + quiz_earned
+    percentage = round(total_earned / total_possible * 100, 1) if total_possible > 0 else 0.0
+    all_submitted = submitted == len(assignments)
+    due_passed = bool(last_due_date and datetime.utcnow() > last_due_date)
+    released = all_submitted or due_passed
+    return {
+        'course': {'id': course.id, 'course_code': course.course_code, 'course_name': course.course_name},
+        'assignments': {
+            'total_count': len(assignments), 'submitted_count': submitted,
+            'graded_count': sum(d['graded'] for d in details),
+            'earned_marks': round(assignment_earned, 2), 'total_marks': round(assignment_total, 2),
+            'last_due_date': _iso(last_due_date), 'details': details,
+        },
+        'quiz': {
+            'total_questions': len(mcqs), 'attempted_count': len(attempts), 'correct_count': len(correct),
+            'earned_marks': round(quiz_earned, 2), 'total_marks': round(quiz_total, 2),
+        },
+        'progress': {'earned_marks': round(total_earned, 2), 'total_marks': round(total_possible, 2), 'percentage': percentage},
+        'final': {
+            'released': released,
+            'reason': 'all_assignments_submitted' if all_submitted else ('past_last_assignment_due_date' if due_passed else 'not_completed'),
+            'percentage': percentage if released else None,
+        },
+    }
+
+
+def test_both_engines_match_the_source_tables(app):
+    seed(db.engine, log=lambda msg: None, **dict(TINY, courses_per_term=4, assignments_per_course=3))
+    # Changes made through the ORM after seeding go through the incremental summary updates
+    mcq = MCQ.query.order_by(MCQ.id).first()
+    mcq.marks = 0
+    for attempt in MCQAttempt.query.filter_by(mcq_id=mcq.id):
+        attempt.is_correct = True
+    evaluation = Evaluation.query.order_by(Evaluation.id).first()
+    evaluation.marks_obtained = 0
+    db.session.delete(Submission.query.filter(~Submission.evaluation.has()).order_by(Submission.id).first())
+    db.session.commit()
+
+    students = Student.query.order_by(Student.id).all()
+    compared = 0
+    for student in students:
+        courses = [e.course for e in StudentCourse.query.filter_by(student_id=student.id, status='active')]
+        expected = [_reference_result(student.id, c) for c in courses]
+        assert _compute_course_results(student.id, courses) == expected
+        assert [_compute_course_result(student.id, c.id) for c in courses] == expected
+        compared += len(courses)
+    assert compared == len(students) * 4
+
+
+def test_course_results_query_count_is_independent_of_course_count(app, client):
+    seed(db.engine, log=lambda msg: None, **dict(TINY, courses_per_term=6))
+    student_id = Student.query.order_by(Student.id).first().id
+
+    with count_queries() as stats:
+        response = client.get(f'/api/student/{student_id}/course-results')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['courses']) == 6
+    # cache lookup (course ids, versions), then student, enrollments + courses,
+    # totals, scores, assignments, submissions
+    assert stats.count <= 8
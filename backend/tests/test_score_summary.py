@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from models import (
+    db, Assignment, Course, CourseScoreTotal, Evaluation, MCQ, MCQAttempt, Student, StudentCourse,
+    StudentCourseScore, Submission,
+)
+from services.score_service import rebuild_scores
+
+
+def _setup():
+    courses = [Course(course_code=f'GER-{i}', course_name=f'German {i}') for i in range(2)]
+    students = [
+        Student(student_code=f'S{i}', username=f's{i}', email=f's{i}@test.com', password_hash='x', full_name=f'S{i}')
+        for i in range(2)
+    ]
+    db.session.add_all(courses + students)
+    db.session.flush()
+    db.session.add_all([
+        StudentCourse(student_id=s.id, course_id=c.id, status='active') for s in students for c in courses
+    ])
+    mcqs = [
+        MCQ(question_text=f'Q{i}', option_a='a', option_b='b', correct_answer='A', course_id=courses[0].id, marks=2)
+        for i in range(3)
+    ]
+    assignments = [
+        Assignment(title=f'A{i}', course_id=courses[0].id, max_marks=10,
+                   due_date=datetime.utcnow() + timedelta(days=i + 1))
+        for i in range(2)
+    ]
+    db.session.add_all(mcqs + assignments)
+    db.session.commit()
+    return courses, students, mcqs, assignments
+
+
+def _snapshot():
+    """Summary rows as plain tuples, comparable across a rebuild."""
+    scores = db.session.execute(select(StudentCourseScore).order_by('student_id', 'course_id')).scalars()
+    totals = db.session.execute(select(CourseScoreTotal).order_by('course_id')).scalars()
+    return (
+        [(s.student_id, s.course_id, s.submitted_count, s.graded_count, float(s.assignment_earned),
+          s.quiz_attempted_count, s.quiz_correct_count, float(s.quiz_earned)) for s in scores
+         if s.submitted_count or s.quiz_attempted_count],
+        [(t.course_id, t.assignment_count, float(t.assignment_total_marks), t.last_due_date,
+          t.mcq_count, float(t.quiz_total_marks)) for t in totals if t.assignment_count or t.mcq_count],
+    )
+
+
+def _assert_matches_rebuild():
+    incremental = _snapshot()
+    with db.engine.begin() as conn:
+        rebuild_scores(conn)
+    db.session.expire_all()
+    assert _snapshot() == incremental
+    return incremental
+
+
+def test_writes_update_summaries_incrementally(app):
+    courses, students, mcqs, assignments = _setup()
+    s0, s1 = students[0].id, students[1].id
+
+    db.session.add_all([
+        MCQAttempt(student_id=s0, mcq_id=mcqs[0].id, selected_answer='A', is_correct=True),
+        MCQAttempt(student_id=s0, mcq_id=mcqs[1].id, selected_answer='B', is_correct=False),
+        MCQAttempt(student_id=s1, mcq_id=mcqs[0].id, selected_answer='A', is_correct=True),
+    ])
+    submission = Submission(assignment_id=assignments[0].id, student_id=s0)
+    db.session.add(submission)
+    db.session.commit()
+
+    evaluation = Evaluation(submission_id=submission.id, marks_obtained=7)
+    db.session.add(evaluation)
+    db.session.commit()
+
+    score = db.session.get(StudentCourseScore, (s0, courses[0].id))
+    assert (score.quiz_attempted_count, score.quiz_correct_count, float(score.quiz_earned)) == (2, 1, 2.0)
+    assert (score.submitted_count, score.graded_count, float(score.assignment_earned)) == (1, 1, 7.0)
+    _assert_matches_rebuild()
+
+    # Re-marking adjusts by the difference
+    evaluation.marks_obtained = 9
+    db.session.commit()
+    assert float(db.session.get(StudentCourseScore, (s0, courses[0].id)).assignment_earned) == 9.0
+    _assert_matches_rebuild()
+
+
+def test_structural_changes_recompute_affected_courses(app):
+    courses, students, mcqs, assignments = _setup()
+    s0 = students[0].id
+    db.session.add(MCQAttempt(student_id=s0, mcq_id=mcqs[0].id, selected_answer='A', is_correct=True))
+    db.session.add(Submission(assignment_id=assignments[1].id, student_id=s0))
+    db.session.commit()
+
+    mcqs[0].marks = 5
+    db.session.commit()
+    assert float(db.session.get(StudentCourseScore, (s0, courses[0].id)).quiz_earned) == 5.0
+    assert float(db.session.get(CourseScoreTotal, courses[0].id).quiz_total_marks) == 9.0
+
+    # Moving an assignment moves its submission to the other course
+    assignments[1].course_id = courses[1].id
+    db.session.commit()
+    assert db.session.get(StudentCourseScore, (s0, courses[0].id)).submitted_count == 0
+    assert db.session.get(StudentCourseScore, (s0, courses[1].id)).submitted_count == 1
+    assert db.session.get(CourseScoreTotal, courses[1].id).assignment_count == 1
+
+    attempt = MCQAttempt.query.filter_by(student_id=s0).one()
+    db.session.delete(attempt)
+    db.session.commit()
+    assert db.session.get(StudentCourseScore, (s0, courses[0].id)).quiz_attempted_count == 0
+    _assert_matches_rebuild()
+
+
+def test_result_endpoint_reads_summaries(app, client):
+    courses, students, mcqs, assignments = _setup()
+    s0 = students[0].id
+    db.session.add(MCQAttempt(student_id=s0, mcq_id=mcqs[2].id, selected_answer='A', is_correct=True))
+    submission = Submission(assignment_id=assignments[0].id, student_id=s0)
+    db.session.add(submission)
+    db.session.flush()
+    db.session.add(Evaluation(submission_id=submission.id, marks_obtained=8))
+    db.session.commit()
+
+    data = client.get(f'/api/student/{s0}/courses/{courses[0].id}/result-breakdown').get_json()
+
+    assert data['assignments']['total_count'] == 2
+    assert data['assignments']['submitted_count'] == 1
+    assert data['assignments']['earned_marks'] == 8.0
+    assert data['assignments']['total_marks'] == 20.0
+    assert [d['graded'] for d in data['assignments']['details']] == [True, False]
+    assert data['quiz'] == {
+        'total_questions': 3, 'attempted_count': 1, 'correct_count': 1, 'earned_marks': 2.0, 'total_marks': 6.0,
+    }
+    assert data['progress']['percentage'] == round(10 / 26 * 100, 1)
+    assert data['final']['released'] is False
+
+
+def test_rebuild_command_repairs_out_of_band_writes(app, runner):
+    courses, students, mcqs, _ = _setup()
+    # Core inserts bypass the maintenance hook
+    with db.engine.begin() as conn:
+        conn.execute(MCQAttempt.__table__.insert(), [
+            {'student_id': students[1].id, 'mcq_id': m.id, 'selected_answer': 'A', 'is_correct': True} for m in mcqs
+        ])
+    assert db.session.get(StudentCourseScore, (students[1].id, courses[0].id)) is None
+
+    result = runner.invoke(args=['scores', 'rebuild'])
+
+    assert 'Rebuilt score summaries for 2 course(s).' in result.output
+    db.session.expire_all()
+    score = db.session.get(StudentCourseScore, (students[1].id, courses[0].id))
+    assert (score.quiz_correct_count, float(score.quiz_earned)) == (3, 6.0)
+
+
+def test_students_and_courses_with_activity_can_be_deleted(app, client):
+    courses, students, mcqs, assignments = _setup()
+    db.session.add_all([
+        MCQAttempt(student_id=students[0].id, mcq_id=mcqs[0].id, selected_answer='A', is_correct=True),
+        MCQAttempt(student_id=students[1].id, mcq_id=mcqs[1].id, selected_answer='B', is_correct=False),
+        Submission(student_id=students[0].id, assignment_id=assignments[0].id),
+    ])
+    # Enrolments cannot outlive their student or course (NOT NULL keys), with or without summaries
+    StudentCourse.query.delete()
+    db.session.commit()
+    student_id, course_id = students[0].id, courses[0].id
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+
+    try:
+        assert client.delete(f'/api/students/{student_id}').status_code == 200
+        assert not StudentCourseScore.query.filter_by(student_id=student_id).count()
+
+        assert client.delete(f'/api/courses/{course_id}').status_code == 200
+        assert not StudentCourseScore.query.filter_by(course_id=course_id).count()
+        assert db.session.get(CourseScoreTotal, course_id) is None
+    finally:
+        db.session.rollback()
+        db.session.execute(text('PRAGMA foreign_keys=OFF'))
+    _assert_matches_rebuild()
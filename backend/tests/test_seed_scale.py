@@ -0,0 +1,33 @@
+from benchmarks.bench_endpoints import ENDPOINTS, time_endpoint
+from benchmarks.seed_scale import sample_ids, seed
+from models import db, MCQAttempt, StudentCourse, Submission, Evaluation
+
+TINY = dict(students=40, programs=2, semesters=2, courses_per_term=2, staff=3,
+            materials_per_course=2, mcqs_per_course=6, assignments_per_course=2, notifications_per_student=2)
+
+
+def test_seed_builds_consistent_dataset(app):
+    counts = seed(db.engine, log=lambda msg: None, **TINY)
+
+    assert counts['student'] == 40
+    # Every student is enrolled in the courses of their program and semester
+    assert counts['student_course'] == 40 * 2
+    assert counts['mcq_attempt'] == MCQAttempt.query.count() > 0
+    assert Evaluation.query.count() <= Submission.query.count()
+    # Attempts only target questions of courses the student is enrolled in
+    stray = db.session.query(MCQAttempt).outerjoin(
+        StudentCourse,
+        (StudentCourse.student_id == MCQAttempt.student_id) & (StudentCourse.course_id == (MCQAttempt.mcq_id - 1) // 6 + 1),
+    ).filter(StudentCourse.id.is_(None)).count()
+    assert stray == 0
+
+
+def test_endpoint_benchmark_runs_against_seeded_data(app, client):
+    seed(db.engine, log=lambda msg: None, **TINY)
+    ids = sample_ids(db.engine)
+
+    result = time_endpoint(client, ENDPOINTS['course_quiz'].format(**ids), runs=2)
+
+    assert result['status'] == 200
+    assert result['queries'] > 0
+    assert result['p95_ms'] >= result['p50_ms']
@@ -0,0 +1,80 @@
+import smtplib
+import threading
+
+import pytest
+
+from benchmarks.smtp_sink import SMTPSink
+from services.smtp_pool import SMTPPool
+
+SENDER = 'lls@test.com'
+MESSAGE = 'Subject: Hello\r\n\r\nLine one\r\n.leading dot\r\n'
+
+
+def _pool(sink, **kwargs):
+    return SMTPPool(*sink.address, username='lls', password='secret', use_tls=False, **kwargs)
+
+
+@pytest.mark.parametrize('pipelining', [True, False])
+def test_messages_share_one_authenticated_session(pipelining):
+    with SMTPSink(pipelining=pipelining) as sink:
+        pool = _pool(sink)
+        for i in range(5):
+            assert pool.send(SENDER, [f's{i}@test.com'], MESSAGE) == {}
+        pool.close()
+
+    assert sink.connections == 1
+    assert sink.commands.count('AUTH') == 1
+    # RSET between messages, not before the first
+    assert sink.commands.count('RSET') == 4
+    assert [m[1] for m in sink.messages] == [[f's{i}@test.com'] for i in range(5)]
+    assert sink.messages[0][2] == 'Subject: Hello\r\n\r\nLine one\r\n.leading dot'
+
+
+def test_rejected_recipient_keeps_the_session():
+    with SMTPSink(reject={'gone@test.com'}) as sink:
+        pool = _pool(sink)
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.send(SENDER, ['gone@test.com'], MESSAGE)
+        assert pool.send(SENDER, ['gone@test.com', 'ok@test.com'], MESSAGE) == {'gone@test.com': (550, b'No such user')}
+        pool.send(SENDER, ['ok@test.com'], MESSAGE)
+
+    assert sink.connections == 1
+    assert [m[1] for m in sink.messages] == [['ok@test.com'], ['ok@test.com']]
+
+
+def test_reconnects_when_the_server_drops_an_idle_session():
+    with SMTPSink(drop_after=2) as sink:
+        pool = _pool(sink)
+        for i in range(5):
+            pool.send(SENDER, [f's{i}@test.com'], MESSAGE)
+
+    assert len(sink.messages) == 5
+    assert sink.connections == 3
+
+
+def test_sessions_are_replaced_after_max_messages_or_idle():
+    with SMTPSink() as sink:
+        pool = _pool(sink, max_messages=2)
+        for i in range(5):
+            pool.send(SENDER, ['s@test.com'], MESSAGE)
+        assert sink.connections == 3
+
+        idle = _pool(sink, idle_timeout=0)
+        idle.send(SENDER, ['s@test.com'], MESSAGE)
+        idle.send(SENDER, ['s@test.com'], MESSAGE)
+        assert sink.connections == 5
+
+
+def test_concurrent_sessions_are_capped():
+    with SMTPSink(latency=0.005) as sink:
+        pool = _pool(sink, max_sessions=2)
+        threads = [threading.Thread(target=lambda: [pool.send(SENDER, ['s@test.com'], MESSAGE) for _ in range(3)])
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.close()
+
+    assert len(sink.messages) == 18
+    assert sink.max_open_connections <= 2
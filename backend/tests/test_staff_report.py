@@ -0,0 +1,93 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import openpyxl
+
+from benchmarks.seed_scale import sample_ids, seed
+from models import (
+    db, Assignment, Course, Evaluation, MCQ, MCQAttempt, Staff, StaffCourse, Student, StudentCourse, Submission,
+)
+from query_stats import count_queries
+from tests.test_seed_scale import TINY
+
+
+def _setup():
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='Teacher')
+    course = Course(course_code='GER-A1', course_name='German A1')
+    students = [
+        Student(student_code=f'S{i}', username=f's{i}', email=f's{i}@test.com', password_hash='x', full_name=f'S{i}')
+        for i in range(2)
+    ]
+    db.session.add_all([staff, course] + students)
+    db.session.flush()
+    db.session.add(StaffCourse(staff_id=staff.id, course_id=course.id))
+    db.session.add_all([StudentCourse(student_id=s.id, course_id=course.id, status='active') for s in students])
+    past, future = datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(days=1)
+    assignments = [
+        Assignment(title='Past', course_id=course.id, max_marks=10, due_date=past),
+        Assignment(title='Future', course_id=course.id, max_marks=10, due_date=future),
+    ]
+    mcqs = [MCQ(question_text=f'Q{i}', option_a='a', option_b='b', correct_answer='A', course_id=course.id, marks=5)
+            for i in range(2)]
+    db.session.add_all(assignments + mcqs)
+    db.session.flush()
+
+    submission = Submission(assignment_id=assignments[0].id, student_id=students[0].id)
+    db.session.add(submission)
+    db.session.flush()
+    db.session.add(Evaluation(submission_id=submission.id, marks_obtained=8))
+    db.session.add(MCQAttempt(student_id=students[0].id, mcq_id=mcqs[0].id, selected_answer='A', is_correct=True))
+    db.session.commit()
+    return staff.id, course.id, [s.id for s in students]
+
+
+def test_staff_report_aggregates_per_enrollment(app, client):
+    staff_id, course_id, student_ids = _setup()
+
+    data = client.get(f'/api/reports/staff/{staff_id}').get_json()
+
+    assert [r['student_id'] for r in data] == student_ids
+    first, second = data
+    assert first['percent_completed'] == 50.0
+    assert first['missed_deadlines'] == 0
+    assert first['marks_obtained'] == 13.0
+    assert first['max_marks'] == 30.0
+    assert first['percent_marks'] == round(13 / 30 * 100, 1)
+    assert (second['percent_completed'], second['missed_deadlines'], second['percent_marks']) == (0, 1, 0)
+    assert client.get(f'/api/reports/staff/{staff_id}?course_id={course_id + 1}').get_json() == []
+
+
+def test_staff_report_query_count(app, client):
+    seed(db.engine, log=lambda msg: None, **TINY)
+    staff_id = sample_ids(db.engine)['staff_id']
+
+    with count_queries() as stats:
+        data = client.get(f'/api/reports/staff/{staff_id}').get_json()
+    assert len(data) > 0
+    # course ids, cache versions, the report itself, next due date
+    assert stats.count == 4
+
+    with count_queries() as stats:
+        assert client.get(f'/api/reports/staff/{staff_id}').get_json() == data
+    assert stats.count == 2
+
+
+def test_export_streams_csv_and_xlsx(app, client):
+    staff_id, _, _ = _setup()
+    rows = client.get(f'/api/reports/staff/{staff_id}').get_json()
+
+    response = client.get(f'/api/reports/staff/{staff_id}/export')
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    exported = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [r['Student Code'] for r in exported] == [r['student_code'] for r in rows]
+    assert exported[1]['Missed Deadlines'] == '1'
+
+    response = client.get(f'/api/reports/staff/{staff_id}/export?format=xlsx')
+    sheet = openpyxl.load_workbook(io.BytesIO(response.get_data())).active
+    values = list(sheet.values)
+    assert values[0][0] == 'Student Code'
+    assert [v[0] for v in values[1:]] == [r['student_code'] for r in rows]
+
+    assert client.get(f'/api/reports/staff/{staff_id}/export?format=pdf').status_code == 400
@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+
+from models import db, AcademicYear, Assignment, Course, Staff, StaffCourse, Student, StudentCourse, StudyMaterial
+
+
+def _student():
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S1')
+    staff = Staff(staff_code='T1', username='t1', email='t1@test.com', password_hash='x', full_name='T1')
+    db.session.add_all([student, staff])
+    db.session.flush()
+    return student, staff
+
+
+def _enroll_courses(student, staff, count, offset=0):
+    for i in range(offset, offset + count):
+        course = Course(course_code=f'C{i}', course_name=f'Course {i}')
+        db.session.add(course)
+        db.session.flush()
+        allocation = StaffCourse(staff_id=staff.id, course_id=course.id)
+        db.session.add_all([allocation, StudentCourse(student_id=student.id, course_id=course.id, status='active')])
+        db.session.flush()
+        db.session.add_all([StudyMaterial(title=f'M{i}', staff_course_id=allocation.id),
+                            Assignment(title=f'A{i}', course_id=course.id)])
+    db.session.commit()
+
+
+def test_primary_allocation_is_the_latest_academic_year(app, client):
+    student, staff = _student()
+    other = Staff(staff_code='T2', username='t2', email='t2@test.com', password_hash='x', full_name='T2')
+    years = [AcademicYear(year_name=f'{y}-{y + 1}', start_date=date(y, 9, 1), end_date=date(y + 1, 8, 31))
+             for y in (2025, 2024)]
+    course = Course(course_code='C', course_name='Course')
+    db.session.add_all(years + [other, course])
+    db.session.flush()
+    old = StaffCourse(staff_id=staff.id, course_id=course.id, academic_year_id=years[1].id)
+    current = StaffCourse(staff_id=other.id, course_id=course.id, academic_year_id=years[0].id)
+    unscheduled = StaffCourse(staff_id=staff.id, course_id=course.id)
+    db.session.add_all([old, current, unscheduled, StudentCourse(student_id=student.id, course_id=course.id)])
+    db.session.flush()
+    db.session.add_all([StudyMaterial(title='Old', staff_course_id=old.id),
+                        StudyMaterial(title='Current', staff_course_id=current.id),
+                        StudyMaterial(title='Current 2', staff_course_id=current.id)])
+    db.session.commit()
+
+    card, = client.get(f'/api/student/{student.id}/courses').get_json()
+
+    assert card['staff_course_id'] == current.id
+    assert card['materials_count'] == 2
+
+
+@pytest.mark.query_budget(1)
+def test_course_list_is_one_statement_regardless_of_enrollments(app, client):
+    student, staff = _student()
+    _enroll_courses(student, staff, 1)
+    assert len(client.get(f'/api/student/{student.id}/courses').get_json()) == 1
+
+    _enroll_courses(student, staff, 12, offset=1)
+    cards = client.get(f'/api/student/{student.id}/courses').get_json()
+    assert [c['course_code'] for c in cards] == [f'C{i}' for i in range(13)]
+    assert all(c['materials_count'] == 1 and c['assignments_count'] == 1 for c in cards)
+
+
+def test_course_list_missing_student(app, client):
+    assert client.get('/api/student/999/courses').status_code == 404
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from models import db, Assignment, Course, Program, Semester, Student, StudentCourse, Submission
+from query_stats import count_queries
+
+
+def _setup():
+    program = Program(program_name='German', program_code='GER')
+    semester = Semester(semester_name='Sem 1', semester_number=1)
+    db.session.add_all([program, semester])
+    db.session.flush()
+    student = Student(student_code='S1', username='s1', email='s1@test.com', password_hash='x', full_name='S1',
+                      program_id=program.id, semester_id=semester.id)
+    courses = [Course(course_code=f'C{i}', course_name=f'Course {i}') for i in range(3)]
+    db.session.add_all([student] + courses)
+    db.session.flush()
+    # Not enrolled in the last course
+    db.session.add_all([StudentCourse(student_id=student.id, course_id=c.id, status='active') for c in courses[:2]])
+    now = datetime.utcnow()
+    assignments = [
+        Assignment(title=f'A{i}', course_id=courses[i % 3].id, due_date=now + timedelta(days=8 - i))
+        for i in range(8)
+    ] + [
+        Assignment(title='Overdue', course_id=courses[0].id, due_date=now - timedelta(days=1)),
+        Assignment(title='Undated', course_id=courses[1].id),
+    ]
+    db.session.add_all(assignments)
+    db.session.flush()
+    # A1 is submitted
+    db.session.add(Submission(assignment_id=assignments[1].id, student_id=student.id))
+    db.session.commit()
+    return student.id, assignments
+
+
+def test_dashboard_filters_and_limits_in_sql(app, client):
+    student_id, _ = _setup()
+
+    with count_queries() as stats:
+        data = client.get(f'/api/student/{student_id}/dashboard').get_json()
+
+    # scope course ids, cache versions, student + counts, upcoming
+    assert stats.count == 4
+    assert data['student']['program'] == 'German'
+    # A0..A7 round-robin over three courses; enrolled in two: A0 A1 A3 A4 A6 A7 + Overdue + Undated
+    assert data['stats'] == {
+        'enrolled_courses': 2, 'pending_assignments': 5, 'completed_assignments': 1, 'total_assignments': 8,
+    }
+    # Ordered by due date (A7 is due first); A1 is submitted
+    assert [a['title'] for a in data['upcoming_assignments']] == ['A7', 'A6', 'A4', 'A3', 'A0']
+    assert data['upcoming_assignments'][0]['course_name'] == 'Course 1'
+
+
+def test_unchanged_dashboard_returns_304(app, client):
+    student_id, assignments = _setup()
+    url = f'/api/student/{student_id}/dashboard'
+    first = client.get(url)
+    etag = first.headers['ETag']
+
+    with count_queries() as stats:
+        response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert stats.count == 2
+
+    # A submission changes the dashboard, so the old ETag no longer matches
+    db.session.add(Submission(assignment_id=assignments[7].id, student_id=student_id))
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['stats']['pending_assignments'] == 4
+
+
+def test_dashboard_missing_student(app, client):
+    assert client.get('/api/student/999/dashboard').status_code == 404
@@ -0,0 +1,16 @@
+import React from 'react';
+import Button from './Button';
+
+// "Load more" control under a paged list; renders nothing once the last page is loaded
+const LoadMore = ({ hasMore, loading, onClick }) => {
+    if (!hasMore) return null;
+    return (
+        <div className="table-load-more">
+            <Button variant="secondary" onClick={onClick} disabled={loading}>
+                {loading ? 'Loading...' : 'Load more'}
+            </Button>
+        </div>
+    );
+};
+
+export default LoadMore;
@@ -24,10 +24,13 @@ const Dashboard = () => {
                     staffApi.getAll()
                 ]);
 
+                // Student and staff lists are capped (see apiRequestAll); past the cap the count reads "1,000+"
                 setStats({
                     students: studentsRes.length || 0,
                     courses: coursesRes.length || 0,
-                    staff: staffRes.length || 0
+                    staff: staffRes.length || 0,
+                    studentsTruncated: studentsRes.truncated,
+                    staffTruncated: staffRes.truncated
                 });
             } catch (error) {
                 console.error('Error fetching dashboard stats:', error);
@@ -57,7 +60,7 @@ const Dashboard = () => {
             <div className="stats-grid">
                 <StatCard
                     title="Total Students"
-                    value={stats.students.toLocaleString()}
+                    value={`${stats.students.toLocaleString()}${stats.studentsTruncated ? '+' : ''}`}
                     icon={<UserCircle size={24} />}
                 />
                 <StatCard
@@ -67,7 +70,7 @@ const Dashboard = () => {
                 />
                 <StatCard
                     title="Active Staff"
-                    value={stats.staff.toLocaleString()}
+                    value={`${stats.staff.toLocaleString()}${stats.staffTruncated ? '+' : ''}`}
                     icon={<Users size={24} />}
                 />
             </div>
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Button from '../../../components/Button';
+import LoadMore from '../../../components/LoadMore';
 import { staffApi } from '../../../services/api';
 import '../../../styles/Table.css';
 
@@ -8,6 +9,8 @@ const StaffList = () => {
     const navigate = useNavigate();
     const [staffMembers, setStaffMembers] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         loadData();
@@ -15,8 +18,9 @@ const StaffList = () => {
 
     const loadData = async () => {
         try {
-            const data = await staffApi.getAll();
-            setStaffMembers(data);
+            const { items, nextCursor: cursor } = await staffApi.getPage();
+            setStaffMembers(items);
+            setNextCursor(cursor);
         } catch (error) {
             console.error('Error loading staff:', error);
         } finally {
@@ -24,6 +28,19 @@ const StaffList = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await staffApi.getPage(nextCursor);
+            setStaffMembers(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading staff:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDelete = async (id) => {
         if (confirm('Are you sure?')) {
             try {
@@ -73,6 +90,7 @@ const StaffList = () => {
                     ))}
                 </tbody>
             </table>
+            <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
         </div>
     );
 };
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Button from '../../../components/Button';
 import ConfirmDialog from '../../../components/ConfirmDialog';
+import LoadMore from '../../../components/LoadMore';
 import { studentApi } from '../../../services/api';
 import '../../../styles/Table.css';
 
@@ -9,6 +10,8 @@ const StudentList = () => {
     const navigate = useNavigate();
     const [students, setStudents] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [showConfirm, setShowConfirm] = useState(false);
     const [deleteId, setDeleteId] = useState(null);
 
@@ -18,8 +21,9 @@ const StudentList = () => {
 
     const loadData = async () => {
         try {
-            const data = await studentApi.getAll();
-            setStudents(data);
+            const { items, nextCursor: cursor } = await studentApi.getPage();
+            setStudents(items);
+            setNextCursor(cursor);
         } catch (error) {
             console.error('Error loading students:', error);
         } finally {
@@ -27,6 +31,19 @@ const StudentList = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await studentApi.getPage(nextCursor);
+            setStudents(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading students:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDeleteClick = (id) => {
         setDeleteId(id);
         setShowConfirm(true);
@@ -93,6 +110,7 @@ const StudentList = () => {
                     ))}
                 </tbody>
             </table>
+            <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
 
             <ConfirmDialog
                 isOpen={showConfirm}
@@ -2,8 +2,10 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { communicationApi } from '../../services/api';
 import Button from '../../components/Button';
+import LoadMore from '../../components/LoadMore';
 import { useAuth } from '../../context/AuthContext';
 import { Mail, Send, Trash2, Eye, Inbox as InboxIcon } from 'lucide-react';
+import '../../styles/Table.css';
 
 const Inbox = () => {
     const navigate = useNavigate();
@@ -11,6 +13,8 @@ const Inbox = () => {
     const [activeTab, setActiveTab] = useState('inbox'); // 'inbox' or 'sent'
     const [messages, setMessages] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const userType = user?.role || 'student';
     const userId = user?.id || 1;
@@ -19,16 +23,16 @@ const Inbox = () => {
         loadMessages();
     }, [activeTab]);
 
+    const fetchPage = (cursor) => activeTab === 'inbox'
+        ? communicationApi.getInboxPage(userType, userId, cursor)
+        : communicationApi.getSentPage(userType, userId, cursor);
+
     const loadMessages = async () => {
         setLoading(true);
         try {
-            let data;
-            if (activeTab === 'inbox') {
-                data = await communicationApi.getInbox(userType, userId);
-            } else {
-                data = await communicationApi.getSent(userType, userId);
-            }
-            setMessages(data);
+            const { items, nextCursor: cursor } = await fetchPage();
+            setMessages(items);
+            setNextCursor(cursor);
         } catch (error) {
             console.error('Error loading messages:', error);
         } finally {
@@ -36,6 +40,19 @@ const Inbox = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await fetchPage(nextCursor);
+            setMessages(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading messages:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDelete = async (e, id) => {
         e.stopPropagation();
         if (window.confirm('Are you sure you want to delete this message?')) {
@@ -195,6 +212,7 @@ const Inbox = () => {
                             </div>
                         </div>
                     ))}
+                    <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
                 </div>
             )}
         </div>
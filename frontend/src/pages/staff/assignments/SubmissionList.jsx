@@ -1,7 +1,8 @@
 import { API_ORIGIN } from '../../../services/api';
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import Button from '../../../components/Button';
+import LoadMore from '../../../components/LoadMore';
 import { submissionApi, assignmentApi, staffCourseApi, courseApi } from '../../../services/api';
 import '../../../styles/Table.css';
 
@@ -14,6 +15,10 @@ const SubmissionList = () => {
     const [evaluating, setEvaluating] = useState(null); // id of submission being evaluated
     const [saving, setSaving] = useState(false); // prevent multiple submissions
     const [gradeForm, setGradeForm] = useState({ marks: '', feedback: '' });
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    // Fetches one page of the submissions currently shown: (cursor) => { items, nextCursor }
+    const fetchPage = useRef(null);
 
     const [courses, setCourses] = useState([]);
     const [selectedCourseId, setSelectedCourseId] = useState('');
@@ -76,16 +81,17 @@ const SubmissionList = () => {
             }
 
             if (currentScope === 'assignment' && assignmentId) {
-                const submissionData = await submissionApi.getAll(assignmentId);
-                setSubmissions(submissionData);
+                fetchPage.current = (cursor) => submissionApi.getPage(assignmentId, cursor);
             } else {
                 // Course scope or All (if course selected or not)
                 const courseId = Number(selectedCourseId || assignmentCourseId || 0); // 0 means all
-                const submissionData = courseId
-                    ? await submissionApi.getForStaffCourse(staffId, courseId)
-                    : await submissionApi.getForStaff(staffId);
-                setSubmissions(submissionData);
+                fetchPage.current = courseId
+                    ? (cursor) => submissionApi.getForStaffCoursePage(staffId, courseId, cursor)
+                    : (cursor) => submissionApi.getForStaffPage(staffId, cursor);
             }
+            const { items, nextCursor: cursor } = await fetchPage.current();
+            setSubmissions(items);
+            setNextCursor(cursor);
         } catch (error) {
             console.error('Error loading submissions:', error);
         } finally {
@@ -93,6 +99,19 @@ const SubmissionList = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await fetchPage.current(nextCursor);
+            setSubmissions(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading submissions:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     // Reload submissions when scope/course changes
     useEffect(() => {
         if (!assignmentId) return;
@@ -151,7 +170,7 @@ const SubmissionList = () => {
                 )}
                 <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
                     <h2>{assignment ? `Submissions: ${assignment.title}` : 'All Submissions'}</h2>
-                    <span style={{ fontSize: '1.2rem', fontWeight: 600 }}>Total: {displayedSubmissions.length}</span>
+                    <span style={{ fontSize: '1.2rem', fontWeight: 600 }}>Total: {displayedSubmissions.length}{nextCursor ? '+' : ''}</span>
                 </div>
 
                 <div style={{ display: 'flex', gap: '12px', marginTop: '12px', flexWrap: 'wrap' }}>
@@ -292,6 +311,7 @@ const SubmissionList = () => {
                     ))}
                 </tbody>
             </table>
+            <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
         </div>
     );
 };
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Button from '../../../components/Button';
 import ConfirmDialog from '../../../components/ConfirmDialog';
+import LoadMore from '../../../components/LoadMore';
 import { studyMaterialApi, courseApi, staffCourseApi } from '../../../services/api';
 import { useAuth } from '../../../context/AuthContext';
 import '../../../styles/Table.css';
@@ -15,6 +16,8 @@ const MaterialList = () => {
     const [staffCourses, setStaffCourses] = useState([]);
     const [expandedIds, setExpandedIds] = useState(new Set());
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [showConfirm, setShowConfirm] = useState(false);
     const [deleteId, setDeleteId] = useState(null);
 
@@ -26,14 +29,14 @@ const MaterialList = () => {
 
     const loadData = async () => {
         try {
-            const [materialData, courseData, scData] = await Promise.all([
-                studyMaterialApi.getByStaff(staffId),
+            // Parent materials (those without parent_id) one page at a time, each with its children
+            const [materialPage, courseData, scData] = await Promise.all([
+                studyMaterialApi.getParentPageByStaff(staffId),
                 courseApi.getAll(),
                 staffCourseApi.getByStaff(staffId)
             ]);
-            // Filter to only show parent materials (those without parent_id)
-            const parentMaterials = materialData.filter(m => !m.parent_id);
-            setMaterials(parentMaterials);
+            setMaterials(materialPage.items);
+            setNextCursor(materialPage.nextCursor);
             setCourses(courseData);
             setStaffCourses(scData);
         } catch (error) {
@@ -43,6 +46,19 @@ const MaterialList = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await studyMaterialApi.getParentPageByStaff(staffId, nextCursor);
+            setMaterials(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading materials:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const getCourseName = (staffCourseId) => {
         const sc = staffCourses.find(s => s.id === staffCourseId);
         if (sc) {
@@ -197,6 +213,7 @@ const MaterialList = () => {
                     ))}
                 </tbody>
             </table>
+            <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
 
             <ConfirmDialog
                 isOpen={showConfirm}
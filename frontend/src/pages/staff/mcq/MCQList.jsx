@@ -1,8 +1,10 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../../context/AuthContext';
+import LoadMore from '../../../components/LoadMore';
 import { mcqApi, courseApi, staffCourseApi } from '../../../services/api';
 import '../../../styles/MCQList.css';
+import '../../../styles/Table.css';
 
 const MCQList = () => {
     const navigate = useNavigate();
@@ -14,6 +16,8 @@ const MCQList = () => {
     const [studyMaterials, setStudyMaterials] = useState([]);
     const [selectedMaterial, setSelectedMaterial] = useState('');
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         if (staffId) {
@@ -62,15 +66,19 @@ const MCQList = () => {
         }
     };
 
+    const currentFilters = () => {
+        const filters = { staff_id: staffId };
+        if (selectedCourse) filters.course_id = selectedCourse;
+        if (selectedMaterial) filters.study_material_id = selectedMaterial;
+        return filters;
+    };
+
     const loadMCQs = async () => {
         setLoading(true);
         try {
-            const filters = { staff_id: staffId };
-            if (selectedCourse) filters.course_id = selectedCourse;
-            if (selectedMaterial) filters.study_material_id = selectedMaterial;
-
-            const data = await mcqApi.getAll(filters);
-            setMcqs(data);
+            const { items, nextCursor: cursor } = await mcqApi.getPage(currentFilters());
+            setMcqs(items);
+            setNextCursor(cursor);
         } catch (error) {
             console.error('Error loading MCQs:', error);
         } finally {
@@ -78,6 +86,19 @@ const MCQList = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const { items, nextCursor: cursor } = await mcqApi.getPage(currentFilters(), nextCursor);
+            setMcqs(prev => [...prev, ...items]);
+            setNextCursor(cursor);
+        } catch (error) {
+            console.error('Error loading MCQs:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDelete = async (id) => {
         if (!window.confirm('Are you sure you want to delete this question?')) return;
         try {
@@ -95,7 +116,7 @@ const MCQList = () => {
             <header className="mcq-list-header">
                 <div>
                     <h1 className="mcq-list-title">Quiz Questions</h1>
-                    <p className="mcq-list-subtitle">{mcqs.length} questions created</p>
+                    <p className="mcq-list-subtitle">{mcqs.length}{nextCursor ? '+' : ''} questions created</p>
                 </div>
                 <div className="mcq-list-actions">
                     <button onClick={() => navigate('/staff/mcqs/new')} className="mcq-list-add-btn">
@@ -186,6 +207,7 @@ const MCQList = () => {
                             </div>
                         </div>
                     ))}
+                    <LoadMore hasMore={Boolean(nextCursor)} loading={loadingMore} onClick={loadMore} />
                 </div>
             )}
         </div>
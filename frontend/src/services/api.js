@@ -29,6 +29,36 @@ async function apiRequest(endpoint, options = {}) {
     return response.json();
 }
 
+// List endpoints return one page at a time: { items, nextCursor }, nextCursor null on the last page
+async function apiRequestPage(endpoint, cursor = null) {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    const response = await fetch(`${API_BASE}${endpoint}${cursor ? `${separator}cursor=${encodeURIComponent(cursor)}` : ''}`, {
+        headers: { 'Content-Type': 'application/json' },
+    });
+    if (!response.ok) {
+        throw new Error(`API error: ${response.status}`);
+    }
+    return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
+// Pages followed by apiRequestAll before it gives up (100 rows per page)
+const MAX_PAGES = 10;
+
+// Collects up to MAX_PAGES pages, for pickers and counts; list screens page with getPage instead.
+// The result has truncated = true when rows were left unfetched.
+async function apiRequestAll(endpoint) {
+    const items = [];
+    let cursor = null;
+    for (let page = 0; page < MAX_PAGES; page++) {
+        const result = await apiRequestPage(endpoint, cursor);
+        items.push(...result.items);
+        cursor = result.nextCursor;
+        if (!cursor) break;
+    }
+    items.truncated = Boolean(cursor);
+    return items;
+}
+
 // Academic Years
 export const academicYearApi = {
     getAll: () => apiRequest('/academic-years'),
@@ -59,14 +89,16 @@ export const courseApi = {
 
 // Staff
 export const staffApi = {
-    getAll: () => apiRequest('/staff'),
+    getAll: () => apiRequestAll('/staff'),
+    getPage: (cursor) => apiRequestPage('/staff', cursor),
     create: (data) => apiRequest('/staff', { method: 'POST', body: JSON.stringify(data) }),
     delete: (id) => apiRequest(`/staff/${id}`, { method: 'DELETE' }),
 };
 
 // Students
 export const studentApi = {
-    getAll: () => apiRequest('/students'),
+    getAll: () => apiRequestAll('/students'),
+    getPage: (cursor) => apiRequestPage('/students', cursor),
     create: (data) => apiRequest('/students', { method: 'POST', body: JSON.stringify(data) }),
     delete: (id) => apiRequest(`/students/${id}`, { method: 'DELETE' }),
 };
@@ -81,9 +113,12 @@ export const staffCourseApi = {
 
 // Study Materials (Videos)
 export const studyMaterialApi = {
-    getAll: () => apiRequest('/study-materials'),
-    getByStaff: (staffId) => apiRequest(`/study-materials?staff_id=${staffId}`),
+    getAll: () => apiRequestAll('/study-materials'),
+    getByStaff: (staffId) => apiRequestAll(`/study-materials?staff_id=${staffId}`),
+    getParentPageByStaff: (staffId, cursor) => apiRequestPage(`/study-materials?staff_id=${staffId}&parent_only=true`, cursor),
     getOne: (id) => apiRequest(`/study-materials/${id}`),
+    getSubtree: (id, maxDepth) => apiRequest(`/study-materials/${id}/subtree${maxDepth != null ? `?max_depth=${maxDepth}` : ''}`),
+    getBreadcrumbs: (id) => apiRequest(`/study-materials/${id}/breadcrumbs`),
     getByCourse: (courseId) => apiRequest(`/courses/${courseId}/materials`),
     create: (data) => apiRequest('/study-materials', { method: 'POST', body: JSON.stringify(data) }),
     addToCourse: (courseId, data) => {
@@ -100,6 +135,7 @@ export const studyMaterialApi = {
             body: isFormData ? data : JSON.stringify(data)
         });
     },
+    update: (id, data) => apiRequest(`/study-materials/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
     delete: (id) => apiRequest(`/study-materials/${id}`, { method: 'DELETE' }),
 };
 
@@ -118,11 +154,12 @@ export const assignmentApi = {
 
 // Submissions
 export const submissionApi = {
-    getAll: (assignmentId) => apiRequest(`/submissions?assignment_id=${assignmentId}`),
-    getByStudent: (studentId) => apiRequest(`/submissions?student_id=${studentId}`),
+    getByStudent: (studentId) => apiRequestAll(`/submissions?student_id=${studentId}`),
     getByAssignmentAndStudent: (assignmentId, studentId) => apiRequest(`/submissions?assignment_id=${assignmentId}&student_id=${studentId}`).then(data => data?.[0] || null),
-    getForStaff: (staffId) => apiRequest(`/submissions?staff_id=${staffId}`),
-    getForStaffCourse: (staffId, courseId) => apiRequest(`/submissions?staff_id=${staffId}&course_id=${courseId}`),
+    getForStaff: (staffId) => apiRequestAll(`/submissions?staff_id=${staffId}`),
+    getPage: (assignmentId, cursor) => apiRequestPage(`/submissions?assignment_id=${assignmentId}`, cursor),
+    getForStaffPage: (staffId, cursor) => apiRequestPage(`/submissions?staff_id=${staffId}`, cursor),
+    getForStaffCoursePage: (staffId, courseId, cursor) => apiRequestPage(`/submissions?staff_id=${staffId}&course_id=${courseId}`, cursor),
     create: (formData) => apiRequest('/submissions', { method: 'POST', body: formData }),
     evaluate: (id, data) => apiRequest(`/submissions/${id}/evaluate`, { method: 'POST', body: JSON.stringify(data) }),
     getPendingCount: (staffId) => apiRequest(`/submissions/pending-count/${staffId}`),
@@ -140,9 +177,9 @@ export const studentDashboardApi = {
 
 // MCQ / Quiz API
 export const mcqApi = {
-    getAll: (filters = {}) => {
+    getPage: (filters = {}, cursor = null) => {
         const params = new URLSearchParams(filters).toString();
-        return apiRequest(`/mcqs${params ? '?' + params : ''}`);
+        return apiRequestPage(`/mcqs${params ? '?' + params : ''}`, cursor);
     },
     getOne: (id) => apiRequest(`/mcqs/${id}`),
     create: (data) => apiRequest('/mcqs', { method: 'POST', body: JSON.stringify(data) }),
@@ -151,6 +188,8 @@ export const mcqApi = {
     getCourseQuiz: (courseId, studentId) => apiRequest(`/courses/${courseId}/quiz?student_id=${studentId}`),
     getMaterialQuiz: (materialId, studentId) => apiRequest(`/materials/${materialId}/quiz?student_id=${studentId}`),
     submitAnswer: (mcqId, data) => apiRequest(`/mcqs/${mcqId}/attempt`, { method: 'POST', body: JSON.stringify(data) }),
+    submitCourseAnswerSheet: (courseId, data) => apiRequest(`/courses/${courseId}/quiz/submit`, { method: 'POST', body: JSON.stringify(data) }),
+    submitMaterialAnswerSheet: (materialId, data) => apiRequest(`/materials/${materialId}/quiz/submit`, { method: 'POST', body: JSON.stringify(data) }),
     getStudentResults: (studentId) => apiRequest(`/student/${studentId}/quiz-results`),
 };
 
@@ -201,10 +240,10 @@ export const notificationApi = {
 
 // Communication/Messages API
 export const communicationApi = {
-    getInbox: (userType, userId) =>
-        apiRequest(`/communications/inbox/${userType}/${userId}`),
-    getSent: (userType, userId) =>
-        apiRequest(`/communications/sent/${userType}/${userId}`),
+    getInboxPage: (userType, userId, cursor) =>
+        apiRequestPage(`/communications/inbox/${userType}/${userId}`, cursor),
+    getSentPage: (userType, userId, cursor) =>
+        apiRequestPage(`/communications/sent/${userType}/${userId}`, cursor),
     getOne: (id) =>
         apiRequest(`/communications/${id}`),
     send: (data) =>
@@ -222,6 +261,11 @@ export const reportApi = {
     getStaffReports: (staffId, filters = {}) => {
         const params = new URLSearchParams(filters).toString();
         return apiRequest(`/reports/staff/${staffId}${params ? '?' + params : ''}`);
+    },
+    // Download link for the CSV/XLSX export (streamed by the backend)
+    getStaffReportExportUrl: (staffId, format = 'csv', filters = {}) => {
+        const params = new URLSearchParams({ ...filters, format }).toString();
+        return `${API_BASE}/reports/staff/${staffId}/export?${params}`;
     }
 };
 